@@ -66,6 +66,8 @@ class Settings(BaseSettings):
     database_name: str = Field("trading_db", env="DATABASE_NAME")
     database_user: str = Field("trading_user", env="DATABASE_USER")
     database_password: Optional[str] = Field(None, env="DATABASE_PASSWORD")
+    # Write fetched daily bars through to stock_prices, and read them back when upstream has none
+    database_bars_enabled: bool = Field(False, env="DATABASE_BARS_ENABLED")
     
     # Redis Configuration
     redis_url: str = Field("redis://localhost:6379/0", env="REDIS_URL")
@@ -78,9 +80,31 @@ class Settings(BaseSettings):
     default_position_size: float = Field(0.1, env="DEFAULT_POSITION_SIZE")
     risk_free_rate: float = Field(0.045, env="RISK_FREE_RATE")
     
-    # Market Data Configuration
+    # Market Data Configuration (warm-up of hot symbols runs every interval, in batches)
     update_interval_minutes: int = Field(15, env="UPDATE_INTERVAL_MINUTES")
     max_symbols_per_batch: int = Field(10, env="MAX_SYMBOLS_PER_BATCH")
+    warmup_enabled: bool = Field(True, env="WARMUP_ENABLED")
+    warmup_lead_minutes: int = Field(30, env="WARMUP_LEAD_MINUTES")
+
+    # Local Bar Store (Parquet)
+    bar_store_enabled: bool = Field(True, env="BAR_STORE_ENABLED")
+    bar_store_path: str = Field("data/bars", env="BAR_STORE_PATH")
+    bar_store_refresh_seconds: int = Field(300, env="BAR_STORE_REFRESH_SECONDS")
+    market_data_max_workers: int = Field(8, env="MARKET_DATA_MAX_WORKERS")
+    symbol_master_refresh_hours: int = Field(24, env="SYMBOL_MASTER_REFRESH_HOURS")
+    
+    # Upstream API rate limits ("memory" = per process, "redis" = shared via REDIS_URL)
+    rate_limit_store: str = Field("memory", env="RATE_LIMIT_STORE")
+    alpha_vantage_requests_per_minute: int = Field(5, env="ALPHA_VANTAGE_REQUESTS_PER_MINUTE")
+    
+    # Response caches (expired entries within the grace window are served while refreshing)
+    cache_ttl_seconds: int = Field(300, env="CACHE_TTL_SECONDS")
+    cache_stale_grace_seconds: int = Field(900, env="CACHE_STALE_GRACE_SECONDS")
+    
+    # Upstream transport ("live", "record" to capture responses, "replay" to serve them offline)
+    http_transport_mode: str = Field("live", env="HTTP_TRANSPORT_MODE")
+    http_cassette_dir: str = Field("data/cassettes", env="HTTP_CASSETTE_DIR")
+    http_replay_latency_ms: float = Field(0, env="HTTP_REPLAY_LATENCY_MS")
     
     # TradingView Configuration
     tradingview_username: Optional[str] = Field(None, env="TRADINGVIEW_USERNAME")
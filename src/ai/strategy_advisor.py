@@ -13,6 +13,7 @@ from dataclasses import dataclass, asdict
 import openai
 from openai import OpenAI
 from config.settings import settings
+from src.data_fetcher.transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +53,7 @@ class StrategyAdvisor:
             self.client = None
         else:
             try:
-                self.client = OpenAI(api_key=self.api_key)
+                self.client = OpenAI(api_key=self.api_key, http_client=get_transport().httpx_client())
                 logger.info("OpenAI client initialized successfully")
             except Exception as e:
                 logger.error(f"OpenAI client initialization failed: {e}")
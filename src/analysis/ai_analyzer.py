@@ -21,6 +21,7 @@ except ImportError:
     logging.warning("Plotting libraries not available. Chart analysis will be limited.")
 
 from config.settings import settings
+from src.data_fetcher.transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +53,7 @@ class OpenAIAnalyzer:
         self.model_name = "gpt-4o"  # 使用最新的 GPT-4o 模型
         
         openai.api_key = self.api_key
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self.client = openai.OpenAI(api_key=self.api_key, http_client=get_transport().httpx_client())
 
     async def get_simple_stock_suggestion(self, symbol: str, language: str = "zh") -> AIAnalysisResult:
         """
@@ -237,7 +238,7 @@ class OpenAIAnalyzer:
         """
         try:
             # 導入 stock functions
-            from src.data.stock_functions import STOCK_FUNCTIONS, FUNCTION_MAP
+            from src.data.stock_functions import STOCK_FUNCTIONS, ASYNC_FUNCTION_MAP
             
             messages = [
                 {"role": "user", "content": prompt}
@@ -277,9 +278,9 @@ class OpenAIAnalyzer:
                     logger.info(f"AI calling function: {function_name} with args: {function_args}")
                     
                     # 調用實際函數
-                    if function_name in FUNCTION_MAP:
+                    if function_name in ASYNC_FUNCTION_MAP:
                         try:
-                            function_result = FUNCTION_MAP[function_name](**function_args)
+                            function_result = await ASYNC_FUNCTION_MAP[function_name](**function_args)
                             
                             # 將工具調用結果添加到對話
                             messages.append({
@@ -319,9 +320,9 @@ class OpenAIAnalyzer:
                         function_args = json.loads(tool_call.function.arguments)
                         call_id = tool_call.id
                         
-                        if function_name in FUNCTION_MAP:
+                        if function_name in ASYNC_FUNCTION_MAP:
                             try:
-                                function_result = FUNCTION_MAP[function_name](**function_args)
+                                function_result = await ASYNC_FUNCTION_MAP[function_name](**function_args)
                                 messages.append({
                                     "role": "tool",
                                     "tool_call_id": call_id,
@@ -18,6 +18,7 @@ except ImportError:
     OPENAI_AVAILABLE = False
 
 from config.settings import settings
+from src.data_fetcher.transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ class AIStrategyAdvisor:
         
         if OPENAI_AVAILABLE and settings.openai_api_key:
             try:
-                self.client = OpenAI(api_key=settings.openai_api_key)
+                self.client = OpenAI(api_key=settings.openai_api_key, http_client=get_transport().httpx_client())
                 logger.info("AI 策略顧問初始化成功")
             except Exception as e:
                 logger.error(f"OpenAI 初始化失敗: {str(e)}")
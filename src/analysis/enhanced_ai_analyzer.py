@@ -13,6 +13,7 @@ import logging
 from .ai_analyzer import OpenAIAnalyzer, AIAnalysisResult
 from .technical_indicators import TechnicalIndicators
 from .pattern_recognition import PatternRecognition
+from src.cache.indicator_frame_cache import IndicatorFrameCache, get_indicator_frame_cache
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +61,11 @@ class EnhancedAIAnalysis:
 class EnhancedAIAnalyzer:
     """增強版AI分析器"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, indicator_frames: Optional[IndicatorFrameCache] = None):
         self.ai_analyzer = OpenAIAnalyzer(api_key)
         self.technical_indicators = TechnicalIndicators()
         self.pattern_recognition = PatternRecognition()
+        self.indicator_frames = indicator_frames or get_indicator_frame_cache()
     
     async def analyze_stock_comprehensive(
         self,
@@ -76,7 +78,7 @@ class EnhancedAIAnalyzer:
         """
         try:
             # 1. 計算技術指標
-            indicators = await self._calculate_comprehensive_indicators(data)
+            indicators = await self._calculate_comprehensive_indicators(symbol, data)
             
             # 2. 識別圖表型態
             patterns = await self._identify_patterns(data)
@@ -113,38 +115,37 @@ class EnhancedAIAnalyzer:
             logger.error(f"Enhanced AI analysis failed for {symbol}: {str(e)}")
             return self._create_fallback_analysis(symbol)
     
-    async def _calculate_comprehensive_indicators(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """計算全面技術指標"""
+    async def _calculate_comprehensive_indicators(self, symbol: str, data: pd.DataFrame) -> Dict[str, Any]:
+        """計算全面技術指標 (共用指標快取中的同檔指標表)"""
         if data.empty:
             return {}
         
         # 基礎指標
         indicators = {}
+        frame = self.indicator_frames.get_frame(symbol, data)
         
         # RSI
-        rsi_14 = self.technical_indicators.calculate_rsi(data['close'], period=14)
-        rsi_21 = self.technical_indicators.calculate_rsi(data['close'], period=21)
+        rsi_14 = frame['rsi']
+        rsi_21 = self.technical_indicators.rsi(data['close'], period=21)
         
         # MACD
-        macd_line, macd_signal, macd_histogram = self.technical_indicators.calculate_macd(data['close'])
+        macd_line, macd_signal, macd_histogram = frame['macd'], frame['macd_signal'], frame['macd_histogram']
         
         # 布林帶
-        bb_upper, bb_middle, bb_lower = self.technical_indicators.calculate_bollinger_bands(data['close'])
+        bb_upper, bb_middle, bb_lower = frame['bb_upper'], frame['bb_middle'], frame['bb_lower']
         
         # 移動平均線
-        sma_20 = data['close'].rolling(window=20).mean()
-        sma_50 = data['close'].rolling(window=50).mean()
-        ema_12 = data['close'].ewm(span=12).mean()
-        ema_26 = data['close'].ewm(span=26).mean()
+        sma_20, sma_50 = frame['sma_20'], frame['sma_50']
+        ema_12, ema_26 = frame['ema_12'], frame['ema_26']
         
         # KDJ指標
         k_percent, d_percent = self._calculate_kdj(data)
         
         # 威廉指標
-        williams_r = self._calculate_williams_r(data)
+        williams_r = frame['williams_r']
         
         # 成交量指標
-        volume_sma = data['volume'].rolling(window=20).mean()
+        volume_sma = frame['volume_sma']
         
         indicators.update({
             'rsi_14': rsi_14.iloc[-1] if not rsi_14.empty else 50,
@@ -369,17 +370,6 @@ class EnhancedAIAnalyzer:
         
         return k_percent, d_percent
     
-    def _calculate_williams_r(self, data: pd.DataFrame, period: int = 14) -> pd.Series:
-        """計算威廉指標"""
-        if len(data) < period:
-            return pd.Series([-50] * len(data), index=data.index)
-        
-        high_max = data['high'].rolling(window=period).max()
-        low_min = data['low'].rolling(window=period).min()
-        
-        williams_r = (high_max - data['close']) / (high_max - low_min) * -100
-        return williams_r
-    
     def _calculate_trend_strength(self, data: pd.DataFrame) -> float:
         """計算趨勢強度"""
         if len(data) < 20:
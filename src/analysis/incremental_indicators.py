@@ -0,0 +1,345 @@
+"""
+Streaming technical indicators with constant work per bar.
+
+``IndicatorAnalyzer.calculate_all_indicators`` recomputes every indicator over
+the whole history. ``IncrementalIndicators`` keeps the running state of each
+indicator instead (windowed sums and Welford moments, monotonic deques for
+rolling extremes, EMA recursions), so appending a bar costs O(1) regardless
+of history length. Values match the batch (non-TA-Lib) implementations in
+``TechnicalIndicators`` column for column, and the state can be snapshotted
+to a JSON-serialisable dict and restored later.
+"""
+
+import copy
+import math
+from typing import Any, Dict, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .rolling_kernels import NAN, RollingExtreme, RollingMoments, StatefulKernel
+
+
+def _div(a: float, b: float) -> float:
+    """Division with pandas semantics: x/0 is +/-inf, 0/0 and NaN operands give NaN."""
+    if math.isnan(a) or math.isnan(b):
+        return NAN
+    if b == 0:
+        return NAN if a == 0 else math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class EMA(StatefulKernel):
+    """
+    ``Series.ewm(span=period, adjust=False).mean()``, seeded with the first value.
+
+    A missing value repeats the current value but decays its weight, so the
+    next value counts for more after a gap, as in pandas (``ignore_na=False``).
+    """
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1)
+        self.value = NAN
+        self.weight = 1.0
+
+    def update(self, x: float) -> float:
+        if math.isnan(x):
+            if not math.isnan(self.value):
+                self.weight *= 1 - self.alpha
+            return self.value
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.weight *= 1 - self.alpha
+            self.value = (self.weight * self.value + self.alpha * x) / (self.weight + self.alpha)
+        self.weight = 1.0
+        return self.value
+
+
+class RSI(StatefulKernel):
+    """
+    Relative Strength Index.
+
+    By default matches ``TechnicalIndicators.rsi`` (simple rolling means of
+    gains and losses); ``wilder=True`` uses Wilder smoothing (as TA-Lib does).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.prev = NAN
+        self.gains = RollingMoments(period)
+        self.losses = RollingMoments(period)
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, close: float) -> float:
+        delta = close - self.prev if not math.isnan(self.prev) else NAN
+        self.prev = close
+        # delta.where(delta > 0, 0) turns the leading NaN change into a zero gain/loss
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if not self.wilder:
+            self.gains.update(gain)
+            self.losses.update(loss)
+            rs = _div(self.gains.average, self.losses.average)
+            return 100 - _div(100, 1 + rs) if not math.isinf(rs) else 100.0
+
+        if math.isnan(delta):
+            return NAN
+        self.changes += 1
+        if self.changes <= self.period:
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.changes < self.period:
+                return NAN
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        rs = _div(self.avg_gain, self.avg_loss)
+        return 100 - _div(100, 1 + rs) if not math.isinf(rs) else 100.0
+
+
+class IncrementalIndicators(StatefulKernel):
+    """
+    O(1)-per-bar engine producing the columns of ``calculate_all_indicators``.
+    """
+
+    COLUMNS = [
+        "sma_20", "sma_50", "ema_12", "ema_26", "rsi",
+        "macd", "macd_signal", "macd_histogram",
+        "bb_upper", "bb_middle", "bb_lower", "bb_width", "bb_position",
+        "stoch_k", "stoch_d", "williams_r", "atr", "adx",
+        "volume_sma", "obv", "pvt", "price_change", "volume_ratio",
+    ]
+
+    # Bars replayed by resume(); covers the longest window chain (sma_50, ADX over ATR)
+    RESUME_BARS = 64
+    # Unbounded recursions that resume() takes from a computed frame instead of replaying
+    RESUME_COLUMNS = ("ema_12", "ema_26", "macd_signal", "obv", "pvt")
+
+    def __init__(
+        self,
+        rsi_period: int = 14,
+        macd_periods: tuple = (12, 26, 9),
+        bb_period: int = 20,
+        bb_std: float = 2.0,
+        stoch_periods: tuple = (14, 3),
+        williams_period: int = 14,
+        atr_period: int = 14,
+        adx_period: int = 14,
+        volume_sma_period: int = 20,
+        wilder_rsi: bool = False
+    ):
+        """
+        Args:
+            rsi_period: RSI lookback
+            macd_periods: (fast, slow, signal) EMA periods
+            bb_period: Bollinger window
+            bb_std: Bollinger standard-deviation multiplier
+            stoch_periods: (%K, %D) periods
+            williams_period: Williams %R lookback
+            atr_period: ATR window
+            adx_period: ADX window (directional movement, DX smoothing)
+            volume_sma_period: Volume SMA window
+            wilder_rsi: Use Wilder smoothing for RSI instead of the batch simple means
+        """
+        fast, slow, signal = macd_periods
+        k_period, d_period = stoch_periods
+        self.bars = 0
+        self.prev_close = NAN
+        self.prev_high = NAN
+        self.prev_low = NAN
+
+        self.sma_20 = RollingMoments(20)
+        self.sma_50 = RollingMoments(50)
+        self.ema_12 = EMA(12)
+        self.ema_26 = EMA(26)
+        self.rsi = RSI(rsi_period, wilder=wilder_rsi)
+        self.macd_fast = EMA(fast)
+        self.macd_slow = EMA(slow)
+        self.macd_signal = EMA(signal)
+        self.bb = RollingMoments(bb_period)
+        self.bb_std = bb_std
+        self.stoch_high = RollingExtreme(k_period, maximum=True)
+        self.stoch_low = RollingExtreme(k_period, maximum=False)
+        self.stoch_d = RollingMoments(d_period)
+        self.williams_high = RollingExtreme(williams_period, maximum=True)
+        self.williams_low = RollingExtreme(williams_period, maximum=False)
+        self.atr = RollingMoments(atr_period)
+        self.adx_atr = RollingMoments(adx_period)
+        self.plus_dm = RollingMoments(adx_period)
+        self.minus_dm = RollingMoments(adx_period)
+        self.dx = RollingMoments(adx_period)
+        self.volume_sma = RollingMoments(volume_sma_period)
+        self.obv = 0.0
+        self.pvt = 0.0
+        self.latest: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """
+        Append one bar and return every indicator's value at it.
+
+        Args:
+            bar: Mapping (dict or Series row) with open/high/low/close/volume
+
+        Returns:
+            {column: value} for ``COLUMNS`` (NaN while a window is filling)
+        """
+        high, low, close = float(bar["high"]), float(bar["low"]), float(bar["close"])
+        volume = float(bar["volume"])
+        prev_close, prev_high, prev_low = self.prev_close, self.prev_high, self.prev_low
+        out: Dict[str, float] = {}
+
+        self.sma_20.update(close)
+        self.sma_50.update(close)
+        out["sma_20"] = self.sma_20.average
+        out["sma_50"] = self.sma_50.average
+        out["ema_12"] = self.ema_12.update(close)
+        out["ema_26"] = self.ema_26.update(close)
+        out["rsi"] = self.rsi.update(close)
+
+        macd = self.macd_fast.update(close) - self.macd_slow.update(close)
+        signal = self.macd_signal.update(macd)
+        out["macd"], out["macd_signal"], out["macd_histogram"] = macd, signal, macd - signal
+
+        self.bb.update(close)
+        middle, deviation = self.bb.average, self.bb.std
+        upper, lower = middle + deviation * self.bb_std, middle - deviation * self.bb_std
+        out["bb_upper"], out["bb_middle"], out["bb_lower"] = upper, middle, lower
+        out["bb_width"] = _div(upper - lower, middle)
+        out["bb_position"] = _div(close - lower, upper - lower)
+
+        highest, lowest = self.stoch_high.update(high), self.stoch_low.update(low)
+        stoch_k = 100 * _div(close - lowest, highest - lowest)
+        self.stoch_d.update(stoch_k)
+        out["stoch_k"], out["stoch_d"] = stoch_k, self.stoch_d.average
+
+        highest, lowest = self.williams_high.update(high), self.williams_low.update(low)
+        out["williams_r"] = -100 * _div(highest - close, highest - lowest)
+
+        # True range; the first bar has no previous close and uses high - low
+        true_range = high - low
+        if not math.isnan(prev_close):
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+        self.atr.update(true_range)
+        self.adx_atr.update(true_range)
+        out["atr"] = self.atr.average
+        out["adx"] = self._update_adx(high, low, prev_high, prev_low)
+
+        self.volume_sma.update(volume)
+        out["volume_sma"] = self.volume_sma.average
+        # Running sums skip missing terms and report NaN for them, like Series.cumsum
+        change = close - prev_close
+        signed = -volume if change < 0 else (0.0 if change == 0 else volume)
+        if not math.isnan(signed):
+            self.obv += signed
+        out["obv"] = NAN if math.isnan(signed) else self.obv
+        price_change = _div(close - prev_close, prev_close)
+        flow = price_change * volume
+        if not math.isnan(flow):
+            self.pvt += flow
+        out["pvt"] = NAN if math.isnan(flow) else self.pvt
+        out["price_change"] = price_change
+        out["volume_ratio"] = _div(volume, out["volume_sma"])
+
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        self.bars += 1
+        self.latest = out
+        return out
+
+    def _update_adx(self, high: float, low: float, prev_high: float, prev_low: float) -> float:
+        """Mirror of the simplified batch ADX: rolling means of clipped diffs over ATR."""
+        up = high - prev_high
+        down = low - prev_low
+        plus = up if up >= 0 or math.isnan(up) else 0.0
+        minus = abs(down) if down <= 0 or math.isnan(down) else 0.0
+        self.plus_dm.update(plus)
+        self.minus_dm.update(minus)
+
+        atr = self.adx_atr.average
+        plus_di = 100 * _div(self.plus_dm.average, atr)
+        minus_di = 100 * _div(self.minus_dm.average, atr)
+        dx = 100 * abs(_div(plus_di - minus_di, plus_di + minus_di))
+        self.dx.update(dx)
+        return self.dx.average
+
+    def preview(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """Values if ``bar`` were appended, without changing state (e.g. a forming bar)."""
+        return copy.deepcopy(self).update(bar)
+
+    # ------------------------------------------------------------------
+    # Batch helpers
+    # ------------------------------------------------------------------
+
+    def update_frame(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append every row of an OHLCV frame.
+
+        Returns:
+            Indicator DataFrame aligned to ``data.index`` with ``COLUMNS``
+        """
+        highs = data["high"].to_numpy(dtype=np.float64)
+        lows = data["low"].to_numpy(dtype=np.float64)
+        closes = data["close"].to_numpy(dtype=np.float64)
+        volumes = data["volume"].to_numpy(dtype=np.float64)
+        rows = [
+            self.update({"high": h, "low": l, "close": c, "volume": v})
+            for h, l, c, v in zip(highs, lows, closes, volumes)
+        ]
+        return pd.DataFrame(rows, index=data.index, columns=self.COLUMNS)
+
+    @classmethod
+    def from_history(cls, data: pd.DataFrame, **kwargs) -> "IncrementalIndicators":
+        """Engine warmed up on an existing OHLCV history."""
+        engine = cls(**kwargs)
+        engine.update_frame(data)
+        return engine
+
+    @classmethod
+    def resume(cls, data: pd.DataFrame, indicators: pd.DataFrame) -> "IncrementalIndicators":
+        """
+        Engine positioned after the last row of an already computed frame.
+
+        Only the last ``RESUME_BARS`` bars are replayed, which refills every
+        window; the unbounded recursions (``RESUME_COLUMNS``) are then taken
+        from the frame's last row. Uses the default indicator parameters.
+
+        Args:
+            data: OHLCV bars the frame was computed from
+            indicators: Frame for ``data`` holding at least ``RESUME_COLUMNS``
+        """
+        engine = cls()
+        engine.update_frame(data.iloc[-cls.RESUME_BARS:])
+        last = indicators.iloc[-1]
+        engine.ema_12.value = engine.macd_fast.value = float(last["ema_12"])
+        engine.ema_26.value = engine.macd_slow.value = float(last["ema_26"])
+        engine.macd_signal.value = float(last["macd_signal"])
+        # A missing term leaves NaN in the frame; the running sum is the last reported one
+        for column in ("obv", "pvt"):
+            reported = indicators[column].dropna()
+            setattr(engine, column, float(reported.iloc[-1]) if len(reported) else 0.0)
+        engine.bars = len(data)
+        engine.latest.update({column: float(last[column]) for column in indicators.columns if column in cls.COLUMNS})
+        return engine
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serialisable copy of the full engine state."""
+        return copy.deepcopy(self.state())
+
+    @classmethod
+    def restore(cls, snapshot: Mapping[str, Any]) -> "IncrementalIndicators":
+        """Rebuild an engine from ``snapshot()`` output."""
+        engine = cls()
+        engine.load(copy.deepcopy(dict(snapshot)))
+        return engine
@@ -0,0 +1,317 @@
+"""
+Declarative indicator registry with a dependency planner.
+
+Every indicator column (and every shared intermediate such as the rolling
+14-bar high/low or the true range) is an ``IndicatorSpec`` naming the inputs
+it is computed from. ``IndicatorPlanner`` resolves a requested set of
+columns to the minimal set of nodes, orders them topologically, computes
+each node exactly once and writes the requested columns into one
+preallocated array. ``sma_20`` therefore also serves as the Bollinger
+middle band, ``ema_12``/``ema_26`` feed MACD, and ATR is shared with ADX.
+
+Nodes run on float64 NumPy arrays, either 1D (one symbol) or 2D
+(time x symbol panels), mostly with the same kernels as ``PanelIndicators``.
+Missing bars inside a series follow the manual pandas calculations in
+``TechnicalIndicators`` (one column at a time), not the panel's skip-the-bar
+convention: EMAs decay across the gap as ``ewm(adjust=False)`` does, a
+missing change counts as zero gain/loss in RSI and as full volume in OBV.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import rolling_kernels
+from .panel_indicators import PanelIndicators, _divide, _shift
+
+# Raw inputs every plan can draw on
+BASE_FIELDS = ("open", "high", "low", "close", "volume")
+
+# Column order of IndicatorAnalyzer.calculate_all_indicators
+ALL_INDICATORS = tuple(PanelIndicators.COLUMNS)
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """One node of the indicator graph."""
+    name: str
+    inputs: Tuple[str, ...]
+    compute: Callable[..., np.ndarray]
+
+
+INDICATOR_REGISTRY: Dict[str, IndicatorSpec] = {}
+
+
+def register_indicator(name: str, *inputs: str):
+    """Decorator adding ``compute(*inputs)`` to the registry under ``name``."""
+    def decorator(compute: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        INDICATOR_REGISTRY[name] = IndicatorSpec(name, tuple(inputs), compute)
+        return compute
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# Series kernels with TechnicalIndicators' missing-bar semantics
+# ----------------------------------------------------------------------
+
+def _ewm(values: np.ndarray, period: int) -> np.ndarray:
+    """``ewm(span=period, adjust=False).mean()`` per column."""
+    frame = pd.DataFrame(values.reshape(len(values), -1))
+    return frame.ewm(span=period, adjust=False).mean().to_numpy().reshape(values.shape)
+
+
+def _cumsum(values: np.ndarray) -> np.ndarray:
+    """``Series.cumsum()``: missing values are skipped and stay NaN."""
+    return np.where(np.isnan(values), np.nan, np.nancumsum(values, axis=0))
+
+
+# ----------------------------------------------------------------------
+# Moving averages and momentum
+# ----------------------------------------------------------------------
+
+@register_indicator("prev_close", "close")
+def _prev_close(close):
+    return _shift(close)
+
+
+@register_indicator("rsi", "close")
+def _rsi(close):
+    delta = close - _shift(close)
+    # delta.where(delta > 0, 0): a missing change is a zero gain and loss
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    rs = _divide(rolling_kernels.rolling_mean(gain, 14), rolling_kernels.rolling_mean(loss, 14))
+    return 100 - _divide(100, 1 + rs)
+
+
+@register_indicator("macd", "ema_12", "ema_26")
+def _macd(ema_12, ema_26):
+    return ema_12 - ema_26
+
+
+@register_indicator("macd_signal", "macd")
+def _macd_signal(macd):
+    return _ewm(macd, 9)
+
+
+@register_indicator("macd_histogram", "macd", "macd_signal")
+def _macd_histogram(macd, macd_signal):
+    return macd - macd_signal
+
+
+# ----------------------------------------------------------------------
+# Bollinger Bands (middle band is sma_20)
+# ----------------------------------------------------------------------
+
+@register_indicator("bb_std", "close")
+def _bb_std(close):
+    return rolling_kernels.rolling_std(close, 20)
+
+
+@register_indicator("bb_middle", "sma_20")
+def _bb_middle(sma_20):
+    return sma_20
+
+
+@register_indicator("bb_upper", "sma_20", "bb_std")
+def _bb_upper(sma_20, bb_std):
+    return sma_20 + bb_std * 2
+
+
+@register_indicator("bb_lower", "sma_20", "bb_std")
+def _bb_lower(sma_20, bb_std):
+    return sma_20 - bb_std * 2
+
+
+@register_indicator("bb_width", "bb_upper", "bb_lower", "sma_20")
+def _bb_width(bb_upper, bb_lower, sma_20):
+    return _divide(bb_upper - bb_lower, sma_20)
+
+
+@register_indicator("bb_position", "close", "bb_upper", "bb_lower")
+def _bb_position(close, bb_upper, bb_lower):
+    return _divide(close - bb_lower, bb_upper - bb_lower)
+
+
+# ----------------------------------------------------------------------
+# Range oscillators (stochastic and Williams %R share the 14-bar range)
+# ----------------------------------------------------------------------
+
+@register_indicator("highest_14", "high")
+def _highest_14(high):
+    return rolling_kernels.rolling_max(high, 14)
+
+
+@register_indicator("lowest_14", "low")
+def _lowest_14(low):
+    return rolling_kernels.rolling_min(low, 14)
+
+
+@register_indicator("stoch_k", "close", "highest_14", "lowest_14")
+def _stoch_k(close, highest_14, lowest_14):
+    return 100 * _divide(close - lowest_14, highest_14 - lowest_14)
+
+
+@register_indicator("stoch_d", "stoch_k")
+def _stoch_d(stoch_k):
+    return rolling_kernels.rolling_mean(stoch_k, 3)
+
+
+@register_indicator("williams_r", "close", "highest_14", "lowest_14")
+def _williams_r(close, highest_14, lowest_14):
+    return -100 * _divide(highest_14 - close, highest_14 - lowest_14)
+
+
+# ----------------------------------------------------------------------
+# Volatility and trend strength (ADX reuses ATR)
+# ----------------------------------------------------------------------
+
+@register_indicator("true_range", "high", "low", "close")
+def _true_range(high, low, close):
+    return PanelIndicators.true_range(high, low, close)
+
+
+@register_indicator("atr", "true_range")
+def _atr(true_range):
+    return rolling_kernels.rolling_mean(true_range, 14)
+
+
+@register_indicator("adx", "high", "low", "atr")
+def _adx(high, low, atr):
+    up = high - _shift(high)
+    down = low - _shift(low)
+    plus_dm = np.where(up < 0, 0.0, up)
+    minus_dm = np.abs(np.where(down > 0, 0.0, down))
+    plus_di = 100 * _divide(rolling_kernels.rolling_mean(plus_dm, 14), atr)
+    minus_di = 100 * _divide(rolling_kernels.rolling_mean(minus_dm, 14), atr)
+    dx = 100 * np.abs(_divide(plus_di - minus_di, plus_di + minus_di))
+    return rolling_kernels.rolling_mean(dx, 14)
+
+
+# ----------------------------------------------------------------------
+# Volume
+# ----------------------------------------------------------------------
+
+@register_indicator("volume_sma", "volume")
+def _volume_sma(volume):
+    return rolling_kernels.rolling_mean(volume, 20)
+
+
+@register_indicator("obv", "close", "volume")
+def _obv(close, volume):
+    change = close - _shift(close)
+    return _cumsum(np.where(change < 0, -volume, np.where(change == 0, 0.0, volume)))
+
+
+@register_indicator("pvt", "close", "volume")
+def _pvt(close, volume):
+    return _cumsum(_divide(close - _shift(close), _shift(close)) * volume)
+
+
+@register_indicator("price_change", "close", "prev_close")
+def _price_change(close, prev_close):
+    return _divide(close - prev_close, prev_close)
+
+
+@register_indicator("volume_ratio", "volume", "volume_sma")
+def _volume_ratio(volume, volume_sma):
+    return _divide(volume, volume_sma)
+
+
+# Moving averages of any length: sma_N / ema_N
+_MOVING_AVERAGE = re.compile(r"^(sma|ema)_(\d+)$")
+
+
+def _moving_average_spec(name: str) -> Optional[IndicatorSpec]:
+    match = _MOVING_AVERAGE.match(name)
+    if not match or int(match.group(2)) < 1:
+        return None
+    kind, period = match.group(1), int(match.group(2))
+    kernel = rolling_kernels.rolling_mean if kind == "sma" else _ewm
+    return IndicatorSpec(name, ("close",), lambda close: kernel(close, period))
+
+
+class IndicatorPlanner:
+    """
+    Compute a requested subset of indicators, sharing intermediates.
+    """
+
+    def __init__(self, registry: Optional[Mapping[str, IndicatorSpec]] = None):
+        self.registry = registry if registry is not None else INDICATOR_REGISTRY
+
+    def spec(self, name: str) -> IndicatorSpec:
+        """Registry entry for ``name`` (``sma_N``/``ema_N`` are generated on demand)."""
+        spec = self.registry.get(name) or _moving_average_spec(name)
+        if spec is None:
+            raise ValueError(f"Unknown indicator: {name}")
+        return spec
+
+    def plan(self, names: Iterable[str]) -> List[str]:
+        """
+        Nodes needed for ``names``, dependencies first, each listed once.
+
+        Raises:
+            ValueError: For unknown indicators or dependency cycles
+        """
+        order: List[str] = []
+        done, visiting = set(BASE_FIELDS), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Indicator dependency cycle at {name}")
+            visiting.add(name)
+            for dependency in self.spec(name).inputs:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def compute_arrays(self, fields: Mapping[str, np.ndarray], names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Evaluate a plan on float arrays.
+
+        Args:
+            fields: OHLCV arrays (1D, or 2D time x symbol)
+            names: Indicators to return
+
+        Returns:
+            {name: array} for the requested names only
+        """
+        names = list(dict.fromkeys(names))
+        values: Dict[str, np.ndarray] = {
+            field: np.asarray(array, dtype=np.float64) for field, array in fields.items()
+        }
+        for name in self.plan(names):
+            spec = self.spec(name)
+            values[name] = spec.compute(*(values[dependency] for dependency in spec.inputs))
+        return {name: values[name] for name in names}
+
+    def compute(self, data: pd.DataFrame, names: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Indicator columns for an OHLCV DataFrame.
+
+        Args:
+            data: DataFrame with OHLCV columns
+            names: Indicators to compute (default: every calculate_all_indicators column)
+
+        Returns:
+            DataFrame indexed like ``data`` with one column per requested indicator
+        """
+        names = list(dict.fromkeys(names if names is not None else ALL_INDICATORS))
+        needed = {dependency for name in self.plan(names) for dependency in self.spec(name).inputs}
+        fields = {field: data[field].to_numpy(dtype=np.float64) for field in BASE_FIELDS if field in needed}
+        values = self.compute_arrays(fields, names)
+
+        block = np.empty((len(data), len(names)), dtype=np.float64)
+        for position, name in enumerate(names):
+            block[:, position] = values[name]
+        return pd.DataFrame(block, index=data.index, columns=names)
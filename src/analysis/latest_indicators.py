@@ -0,0 +1,213 @@
+"""
+Latest-bar indicator values without full-length columns.
+
+``IndicatorAnalyzer.analyze`` only reports each indicator's value at the last
+bar. The functions here compute exactly that from the shortest tail of the
+history each indicator depends on: windowed indicators (SMA, RSI, Bollinger,
+stochastic, Williams %R, ATR) read their final window only, and EMA-type
+indicators run over a warm-up tail long enough that the ignored history
+carries less than ``EMA_TOLERANCE`` of the weight (the whole history when it
+is shorter, which makes them exact). Values match the manual calculations in
+``TechnicalIndicators``.
+"""
+
+import math
+from functools import cached_property
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+# Weight of the history an EMA warm-up tail may ignore
+EMA_TOLERANCE = 1e-10
+
+NAN = float("nan")
+
+
+def ema_warmup(period: int, tolerance: float = EMA_TOLERANCE) -> int:
+    """Bars after which an EMA's seed carries less than ``tolerance`` of the weight."""
+    decay = 1 - 2.0 / (period + 1)
+    return int(math.ceil(math.log(tolerance) / math.log(decay))) + 1
+
+
+def ema_series(values: np.ndarray, period: int) -> np.ndarray:
+    """``ewm(span=period, adjust=False)`` of a NaN-free array, seeded with its first value."""
+    if len(values) == 0:
+        return values
+    alpha = 2.0 / (period + 1)
+    out = np.empty(len(values))
+    out[0] = values[0]
+    if len(values) > 1:
+        out[1:], _ = lfilter([alpha], [1, alpha - 1], values[1:], zi=[(1 - alpha) * values[0]])
+    return out
+
+
+def _ratio(a: float, b: float) -> float:
+    """Scalar division with pandas semantics (x/0 is +/-inf, 0/0 is NaN)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.float64(a) / np.float64(b))
+
+
+def _window(values: np.ndarray, size: int) -> Optional[np.ndarray]:
+    """Last ``size`` values, or None when the history is shorter."""
+    return values[-size:] if len(values) >= size else None
+
+
+class _Latest:
+    """Latest-value kernels over one bar series; ``values`` collects results."""
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self.values: Dict[str, float] = {}
+
+    # Columns are extracted on first use; column access dominates the cost here
+    @cached_property
+    def close(self) -> np.ndarray:
+        return self.data["close"].to_numpy(dtype=np.float64)
+
+    @cached_property
+    def high(self) -> np.ndarray:
+        return self.data["high"].to_numpy(dtype=np.float64)
+
+    @cached_property
+    def low(self) -> np.ndarray:
+        return self.data["low"].to_numpy(dtype=np.float64)
+
+    @cached_property
+    def volume(self) -> np.ndarray:
+        return self.data["volume"].to_numpy(dtype=np.float64)
+
+    # Moving averages ----------------------------------------------------
+
+    def sma(self, values: np.ndarray, period: int) -> float:
+        window = _window(values, period)
+        return float(window.mean()) if window is not None else NAN
+
+    def ema_block(self) -> Dict[str, float]:
+        """ema_12, ema_26, macd, macd_signal and macd_histogram from one warm-up tail."""
+        signal_warmup = ema_warmup(9)
+        tail = self.close[-(ema_warmup(26) + signal_warmup):]
+        if np.isnan(tail).any():
+            raise ValueError("EMA tail contains missing closes")
+        fast, slow = ema_series(tail, 12), ema_series(tail, 26)
+        macd = fast - slow
+        # With the whole history the signal seeds at the first bar, as in the batch path
+        signal_input = macd if len(tail) == len(self.close) else macd[-signal_warmup:]
+        signal = ema_series(signal_input, 9)
+        return {
+            "ema_12": float(fast[-1]), "ema_26": float(slow[-1]), "macd": float(macd[-1]),
+            "macd_signal": float(signal[-1]), "macd_histogram": float(macd[-1] - signal[-1]),
+        }
+
+    # Oscillators --------------------------------------------------------
+
+    def rsi(self, period: int = 14) -> float:
+        tail = self.close[-(period + 1):]
+        deltas = np.diff(tail)
+        if len(tail) < period + 1:
+            # The series' first bar has no change; the batch path counts it as zero
+            deltas = np.concatenate([[0.0], deltas])
+        if len(deltas) < period:
+            return NAN
+        # NaN changes count as zero, as delta.where(...) does in the batch path
+        gain = np.fmax(deltas, 0.0).sum() / period
+        loss = -np.fmin(deltas, 0.0).sum() / period
+        return 100 - _ratio(100, 1 + _ratio(gain, loss))
+
+    def bollinger(self, period: int = 20, std_dev: float = 2) -> Dict[str, float]:
+        window = _window(self.close, period)
+        middle = float(window.mean()) if window is not None else NAN
+        deviation = float(window.std(ddof=1)) if window is not None else NAN
+        return {
+            "bb_upper": middle + deviation * std_dev, "bb_middle": middle,
+            "bb_lower": middle - deviation * std_dev,
+        }
+
+    def stochastic(self, k_period: int = 14, d_period: int = 3) -> Dict[str, float]:
+        span = k_period + d_period - 1
+        highs, lows, closes = _window(self.high, span), _window(self.low, span), _window(self.close, span)
+        if highs is None:
+            # Not enough bars for %D; %K may still be available
+            highs, lows, closes = _window(self.high, k_period), _window(self.low, k_period), _window(self.close, k_period)
+            if highs is None:
+                return {"stoch_k": NAN, "stoch_d": NAN}
+        k_percent = [
+            100 * _ratio(closes[end - 1] - lows[end - k_period:end].min(),
+                         highs[end - k_period:end].max() - lows[end - k_period:end].min())
+            for end in range(k_period, len(closes) + 1)
+        ]
+        return {
+            "stoch_k": k_percent[-1],
+            "stoch_d": sum(k_percent) / d_period if len(k_percent) == d_period else NAN,
+        }
+
+    def williams_r(self, period: int = 14) -> float:
+        highs, lows = _window(self.high, period), _window(self.low, period)
+        if highs is None:
+            return NAN
+        highest, lowest = highs.max(), lows.min()
+        return -100 * _ratio(highest - self.close[-1], highest - lowest)
+
+    # Volatility and volume ---------------------------------------------
+
+    def atr(self, period: int = 14) -> float:
+        if len(self.close) < period:
+            return NAN
+        tail = slice(-(period + 1), None) if len(self.close) > period else slice(None)
+        high, low, close = self.high[tail], self.low[tail], self.close[tail]
+        true_range = high - low
+        prev_close = close[:-1]
+        true_range[1:] = np.fmax(true_range[1:], np.fmax(np.abs(high[1:] - prev_close),
+                                                         np.abs(low[1:] - prev_close)))
+        return float(true_range[-period:].mean())
+
+    def price_change(self) -> float:
+        if len(self.close) < 2:
+            return NAN
+        return _ratio(self.close[-1] - self.close[-2], self.close[-2])
+
+
+# name -> kernel returning that indicator's value (some return several at once)
+_KERNELS: Dict[str, Callable[[_Latest], Dict[str, float]]] = {
+    "sma_20": lambda latest: {"sma_20": latest.sma(latest.close, 20)},
+    "sma_50": lambda latest: {"sma_50": latest.sma(latest.close, 50)},
+    "rsi": lambda latest: {"rsi": latest.rsi()},
+    "williams_r": lambda latest: {"williams_r": latest.williams_r()},
+    "atr": lambda latest: {"atr": latest.atr()},
+    "volume_sma": lambda latest: {"volume_sma": latest.sma(latest.volume, 20)},
+    "volume_ratio": lambda latest: {"volume_ratio": _ratio(latest.volume[-1], latest.sma(latest.volume, 20))},
+    "price_change": lambda latest: {"price_change": latest.price_change()},
+}
+for _name in ("ema_12", "ema_26", "macd", "macd_signal", "macd_histogram"):
+    _KERNELS[_name] = _Latest.ema_block
+for _name in ("bb_upper", "bb_middle", "bb_lower"):
+    _KERNELS[_name] = _Latest.bollinger
+for _name in ("stoch_k", "stoch_d"):
+    _KERNELS[_name] = _Latest.stochastic
+
+LATEST_INDICATORS = tuple(_KERNELS)
+
+
+def latest_indicator_values(data: pd.DataFrame, names: Iterable[str]) -> Dict[str, float]:
+    """
+    Each requested indicator's value at the last bar of ``data``.
+
+    Args:
+        data: DataFrame with OHLCV columns
+        names: Indicators from ``LATEST_INDICATORS``
+
+    Returns:
+        {name: value}; NaN where the history is too short
+
+    Raises:
+        ValueError: For unsupported indicators, or missing closes inside an EMA warm-up
+    """
+    latest = _Latest(data)
+    for name in names:
+        if name not in latest.values:
+            kernel = _KERNELS.get(name)
+            if kernel is None:
+                raise ValueError(f"No latest-value kernel for indicator: {name}")
+            latest.values.update(kernel(latest))
+    return {name: latest.values[name] for name in names}
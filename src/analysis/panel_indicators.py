@@ -0,0 +1,289 @@
+"""
+Vectorized technical indicators over a (time x symbol) panel.
+
+``IndicatorAnalyzer.calculate_all_indicators`` runs one pandas pipeline per
+symbol. ``PanelIndicators`` takes one 2D array per OHLCV field (rows are bar
+timestamps, columns are symbols, e.g. ``SyntheticMarket.panel()`` or
+``MarketDataRepository.read_panel()`` output) and computes every indicator
+for all symbols with NumPy array operations, so a market-wide scan is a
+handful of array passes instead of a Python loop over symbols.
+
+Histories may be ragged: NaN rows before a listing or after a delisting are
+treated as "no bar", and each column then equals what the batch fallback in
+``TechnicalIndicators`` produces on that symbol's own bars.
+"""
+
+import logging
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from . import rolling_kernels
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PanelLike = Union[pd.DataFrame, np.ndarray]
+
+
+def _shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Shift rows down by ``periods`` (NaN fill), like ``DataFrame.shift``."""
+    out = np.full_like(values, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def _divide(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise division with pandas semantics (inf for x/0, NaN for 0/0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a / b
+
+
+def _first_valid(values: np.ndarray) -> np.ndarray:
+    """Boolean mask of each column's first non-NaN row."""
+    valid = ~np.isnan(values)
+    return valid & (np.cumsum(valid, axis=0) == 1)
+
+
+class PanelIndicators:
+    """
+    NumPy indicator kernels operating column-wise on (time x symbol) arrays.
+
+    Each kernel mirrors the manual calculation of the same name in
+    ``TechnicalIndicators``; windows containing a missing bar yield NaN.
+    """
+
+    COLUMNS = [
+        "sma_20", "sma_50", "ema_12", "ema_26", "rsi",
+        "macd", "macd_signal", "macd_histogram",
+        "bb_upper", "bb_middle", "bb_lower", "bb_width", "bb_position",
+        "stoch_k", "stoch_d", "williams_r", "atr", "adx",
+        "volume_sma", "obv", "pvt", "price_change", "volume_ratio",
+    ]
+
+    # ------------------------------------------------------------------
+    # Rolling primitives (linear-time kernels from rolling_kernels)
+    # ------------------------------------------------------------------
+
+    rolling_sum = staticmethod(rolling_kernels.rolling_sum)
+    rolling_mean = staticmethod(rolling_kernels.rolling_mean)
+    rolling_std = staticmethod(rolling_kernels.rolling_std)
+
+    @staticmethod
+    def rolling_extreme(values: np.ndarray, window: int, maximum: bool = True) -> np.ndarray:
+        """Rolling max (or min) over the last ``window`` rows, NaN-propagating."""
+        return rolling_kernels.rolling_max(values, window) if maximum else rolling_kernels.rolling_min(values, window)
+
+    # ------------------------------------------------------------------
+    # Indicators
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def sma(close: np.ndarray, period: int) -> np.ndarray:
+        """Simple Moving Average"""
+        return PanelIndicators.rolling_mean(close, period)
+
+    @staticmethod
+    def ema(values: np.ndarray, period: int) -> np.ndarray:
+        """
+        Exponential Moving Average (``ewm(span, adjust=False)``), seeded per
+        column with its first bar; missing bars are skipped and stay NaN.
+        """
+        frame = pd.DataFrame(values.reshape(len(values), -1))
+        smoothed = frame.ewm(span=period, adjust=False, ignore_na=True).mean().to_numpy()
+        return np.where(np.isnan(values), np.nan, smoothed.reshape(values.shape))
+
+    @staticmethod
+    def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+        """Relative Strength Index (simple rolling means of gains and losses)"""
+        delta = close - _shift(close)
+        has_bar = ~np.isnan(close)
+        # A symbol's first bar has no change; the batch fallback counts it as zero gain/loss
+        gain = np.where(has_bar, np.where(delta > 0, delta, 0.0), np.nan)
+        loss = np.where(has_bar, np.where(delta < 0, -delta, 0.0), np.nan)
+        rs = _divide(PanelIndicators.rolling_mean(gain, period), PanelIndicators.rolling_mean(loss, period))
+        return 100 - _divide(100, 1 + rs)
+
+    @staticmethod
+    def macd(close: np.ndarray, fast_period: int = 12, slow_period: int = 26,
+             signal_period: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """MACD line, signal line and histogram"""
+        macd_line = PanelIndicators.ema(close, fast_period) - PanelIndicators.ema(close, slow_period)
+        signal_line = PanelIndicators.ema(macd_line, signal_period)
+        return macd_line, signal_line, macd_line - signal_line
+
+    @staticmethod
+    def bollinger_bands(close: np.ndarray, period: int = 20,
+                        std_dev: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Upper, middle and lower Bollinger Bands"""
+        middle = PanelIndicators.rolling_mean(close, period)
+        deviation = PanelIndicators.rolling_std(close, period)
+        return middle + deviation * std_dev, middle, middle - deviation * std_dev
+
+    @staticmethod
+    def stochastic_oscillator(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                              k_period: int = 14, d_period: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Stochastic %K and %D"""
+        highest = PanelIndicators.rolling_extreme(high, k_period, maximum=True)
+        lowest = PanelIndicators.rolling_extreme(low, k_period, maximum=False)
+        k_percent = 100 * _divide(close - lowest, highest - lowest)
+        return k_percent, PanelIndicators.rolling_mean(k_percent, d_period)
+
+    @staticmethod
+    def williams_r(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+        """Williams %R"""
+        highest = PanelIndicators.rolling_extreme(high, period, maximum=True)
+        lowest = PanelIndicators.rolling_extreme(low, period, maximum=False)
+        return -100 * _divide(highest - close, highest - lowest)
+
+    @staticmethod
+    def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """True range; a symbol's first bar (no previous close) uses high - low"""
+        prev_close = _shift(close)
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    @staticmethod
+    def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+        """Average True Range"""
+        return PanelIndicators.rolling_mean(PanelIndicators.true_range(high, low, close), period)
+
+    @staticmethod
+    def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+        """Average Directional Index (same simplified form as the batch fallback)"""
+        up = high - _shift(high)
+        down = low - _shift(low)
+        plus_dm = np.where(up < 0, 0.0, up)
+        minus_dm = np.abs(np.where(down > 0, 0.0, down))
+
+        atr = PanelIndicators.atr(high, low, close, period)
+        plus_di = 100 * _divide(PanelIndicators.rolling_mean(plus_dm, period), atr)
+        minus_di = 100 * _divide(PanelIndicators.rolling_mean(minus_dm, period), atr)
+        dx = 100 * np.abs(_divide(plus_di - minus_di, plus_di + minus_di))
+        return PanelIndicators.rolling_mean(dx, period)
+
+    @staticmethod
+    def on_balance_volume(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        """On-Balance Volume; a symbol's first bar contributes its full volume"""
+        change = close - _shift(close)
+        signed = np.where(change < 0, -volume, np.where(change == 0, 0.0, volume))
+        has_bar = ~np.isnan(close)
+        return np.where(has_bar, np.nancumsum(np.where(has_bar, signed, np.nan), axis=0), np.nan)
+
+    @staticmethod
+    def price_volume_trend(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        """Price Volume Trend; NaN on a symbol's first bar"""
+        flow = _divide(close - _shift(close), _shift(close)) * volume
+        return np.where(np.isnan(close) | _first_valid(close), np.nan, np.nancumsum(flow, axis=0))
+
+    # ------------------------------------------------------------------
+    # Panel API
+    # ------------------------------------------------------------------
+
+    def calculate_panel(
+        self,
+        fields: Mapping[str, PanelLike],
+        symbols: Optional[Iterable[str]] = None,
+        index: Optional[pd.Index] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Calculate all indicators for every symbol of an OHLCV panel.
+
+        Args:
+            fields: {"high"/"low"/"close"/"volume" (and optionally "open"): (time x symbol)}
+                    DataFrames or 2D arrays
+            symbols: Column labels when plain arrays are given
+            index: Row labels when plain arrays are given
+
+        Returns:
+            {indicator column: (time x symbol) DataFrame}, columns as in
+            ``calculate_all_indicators``
+        """
+        close_frame = fields["close"]
+        if isinstance(close_frame, pd.DataFrame):
+            index = close_frame.index if index is None else index
+            symbols = list(close_frame.columns) if symbols is None else list(symbols)
+            arrays = {
+                name: frame.reindex(index=index, columns=symbols).to_numpy(dtype=np.float64)
+                for name, frame in fields.items() if isinstance(frame, pd.DataFrame)
+            }
+        else:
+            arrays = {name: np.asarray(values, dtype=np.float64) for name, values in fields.items()}
+            rows, cols = arrays["close"].shape
+            index = pd.RangeIndex(rows) if index is None else index
+            symbols = list(range(cols)) if symbols is None else list(symbols)
+
+        values = self.calculate_arrays(arrays)
+        return {name: pd.DataFrame(data, index=index, columns=symbols) for name, data in values.items()}
+
+    def calculate_arrays(self, fields: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """``calculate_panel`` on raw float64 (time x symbol) arrays."""
+        high, low = fields["high"], fields["low"]
+        close, volume = fields["close"], fields["volume"]
+        out: Dict[str, np.ndarray] = {}
+
+        out["sma_20"] = self.sma(close, 20)
+        out["sma_50"] = self.sma(close, 50)
+        out["ema_12"] = self.ema(close, 12)
+        out["ema_26"] = self.ema(close, 26)
+        out["rsi"] = self.rsi(close)
+        out["macd"], out["macd_signal"], out["macd_histogram"] = self.macd(close)
+
+        upper, middle, lower = self.bollinger_bands(close)
+        out["bb_upper"], out["bb_middle"], out["bb_lower"] = upper, middle, lower
+        out["bb_width"] = _divide(upper - lower, middle)
+        out["bb_position"] = _divide(close - lower, upper - lower)
+
+        out["stoch_k"], out["stoch_d"] = self.stochastic_oscillator(high, low, close)
+        out["williams_r"] = self.williams_r(high, low, close)
+        out["atr"] = self.atr(high, low, close)
+        out["adx"] = self.adx(high, low, close)
+
+        out["volume_sma"] = self.sma(volume, 20)
+        out["obv"] = self.on_balance_volume(close, volume)
+        out["pvt"] = self.price_volume_trend(close, volume)
+        out["price_change"] = _divide(close - _shift(close), _shift(close))
+        out["volume_ratio"] = _divide(volume, out["volume_sma"])
+        return out
+
+    @staticmethod
+    def latest(panel: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+        """Last bar's indicators as a (symbol x indicator) frame, e.g. for screening."""
+        return pd.DataFrame({name: frame.iloc[-1] for name, frame in panel.items()})
+
+    @staticmethod
+    def to_arrow(panel: Mapping[str, pd.DataFrame], dropna: bool = True) -> "pa.Table":
+        """
+        Long-format Arrow table (timestamp, symbol, one column per indicator).
+
+        Args:
+            panel: ``calculate_panel`` output
+            dropna: Drop rows where the symbol has no indicator values at all
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required for Arrow output")
+
+        names = list(panel)
+        first = panel[names[0]]
+        rows, cols = first.shape
+        data = {name: panel[name].to_numpy(dtype=np.float64).reshape(-1) for name in names}
+        timestamps = np.repeat(first.index.to_numpy(), cols)
+        symbols = np.tile(np.asarray([str(symbol) for symbol in first.columns], dtype=object), rows)
+
+        if dropna:
+            keep = ~np.all(np.isnan(np.vstack(list(data.values()))), axis=0)
+            timestamps, symbols = timestamps[keep], symbols[keep]
+            data = {name: values[keep] for name, values in data.items()}
+
+        columns = {"timestamp": pa.array(timestamps), "symbol": pa.array(symbols, type=pa.string())}
+        columns.update({name: pa.array(values, from_pandas=True) for name, values in data.items()})
+        return pa.table(columns)
@@ -12,6 +12,8 @@ from enum import Enum
 import logging
 from datetime import datetime, timedelta
 
+from .rolling_kernels import OrderStatistics
+
 logger = logging.getLogger(__name__)
 
 class PatternType(Enum):
@@ -133,16 +135,20 @@ class TechnicalPatternAnalyzer:
         signals = []
         
         try:
+            # 視窗由最近一根往前擴張，以排序結構累加新 K棒，避免每個視窗重新排序
+            highs = df['high'].values
+            lows = df['low'].values
+            high_stats = OrderStatistics(highs[len(df) - self.min_pattern_days + 1:])
+            low_stats = OrderStatistics(lows[len(df) - self.min_pattern_days + 1:])
+
             for i in range(self.min_pattern_days, min(len(df), self.max_pattern_days)):
                 period_data = df.iloc[-i:]
-                
-                # 尋找水平支撐和阻力
-                highs = period_data['high'].values
-                lows = period_data['low'].values
+                high_stats.add(highs[-i])
+                low_stats.add(lows[-i])
                 
                 # 計算阻力位和支撐位
-                resistance_level = np.percentile(highs, 95)
-                support_level = np.percentile(lows, 5)
+                resistance_level = high_stats.quantile(0.95)
+                support_level = low_stats.quantile(0.05)
                 
                 # 檢查是否形成箱型
                 if self._is_rectangle_pattern(period_data, support_level, resistance_level):
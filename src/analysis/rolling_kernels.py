@@ -0,0 +1,340 @@
+"""
+Rolling-window primitives shared by indicators and pattern detectors.
+
+Two flavours:
+
+* Array kernels (``rolling_sum``, ``rolling_mean``, ``rolling_std``,
+  ``rolling_max``/``rolling_min``, ``rolling_quantile``) take 1D arrays or 2D
+  (time x symbol) arrays and work along axis 0. Sums and extremes use block
+  decomposition (prefix/suffix scans over blocks of ``window`` rows, van
+  Herk/Gil-Werman), so cost is linear in the number of rows whatever the
+  window length, and every sum only ever accumulates values from one window.
+* Streaming kernels (``RollingMoments`` with Welford updates, the
+  monotonic-deque ``RollingExtreme`` and the sorted-list ``OrderStatistics``)
+  consume one value at a time for live bars.
+
+NaN semantics follow ``pandas.rolling(window)`` with the default
+``min_periods``: a result is NaN until the window is full and whenever the
+window holds a NaN. As in pandas, a window of identical values has exactly
+that value as its mean and a variance of exactly 0, so flat spans give
+0/0 = NaN in ratios built on them rather than rounding residue.
+"""
+
+import bisect
+import math
+from collections import deque
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+NAN = float("nan")
+
+
+# ----------------------------------------------------------------------
+# Array kernels
+# ----------------------------------------------------------------------
+
+def _as_float_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _block_scan(values: np.ndarray, window: int, ufunc: np.ufunc) -> np.ndarray:
+    """
+    Apply an associative reduction over every trailing ``window`` of rows.
+
+    Rows are split into blocks of ``window``; a window ending at row ``t``
+    is the suffix of one block plus the prefix of the next, so two
+    ``ufunc.accumulate`` scans give every window in O(n).
+    """
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if window < 1 or n < window:
+        return out
+    if window == 1:
+        return values.astype(np.float64, copy=True)
+
+    blocks = -(-n // window)
+    padded = np.full((blocks * window,) + values.shape[1:], np.nan)
+    padded[:n] = values
+    shaped = padded.reshape((blocks, window) + values.shape[1:])
+    prefix = ufunc.accumulate(shaped, axis=1).reshape(padded.shape)
+    suffix = ufunc.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    ends = np.arange(window - 1, n)
+    starts = ends - window + 1
+    aligned = starts % window == 0
+    result = ufunc(suffix[starts], prefix[ends])
+    result[aligned] = prefix[ends[aligned]]
+    out[window - 1:] = result
+    return out
+
+
+def rolling_sum(values, window: int) -> np.ndarray:
+    """Sum of each trailing ``window`` of rows (1D or 2D, along axis 0)."""
+    return _block_scan(_as_float_array(values), window, np.add)
+
+
+def constant_windows(values, window: int) -> np.ndarray:
+    """Boolean mask of rows whose trailing ``window`` holds one repeated (non-NaN) value."""
+    values = _as_float_array(values)
+    if window <= 1 or len(values) < 2:
+        return ~np.isnan(values) & (window == 1)
+    changed = np.ones(values.shape)
+    changed[1:] = values[1:] != values[:-1]  # NaN never equals itself
+    out = rolling_sum(changed[1:], window - 1) == 0
+    return np.concatenate([np.zeros((1,) + values.shape[1:], dtype=bool), out]) & ~np.isnan(values)
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    """Mean of each trailing ``window`` of rows."""
+    values = _as_float_array(values)
+    mean = rolling_sum(values, window) / window
+    return np.where(constant_windows(values, window), values, mean)
+
+
+def rolling_var(values, window: int, ddof: int = 1) -> np.ndarray:
+    """
+    Variance of each trailing ``window`` of rows.
+
+    Values are centred on their column mean before squaring and each sum
+    covers a single window, which keeps cancellation error local.
+    """
+    values = _as_float_array(values)
+    if window - ddof <= 0:
+        return np.full(values.shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        centred = values - np.nanmean(values, axis=0) if np.isfinite(values).any() else values
+    total = rolling_sum(centred, window)
+    squares = rolling_sum(centred * centred, window)
+    variance = np.maximum(squares - total * total / window, 0.0) / (window - ddof)
+    return np.where(constant_windows(values, window), 0.0, variance)
+
+
+def rolling_std(values, window: int, ddof: int = 1) -> np.ndarray:
+    """Standard deviation of each trailing ``window`` of rows."""
+    return np.sqrt(rolling_var(values, window, ddof))
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """Maximum of each trailing ``window`` of rows."""
+    return _block_scan(_as_float_array(values), window, np.maximum)
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """Minimum of each trailing ``window`` of rows."""
+    return _block_scan(_as_float_array(values), window, np.minimum)
+
+
+def rolling_quantile(values, window: int, q: float) -> np.ndarray:
+    """
+    ``q``-quantile (0-1, linear interpolation as ``np.percentile``) of each
+    trailing ``window`` of rows, maintained with an ``OrderStatistics`` per column.
+    """
+    values = _as_float_array(values)
+    out = np.full(values.shape, np.nan)
+    columns = values.reshape(len(values), -1)
+    flat = out.reshape(len(values), -1)
+    for column in range(columns.shape[1]):
+        stats = OrderStatistics()
+        series = columns[:, column]
+        for t, x in enumerate(series):
+            stats.add(x)
+            if t >= window:
+                stats.remove(series[t - window])
+            if t >= window - 1:
+                flat[t, column] = stats.quantile(q)
+    return out
+
+
+# ----------------------------------------------------------------------
+# Streaming kernels
+# ----------------------------------------------------------------------
+
+class StatefulKernel:
+    """
+    Base for streaming kernels: generic snapshot/restore of instance attributes.
+
+    ``state()`` returns plain lists/numbers (deques keep their ``maxlen`` and
+    nested kernels are recursed into), so the result is JSON-serialisable.
+    """
+
+    def state(self) -> Dict[str, Any]:
+        out = {}
+        for name, value in vars(self).items():
+            if isinstance(value, deque):
+                out[name] = {"deque": list(value), "maxlen": value.maxlen}
+            elif isinstance(value, StatefulKernel):
+                out[name] = {"component": value.state()}
+            else:
+                out[name] = value
+        return out
+
+    def load(self, state: Mapping[str, Any]):
+        for name, value in state.items():
+            current = getattr(self, name, None)
+            if isinstance(value, dict) and "deque" in value:
+                setattr(self, name, deque(value["deque"], maxlen=value["maxlen"]))
+            elif isinstance(value, dict) and "component" in value and isinstance(current, StatefulKernel):
+                current.load(value["component"])
+            else:
+                setattr(self, name, value)
+
+
+class RollingMoments(StatefulKernel):
+    """
+    Windowed mean and sample variance (Welford add/remove updates).
+
+    Matches ``Series.rolling(window).mean()`` / ``.std()``: the result is NaN
+    until the window is full and while it holds a NaN. Removals leave rounding
+    residue, so the moments are recomputed from the window every ``window``
+    updates, and a window of identical values reports that value and a
+    variance of exactly 0 (as pandas does), so all-zero gains or a flat price
+    span give the same 0/0 = NaN downstream as the batch calculation.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.count = 0       # non-NaN values in the window
+        self.nans = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.run = 0         # trailing run of identical values
+        self.updates = 0     # since the last exact recompute
+
+    def _recompute(self):
+        finite = [x for x in self.values if not math.isnan(x)]
+        self.count = len(finite)
+        self.mean = math.fsum(finite) / self.count if finite else 0.0
+        self.m2 = math.fsum((x - self.mean) ** 2 for x in finite)
+        self.updates = 0
+
+    def _add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, x: float):
+        if self.count == 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.count -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (x - self.mean)
+
+    def update(self, x: float):
+        self.run = self.run + 1 if self.values and self.values[-1] == x else 1
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self._remove(old)
+        self.values.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self._add(x)
+        self.updates += 1
+        if self.updates >= self.window:
+            self._recompute()
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window and self.nans == 0
+
+    @property
+    def constant(self) -> bool:
+        return self.run >= self.window
+
+    @property
+    def average(self) -> float:
+        if not self.ready:
+            return NAN
+        return self.values[-1] if self.constant else self.mean
+
+    @property
+    def std(self) -> float:
+        if not self.ready or self.window < 2:
+            return NAN
+        if self.constant:
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / (self.window - 1))
+
+
+class RollingExtreme(StatefulKernel):
+    """Windowed max (or min) via a monotonic deque; amortised O(1) per value."""
+
+    def __init__(self, window: int, maximum: bool = True):
+        self.window = window
+        self.maximum = maximum
+        self.index = 0
+        self.candidates = deque()  # [position, value], values monotonic
+        self.nan_positions = deque()
+
+    def update(self, x: float) -> float:
+        position = self.index
+        self.index += 1
+        if math.isnan(x):
+            self.nan_positions.append(position)
+        else:
+            while self.candidates and (
+                self.candidates[-1][1] <= x if self.maximum else self.candidates[-1][1] >= x
+            ):
+                self.candidates.pop()
+            self.candidates.append([position, x])
+        expired = position - self.window
+        while self.candidates and self.candidates[0][0] <= expired:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] <= expired:
+            self.nan_positions.popleft()
+        if self.index < self.window or self.nan_positions or not self.candidates:
+            return NAN
+        return self.candidates[0][1]
+
+
+
+class OrderStatistics(StatefulKernel):
+    """
+    Multiset with sorted order for quantile queries (bisect-maintained list).
+
+    ``quantile`` matches ``np.percentile``'s default linear interpolation and
+    is NaN while the set holds a NaN, like the array kernels.
+    """
+
+    def __init__(self, values: Optional[Iterable[float]] = None):
+        self.sorted = []
+        self.nans = 0
+        if values is not None:
+            for x in values:
+                self.add(x)
+
+    def __len__(self) -> int:
+        return len(self.sorted) + self.nans
+
+    def add(self, x: float):
+        x = float(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            bisect.insort(self.sorted, x)
+
+    def remove(self, x: float):
+        x = float(x)
+        if math.isnan(x):
+            self.nans -= 1
+            return
+        position = bisect.bisect_left(self.sorted, x)
+        if position == len(self.sorted) or self.sorted[position] != x:
+            raise ValueError(f"{x} is not in the set")
+        del self.sorted[position]
+
+    def quantile(self, q: float) -> float:
+        if self.nans or not self.sorted:
+            return NAN
+        rank = q * (len(self.sorted) - 1)
+        lower = int(math.floor(rank))
+        upper = min(lower + 1, len(self.sorted) - 1)
+        return self.sorted[lower] + (self.sorted[upper] - self.sorted[lower]) * (rank - lower)
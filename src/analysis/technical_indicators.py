@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Iterable
 import logging
 
+from .indicator_planner import IndicatorPlanner
+from .latest_indicators import latest_indicator_values
+from .rolling_kernels import rolling_max, rolling_min
+
 # Try to import talib, fallback to manual calculations if not available
 try:
     import talib
@@ -150,8 +154,8 @@ class TechnicalIndicators:
             )
         
         # Manual calculation
-        lowest_low = low.rolling(window=k_period).min()
-        highest_high = high.rolling(window=k_period).max()
+        lowest_low = pd.Series(rolling_min(low.values, k_period), index=low.index)
+        highest_high = pd.Series(rolling_max(high.values, k_period), index=high.index)
         
         k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
         d_percent = k_percent.rolling(window=d_period).mean()
@@ -177,8 +181,8 @@ class TechnicalIndicators:
                            index=close.index)
         
         # Manual calculation
-        highest_high = high.rolling(window=period).max()
-        lowest_low = low.rolling(window=period).min()
+        highest_high = pd.Series(rolling_max(high.values, period), index=high.index)
+        lowest_low = pd.Series(rolling_min(low.values, period), index=low.index)
         
         wr = -100 * ((highest_high - close) / (highest_high - lowest_low))
         return wr
@@ -297,8 +301,31 @@ class IndicatorAnalyzer:
     Analyze technical indicators and generate signals.
     """
     
+    # Latest values reported by analyze()
+    SUMMARY_INDICATORS = (
+        'rsi', 'macd', 'macd_signal', 'macd_histogram', 'sma_20', 'sma_50', 'ema_12', 'ema_26',
+        'bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d', 'williams_r'
+    )
+    
     def __init__(self):
         self.ti = TechnicalIndicators()
+        self.planner = IndicatorPlanner()
+    
+    def calculate_indicators(self, data: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+        """
+        Calculate only the requested indicators, sharing intermediates.
+        
+        Args:
+            data: DataFrame with OHLCV columns
+            names: Indicator columns (as produced by calculate_all_indicators, or sma_N/ema_N)
+            
+        Returns:
+            DataFrame indexed like data with one column per requested indicator
+        """
+        names = list(names)
+        if TALIB_AVAILABLE:
+            return self.calculate_all_indicators(data)[names]
+        return self.planner.compute(data, names)
     
     def calculate_all_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -310,6 +337,14 @@ class IndicatorAnalyzer:
         Returns:
             DataFrame with all indicators added
         """
+        if not TALIB_AVAILABLE:
+            try:
+                indicators = self.planner.compute(data)
+                return pd.concat([data.drop(columns=indicators.columns, errors='ignore'), indicators], axis=1)
+            except Exception as e:
+                logger.error(f"Error calculating indicators: {str(e)}")
+                return data.copy()
+        
         df = data.copy()
         
         try:
@@ -449,12 +484,14 @@ class IndicatorAnalyzer:
         
         return strengths
     
-    def analyze(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def analyze(self, data: pd.DataFrame, latest_only: bool = True) -> Dict[str, Any]:
         """
         Comprehensive analysis of technical indicators
         
         Args:
             data: DataFrame with OHLCV data
+            latest_only: Compute only each indicator's last value from the tail
+                         it needs, instead of full-length indicator columns
             
         Returns:
             Dictionary with indicator values and analysis
@@ -462,12 +499,36 @@ class IndicatorAnalyzer:
         if data.empty:
             return {}
         
-        # Calculate all indicators
-        df_with_indicators = self.calculate_all_indicators(data)
+        if latest_only and not TALIB_AVAILABLE:
+            try:
+                return self._summary(latest_indicator_values(data, self.SUMMARY_INDICATORS), data)
+            except ValueError as e:
+                logger.debug(f"Latest-value path unavailable, using full calculation: {str(e)}")
+        
+        # Calculate the summarised indicators only
+        df_with_indicators = self.calculate_indicators(data, self.SUMMARY_INDICATORS)
+        return self.summarize(df_with_indicators, data)
+    
+    def summarize(self, df_with_indicators: pd.DataFrame, data: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Latest indicator values from an already computed indicator frame
+        
+        Args:
+            df_with_indicators: Frame holding at least SUMMARY_INDICATORS
+            data: DataFrame with OHLCV data the frame was computed from
+            
+        Returns:
+            Dictionary with indicator values and analysis
+        """
+        if data.empty:
+            return {}
         
         # Get latest values
         latest = df_with_indicators.iloc[-1] if len(df_with_indicators) > 0 else pd.Series()
-        
+        return self._summary(latest, data)
+    
+    def _summary(self, latest, data: pd.DataFrame) -> Dict[str, Any]:
+        """Summary dict from the last bar's indicator values (Series or dict)"""
         return {
             'rsi': latest.get('rsi', 50),
             'macd': latest.get('macd', 0),
@@ -8,6 +8,7 @@ import asyncio
 import json
 import logging
 import math
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
@@ -16,6 +17,14 @@ import numpy as np
 from config.settings import settings, US_SYMBOLS, TW_SYMBOLS
 from src.data_fetcher.us_stocks import USStockDataFetcher
 from src.data_fetcher.tw_stocks import TWStockDataFetcher
+from src.data_fetcher.bar_store import get_bar_store
+from src.data_fetcher.async_market_data import AsyncMarketData, quotes_to_columns
+from src.data_fetcher.quote_hub import QuoteHub
+from src.data_fetcher.symbol_master import get_symbol_master
+from src.data_fetcher.warmup import WarmupScheduler
+from src.database.market_data_repository import get_market_data_repository
+from src.cache.indicator_frame_cache import get_indicator_frame_cache
+from src.cache.swr_cache import SWRCache
 from src.analysis.technical_indicators import IndicatorAnalyzer
 from src.analysis.pattern_recognition import PatternRecognition
 from src.analysis.ai_analyzer import OpenAIAnalyzer
@@ -74,9 +83,11 @@ def normalize_taiwan_symbol(symbol: str) -> str:
     """將台股代號標準化為帶.TW後綴的格式，用於內部API處理"""
     symbol = symbol.upper().strip()
     
-    # 如果是純數字的台股代號，加上.TW後綴
+    # 如果是純數字的台股代號，或全市場代號表中的台股代號 (如 00878)，加上.TW後綴
     if symbol.isdigit() and len(symbol) == 4:
         return f"{symbol}.TW"
+    if symbol[:1].isdigit() and get_symbol_master().exchange_of(symbol) in ("TWSE", "TPEx"):
+        return f"{symbol}.TW"
     
     # 如果已經有.TW後綴，保持不變
     if symbol.endswith('.TW'):
@@ -98,13 +109,26 @@ def get_tradingview_symbol(symbol: str) -> str:
     # 美股保持原樣
     return symbol
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """應用生命週期：執行已註冊的 startup/shutdown 事件，並啟動熱門股票預熱排程"""
+    await app.router.startup()
+    if settings.warmup_enabled:
+        warmup_scheduler.start()
+    try:
+        yield
+    finally:
+        await warmup_scheduler.stop()
+        await app.router.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Trading System API",
     description="Advanced stock trading analysis with AI-powered insights",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -158,37 +182,127 @@ if os.path.exists("frontend/.next"):
     # Note: No public directory in this project structure
 
 # Initialize analyzers
-us_fetcher = USStockDataFetcher()
-tw_fetcher = TWStockDataFetcher()
+bar_store = get_bar_store()
+us_fetcher = USStockDataFetcher(bar_store=bar_store)
+tw_fetcher = TWStockDataFetcher(bar_store=bar_store)
+# Blocking fetches run on a bounded executor so routes never stall the event loop;
+# expired bars are served during the grace window while one refresh runs
+market_data = AsyncMarketData(
+    us_fetcher, tw_fetcher,
+    max_workers=settings.market_data_max_workers,
+    bars_cache=SWRCache(
+        settings.cache_ttl_seconds, settings.cache_stale_grace_seconds,
+        should_cache=lambda data: data is not None and not data.empty
+    ),
+    repository=get_market_data_repository() if settings.database_bars_enabled else None
+)
+app.add_event_handler("shutdown", market_data.shutdown)
+# One quote poller shared by all websocket clients
+quote_hub = QuoteHub(market_data.get_quotes, interval=5.0)
+app.add_event_handler("shutdown", quote_hub.close)
+
+# 全市場代號表：啟動時由本地檔案載入，過期則於背景重新下載上市櫃清單
+symbol_master = get_symbol_master()
+
+async def refresh_symbol_master():
+    """背景更新全市場代號表 (不阻塞啟動)"""
+    asyncio.get_running_loop().run_in_executor(None, symbol_master.refresh_if_stale)
+
+app.add_event_handler("startup", refresh_symbol_master)
+
 indicator_analyzer = IndicatorAnalyzer()
 pattern_recognizer = PatternRecognition()
 
-# 簡單的內存緩存
-from typing import Dict, Tuple
-import time
 
-class SimpleCache:
-    def __init__(self, ttl_seconds: int = 300):  # 5分鐘緩存
-        self.cache: Dict[str, Tuple[float, Any]] = {}
-        self.ttl = ttl_seconds
-    
-    def get(self, key: str):
-        if key in self.cache:
-            timestamp, data = self.cache[key]
-            if time.time() - timestamp < self.ttl:
-                return data
-            else:
-                del self.cache[key]
-        return None
-    
-    def set(self, key: str, data: Any):
-        self.cache[key] = (time.time(), data)
-    
-    def clear(self):
-        self.cache.clear()
+def _bars_key(data: pd.DataFrame) -> tuple:
+    """Identify a bar series by its span, length and last close."""
+    if data.empty:
+        return (0,)
+    last_close = float(data['close'].iloc[-1]) if 'close' in data.columns else None
+    return (str(data.index[0]), str(data.index[-1]), len(data), last_close)
+
 
-# 創建緩存實例
-stock_cache = SimpleCache(ttl_seconds=300)  # 5分鐘緩存
+# Indicator results keyed by the bars they were computed from
+indicator_cache = SWRCache(settings.cache_ttl_seconds, settings.cache_stale_grace_seconds, max_entries=256)
+
+# Indicator frames per symbol, extended bar by bar as new bars arrive
+indicator_frames = get_indicator_frame_cache()
+
+
+async def compute_indicators(symbol: str, data: pd.DataFrame, record: bool = True) -> pd.DataFrame:
+    """
+    Calculate all indicators once for concurrent requests on the same bars.
+
+    Frames are reused across routes and extended when only new bars arrive.
+    User requests (``record=True``) also keep the symbol in the warm-up set.
+    """
+    if record:
+        warmup_scheduler.record(symbol)
+    key = ("indicators", "all", symbol.upper(), _bars_key(data))
+    return await market_data.run_shared(key, indicator_frames.get_frame, symbol, data)
+
+
+async def analyze_indicators(symbol: str, data: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Indicator summary for the last bar.
+
+    Only the latest values are computed, so this neither builds nor caches a
+    full indicator frame; it still runs on the market data executor because
+    bars with gaps fall back to the full calculation.
+    """
+    key = ("analysis", symbol.upper(), _bars_key(data))
+    return await market_data.run_shared(key, indicator_analyzer.analyze, data)
+
+
+async def compute_signals(symbol: str, data_with_indicators: pd.DataFrame) -> pd.DataFrame:
+    """Signal columns for an indicator frame, cached like the indicators."""
+    key = ("signals", symbol.upper(), _bars_key(data_with_indicators))
+    frame = await indicator_cache.get_or_compute(
+        key, lambda: market_data.run_shared(key, indicator_analyzer.generate_signals, data_with_indicators)
+    )
+    return frame.copy(deep=False)
+
+
+async def detect_patterns(symbol: str, data: pd.DataFrame) -> Dict[str, Any]:
+    """Chart pattern scan for a bar series, cached like the indicators."""
+    key = ("patterns", symbol.upper(), _bars_key(data))
+    return await indicator_cache.get_or_compute(
+        key, lambda: market_data.run_shared(key, pattern_recognizer.analyze_all_patterns, data)
+    )
+
+
+# 預熱時使用的資料區間，對應各路由常用的 period 與台股天數
+WARMUP_RANGES = (("1mo", 30), ("3mo", 90), ("6mo", 180))
+
+
+async def warm_symbol(symbol: str):
+    """預熱單一股票：重新抓取K線，並計算技術指標、交易訊號與形態掃描"""
+    for period, days in WARMUP_RANGES:
+        if symbol.endswith('.TW') or symbol.endswith('.TWO'):
+            end_date = datetime.now()
+            data = await market_data.get_bars(
+                symbol, start_date=end_date - timedelta(days=days), end_date=end_date, refresh=True
+            )
+        else:
+            data = await market_data.get_bars(symbol, period=period, refresh=True)
+        if data.empty:
+            continue
+        data_with_indicators = await compute_indicators(symbol, data, record=False)
+        await compute_signals(symbol, data_with_indicators)
+        await detect_patterns(symbol, data)
+
+
+warmup_scheduler = WarmupScheduler(
+    warm_symbol,
+    US_SYMBOLS + TW_SYMBOLS,
+    interval=settings.update_interval_minutes * 60,
+    batch_size=settings.max_symbols_per_batch,
+    lead=settings.warmup_lead_minutes * 60
+)
+
+
+# 圖表 HTML 與 AI 建議緩存：過期後於寬限時間內先回傳舊內容，背景重新產生
+stock_cache = SWRCache(settings.cache_ttl_seconds, settings.cache_stale_grace_seconds)
 
 # Initialize AI analyzer if API key is available
 ai_analyzer = None
@@ -482,16 +596,16 @@ async def analyze_stock(
             else:
                 start_date = end_date - timedelta(days=90)  # default 3 months
             
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period=request.period)
+            data = await market_data.get_bars(symbol, period=request.period)
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
         
         # Calculate technical indicators
-        data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
-        data_with_signals = indicator_analyzer.generate_signals(data_with_indicators)
+        data_with_indicators = await compute_indicators(symbol, data)
+        data_with_signals = await compute_signals(symbol, data_with_indicators)
         
         # Extract latest indicators
         latest = data_with_indicators.iloc[-1]
@@ -516,7 +630,7 @@ async def analyze_stock(
         # Pattern recognition
         patterns = {}
         if request.include_patterns:
-            detected_patterns = pattern_recognizer.analyze_all_patterns(data)
+            detected_patterns = await detect_patterns(symbol, data)
             # Convert pattern objects to dictionaries
             for pattern_type, pattern_list in detected_patterns.items():
                 if pattern_type == 'support_resistance':
@@ -646,16 +760,16 @@ async def get_current_signals(symbol: str):
         if symbol.endswith('.TW'):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=30)  # 1 month
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period="1mo")
+            data = await market_data.get_bars(symbol, period="1mo")
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
         
         # Calculate indicators and signals
-        data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
-        data_with_signals = indicator_analyzer.generate_signals(data_with_indicators)
+        data_with_indicators = await compute_indicators(symbol, data)
+        data_with_signals = await compute_signals(symbol, data_with_indicators)
         
         # Get latest signals
         latest = data_with_signals.iloc[-1]
@@ -733,15 +847,15 @@ async def get_detected_patterns(symbol: str):
         if symbol.endswith('.TW'):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=180)  # 6 months
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period="6mo")
+            data = await market_data.get_bars(symbol, period="6mo")
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
         
         # Detect patterns
-        patterns = pattern_recognizer.analyze_all_patterns(data)
+        patterns = await detect_patterns(symbol, data)
         
         # Format patterns for response
         formatted_patterns = {}
@@ -803,7 +917,7 @@ async def run_backtest(request: BacktestRequest):
         # Fetch historical data
         logger.info(f"Fetching data for {symbol} from {start_date.date()} to {end_date.date()}")
         if symbol.endswith('.TW'):
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
             logger.info(f"TW data fetched: shape={data.shape}, index_type={type(data.index) if not data.empty else 'empty'}")
         else:
             # Calculate period for US stocks
@@ -822,7 +936,7 @@ async def run_backtest(request: BacktestRequest):
                 period = "max"
             
             logger.info(f"US stock period: {period}")
-            data = us_fetcher.fetch_historical_data(symbol, period=period)
+            data = await market_data.get_bars(symbol, period=period)
             logger.info(f"US data fetched: shape={data.shape}, index_type={type(data.index) if not data.empty else 'empty'}")
             
             # Filter by date range if we got more data than requested
@@ -840,7 +954,7 @@ async def run_backtest(request: BacktestRequest):
         
         # Calculate technical indicators
         logger.info(f"Data before indicators: shape={data.shape}, index_type={type(data.index)}")
-        data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
+        data_with_indicators = await compute_indicators(symbol, data)
         logger.info(f"Data with indicators: shape={data_with_indicators.shape}, index_type={type(data_with_indicators.index)}")
         
         # Create strategy
@@ -1003,15 +1117,15 @@ async def ai_discuss_strategy(request: StrategyDiscussionRequest):
         if symbol.endswith('.TW'):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=90 if request.period == "3mo" else 30)
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period=request.period)
+            data = await market_data.get_bars(symbol, period=request.period)
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
         
         # 計算技術指標
-        data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
+        data_with_indicators = await compute_indicators(symbol, data)
         latest = data_with_indicators.iloc[-1]
         
         technical_indicators = {
@@ -1109,9 +1223,9 @@ async def ai_optimize_backtest(request: BacktestOptimizationRequest):
         if symbol.endswith('.TW'):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=180)  # 6個月數據
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period="6mo")
+            data = await market_data.get_bars(symbol, period="6mo")
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
@@ -1202,9 +1316,9 @@ async def get_advanced_patterns(symbol: str, period: str = "3mo"):
                 start_date = end_date - timedelta(days=180)
             else:  # 3mo default
                 start_date = end_date - timedelta(days=90)
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period=period)
+            data = await market_data.get_bars(symbol, period=period)
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
@@ -1294,9 +1408,9 @@ async def get_candlestick_chart(
                 start_date = end_date - timedelta(days=180)
             else:  # 3mo default
                 start_date = end_date - timedelta(days=90)
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period=period)
+            data = await market_data.get_bars(symbol, period=period)
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
@@ -1304,7 +1418,7 @@ async def get_candlestick_chart(
         # 計算技術指標
         indicators = None
         if include_indicators:
-            data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
+            data_with_indicators = await compute_indicators(symbol, data)
             indicators = {
                 "sma_20": data_with_indicators.get('sma_20'),
                 "sma_50": data_with_indicators.get('sma_50'),
@@ -1382,16 +1496,16 @@ async def get_performance_chart(symbol: str, strategy: str = "pattern_trading",
         start_date = end_date - timedelta(days=days)
         
         if symbol.endswith('.TW'):
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period="3mo")
+            data = await market_data.get_bars(symbol, period="3mo")
             data = data[(data.index.date >= start_date.date()) & (data.index.date <= end_date.date())]
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
         
         # 計算技術指標
-        data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
+        data_with_indicators = await compute_indicators(symbol, data)
         
         # 創建策略並運行回測
         trading_strategy = StrategyFactory.create_strategy(strategy)
@@ -1457,9 +1571,9 @@ async def get_professional_chart(
                 start_date = end_date - timedelta(days=180)
             else:  # 3mo default
                 start_date = end_date - timedelta(days=90)
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+            data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
         else:
-            data = us_fetcher.fetch_historical_data(symbol, period=period)
+            data = await market_data.get_bars(symbol, period=period)
         
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
@@ -1467,7 +1581,7 @@ async def get_professional_chart(
         # 計算技術指標
         indicators = None
         if include_indicators:
-            data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
+            data_with_indicators = await compute_indicators(symbol, data)
             indicators = {
                 "sma_20": data_with_indicators.get('sma_20'),
                 "sma_50": data_with_indicators.get('sma_50'),
@@ -1552,9 +1666,9 @@ async def get_tradingview_chart(
                 if symbol.endswith('.TW'):
                     end_date = datetime.now()
                     start_date = end_date - timedelta(days=90)
-                    data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
+                    data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date)
                 else:
-                    data = us_fetcher.fetch_historical_data(symbol, period="3mo")
+                    data = await market_data.get_bars(symbol, period="3mo")
                 
                 if not data.empty:
                     # 執行形態分析
@@ -1620,6 +1734,187 @@ async def get_tradingview_chart(
         logger.error(f"TradingView圖表錯誤: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def build_custom_chart(
+    symbol: str,
+    original_symbol: str,
+    theme: str,
+    strategy: str,
+    include_ai: bool,
+    fast_mode: bool,
+    language: str,
+    refresh_bars: bool = False
+) -> str:
+    """產生定制圖表 HTML（K線、成交量、RSI 與 AI 建議）；refresh_bars 時略過 K線快取"""
+    # 快速獲取基本數據 - 只取最近 30 天用於 UI 顯示
+    if symbol.endswith('.TW'):
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=30)  # 減少到 30 天
+        data = await market_data.get_bars(symbol, start_date=start_date, end_date=end_date, refresh=refresh_bars)
+    else:
+        data = await market_data.get_bars(symbol, period="1mo", refresh=refresh_bars)  # 減少到 1 個月
+    
+    if data.empty:
+        # 快速返回默認數據而不是錯誤
+        stock_data = {
+            "current_price": 0,
+            "change_percent": 0,
+            "volume": 0,
+            "rsi": 50,
+            "market_open": False
+        }
+        ai_recommendations = {
+            "hold_recommendation": {
+                "confidence": 50,
+                "reasoning": f"無法獲取 {symbol} 的數據，請檢查股票代號是否正確"
+            }
+        }
+    else:
+        # 快速計算基本指標 - 只計算必要的
+        data_with_indicators = await compute_indicators(symbol, data)
+        latest = data_with_indicators.iloc[-1]
+        
+        # 準備股票數據
+        stock_data = {
+            "current_price": float(latest['close']),
+            "change_percent": float(((latest['close'] - data_with_indicators.iloc[-2]['close']) / data_with_indicators.iloc[-2]['close'] * 100)) if len(data_with_indicators) > 1 else 0,
+            "volume": int(latest['volume']),
+            "rsi": float(latest.get('rsi', 50)),
+            "market_open": us_fetcher.is_market_open() if not symbol.endswith('.TW') else tw_fetcher.is_tw_market_open()
+        }
+        
+        # 簡化的AI建議 - 不進行複雜分析
+        ai_recommendations = None
+        if include_ai and not fast_mode and ai_analyzer:
+            try:
+                # 簡化的技術指標
+                technical_indicators = {
+                    "rsi": latest.get('rsi'),
+                    "sma_20": latest.get('sma_20'),
+                    "sma_50": latest.get('sma_50'),
+                }
+                
+                # 清理技術指標
+                technical_indicators = {
+                    k: float(v) for k, v in technical_indicators.items() 
+                    if v is not None and not pd.isna(v) and math.isfinite(float(v))
+                }
+                
+                # 快速 AI 分析
+                ai_result = await ai_analyzer.analyze_technical_data(
+                    symbol, data_with_indicators, technical_indicators, {}, 
+                    context=None, language=language
+                )
+                
+                # 基於AI分析生成建議區間
+                current_price = stock_data["current_price"]
+                
+                if ai_result.recommendation == "BUY":
+                    ai_recommendations = {
+                        "buy_zone": {
+                            "price_low": current_price * 0.98,
+                            "price_high": current_price * 1.02,
+                            "target_price": ai_result.price_target or current_price * 1.08,
+                            "stop_loss": ai_result.stop_loss or current_price * 0.95,
+                            "confidence": int(ai_result.confidence * 100),
+                            "reasoning": ai_result.reasoning[:100] + "..."  # 截短推理文字
+                        }
+                    }
+                elif ai_result.recommendation == "SELL":
+                    ai_recommendations = {
+                        "sell_zone": {
+                            "price_low": current_price * 0.98,
+                            "price_high": current_price * 1.02,
+                            "target_price": ai_result.price_target or current_price * 0.92,
+                            "stop_loss": ai_result.stop_loss or current_price * 1.05,
+                            "confidence": int(ai_result.confidence * 100),
+                            "reasoning": ai_result.reasoning[:100] + "..."
+                        }
+                    }
+                else:
+                    ai_recommendations = {
+                        "hold_recommendation": {
+                            "confidence": int(ai_result.confidence * 100),
+                            "reasoning": ai_result.reasoning[:100] + "..."
+                        }
+                    }
+                    
+            except Exception as e:
+                logger.warning(f"AI分析失敗: {str(e)}")
+                ai_recommendations = None
+        
+        # 快速模式的 AI 建議
+        if ai_recommendations is None:
+            current_price = stock_data.get("current_price", 0)
+            rsi = stock_data.get("rsi", 50)
+            
+            # 基於簡單的 RSI 規則生成建議
+            if rsi < 30:
+                ai_recommendations = {
+                    "buy_zone": {
+                        "price_low": current_price * 0.98,
+                        "price_high": current_price * 1.02,
+                        "target_price": current_price * 1.08,
+                        "stop_loss": current_price * 0.95,
+                        "confidence": 70,
+                        "reasoning": f"RSI {rsi:.1f} 顯示超賣，技術面支持買入"
+                    }
+                }
+            elif rsi > 70:
+                ai_recommendations = {
+                    "sell_zone": {
+                        "price_low": current_price * 0.98,
+                        "price_high": current_price * 1.02,
+                        "target_price": current_price * 0.92,
+                        "stop_loss": current_price * 1.05,
+                        "confidence": 70,
+                        "reasoning": f"RSI {rsi:.1f} 顯示超買，建議減倉"
+                    }
+                }
+            else:
+                ai_recommendations = {
+                    "hold_recommendation": {
+                        "confidence": 60,
+                        "reasoning": f"RSI {rsi:.1f} 處於中性區間，建議持有觀望"
+                    }
+                }
+    
+    # 準備策略信息
+    strategy_info = {
+        "name": "RSI + K線 + 成交量分析",
+        "description": "基於RSI指標、K線形態和成交量的綜合分析策略",
+        "parameters": {
+            "RSI週期": "14天",
+            "超買線": "70",
+            "超賣線": "30",
+            "成交量倍數": "1.5x",
+            "K線週期": "日線"
+        },
+        "risk_level": "中等"
+    }
+    
+    if strategy == "pattern_trading":
+        strategy_info.update({
+            "name": "形態交易策略",
+            "description": "基於經典圖表形態的交易策略，結合RSI和成交量確認",
+            "parameters": {
+                "形態信心度": ">60%",
+                "風險報酬比": "1:2",
+                "RSI確認": "啟用",
+                "成交量確認": "啟用"
+            }
+        })
+    
+    # 生成定制圖表
+    chart_html = custom_tradingview.create_trading_chart(
+        symbol=original_symbol,  # 傳遞原始輸入的symbol給圖表生成器處理
+        stock_data=stock_data,
+        ai_recommendations=ai_recommendations,
+        strategy_info=strategy_info,
+        theme=theme
+    )
+    return chart_html
+
+
 @app.get("/chart/custom/{symbol}")
 async def get_custom_trading_chart(
     symbol: str, 
@@ -1649,183 +1944,14 @@ async def get_custom_trading_chart(
         
         # 檢查緩存
         cache_key = f"chart_data_{normalized_symbol}_{theme}_{strategy}"
-        cached_result = stock_cache.get(cache_key)
-        if cached_result:
-            logger.info(f"Returning cached data for {symbol}")
-            return Response(content=cached_result, media_type="text/html")
-        
-        # 快速獲取基本數據 - 只取最近 30 天用於 UI 顯示
-        if symbol.endswith('.TW'):
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=30)  # 減少到 30 天
-            data = tw_fetcher.fetch_historical_data(symbol, start_date=start_date, end_date=end_date)
-        else:
-            data = us_fetcher.fetch_historical_data(symbol, period="1mo")  # 減少到 1 個月
-        
-        if data.empty:
-            # 快速返回默認數據而不是錯誤
-            stock_data = {
-                "current_price": 0,
-                "change_percent": 0,
-                "volume": 0,
-                "rsi": 50,
-                "market_open": False
-            }
-            ai_recommendations = {
-                "hold_recommendation": {
-                    "confidence": 50,
-                    "reasoning": f"無法獲取 {symbol} 的數據，請檢查股票代號是否正確"
-                }
-            }
-        else:
-            # 快速計算基本指標 - 只計算必要的
-            data_with_indicators = indicator_analyzer.calculate_all_indicators(data)
-            latest = data_with_indicators.iloc[-1]
-            
-            # 準備股票數據
-            stock_data = {
-                "current_price": float(latest['close']),
-                "change_percent": float(((latest['close'] - data_with_indicators.iloc[-2]['close']) / data_with_indicators.iloc[-2]['close'] * 100)) if len(data_with_indicators) > 1 else 0,
-                "volume": int(latest['volume']),
-                "rsi": float(latest.get('rsi', 50)),
-                "market_open": us_fetcher.is_market_open() if not symbol.endswith('.TW') else tw_fetcher.is_tw_market_open()
-            }
-            
-            # 簡化的AI建議 - 不進行複雜分析
-            ai_recommendations = None
-            if include_ai and not fast_mode and ai_analyzer:
-                try:
-                    # 簡化的技術指標
-                    technical_indicators = {
-                        "rsi": latest.get('rsi'),
-                        "sma_20": latest.get('sma_20'),
-                        "sma_50": latest.get('sma_50'),
-                    }
-                    
-                    # 清理技術指標
-                    technical_indicators = {
-                        k: float(v) for k, v in technical_indicators.items() 
-                        if v is not None and not pd.isna(v) and math.isfinite(float(v))
-                    }
-                    
-                    # 快速 AI 分析
-                    ai_result = await ai_analyzer.analyze_technical_data(
-                        symbol, data_with_indicators, technical_indicators, {}, 
-                        context=None, language=language
-                    )
-                    
-                    # 基於AI分析生成建議區間
-                    current_price = stock_data["current_price"]
-                    
-                    if ai_result.recommendation == "BUY":
-                        ai_recommendations = {
-                            "buy_zone": {
-                                "price_low": current_price * 0.98,
-                                "price_high": current_price * 1.02,
-                                "target_price": ai_result.price_target or current_price * 1.08,
-                                "stop_loss": ai_result.stop_loss or current_price * 0.95,
-                                "confidence": int(ai_result.confidence * 100),
-                                "reasoning": ai_result.reasoning[:100] + "..."  # 截短推理文字
-                            }
-                        }
-                    elif ai_result.recommendation == "SELL":
-                        ai_recommendations = {
-                            "sell_zone": {
-                                "price_low": current_price * 0.98,
-                                "price_high": current_price * 1.02,
-                                "target_price": ai_result.price_target or current_price * 0.92,
-                                "stop_loss": ai_result.stop_loss or current_price * 1.05,
-                                "confidence": int(ai_result.confidence * 100),
-                                "reasoning": ai_result.reasoning[:100] + "..."
-                            }
-                        }
-                    else:
-                        ai_recommendations = {
-                            "hold_recommendation": {
-                                "confidence": int(ai_result.confidence * 100),
-                                "reasoning": ai_result.reasoning[:100] + "..."
-                            }
-                        }
-                        
-                except Exception as e:
-                    logger.warning(f"AI分析失敗: {str(e)}")
-                    ai_recommendations = None
-            
-            # 快速模式的 AI 建議
-            if ai_recommendations is None:
-                current_price = stock_data.get("current_price", 0)
-                rsi = stock_data.get("rsi", 50)
-                
-                # 基於簡單的 RSI 規則生成建議
-                if rsi < 30:
-                    ai_recommendations = {
-                        "buy_zone": {
-                            "price_low": current_price * 0.98,
-                            "price_high": current_price * 1.02,
-                            "target_price": current_price * 1.08,
-                            "stop_loss": current_price * 0.95,
-                            "confidence": 70,
-                            "reasoning": f"RSI {rsi:.1f} 顯示超賣，技術面支持買入"
-                        }
-                    }
-                elif rsi > 70:
-                    ai_recommendations = {
-                        "sell_zone": {
-                            "price_low": current_price * 0.98,
-                            "price_high": current_price * 1.02,
-                            "target_price": current_price * 0.92,
-                            "stop_loss": current_price * 1.05,
-                            "confidence": 70,
-                            "reasoning": f"RSI {rsi:.1f} 顯示超買，建議減倉"
-                        }
-                    }
-                else:
-                    ai_recommendations = {
-                        "hold_recommendation": {
-                            "confidence": 60,
-                            "reasoning": f"RSI {rsi:.1f} 處於中性區間，建議持有觀望"
-                        }
-                    }
-        
-        # 準備策略信息
-        strategy_info = {
-            "name": "RSI + K線 + 成交量分析",
-            "description": "基於RSI指標、K線形態和成交量的綜合分析策略",
-            "parameters": {
-                "RSI週期": "14天",
-                "超買線": "70",
-                "超賣線": "30",
-                "成交量倍數": "1.5x",
-                "K線週期": "日線"
-            },
-            "risk_level": "中等"
-        }
-        
-        if strategy == "pattern_trading":
-            strategy_info.update({
-                "name": "形態交易策略",
-                "description": "基於經典圖表形態的交易策略，結合RSI和成交量確認",
-                "parameters": {
-                    "形態信心度": ">60%",
-                    "風險報酬比": "1:2",
-                    "RSI確認": "啟用",
-                    "成交量確認": "啟用"
-                }
-            })
-        
-        # 生成定制圖表
-        chart_html = custom_tradingview.create_trading_chart(
-            symbol=original_symbol,  # 傳遞原始輸入的symbol給圖表生成器處理
-            stock_data=stock_data,
-            ai_recommendations=ai_recommendations,
-            strategy_info=strategy_info,
-            theme=theme
+        # 背景更新以新抓取的 K線重建圖表，避免在過期的 K線快取上重建
+        chart_html = await stock_cache.get_or_compute(
+            cache_key,
+            lambda: build_custom_chart(symbol, original_symbol, theme, strategy, include_ai, fast_mode, language),
+            refresh=lambda: build_custom_chart(symbol, original_symbol, theme, strategy, include_ai, fast_mode,
+                                               language, refresh_bars=True)
         )
         
-        # 緩存結果
-        stock_cache.set(cache_key, chart_html)
-        logger.info(f"Cached chart data for {normalized_symbol}")
-        
         # 返回帶有強制刷新headers的響應
         headers = {
             "Cache-Control": "no-cache, no-store, must-revalidate",
@@ -1956,25 +2082,39 @@ async def search_taiwan_symbols(query: str, limit: int = 10):
         taiwan_widget = get_enhanced_taiwan_widget()
         results = []
         
-        query_upper = query.upper()
-        for code, info in taiwan_widget.taiwan_stocks.items():
-            if (query_upper in code or 
-                query in info["name"] or
-                query in info["industry"]):
-                
-                stock_info = taiwan_widget.get_stock_info(code)
+        if symbol_master.is_loaded():
+            for instrument in symbol_master.search(query, limit, market="TW"):
+                stock_info = taiwan_widget.get_stock_info(instrument.code)
                 results.append({
-                    "code": code,
-                    "name": info["name"],
-                    "industry": info["industry"],
-                    "exchange": info["exchange"],
-                    "market_cap": info["market_cap"],
+                    "code": instrument.code,
+                    "name": instrument.name,
+                    "industry": stock_info["industry"],
+                    "exchange": instrument.exchange,
+                    "market_cap": stock_info["market_cap"],
                     "tradingview_symbol": stock_info["tradingview_symbol"],
-                    "full_symbol": stock_info["full_symbol"]
+                    "full_symbol": instrument.symbol
                 })
+        else:
+            # 代號表尚未載入時搜尋內建清單
+            query_upper = query.upper()
+            for code, info in taiwan_widget.taiwan_stocks.items():
+                if (query_upper in code or 
+                    query in info["name"] or
+                    query in info["industry"]):
+                
+                    stock_info = taiwan_widget.get_stock_info(code)
+                    results.append({
+                        "code": code,
+                        "name": info["name"],
+                        "industry": info["industry"],
+                        "exchange": info["exchange"],
+                        "market_cap": info["market_cap"],
+                        "tradingview_symbol": stock_info["tradingview_symbol"],
+                        "full_symbol": stock_info["full_symbol"]
+                    })
                 
-                if len(results) >= limit:
-                    break
+                    if len(results) >= limit:
+                        break
         
         return {
             "success": True,
@@ -2070,26 +2210,41 @@ async def search_us_symbols(query: str, limit: int = 10):
         us_widget = get_enhanced_us_widget()
         results = []
         
-        query_upper = query.upper()
-        for code, info in us_widget.us_stocks.items():
-            if (query_upper in code or 
-                query.lower() in info["name"].lower() or
-                query.lower() in info["industry"].lower() or
-                query.lower() in info["sector"].lower()):
-                
+        if symbol_master.is_loaded():
+            for instrument in symbol_master.search(query, limit, market="US"):
+                info = us_widget.us_stocks.get(instrument.code, {})
                 results.append({
-                    "code": code,
-                    "name": info["name"],
-                    "industry": info["industry"],
-                    "sector": info["sector"],
-                    "exchange": info["exchange"],
-                    "market_cap": info["market_cap"],
-                    "tradingview_symbol": code,
-                    "full_symbol": code
+                    "code": instrument.code,
+                    "name": instrument.name,
+                    "industry": info.get("industry", "ETF" if instrument.type == "etf" else ""),
+                    "sector": info.get("sector", ""),
+                    "exchange": instrument.exchange,
+                    "market_cap": info.get("market_cap", ""),
+                    "tradingview_symbol": instrument.code,
+                    "full_symbol": instrument.code
                 })
+        else:
+            # 代號表尚未載入時搜尋內建清單
+            query_upper = query.upper()
+            for code, info in us_widget.us_stocks.items():
+                if (query_upper in code or 
+                    query.lower() in info["name"].lower() or
+                    query.lower() in info["industry"].lower() or
+                    query.lower() in info["sector"].lower()):
                 
-                if len(results) >= limit:
-                    break
+                    results.append({
+                        "code": code,
+                        "name": info["name"],
+                        "industry": info["industry"],
+                        "sector": info["sector"],
+                        "exchange": info["exchange"],
+                        "market_cap": info["market_cap"],
+                        "tradingview_symbol": code,
+                        "full_symbol": code
+                    })
+                
+                    if len(results) >= limit:
+                        break
         
         return {
             "success": True,
@@ -2107,14 +2262,26 @@ async def search_us_symbols(query: str, limit: int = 10):
 async def clear_cache():
     """清除緩存，強制重新載入數據"""
     stock_cache.clear()
+    market_data.bars_cache.clear()
+    indicator_cache.clear()
+    indicator_frames.clear()
     return {"message": "Cache cleared successfully", "timestamp": datetime.now()}
 
 @app.get("/cache-status")
 async def get_cache_status():
     """獲取緩存狀態"""
     return {
-        "cache_size": len(stock_cache.cache),
-        "cache_keys": list(stock_cache.cache.keys()),
+        "cache_size": len(stock_cache),
+        "cache_keys": stock_cache.keys(),
+        "response_cache": stock_cache.get_stats(),
+        "bars_cache": market_data.bars_cache.get_stats(),
+        "indicator_cache": indicator_cache.get_stats(),
+        "indicator_frames": indicator_frames.get_stats(),
+        "single_flight": market_data.flights.get_stats(),
+        "quote_hub": quote_hub.get_stats(),
+        "symbol_master": symbol_master.get_stats(),
+        "tw_source_router": tw_fetcher.source_router.get_stats(),
+        "warmup": warmup_scheduler.get_stats(),
         "timestamp": datetime.now()
     }
 
@@ -2160,16 +2327,11 @@ async def get_stock_data_component(symbol: str):
         
         try:
             # 嘗試獲取真實股價數據
-            if normalized_symbol.endswith('.TW'):
-                # 台股數據
-                data = tw_fetcher.get_stock_data(normalized_symbol, "1mo")
-            else:
-                # 美股數據  
-                data = us_fetcher.get_stock_data(normalized_symbol, "1mo")
+            data = await market_data.get_stock_data(normalized_symbol, "1mo")
             
             if data is not None and not data.empty:
                 # 計算技術指標
-                indicators = indicator_analyzer.analyze(data)
+                indicators = await analyze_indicators(normalized_symbol, data)
                 current_price = float(data['close'].iloc[-1]) if len(data) > 0 else 0
                 prev_price = float(data['close'].iloc[-2]) if len(data) > 1 else current_price
                 change_percent = ((current_price - prev_price) / prev_price) * 100 if prev_price != 0 else 0
@@ -2284,6 +2446,47 @@ async def get_stock_data_component(symbol: str):
             "display_symbol": symbol
         }
 
+async def build_ai_recommendations(symbol: str) -> Dict[str, Any]:
+    """依 RSI 快速產生 AI 建議區間"""
+    # 獲取基本股票數據計算 RSI
+    stock_data_response = await get_stock_data_component(symbol)
+    rsi = stock_data_response.get('rsi', 50)
+    current_price = stock_data_response.get('current_price', 0)
+    
+    # 基於 RSI 快速生成建議
+    ai_recommendations = None
+    if rsi < 30:
+        ai_recommendations = {
+            "buy_zone": {
+                "price_low": current_price * 0.98,
+                "price_high": current_price * 1.02,
+                "target_price": current_price * 1.08,
+                "stop_loss": current_price * 0.95,
+                "confidence": 75,
+                "reasoning": f"RSI {rsi:.1f} 顯示嚴重超賣，技術面支持反彈買入"
+            }
+        }
+    elif rsi > 70:
+        ai_recommendations = {
+            "sell_zone": {
+                "price_low": current_price * 0.98,
+                "price_high": current_price * 1.02,
+                "target_price": current_price * 0.92,
+                "stop_loss": current_price * 1.05,
+                "confidence": 75,
+                "reasoning": f"RSI {rsi:.1f} 顯示嚴重超買，建議獲利了結"
+            }
+        }
+    else:
+        ai_recommendations = {
+            "hold_recommendation": {
+                "confidence": 60,
+                "reasoning": f"RSI {rsi:.1f} 處於中性區間，建議持有觀望等待明確信號"
+            }
+        }
+    return ai_recommendations
+
+
 @app.get("/api/ai-recommendations/{symbol}")
 async def get_ai_recommendations_component(symbol: str):
     """異步獲取AI建議組件 - 支持台股代號自動轉換"""
@@ -2294,51 +2497,7 @@ async def get_ai_recommendations_component(symbol: str):
         
         # 檢查緩存
         cache_key = f"ai_rec_{normalized_symbol}"
-        cached_data = stock_cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # 獲取基本股票數據計算 RSI
-        stock_data_response = await get_stock_data_component(symbol)
-        rsi = stock_data_response.get('rsi', 50)
-        current_price = stock_data_response.get('current_price', 0)
-        
-        # 基於 RSI 快速生成建議
-        ai_recommendations = None
-        if rsi < 30:
-            ai_recommendations = {
-                "buy_zone": {
-                    "price_low": current_price * 0.98,
-                    "price_high": current_price * 1.02,
-                    "target_price": current_price * 1.08,
-                    "stop_loss": current_price * 0.95,
-                    "confidence": 75,
-                    "reasoning": f"RSI {rsi:.1f} 顯示嚴重超賣，技術面支持反彈買入"
-                }
-            }
-        elif rsi > 70:
-            ai_recommendations = {
-                "sell_zone": {
-                    "price_low": current_price * 0.98,
-                    "price_high": current_price * 1.02,
-                    "target_price": current_price * 0.92,
-                    "stop_loss": current_price * 1.05,
-                    "confidence": 75,
-                    "reasoning": f"RSI {rsi:.1f} 顯示嚴重超買，建議獲利了結"
-                }
-            }
-        else:
-            ai_recommendations = {
-                "hold_recommendation": {
-                    "confidence": 60,
-                    "reasoning": f"RSI {rsi:.1f} 處於中性區間，建議持有觀望等待明確信號"
-                }
-            }
-        
-        # 緩存結果
-        stock_cache.set(cache_key, ai_recommendations)
-        
-        return ai_recommendations
+        return await stock_cache.get_or_compute(cache_key, lambda: build_ai_recommendations(symbol))
         
     except Exception as e:
         logger.error(f"Error fetching AI recommendations for {symbol}: {str(e)}")
@@ -2354,32 +2513,45 @@ async def websocket_endpoint(websocket: WebSocket, symbol: str):
     """WebSocket endpoint for real-time updates."""
     await manager.connect(websocket)
     symbol = symbol.upper()
+    queue = quote_hub.subscribe(symbol)
     
     try:
         while True:
-            # Get real-time quote
-            if symbol.endswith('.TW'):
-                quote = tw_fetcher.get_real_time_quote(symbol)
-            else:
-                quote = us_fetcher.get_real_time_quote(symbol)
-            
-            if quote:
-                await manager.send_personal_message(json.dumps({
-                    "symbol": symbol,
-                    "price": quote.price if hasattr(quote, 'price') else quote.get('price'),
-                    "change": quote.change if hasattr(quote, 'change') else quote.get('change'),
-                    "change_percent": quote.change_percent if hasattr(quote, 'change_percent') else quote.get('change_percent'),
-                    "timestamp": datetime.now().isoformat()
-                }), websocket)
+            # Wait for the shared poller to publish the next quote
+            quote = await queue.get()
             
-            # Wait before next update
-            await asyncio.sleep(5)
+            await manager.send_personal_message(json.dumps({
+                "symbol": symbol,
+                "price": quote.price if hasattr(quote, 'price') else quote.get('price'),
+                "change": quote.change if hasattr(quote, 'change') else quote.get('change'),
+                "change_percent": quote.change_percent if hasattr(quote, 'change_percent') else quote.get('change_percent'),
+                "timestamp": datetime.now().isoformat()
+            }), websocket)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error for {symbol}: {str(e)}")
         manager.disconnect(websocket)
+    finally:
+        quote_hub.unsubscribe(symbol, queue)
+
+@app.get("/api/quotes")
+async def get_batch_quotes(symbols: str):
+    """
+    批次即時報價 (欄式格式)
+    symbols 以逗號分隔，例如 AAPL,MSFT,2330
+    """
+    symbol_list = list(dict.fromkeys(
+        normalize_taiwan_symbol(s) for s in symbols.split(',') if s.strip()
+    ))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="請提供至少一個股票代號")
+    if len(symbol_list) > 200:
+        raise HTTPException(status_code=400, detail="一次最多查詢 200 個股票代號")
+    
+    quotes = await market_data.get_quotes(symbol_list)
+    return quotes_to_columns(symbol_list, quotes)
 
 # 市場切換 API 端點
 @app.post("/api/market/switch")
@@ -2421,10 +2593,7 @@ async def get_pattern_signals(request: PatternSignalRequest):
     """
     try:
         # 獲取股價數據
-        if request.symbol.endswith('.TW'):
-            df = tw_fetcher.get_stock_data(request.symbol, request.period)
-        else:
-            df = us_fetcher.get_stock_data(request.symbol, request.period)
+        df = await market_data.get_stock_data(request.symbol, request.period)
         
         if df is None or df.empty:
             raise HTTPException(status_code=404, detail=f"無法獲取 {request.symbol} 的數據")
@@ -2452,10 +2621,7 @@ async def start_strategy_chat(request: StrategyAnalysisRequest):
     """
     try:
         # 獲取股價數據和分析
-        if request.symbol.endswith('.TW'):
-            df = tw_fetcher.get_stock_data(request.symbol, request.period)
-        else:
-            df = us_fetcher.get_stock_data(request.symbol, request.period)
+        df = await market_data.get_stock_data(request.symbol, request.period)
         
         if df is None or df.empty:
             raise HTTPException(status_code=404, detail=f"無法獲取 {request.symbol} 的數據")
@@ -2508,7 +2674,7 @@ async def send_chat_message(request: StrategyChatRequest):
         # 更新上下文（如果提供新股票）
         context = None
         if request.symbol:
-            df = us_fetcher.get_stock_data(request.symbol, "1mo") if not request.symbol.endswith('.TW') else tw_fetcher.get_stock_data(request.symbol, "1mo")
+            df = await market_data.get_stock_data(request.symbol, "1mo")
             if df is not None and not df.empty:
                 signals = buy_signal_engine.generate_buy_signals(request.symbol, df)
                 context = StrategyContext(
@@ -2569,10 +2735,7 @@ async def run_pattern_backtest(request: PatternBacktestRequest):
         start_date = datetime.strptime(request.start_date, '%Y-%m-%d')
         end_date = datetime.strptime(request.end_date, '%Y-%m-%d')
         
-        if request.symbol.endswith('.TW'):
-            df = tw_fetcher.get_stock_data(request.symbol, "1y")  # Use longer period to ensure we have enough data
-        else:
-            df = us_fetcher.get_stock_data(request.symbol, "1y")  # Use longer period to ensure we have enough data
+        df = await market_data.get_stock_data(request.symbol, "1y")  # Use longer period to ensure we have enough data
         
         if df is None or df.empty:
             raise HTTPException(status_code=404, detail=f"無法獲取 {request.symbol} 的歷史數據")
@@ -2743,16 +2906,13 @@ async def get_dashboard_signals(symbol: str, period: str = "3mo"):
     """
     try:
         # 獲取股價數據
-        if symbol.endswith('.TW'):
-            df = tw_fetcher.get_stock_data(symbol, period)
-        else:
-            df = us_fetcher.get_stock_data(symbol, period)
+        df = await market_data.get_stock_data(symbol, period)
         
         if df is None or df.empty:
             return {"success": False, "error": f"無法獲取 {symbol} 的數據"}
         
         # 計算技術指標
-        indicators = indicator_analyzer.analyze(df)
+        indicators = await analyze_indicators(symbol, df)
         
         # 生成訊號
         current_rsi = indicators.get('rsi', 50)
@@ -23,6 +23,7 @@ import httpx
 from config.settings import settings, US_SYMBOLS, TW_SYMBOLS
 from src.data_fetcher.us_stocks import USStockDataFetcher
 from src.data_fetcher.tw_stocks import TWStockDataFetcher
+from src.data_fetcher.bar_store import get_bar_store
 from src.analysis.technical_indicators import IndicatorAnalyzer
 from src.analysis.pattern_recognition import PatternRecognition
 from src.analysis.ai_analyzer import OpenAIAnalyzer
@@ -94,8 +95,8 @@ app.add_middleware(
 )
 
 # Initialize services
-us_data_fetcher = USStockDataFetcher()
-tw_data_fetcher = TWStockDataFetcher()
+us_data_fetcher = USStockDataFetcher(bar_store=get_bar_store())
+tw_data_fetcher = TWStockDataFetcher(bar_store=get_bar_store())
 indicator_analyzer = IndicatorAnalyzer()
 pattern_recognizer = PatternRecognition()
 ai_analyzer = OpenAIAnalyzer()
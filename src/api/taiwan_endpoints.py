@@ -14,6 +14,8 @@ import pandas as pd
 from enum import Enum
 
 from ..data_fetcher.tw_stocks import TWStockDataFetcher
+from ..data_fetcher.bar_store import get_bar_store
+from ..data_fetcher.symbol_master import get_symbol_master, split_symbol
 from ..analysis.technical_indicators import IndicatorAnalyzer
 from ..visualization.tradingview_datafeed import setup_datafeed_routes
 
@@ -88,9 +90,12 @@ class TaiwanStockAPIEndpoints:
     """台股API端點類"""
     
     def __init__(self):
-        self.tw_fetcher = TWStockDataFetcher()
+        self.tw_fetcher = TWStockDataFetcher(bar_store=get_bar_store())
         self.indicator_analyzer = IndicatorAnalyzer()
         
+        # 全市場代號表 (TWSE/TPEx 上市櫃清單)
+        self.symbol_master = get_symbol_master()
+        
         # 台股代號對照表
         self.taiwan_stocks = {
             # TWSE 上市公司
@@ -127,6 +132,9 @@ class TaiwanStockAPIEndpoints:
             return symbol
         elif symbol.endswith('.TWO'):
             return symbol
+        elif symbol[:1].isdigit() and self.symbol_master.exchange_of(symbol) in ("TWSE", "TPEx"):
+            # 上市櫃清單精確判斷交易所 (含 00878 等 ETF 代號)
+            return self.symbol_master.get(symbol).symbol
         elif symbol.isdigit() and len(symbol) >= 4:
             # 判斷是上市還是上櫃
             code = symbol[:4] if len(symbol) > 4 else symbol
@@ -143,7 +151,7 @@ class TaiwanStockAPIEndpoints:
     def get_stock_info(self, symbol: str) -> TaiwanStockInfo:
         """獲取股票基本資訊"""
         normalized = self.normalize_symbol(symbol)
-        code = normalized.replace('.TW', '').replace('.TWO', '')
+        code = split_symbol(normalized)[0]
         
         if code in self.taiwan_stocks:
             stock_data = self.taiwan_stocks[code]
@@ -156,12 +164,13 @@ class TaiwanStockAPIEndpoints:
                 industry=stock_data["industry"]
             )
         else:
-            # 未知股票，使用預設值
+            # 未知股票，使用預設值 (名稱取自全市場代號表)
             market = TaiwanMarketEnum.TWSE if normalized.endswith('.TW') else TaiwanMarketEnum.TPEX
+            instrument = self.symbol_master.get(normalized)
             return TaiwanStockInfo(
                 symbol=normalized,
                 code=code,
-                name=f"台股 {code}",
+                name=instrument.name if instrument else f"台股 {code}",
                 market=market,
                 type=StockTypeEnum.STOCK,
                 industry="未分類"
@@ -213,8 +222,25 @@ def setup_taiwan_routes(app: FastAPI):
         """
         try:
             results = []
-            query_upper = query.upper()
             
+            if tw_api.symbol_master.is_loaded():
+                instruments = tw_api.symbol_master.search(
+                    query, limit, market="TW", exchange=market.value if market else None
+                )
+                for instrument in instruments:
+                    stock_data = tw_api.taiwan_stocks.get(instrument.code, {})
+                    results.append(TaiwanStockInfo(
+                        symbol=instrument.symbol,
+                        code=instrument.code,
+                        name=instrument.name,
+                        market=TaiwanMarketEnum(instrument.exchange),
+                        type=StockTypeEnum(instrument.type),
+                        industry=stock_data.get("industry", "")
+                    ))
+                return results
+            
+            # 代號表尚未載入時搜尋內建對照表
+            query_upper = query.upper()
             for code, stock_data in tw_api.taiwan_stocks.items():
                 # 市場篩選
                 if market and stock_data["market"] != market.value:
@@ -236,6 +236,8 @@ async def test_symbol_data(symbol: str):
 def setup_charting_routes(app):
     """將 Charting Library 路由添加到 FastAPI 應用"""
     app.include_router(router)
+    # 關閉 datafeed 的長期連線 session
+    app.add_event_handler("shutdown", tw_datafeed.close)
     return app
 
 # 測試用例
@@ -0,0 +1,249 @@
+"""
+Range-merging interval cache for time-ordered bars.
+
+Bars are kept per series key (e.g. exchange, code and resolution) as a sorted
+list of non-overlapping segments, each recording the time range it covers, not
+just the bars it holds, so ranges without trading days stay covered too. A
+request for any range is answered by slicing the covering segments; only the
+uncovered gaps are fetched, and fetched ranges are merged with their neighbours,
+so panning a chart by one day fetches one day. Whole series are evicted
+least-recently-used once the estimated size exceeds a byte budget.
+
+The newest ``live_window`` seconds of a segment can still change (today's bar),
+so once ``ttl`` has passed since that segment was fetched, its live part counts
+as uncovered and is fetched again.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.cache.single_flight import SingleFlight
+
+# Fetches the bars in [start, end] (unix seconds, inclusive)
+RangeFetcher = Callable[[int, int], Awaitable[List[Any]]]
+
+
+def estimate_bars_bytes(bars: List[Any]) -> int:
+    """Approximate memory used by a list of homogeneous bar objects."""
+    if not bars:
+        return 64
+    sample = bars[0]
+    fields = getattr(sample, "__dict__", None) or {}
+    per_bar = sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in fields.values())
+    return 64 + len(bars) * (per_bar + 16)  # + list slot and time index entry
+
+
+@dataclass
+class _Segment:
+    start: int
+    end: int
+    bars: List[Any]
+    times: List[int]
+    fetched_at: float
+    nbytes: int
+
+    def covered_end(self, now: float, ttl: float, live_window: float) -> int:
+        """End of the range this segment can still answer without a refetch."""
+        if now - self.fetched_at < ttl:
+            return self.end
+        return min(self.end, int(self.fetched_at - live_window))
+
+
+class BarRangeCache:
+    """
+    Per-series interval cache with gap fetching and a byte-budget LRU.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300,
+        live_window: float = 24 * 3600,
+        time_of: Callable[[Any], int] = lambda bar: bar.time
+    ):
+        """
+        Args:
+            max_bytes: Estimated memory budget across all series
+            ttl: Seconds the live end of a fetched range is trusted
+            live_window: Seconds before the fetch time whose bars may still change
+            time_of: Returns a bar's unix timestamp (seconds)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.live_window = live_window
+        self.time_of = time_of
+
+        self._series: "OrderedDict[Hashable, List[_Segment]]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.flights = SingleFlight()
+        self.stats = {"hits": 0, "partial_hits": 0, "misses": 0, "gap_fetches": 0, "evictions": 0}
+
+    # ------------------------------------------------------------------
+    # Coverage
+    # ------------------------------------------------------------------
+
+    def gaps(self, key: Hashable, start: int, end: int, now: Optional[float] = None) -> List[Tuple[int, int]]:
+        """Sub-ranges of [start, end] not covered by cached segments."""
+        now = time.time() if now is None else now
+        gaps = []
+        cursor = start
+        with self._lock:
+            segments = list(self._series.get(key, ()))
+
+        for segment in segments:
+            if segment.start > end:
+                break
+            covered_end = segment.covered_end(now, self.ttl, self.live_window)
+            if covered_end < max(cursor, segment.start):
+                continue
+            if segment.start > cursor:
+                gaps.append((cursor, segment.start - 1))
+            cursor = covered_end + 1
+            if cursor > end:
+                break
+
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def get(self, key: Hashable, start: int, end: int) -> List[Any]:
+        """Cached bars with start <= time <= end, in time order."""
+        with self._lock:
+            segments = self._series.get(key)
+            if segments is None:
+                return []
+            self._series.move_to_end(key)
+            bars = []
+            for segment in segments:
+                if segment.end < start or segment.start > end:
+                    continue
+                lo = bisect_left(segment.times, start)
+                hi = bisect_right(segment.times, end)
+                bars.extend(segment.bars[lo:hi])
+            return bars
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def put(self, key: Hashable, start: int, end: int, bars: List[Any], fetched_at: Optional[float] = None):
+        """
+        Record that [start, end] was fetched and holds ``bars``.
+
+        Overlapping or adjacent segments are merged; within [start, end] the new
+        bars replace cached ones. Bars outside [start, end] are ignored.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        bars = sorted((bar for bar in bars if start <= self.time_of(bar) <= end), key=self.time_of)
+        times = [self.time_of(bar) for bar in bars]
+
+        with self._lock:
+            segments = self._series.pop(key, [])
+            merged_start, merged_end = start, end
+            before: List[Tuple[List[int], List[Any]]] = []
+            after: List[Tuple[List[int], List[Any]]] = []
+            live_fetched_at = fetched_at
+            kept = []
+
+            for segment in segments:
+                if segment.end < start - 1 or segment.start > end + 1:
+                    kept.append(segment)
+                    continue
+                # Overlapping or adjacent: keep only the parts outside [start, end]
+                self._nbytes -= segment.nbytes
+                merged_start = min(merged_start, segment.start)
+                if segment.end > merged_end:
+                    merged_end = segment.end
+                    live_fetched_at = segment.fetched_at
+                lo = bisect_left(segment.times, start)
+                hi = bisect_right(segment.times, end)
+                before.append((segment.times[:lo], segment.bars[:lo]))
+                after.append((segment.times[hi:], segment.bars[hi:]))
+
+            merged_times, merged_bars = [], []
+            for part_times, part_bars in before:
+                merged_times.extend(part_times)
+                merged_bars.extend(part_bars)
+            merged_times.extend(times)
+            merged_bars.extend(bars)
+            for part_times, part_bars in after:
+                merged_times.extend(part_times)
+                merged_bars.extend(part_bars)
+
+            segment = _Segment(
+                merged_start, merged_end, merged_bars, merged_times,
+                live_fetched_at, estimate_bars_bytes(merged_bars)
+            )
+            kept.append(segment)
+            kept.sort(key=lambda s: s.start)
+            self._nbytes += segment.nbytes
+            self._series[key] = kept
+            self._evict()
+
+    def _evict(self):
+        # Drop least recently used series, never the one just written
+        while self._nbytes > self.max_bytes and len(self._series) > 1:
+            _, segments = self._series.popitem(last=False)
+            self._nbytes -= sum(segment.nbytes for segment in segments)
+            self.stats["evictions"] += 1
+
+    async def get_or_fetch(self, key: Hashable, start: int, end: int, fetch: RangeFetcher) -> List[Any]:
+        """
+        Bars in [start, end], fetching only the ranges not yet cached.
+
+        Args:
+            key: Series identity, e.g. ('TWSE', '2330', '1D')
+            start: Range start (unix seconds, inclusive)
+            end: Range end (unix seconds, inclusive)
+            fetch: Coroutine function returning the bars for one uncovered range
+
+        Returns:
+            Bars in time order; fetch errors propagate and nothing is cached for them
+        """
+        gaps = self.gaps(key, start, end)
+        if not gaps:
+            self.stats["hits"] += 1
+        elif gaps == [(start, end)]:
+            self.stats["misses"] += 1
+        else:
+            self.stats["partial_hits"] += 1
+
+        if gaps:
+            self.stats["gap_fetches"] += len(gaps)
+            results = await asyncio.gather(*(
+                self.flights.do((key, gap_start, gap_end), lambda s=gap_start, e=gap_end: fetch(s, e))
+                for gap_start, gap_end in gaps
+            ))
+            for (gap_start, gap_end), bars in zip(gaps, results):
+                self.put(key, gap_start, gap_end, bars)
+
+        return self.get(key, start, end)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one series, or everything."""
+        with self._lock:
+            if key is None:
+                self._series.clear()
+                self._nbytes = 0
+            else:
+                segments = self._series.pop(key, [])
+                self._nbytes -= sum(segment.nbytes for segment in segments)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, series and segment counts and estimated size."""
+        with self._lock:
+            segments = sum(len(series) for series in self._series.values())
+            return {
+                **self.stats,
+                "series": len(self._series),
+                "segments": segments,
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+            }
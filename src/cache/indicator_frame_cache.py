@@ -0,0 +1,273 @@
+"""
+Indicator-frame cache versioned by the bars it was computed from.
+
+Entries are keyed by (symbol, bar interval, indicator set, params, first bar)
+and remember the bars behind them. Indicators depend on where a series
+starts (EMAs seed at its first bar), so 1mo, 3mo and 6mo frames of a symbol
+are separate entries; a window that slides forward starts a new entry and the
+old one ages out of the LRU. A request with the same bars is a hit. When the
+request's bars only extend the cached ones, or revise the newest bars (today's
+bar updating), the cached frame is kept up to the first changed bar. The
+remaining bars are then run through an ``IncrementalIndicators`` engine
+resumed from the saved tail state, so a new bar costs a few microseconds
+instead of a full recompute. Anything else (a changed first bar, an unknown
+indicator, TA-Lib in use, many new bars) is recomputed and replaces the entry.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import technical_indicators
+from src.analysis.incremental_indicators import IncrementalIndicators
+from src.analysis.technical_indicators import IndicatorAnalyzer
+
+# Bar columns compared to decide whether cached bars are still valid
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def bar_interval(index: pd.Index) -> str:
+    """Bar spacing of a time index (smallest gap among the first bars), e.g. '1 days'."""
+    if len(index) < 2 or not isinstance(index, pd.DatetimeIndex):
+        return "unknown"
+    return str(pd.Series(index[:32]).diff().min())
+
+
+def indicator_set_key(names: Optional[Iterable[str]]) -> str:
+    """Order-independent short hash of an indicator set ('all' for the full set)."""
+    if names is None:
+        return "all"
+    return hashlib.sha1(",".join(sorted(set(names))).encode()).hexdigest()[:12]
+
+
+def common_prefix_length(cached: pd.DataFrame, data: pd.DataFrame) -> int:
+    """Number of leading bars (timestamp and OHLCV) that two bar frames share."""
+    n = min(len(cached), len(data))
+    if n == 0:
+        return 0
+    same = np.asarray(cached.index[:n] == data.index[:n])
+    for field in BAR_FIELDS:
+        if field in cached.columns and field in data.columns:
+            old = cached[field].to_numpy(dtype=np.float64)[:n]
+            new = data[field].to_numpy(dtype=np.float64)[:n]
+            same &= (old == new) | (np.isnan(old) & np.isnan(new))
+    return n if same.all() else int(np.argmin(same))
+
+
+@dataclass
+class _Entry:
+    bars: pd.DataFrame
+    frame: pd.DataFrame
+    state: Optional[pd.DataFrame]          # RESUME_COLUMNS for every bar, when extendable
+    engine: Optional[IncrementalIndicators]  # positioned one bar before the end, once extended
+    computed_at: float
+
+
+class IndicatorFrameCache:
+    """
+    Cache of computed indicator frames with incremental extension.
+    """
+
+    def __init__(
+        self,
+        analyzer: Optional[IndicatorAnalyzer] = None,
+        max_entries: int = 256,
+        max_extension_bars: int = 256
+    ):
+        """
+        Args:
+            analyzer: Indicator calculator used for full computations
+            max_entries: Maximum number of frames kept; least recently used are evicted
+            max_extension_bars: New bars above which a full (vectorized) recompute is cheaper
+        """
+        self.analyzer = analyzer or IndicatorAnalyzer()
+        self.max_entries = max_entries
+        self.max_extension_bars = max_extension_bars
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "extensions": 0, "misses": 0, "evictions": 0, "extended_bars": 0}
+
+    def key(
+        self,
+        symbol: str,
+        interval: str,
+        names: Optional[Iterable[str]] = None,
+        params: Optional[Mapping[str, Any]] = None,
+        start: Optional[Hashable] = None
+    ) -> Tuple:
+        """Cache key for a symbol, bar interval, indicator set, extra parameters and first bar."""
+        return (
+            symbol.upper(), interval, indicator_set_key(names),
+            tuple(sorted((params or {}).items())), start
+        )
+
+    def get_frame(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        names: Optional[Iterable[str]] = None,
+        interval: Optional[str] = None,
+        params: Optional[Mapping[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Indicator frame for ``data``, served from cache or extended where possible.
+
+        Args:
+            symbol: Stock symbol
+            data: OHLCV bars (time index)
+            names: Indicator columns; None for ``calculate_all_indicators`` output
+                   (bars plus every indicator)
+            interval: Bar interval label (inferred from the index when omitted)
+            params: Extra values that distinguish otherwise identical requests
+
+        Returns:
+            Shallow copy of the cached frame (callers may add columns), with
+            ``names`` in the requested order
+        """
+        names = list(dict.fromkeys(names)) if names is not None else None
+        if data.empty:
+            return self._compute(data, names)[0]
+
+        key = self.key(symbol, interval or bar_interval(data.index), names, params, data.index[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            shared = common_prefix_length(entry.bars, data)
+            if shared == len(data) == len(entry.bars):
+                with self._lock:
+                    self.stats["hits"] += 1
+                return self._view(entry.frame, names)
+
+            extended = self._extend(entry, data, names, shared)
+            if extended is not None:
+                self._store(key, extended)
+                with self._lock:
+                    self.stats["extensions"] += 1
+                    self.stats["extended_bars"] += len(data) - shared
+                return self._view(extended.frame, names)
+
+        frame, state = self._compute(data, names)
+        self._store(key, _Entry(data, frame, state, None, time.time()))
+        with self._lock:
+            self.stats["misses"] += 1
+        return self._view(frame, names)
+
+    @staticmethod
+    def _view(frame: pd.DataFrame, names: Optional[list]) -> pd.DataFrame:
+        return frame.copy(deep=False) if names is None else frame[names]
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    def _extendable(self, names: Optional[Iterable[str]]) -> bool:
+        """Extension reproduces the analyzer only for its own (non-TA-Lib) columns."""
+        if technical_indicators.TALIB_AVAILABLE:
+            return False
+        return names is None or set(names) <= set(IncrementalIndicators.COLUMNS)
+
+    def _compute(
+        self, data: pd.DataFrame, names: Optional[list]
+    ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+        """Full computation; also returns the tail state columns when extendable."""
+        state_columns = list(IncrementalIndicators.RESUME_COLUMNS)
+        if names is None:
+            frame = self.analyzer.calculate_all_indicators(data)
+            full = frame
+        elif self._extendable(names):
+            full = self.analyzer.calculate_indicators(data, list(dict.fromkeys(names + state_columns)))
+            frame = full[names]
+        else:
+            return self.analyzer.calculate_indicators(data, names), None
+
+        if not self._extendable(names) or not set(state_columns) <= set(full.columns):
+            return frame, None
+        return frame, full[state_columns]
+
+    def _extend(
+        self, entry: _Entry, data: pd.DataFrame, names: Optional[list], shared: int
+    ) -> Optional[_Entry]:
+        """Reuse ``entry`` for its first ``shared`` bars and stream the rest, if possible."""
+        if (
+            entry.state is None or shared == 0 or not self._extendable(names)
+            or len(data) - shared > self.max_extension_bars
+            or list(entry.bars.columns) != list(data.columns)
+        ):
+            return None
+
+        # The stored engine sits one bar behind the cached end, so a revised
+        # newest bar (the usual intraday update) continues from it directly
+        if entry.engine is not None and entry.engine.bars <= shared:
+            engine = copy.deepcopy(entry.engine)
+        else:
+            engine = IncrementalIndicators.resume(entry.bars.iloc[:shared], entry.state.iloc[:shared])
+
+        start = engine.bars
+        body = engine.update_frame(data.iloc[start:-1])
+        saved = copy.deepcopy(engine)
+        values = pd.concat([body, engine.update_frame(data.iloc[-1:])]).iloc[shared - start:]
+
+        new_bars = data.iloc[shared:]
+        if names is None:
+            tail = pd.concat([new_bars, values], axis=1)[entry.frame.columns]
+        else:
+            tail = values[names]
+
+        frame = pd.concat([entry.frame.iloc[:shared], tail])
+        state = pd.concat([entry.state.iloc[:shared], values[list(IncrementalIndicators.RESUME_COLUMNS)]])
+        return _Entry(data, frame, state, saved, time.time())
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _store(self, key: Hashable, entry: _Entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop cached frames for one symbol, or all of them."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == symbol.upper()]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove all entries."""
+        self.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/extension/miss counters and current size."""
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
+
+
+# Global instance
+_indicator_frame_cache: Optional[IndicatorFrameCache] = None
+
+
+def get_indicator_frame_cache() -> IndicatorFrameCache:
+    """Get the shared indicator-frame cache."""
+    global _indicator_frame_cache
+    if _indicator_frame_cache is None:
+        _indicator_frame_cache = IndicatorFrameCache()
+    return _indicator_frame_cache
@@ -0,0 +1,62 @@
+"""
+Single-flight request coalescing.
+
+When several coroutines ask for the same key at the same time, only the first
+one runs the underlying fetch or computation; the others await the same
+in-flight task and share its result (or its exception). The key is forgotten as
+soon as the task finishes, so later calls start a fresh execution.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical async calls into one execution.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``func()`` unless a call with the same key is already in flight.
+
+        Args:
+            key: Identity of the call, e.g. ('bars', 'US', 'AAPL', '6mo', '1d')
+            func: Zero-argument coroutine function performing the work
+
+        Returns:
+            The result of the (possibly shared) execution
+        """
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.stats["shared"] += 1
+        else:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        self.stats["calls"] += 1
+
+        # One caller giving up (e.g. a closed connection) must not cancel the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Call counters, including how many calls joined an in-flight execution."""
+        return {**self.stats, "in_flight": self.in_flight()}
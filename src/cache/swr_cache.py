@@ -0,0 +1,164 @@
+"""
+Stale-while-revalidate cache for async computations.
+
+Entries are fresh for ``ttl`` seconds. After that they stay servable for a
+further ``grace`` seconds: a request in the grace window gets the stale value
+immediately while one background task recomputes it, so only requests for
+entries that are missing or older than ``ttl + grace`` wait for the work.
+Concurrent misses for the same key share one computation.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from src.cache.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+FRESH = "fresh"
+STALE = "stale"
+MISSING = "missing"
+
+
+class SWRCache:
+    """
+    In-memory stale-while-revalidate cache with an LRU size bound.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        grace: float = 900,
+        max_entries: int = 1024,
+        should_cache: Callable[[Any], bool] = lambda value: value is not None
+    ):
+        """
+        Args:
+            ttl: Seconds an entry is served without refreshing
+            grace: Further seconds an expired entry is served while it refreshes
+            max_entries: Maximum number of entries; the least recently used are evicted
+            should_cache: Whether a computed value is worth caching (e.g. not an error result)
+        """
+        self.ttl = ttl
+        self.grace = grace
+        self.max_entries = max_entries
+        self.should_cache = should_cache
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.flights = SingleFlight()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def peek(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """Return (value, state) where state is 'fresh', 'stale' or 'missing'."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, MISSING
+            age = time.monotonic() - entry[0]
+            if age >= self.ttl + self.grace:
+                del self._entries[key]
+                return None, MISSING
+            self._entries.move_to_end(key)
+            return entry[1], FRESH if age < self.ttl else STALE
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value if fresh, else None."""
+        value, state = self.peek(key)
+        return value if state == FRESH else None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value as fresh."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[T]],
+                             refresh: Optional[Callable[[], Awaitable[T]]] = None) -> T:
+        """
+        Return the cached value for ``key``, computing it when needed.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument coroutine function producing the value;
+                values rejected by ``should_cache`` are returned but not cached
+            refresh: Coroutine function used for background refreshes of a
+                stale entry instead of ``compute``, e.g. one that bypasses the
+                caches ``compute`` reads through
+
+        Returns:
+            The fresh value, the stale value (while a refresh runs in the
+            background), or a newly computed value
+        """
+        value, state = self.peek(key)
+        if state == FRESH:
+            self.stats["hits"] += 1
+            return value
+        if state == STALE:
+            self.stats["stale_hits"] += 1
+            self._schedule_refresh(key, refresh or compute)
+            return value
+
+        self.stats["misses"] += 1
+        return await self._compute(key, compute)
+
+    async def refresh(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """Recompute ``key`` now regardless of its age (e.g. for scheduled warm-up)."""
+        return await self._compute(key, compute)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        value = await self.flights.do(key, compute)
+        if self.should_cache(value):
+            self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return
+        self.stats["refreshes"] += 1
+        task = asyncio.ensure_future(self._compute(key, compute))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done, key=key: self._refresh_done(key, done))
+
+    def _refresh_done(self, key: Hashable, task: asyncio.Task):
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Keep serving the stale value until it leaves the grace window
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for {key!r}: {task.exception()}")
+
+    def delete(self, key: Hashable):
+        """Remove an entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self) -> List[Hashable]:
+        """Keys currently held (fresh or stale)."""
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/stale-hit/miss counters, refreshes in progress and current size."""
+        return {
+            **self.stats,
+            "refreshing": sum(1 for task in self._refreshing.values() if not task.done()),
+            "size": len(self._entries),
+        }
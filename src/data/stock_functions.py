@@ -6,11 +6,14 @@
 
 import os
 import json
-import requests
+import asyncio
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
-import time
+
+from src.cache.ttl_cache import TTLCache
+from src.data_fetcher.rate_limiter import SharedTokenBucket
+from src.data_fetcher.transport import Transport, get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -18,32 +21,47 @@ logger = logging.getLogger(__name__)
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "demo")  # 免費 API Key
 ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
 
+# 各 Alpha Vantage 函數的回應快取時間 (秒)
+RESPONSE_TTL = {
+    'GLOBAL_QUOTE': 60,
+    'TIME_SERIES_DAILY_ADJUSTED': 3600,
+    'OVERVIEW': 24 * 3600,
+}
+DEFAULT_RESPONSE_TTL = 3600  # 技術指標等
+
 class StockDataFetcher:
     """股票數據獲取器"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        rate_limiter: Optional[SharedTokenBucket] = None,
+        cache: Optional[TTLCache] = None,
+        transport: Optional[Transport] = None
+    ):
         self.api_key = api_key or ALPHA_VANTAGE_API_KEY
         self.base_url = ALPHA_VANTAGE_BASE_URL
-        self.last_request_time = 0
-        self.request_interval = 12  # Alpha Vantage 免費版限制：每分鐘5次請求
+        # Alpha Vantage 免費版限制：每分鐘5次請求，由所有 worker 共用
+        if rate_limiter is None:
+            from config.settings import settings
+            per_minute = settings.alpha_vantage_requests_per_minute
+            rate_limiter = SharedTokenBucket("alpha_vantage", rate=per_minute / 60, capacity=1)
+        self.rate_limiter = rate_limiter
+        self.cache = cache if cache is not None else TTLCache(default_ttl=DEFAULT_RESPONSE_TTL)
+        # 可錄製/重播的傳輸層 (API key 不會寫入錄製檔)
+        self.transport = transport or get_transport()
     
-    def _rate_limit(self):
-        """API 請求頻率限制"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.request_interval:
-            sleep_time = self.request_interval - time_since_last_request
-            logger.info(f"Rate limiting: waiting {sleep_time:.1f}s")
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
+    @staticmethod
+    def _cache_key(params: Dict[str, Any]) -> tuple:
+        """以函數名稱與參數作為快取鍵 (不含 API key)"""
+        return tuple(sorted((k, str(v)) for k, v in params.items() if k != 'apikey'))
     
-    def _make_request(self, params: Dict[str, str]) -> Dict[str, Any]:
-        """發送 API 請求"""
-        self._rate_limit()
-        params['apikey'] = self.api_key
-        
+    def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """發送 API 請求並檢查 Alpha Vantage 錯誤"""
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = self.transport.get(
+                "alpha_vantage", self.base_url, params={**params, 'apikey': self.api_key}, timeout=30
+            )
             response.raise_for_status()
             data = response.json()
             
@@ -52,11 +70,202 @@ class StockDataFetcher:
                 raise Exception(f"Alpha Vantage error: {data['Error Message']}")
             if "Note" in data:
                 raise Exception(f"API limit reached: {data['Note']}")
+            # 節流與需付費/demo key 限制的回應放在 "Information"，同樣視為錯誤 (不快取)
+            if "Information" in data:
+                raise Exception(f"API limit reached: {data['Information']}")
                 
             return data
         except Exception as e:
             logger.error(f"API request failed: {e}")
             raise
+    
+    def _remember(self, key: tuple, params: Dict[str, Any], data: Dict[str, Any]):
+        self.cache.set(key, data, ttl=RESPONSE_TTL.get(params.get('function'), DEFAULT_RESPONSE_TTL))
+    
+    def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """發送 API 請求 (同步)，快取命中時不消耗請求額度"""
+        key = self._cache_key(params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        self.rate_limiter.acquire_blocking()
+        data = self._request(params)
+        self._remember(key, params, data)
+        return data
+    
+    async def _amake_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """發送 API 請求 (非同步)，等待請求額度時不佔用執行緒"""
+        key = self._cache_key(params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        await self.rate_limiter.acquire()
+        data = await asyncio.get_running_loop().run_in_executor(None, self._request, params)
+        self._remember(key, params, data)
+        return data
+
+# 全局實例 (共用請求額度與回應快取)
+_stock_data_fetcher: Optional[StockDataFetcher] = None
+
+def get_stock_data_fetcher() -> StockDataFetcher:
+    """獲取共用的 Alpha Vantage 數據獲取器"""
+    global _stock_data_fetcher
+    if _stock_data_fetcher is None:
+        _stock_data_fetcher = StockDataFetcher()
+    return _stock_data_fetcher
+
+# ==================== 請求參數與回應解析 ====================
+
+def _quote_params(symbol: str) -> Dict[str, Any]:
+    return {
+        'function': 'GLOBAL_QUOTE',
+        'symbol': symbol
+    }
+
+def _parse_quote(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    if 'Global Quote' not in data:
+        return {
+            "error": f"No quote data found for {symbol}",
+            "symbol": symbol
+        }
+    
+    quote = data['Global Quote']
+    
+    result = {
+        "symbol": quote.get('01. symbol', symbol),
+        "price": float(quote.get('05. price', 0)),
+        "change": float(quote.get('09. change', 0)),
+        "change_percent": quote.get('10. change percent', '0%').replace('%', ''),
+        "volume": int(quote.get('06. volume', 0)),
+        "latest_trading_day": quote.get('07. latest trading day'),
+        "previous_close": float(quote.get('08. previous close', 0)),
+        "open": float(quote.get('02. open', 0)),
+        "high": float(quote.get('03. high', 0)),
+        "low": float(quote.get('04. low', 0))
+    }
+    
+    logger.info(f"Successfully fetched quote for {symbol}: ${result['price']}")
+    return result
+
+def _indicator_params(symbol: str, indicator: str, interval: str, time_period: int) -> Dict[str, Any]:
+    return {
+        'function': indicator,
+        'symbol': symbol,
+        'interval': interval,
+        'time_period': time_period,
+        'series_type': 'close'
+    }
+
+def _parse_indicator(symbol: str, indicator: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    # 找到技術指標數據鍵
+    indicator_key = None
+    for key in data.keys():
+        if 'Technical Analysis' in key:
+            indicator_key = key
+            break
+    
+    if not indicator_key:
+        return {
+            "error": f"No {indicator} data found for {symbol}",
+            "symbol": symbol
+        }
+    
+    indicator_data = data[indicator_key]
+    
+    # 獲取最新的幾個數據點
+    recent_data = {}
+    for date in sorted(indicator_data.keys(), reverse=True)[:5]:
+        recent_data[date] = indicator_data[date]
+    
+    # 獲取最新值
+    latest_date = max(indicator_data.keys())
+    latest_values = indicator_data[latest_date]
+    
+    result = {
+        "symbol": symbol,
+        "indicator": indicator,
+        "latest_date": latest_date,
+        "latest_values": latest_values,
+        "recent_data": recent_data
+    }
+    
+    logger.info(f"Successfully fetched {indicator} for {symbol}")
+    return result
+
+def _daily_params(symbol: str, outputsize: str) -> Dict[str, Any]:
+    return {
+        'function': 'TIME_SERIES_DAILY_ADJUSTED',
+        'symbol': symbol,
+        'outputsize': outputsize
+    }
+
+def _parse_daily(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    if 'Time Series (Daily)' not in data:
+        return {
+            "error": f"No daily data found for {symbol}",
+            "symbol": symbol
+        }
+    
+    time_series = data['Time Series (Daily)']
+    
+    # 轉換為更好用的格式
+    daily_data = []
+    for date in sorted(time_series.keys(), reverse=True)[:30]:  # 最近30天
+        day_data = time_series[date]
+        daily_data.append({
+            "date": date,
+            "open": float(day_data['1. open']),
+            "high": float(day_data['2. high']),
+            "low": float(day_data['3. low']),
+            "close": float(day_data['4. close']),
+            "volume": int(day_data['6. volume'])
+        })
+    
+    result = {
+        "symbol": symbol,
+        "data": daily_data,
+        "latest_date": daily_data[0]['date'] if daily_data else None,
+        "data_points": len(daily_data)
+    }
+    
+    logger.info(f"Successfully fetched {len(daily_data)} days of data for {symbol}")
+    return result
+
+def _company_params(symbol: str) -> Dict[str, Any]:
+    return {
+        'function': 'OVERVIEW',
+        'symbol': symbol
+    }
+
+def _parse_company(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    if not data or 'Symbol' not in data:
+        return {
+            "error": f"No company info found for {symbol}",
+            "symbol": symbol
+        }
+    
+    result = {
+        "symbol": data.get('Symbol'),
+        "name": data.get('Name'),
+        "description": data.get('Description', '')[:200] + '...' if data.get('Description') else '',
+        "industry": data.get('Industry'),
+        "sector": data.get('Sector'),
+        "market_cap": data.get('MarketCapitalization'),
+        "pe_ratio": data.get('PERatio'),
+        "dividend_yield": data.get('DividendYield'),
+        "52_week_high": data.get('52WeekHigh'),
+        "52_week_low": data.get('52WeekLow'),
+        "analyst_target_price": data.get('AnalystTargetPrice'),
+        "eps": data.get('EPS'),
+        "beta": data.get('Beta')
+    }
+    
+    logger.info(f"Successfully fetched company info for {symbol}: {result['name']}")
+    return result
+
+# ==================== 同步函數 ====================
 
 def get_stock_quote(symbol: str) -> Dict[str, Any]:
     """
@@ -69,40 +278,9 @@ def get_stock_quote(symbol: str) -> Dict[str, Any]:
         包含股票基本信息的字典
     """
     logger.info(f"Fetching quote for {symbol}")
-    fetcher = StockDataFetcher()
-    
     try:
-        params = {
-            'function': 'GLOBAL_QUOTE',
-            'symbol': symbol
-        }
-        
-        data = fetcher._make_request(params)
-        
-        if 'Global Quote' not in data:
-            return {
-                "error": f"No quote data found for {symbol}",
-                "symbol": symbol
-            }
-        
-        quote = data['Global Quote']
-        
-        result = {
-            "symbol": quote.get('01. symbol', symbol),
-            "price": float(quote.get('05. price', 0)),
-            "change": float(quote.get('09. change', 0)),
-            "change_percent": quote.get('10. change percent', '0%').replace('%', ''),
-            "volume": int(quote.get('06. volume', 0)),
-            "latest_trading_day": quote.get('07. latest trading day'),
-            "previous_close": float(quote.get('08. previous close', 0)),
-            "open": float(quote.get('02. open', 0)),
-            "high": float(quote.get('03. high', 0)),
-            "low": float(quote.get('04. low', 0))
-        }
-        
-        logger.info(f"Successfully fetched quote for {symbol}: ${result['price']}")
-        return result
-        
+        data = get_stock_data_fetcher()._make_request(_quote_params(symbol))
+        return _parse_quote(symbol, data)
     except Exception as e:
         logger.error(f"Error fetching quote for {symbol}: {e}")
         return {
@@ -124,54 +302,9 @@ def get_stock_technical_indicators(symbol: str, indicator: str = "RSI", interval
         技術指標數據
     """
     logger.info(f"Fetching {indicator} for {symbol}")
-    fetcher = StockDataFetcher()
-    
     try:
-        params = {
-            'function': indicator,
-            'symbol': symbol,
-            'interval': interval,
-            'time_period': time_period,
-            'series_type': 'close'
-        }
-        
-        data = fetcher._make_request(params)
-        
-        # 找到技術指標數據鍵
-        indicator_key = None
-        for key in data.keys():
-            if 'Technical Analysis' in key:
-                indicator_key = key
-                break
-        
-        if not indicator_key:
-            return {
-                "error": f"No {indicator} data found for {symbol}",
-                "symbol": symbol
-            }
-        
-        indicator_data = data[indicator_key]
-        
-        # 獲取最新的幾個數據點
-        recent_data = {}
-        for date in sorted(indicator_data.keys(), reverse=True)[:5]:
-            recent_data[date] = indicator_data[date]
-        
-        # 獲取最新值
-        latest_date = max(indicator_data.keys())
-        latest_values = indicator_data[latest_date]
-        
-        result = {
-            "symbol": symbol,
-            "indicator": indicator,
-            "latest_date": latest_date,
-            "latest_values": latest_values,
-            "recent_data": recent_data
-        }
-        
-        logger.info(f"Successfully fetched {indicator} for {symbol}")
-        return result
-        
+        data = get_stock_data_fetcher()._make_request(_indicator_params(symbol, indicator, interval, time_period))
+        return _parse_indicator(symbol, indicator, data)
     except Exception as e:
         logger.error(f"Error fetching {indicator} for {symbol}: {e}")
         return {
@@ -192,48 +325,9 @@ def get_stock_daily_data(symbol: str, outputsize: str = "compact") -> Dict[str,
         每日價格數據
     """
     logger.info(f"Fetching daily data for {symbol}")
-    fetcher = StockDataFetcher()
-    
     try:
-        params = {
-            'function': 'TIME_SERIES_DAILY_ADJUSTED',
-            'symbol': symbol,
-            'outputsize': outputsize
-        }
-        
-        data = fetcher._make_request(params)
-        
-        if 'Time Series (Daily)' not in data:
-            return {
-                "error": f"No daily data found for {symbol}",
-                "symbol": symbol
-            }
-        
-        time_series = data['Time Series (Daily)']
-        
-        # 轉換為更好用的格式
-        daily_data = []
-        for date in sorted(time_series.keys(), reverse=True)[:30]:  # 最近30天
-            day_data = time_series[date]
-            daily_data.append({
-                "date": date,
-                "open": float(day_data['1. open']),
-                "high": float(day_data['2. high']),
-                "low": float(day_data['3. low']),
-                "close": float(day_data['4. close']),
-                "volume": int(day_data['6. volume'])
-            })
-        
-        result = {
-            "symbol": symbol,
-            "data": daily_data,
-            "latest_date": daily_data[0]['date'] if daily_data else None,
-            "data_points": len(daily_data)
-        }
-        
-        logger.info(f"Successfully fetched {len(daily_data)} days of data for {symbol}")
-        return result
-        
+        data = get_stock_data_fetcher()._make_request(_daily_params(symbol, outputsize))
+        return _parse_daily(symbol, data)
     except Exception as e:
         logger.error(f"Error fetching daily data for {symbol}: {e}")
         return {
@@ -252,41 +346,64 @@ def search_company_info(symbol: str) -> Dict[str, Any]:
         公司基本信息
     """
     logger.info(f"Fetching company info for {symbol}")
-    fetcher = StockDataFetcher()
-    
     try:
-        params = {
-            'function': 'OVERVIEW',
-            'symbol': symbol
+        data = get_stock_data_fetcher()._make_request(_company_params(symbol))
+        return _parse_company(symbol, data)
+    except Exception as e:
+        logger.error(f"Error fetching company info for {symbol}: {e}")
+        return {
+            "error": str(e),
+            "symbol": symbol
         }
-        
-        data = fetcher._make_request(params)
-        
-        if not data or 'Symbol' not in data:
-            return {
-                "error": f"No company info found for {symbol}",
-                "symbol": symbol
-            }
-        
-        result = {
-            "symbol": data.get('Symbol'),
-            "name": data.get('Name'),
-            "description": data.get('Description', '')[:200] + '...' if data.get('Description') else '',
-            "industry": data.get('Industry'),
-            "sector": data.get('Sector'),
-            "market_cap": data.get('MarketCapitalization'),
-            "pe_ratio": data.get('PERatio'),
-            "dividend_yield": data.get('DividendYield'),
-            "52_week_high": data.get('52WeekHigh'),
-            "52_week_low": data.get('52WeekLow'),
-            "analyst_target_price": data.get('AnalystTargetPrice'),
-            "eps": data.get('EPS'),
-            "beta": data.get('Beta')
+
+# ==================== 非同步函數 (供 async 呼叫端使用) ====================
+
+async def aget_stock_quote(symbol: str) -> Dict[str, Any]:
+    """獲取股票即時報價 (非同步版本)"""
+    logger.info(f"Fetching quote for {symbol}")
+    try:
+        data = await get_stock_data_fetcher()._amake_request(_quote_params(symbol))
+        return _parse_quote(symbol, data)
+    except Exception as e:
+        logger.error(f"Error fetching quote for {symbol}: {e}")
+        return {
+            "error": str(e),
+            "symbol": symbol
         }
-        
-        logger.info(f"Successfully fetched company info for {symbol}: {result['name']}")
-        return result
-        
+
+async def aget_stock_technical_indicators(symbol: str, indicator: str = "RSI", interval: str = "daily", time_period: int = 14) -> Dict[str, Any]:
+    """獲取股票技術指標 (非同步版本)"""
+    logger.info(f"Fetching {indicator} for {symbol}")
+    try:
+        data = await get_stock_data_fetcher()._amake_request(_indicator_params(symbol, indicator, interval, time_period))
+        return _parse_indicator(symbol, indicator, data)
+    except Exception as e:
+        logger.error(f"Error fetching {indicator} for {symbol}: {e}")
+        return {
+            "error": str(e),
+            "symbol": symbol,
+            "indicator": indicator
+        }
+
+async def aget_stock_daily_data(symbol: str, outputsize: str = "compact") -> Dict[str, Any]:
+    """獲取股票每日歷史數據 (非同步版本)"""
+    logger.info(f"Fetching daily data for {symbol}")
+    try:
+        data = await get_stock_data_fetcher()._amake_request(_daily_params(symbol, outputsize))
+        return _parse_daily(symbol, data)
+    except Exception as e:
+        logger.error(f"Error fetching daily data for {symbol}: {e}")
+        return {
+            "error": str(e),
+            "symbol": symbol
+        }
+
+async def asearch_company_info(symbol: str) -> Dict[str, Any]:
+    """搜索公司基本信息 (非同步版本)"""
+    logger.info(f"Fetching company info for {symbol}")
+    try:
+        data = await get_stock_data_fetcher()._amake_request(_company_params(symbol))
+        return _parse_company(symbol, data)
     except Exception as e:
         logger.error(f"Error fetching company info for {symbol}: {e}")
         return {
@@ -379,4 +496,12 @@ FUNCTION_MAP = {
     "get_stock_technical_indicators": get_stock_technical_indicators, 
     "get_stock_daily_data": get_stock_daily_data,
     "search_company_info": search_company_info
-}
\ No newline at end of file
+}
+
+# 非同步函數映射 (等待請求額度時不會阻塞事件迴圈)
+ASYNC_FUNCTION_MAP = {
+    "get_stock_quote": aget_stock_quote,
+    "get_stock_technical_indicators": aget_stock_technical_indicators,
+    "get_stock_daily_data": aget_stock_daily_data,
+    "search_company_info": asearch_company_info
+}
@@ -0,0 +1,278 @@
+"""
+Async data-access facade over the synchronous market data fetchers.
+
+``USStockDataFetcher`` and ``TWStockDataFetcher`` are built on yfinance and
+requests, which block. Calling them from an ``async def`` route stalls the event
+loop for every other request in the worker, so this facade runs them on a
+dedicated, size-limited thread pool and exposes awaitable methods instead.
+Identical concurrent requests are coalesced so that one upstream call serves
+all of them.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+from src.cache.single_flight import SingleFlight
+from src.cache.swr_cache import SWRCache
+from src.data_fetcher.bar_store import period_to_start
+from src.data_fetcher.tw_stocks import TWStockDataFetcher
+from src.data_fetcher.us_stocks import USStockDataFetcher
+from src.database.market_data_repository import MarketDataRepository
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def is_taiwan_symbol(symbol: str) -> bool:
+    """Whether a symbol is listed on TWSE (.TW) or TPEx (.TWO)."""
+    symbol = symbol.upper()
+    return symbol.endswith('.TW') or symbol.endswith('.TWO')
+
+
+def _day(value: Optional[datetime]):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def quote_to_dict(quote: Any) -> Dict[str, Any]:
+    """Normalise a RealTimeQuote or Taiwan quote dict into plain fields."""
+    fields = ('symbol', 'price', 'change', 'change_percent', 'volume', 'timestamp')
+    if isinstance(quote, dict):
+        return {field: quote.get(field) for field in fields}
+    return {field: getattr(quote, field, None) for field in fields}
+
+
+def quotes_to_columns(symbols: List[str], quotes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lay out quotes column by column for compact JSON payloads.
+
+    Returns:
+        {'symbols': [...], 'price': [...], ..., 'missing': [...]}, with one entry
+        per symbol that has a quote, in request order
+    """
+    found = [symbol for symbol in symbols if symbol in quotes]
+    rows = [quote_to_dict(quotes[symbol]) for symbol in found]
+    timestamps = [row['timestamp'] for row in rows]
+    return {
+        'symbols': found,
+        'price': [row['price'] for row in rows],
+        'change': [row['change'] for row in rows],
+        'change_percent': [row['change_percent'] for row in rows],
+        'volume': [row['volume'] for row in rows],
+        'timestamp': [ts.isoformat() if isinstance(ts, datetime) else ts for ts in timestamps],
+        'missing': [symbol for symbol in symbols if symbol not in quotes],
+    }
+
+
+class AsyncMarketData:
+    """
+    Awaitable bars and quotes for US and Taiwan symbols.
+    """
+
+    def __init__(
+        self,
+        us_fetcher: USStockDataFetcher,
+        tw_fetcher: TWStockDataFetcher,
+        max_workers: int = 8,
+        quote_ttl: float = 2.0,
+        bars_cache: Optional[SWRCache] = None,
+        repository: Optional[MarketDataRepository] = None
+    ):
+        """
+        Args:
+            us_fetcher: Fetcher used for US symbols
+            tw_fetcher: Fetcher used for .TW / .TWO symbols
+            max_workers: Maximum number of blocking fetches running at once
+            quote_ttl: Seconds a fetched quote is reused before asking upstream again
+            bars_cache: Optional stale-while-revalidate cache for ``get_bars`` results
+            repository: Optional database repository; fetched daily bars are written
+                through to it and read back when upstream returns nothing
+        """
+        self.us_fetcher = us_fetcher
+        self.tw_fetcher = tw_fetcher
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self.flights = SingleFlight()
+        self.quote_ttl = quote_ttl
+        self._quotes: Dict[str, Tuple[float, Any]] = {}
+        self.bars_cache = bars_cache
+        self.repository = repository
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking callable on the market data executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def run_shared(self, key: Hashable, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a blocking callable once for all concurrent callers using the same key.
+
+        DataFrame results are handed to each caller as a shallow copy so that
+        one caller adding columns does not affect the others.
+        """
+        result = await self.flights.do(key, lambda: self.run(func, *args, **kwargs))
+        if isinstance(result, pd.DataFrame):
+            return result.copy(deep=False)
+        return result
+
+    async def get_bars(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        refresh: bool = False
+    ) -> pd.DataFrame:
+        """
+        Fetch historical OHLCV bars without blocking the event loop.
+
+        Args:
+            symbol: Stock symbol ('AAPL', '2330.TW', ...)
+            period: Data period for US symbols, and for Taiwan symbols when no start date is given
+            interval: Data interval (US symbols only; Taiwan data is daily)
+            start_date: Start date for Taiwan symbols
+            end_date: End date for Taiwan symbols
+            refresh: Bypass the bars cache and store the fetched result in it
+
+        Returns:
+            DataFrame with OHLCV data
+        """
+        symbol = symbol.upper()
+        if is_taiwan_symbol(symbol):
+            if start_date is None:
+                start_date = period_to_start(period)
+            # Routes derive ranges from datetime.now(); coalesce on calendar dates
+            key = ("bars", "TW", symbol, _day(start_date), _day(end_date), "1d")
+            load = functools.partial(
+                self.tw_fetcher.fetch_historical_data, symbol, start_date=start_date, end_date=end_date
+            )
+            fetch = functools.partial(self.run_shared, key, self._load_bars, "TW", symbol, load, start_date, end_date)
+        else:
+            key = ("bars", "US", symbol, period, interval)
+            load = functools.partial(self.us_fetcher.fetch_historical_data, symbol, period=period, interval=interval)
+            if interval == "1d":
+                fetch = functools.partial(
+                    self.run_shared, key, self._load_bars, "US", symbol, load, period_to_start(period), None
+                )
+            else:
+                # stock_prices has no interval column, so only daily bars go through the database
+                fetch = functools.partial(self.run_shared, key, load)
+
+        if self.bars_cache is None:
+            return await fetch()
+        if refresh:
+            data = await self.bars_cache.refresh(key, fetch)
+        else:
+            data = await self.bars_cache.get_or_compute(key, fetch)
+        # Cached frames are shared; callers may add columns to their copy
+        return data.copy(deep=False) if isinstance(data, pd.DataFrame) else data
+
+    def _load_bars(
+        self,
+        market: str,
+        symbol: str,
+        load: Callable[[], pd.DataFrame],
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> pd.DataFrame:
+        """
+        Run a daily-bar fetcher call, writing the result through to the repository.
+
+        When upstream fails or returns nothing, bars stored in the database for
+        the same range are returned instead.
+        """
+        if self.repository is None:
+            return load()
+        try:
+            data = load()
+        except Exception as e:
+            logger.warning(f"Fetching {symbol} failed, trying the database: {str(e)}")
+            stored = self._read_stored_bars(market, symbol, start, end)
+            if stored.empty:
+                raise
+            return stored
+
+        if data is not None and not data.empty:
+            try:
+                self.repository.upsert_bars(symbol, data, market)
+            except Exception as e:
+                logger.warning(f"Failed to write bars for {symbol} to the database: {str(e)}")
+            return data
+        stored = self._read_stored_bars(market, symbol, start, end)
+        return data if stored.empty else stored
+
+    def _read_stored_bars(
+        self, market: str, symbol: str, start: Optional[datetime], end: Optional[datetime]
+    ) -> pd.DataFrame:
+        try:
+            return self.repository.read_bars(symbol, start, end, market)
+        except Exception as e:
+            logger.warning(f"Failed to read bars for {symbol} from the database: {str(e)}")
+            return pd.DataFrame()
+
+    async def get_stock_data(self, symbol: str, period: str = "3mo") -> pd.DataFrame:
+        """Awaitable ``get_stock_data`` routed to the fetcher for the symbol's market."""
+        market = "TW" if is_taiwan_symbol(symbol) else "US"
+        fetcher = self.tw_fetcher if market == "TW" else self.us_fetcher
+        return await self.run_shared(("stock_data", market, symbol.upper(), period), fetcher.get_stock_data, symbol, period)
+
+    async def get_quote(self, symbol: str):
+        """
+        Fetch a real-time quote without blocking the event loop.
+
+        Returns:
+            RealTimeQuote for US symbols, quote dict for Taiwan symbols, or None
+        """
+        return (await self.get_quotes([symbol])).get(symbol)
+
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, Any]:
+        """
+        Fetch real-time quotes for many symbols with one bulk request per market.
+
+        Quotes younger than ``quote_ttl`` seconds are served from memory.
+
+        Returns:
+            Dictionary mapping symbol to quote, omitting symbols without a quote
+        """
+        now = time.monotonic()
+        results = {}
+        missing: Dict[str, List[str]] = {"US": [], "TW": []}
+        for symbol in dict.fromkeys(symbols):
+            cached = self._quotes.get(symbol)
+            if cached is not None and now - cached[0] < self.quote_ttl:
+                results[symbol] = cached[1]
+            else:
+                missing["TW" if is_taiwan_symbol(symbol) else "US"].append(symbol)
+
+        pending = [
+            (market, self.run_shared(("quotes", market, tuple(sorted(batch))), fetcher.get_quotes, batch))
+            for market, batch, fetcher in (
+                ("US", missing["US"], self.us_fetcher),
+                ("TW", missing["TW"], self.tw_fetcher),
+            )
+            if batch
+        ]
+        responses = await asyncio.gather(*(request for _, request in pending), return_exceptions=True)
+
+        fetched_at = time.monotonic()
+        for (market, _), quotes in zip(pending, responses):
+            if isinstance(quotes, Exception):
+                logger.warning(f"{market} quote fetch failed: {str(quotes)}")
+                continue
+            for symbol, quote in quotes.items():
+                self._quotes[symbol] = (fetched_at, quote)
+                results[symbol] = quote
+
+        return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+    def shutdown(self):
+        """Stop accepting work and release the executor threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
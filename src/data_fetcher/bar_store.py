@@ -0,0 +1,375 @@
+"""
+Local columnar OHLCV bar store.
+
+Bars are persisted as Parquet files partitioned by market / symbol / interval / year:
+
+    {root}/{market}/{symbol}/{interval}/{year}.parquet
+
+Intraday base bars are partitioned by month instead (``{year}-{month}.parquet``),
+which keeps the rewrite on each append small.
+
+Each symbol/interval directory also keeps a small ``_meta.json`` recording which
+date range has been downloaded and when it was last refreshed, so the fetchers
+can serve repeated requests from disk and only download the missing tail.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (required by pandas' parquet engine)
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.warning("pyarrow not available. Local bar store will be disabled.")
+
+logger = logging.getLogger(__name__)
+
+# Exchange timezone used to normalise bar timestamps per market
+MARKET_TIMEZONES = {
+    "US": "America/New_York",
+    "TW": "Asia/Taipei",
+}
+
+# Intervals persisted by the store (intraday history is too short-lived on yfinance)
+STORE_INTERVALS = {"1d", "1wk", "1mo"}
+
+# Intraday base intervals, kept in monthly partitions and accumulated over time
+INTRADAY_INTERVALS = {"1m"}
+
+_PERIOD_DELTAS = {
+    "1d": timedelta(days=1),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=30),
+    "3mo": timedelta(days=90),
+    "6mo": timedelta(days=180),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730),
+    "5y": timedelta(days=1825),
+    "10y": timedelta(days=3650),
+}
+
+DateLike = Union[datetime, pd.Timestamp, str]
+
+
+def period_to_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Convert a yfinance-style period string into a start datetime.
+
+    Args:
+        period: Period string ('1mo', '1y', 'ytd', 'max', ...)
+        now: Reference time (defaults to now)
+
+    Returns:
+        Start datetime, or None for 'max' (the full history)
+    """
+    now = now or datetime.now()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime(now.year, 1, 1)
+    delta = _PERIOD_DELTAS.get(period, _PERIOD_DELTAS["1y"])
+    return (now - delta).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def start_to_period(start: Optional[DateLike], now: Optional[datetime] = None) -> str:
+    """
+    Shortest yfinance-style period whose start is at or before ``start``.
+
+    Args:
+        start: Earliest date needed, or None for the full history
+        now: Reference time (defaults to now)
+
+    Returns:
+        Period string ('1mo', '1y', ..., or 'max')
+    """
+    if start is None:
+        return "max"
+    start = pd.Timestamp(start)
+    if start.tzinfo is not None:
+        start = start.tz_localize(None)
+    for period in _PERIOD_DELTAS:
+        if period_to_start(period, now) <= start:
+            return period
+    return "max"
+
+
+class BarStore:
+    """
+    Persistent on-disk OHLCV store with incremental append.
+    """
+
+    META_FILE = "_meta.json"
+
+    def __init__(self, root: Union[str, Path], refresh_seconds: int = 300):
+        """
+        Args:
+            root: Root directory of the store
+            refresh_seconds: How long stored bars are served without checking upstream
+        """
+        self.root = Path(root)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Paths and metadata
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _partition_keys(index: pd.DatetimeIndex, interval: str) -> pd.Index:
+        if interval in INTRADAY_INTERVALS:
+            return index.strftime("%Y-%m")
+        return index.year.astype(str)
+
+    @staticmethod
+    def _partition_bounds(stem: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """(year, month) range a partition file can hold."""
+        year, _, month = stem.partition("-")
+        if month:
+            return (int(year), int(month)), (int(year), int(month))
+        return (int(year), 1), (int(year), 12)
+
+    def _symbol_dir(self, market: str, symbol: str) -> Path:
+        safe_symbol = symbol.upper().replace("/", "_").replace("^", "_")
+        return self.root / market.upper() / safe_symbol
+
+    def _series_dir(self, market: str, symbol: str, interval: str) -> Path:
+        return self._symbol_dir(market, symbol) / interval
+
+    def get_metadata(self, market: str, symbol: str, interval: str = "1d") -> Optional[Dict]:
+        """Return the stored metadata for a series, or None if nothing is stored."""
+        meta_path = self._series_dir(market, symbol, interval) / self.META_FILE
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Corrupt bar store metadata for {market}:{symbol} ({interval}): {e}")
+            return None
+
+    def _write_metadata(self, market: str, symbol: str, interval: str, meta: Dict):
+        series_dir = self._series_dir(market, symbol, interval)
+        series_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = series_dir / f".{self.META_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, series_dir / self.META_FILE)
+
+    def last_timestamp(self, market: str, symbol: str, interval: str = "1d") -> Optional[pd.Timestamp]:
+        """Timestamp of the newest stored bar."""
+        meta = self.get_metadata(market, symbol, interval)
+        if not meta or not meta.get("last_timestamp"):
+            return None
+        return pd.Timestamp(meta["last_timestamp"])
+
+    def covers(self, market: str, symbol: str, interval: str, start: Optional[DateLike]) -> bool:
+        """
+        Check whether the stored series was downloaded from ``start`` onwards.
+
+        Args:
+            start: Requested start, or None for the full history
+        """
+        meta = self.get_metadata(market, symbol, interval)
+        if not meta or not meta.get("last_timestamp"):
+            return False
+        if meta.get("full_history"):
+            return True
+        if start is None or meta.get("coverage_start") is None:
+            return False
+        coverage_start = self._localize(pd.Timestamp(meta["coverage_start"]), market)
+        return coverage_start <= self._localize(pd.Timestamp(start), market)
+
+    def is_fresh(self, market: str, symbol: str, interval: str = "1d") -> bool:
+        """Whether the series was refreshed within ``refresh_seconds``."""
+        meta = self.get_metadata(market, symbol, interval)
+        if not meta:
+            return False
+        return (time.time() - meta.get("updated_at", 0)) < self.refresh_seconds
+
+    def updated_at(self, market: str, symbol: str, interval: str = "1d") -> Optional[datetime]:
+        """When the series was last refreshed from upstream (local time)."""
+        meta = self.get_metadata(market, symbol, interval)
+        if not meta or not meta.get("updated_at"):
+            return None
+        return datetime.fromtimestamp(meta["updated_at"])
+
+    def touch(self, market: str, symbol: str, interval: str = "1d"):
+        """Mark a series as refreshed without changing its bars."""
+        with self._lock:
+            meta = self.get_metadata(market, symbol, interval)
+            if meta:
+                meta["updated_at"] = time.time()
+                self._write_metadata(market, symbol, interval, meta)
+
+    # ------------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _localize(ts: pd.Timestamp, market: str) -> pd.Timestamp:
+        tz = MARKET_TIMEZONES.get(market.upper(), "UTC")
+        if ts.tzinfo is None:
+            return ts.tz_localize(tz)
+        return ts.tz_convert(tz)
+
+    def _normalize_frame(self, data: pd.DataFrame, market: str) -> pd.DataFrame:
+        df = data.drop(columns=["symbol"], errors="ignore")
+        index = pd.DatetimeIndex(pd.to_datetime(df.index))
+        tz = MARKET_TIMEZONES.get(market.upper(), "UTC")
+        index = index.tz_localize(tz) if index.tz is None else index.tz_convert(tz)
+        df.index = index.rename("date")
+        return df
+
+    def read(
+        self,
+        market: str,
+        symbol: str,
+        interval: str = "1d",
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None
+    ) -> pd.DataFrame:
+        """
+        Read stored bars for a symbol.
+
+        Args:
+            market: Market code ('US' or 'TW')
+            symbol: Symbol as stored
+            interval: Bar interval
+            start: Inclusive start (naive values are interpreted in exchange time)
+            end: Inclusive end
+
+        Returns:
+            DataFrame indexed by bar timestamp, empty if nothing is stored
+        """
+        series_dir = self._series_dir(market, symbol, interval)
+        if not series_dir.exists():
+            return pd.DataFrame()
+
+        start_ts = self._localize(pd.Timestamp(start), market) if start is not None else None
+        end_ts = self._localize(pd.Timestamp(end), market) if end is not None else None
+
+        frames = []
+        for path in sorted(series_dir.glob("*.parquet")):
+            first, last = self._partition_bounds(path.stem)
+            if start_ts is not None and last < (start_ts.year, start_ts.month):
+                continue
+            if end_ts is not None and first > (end_ts.year, end_ts.month):
+                continue
+            try:
+                frames.append(pd.read_parquet(path))
+            except Exception as e:
+                logger.warning(f"Failed to read bar partition {path}: {e}")
+
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        if start_ts is not None:
+            df = df[df.index >= start_ts]
+        if end_ts is not None:
+            df = df[df.index <= end_ts]
+        return df
+
+    def write(
+        self,
+        market: str,
+        symbol: str,
+        data: pd.DataFrame,
+        interval: str = "1d",
+        coverage_start: Optional[DateLike] = None,
+        full_history: bool = False
+    ):
+        """
+        Upsert bars into the store, rewriting only the affected partitions.
+
+        Args:
+            market: Market code ('US' or 'TW')
+            symbol: Symbol to store under
+            data: OHLCV DataFrame indexed by timestamp
+            interval: Bar interval
+            coverage_start: Start of the range this download was requested for
+            full_history: True if ``data`` is the complete history of the symbol
+        """
+        if data is None or data.empty:
+            return
+
+        df = self._normalize_frame(data, market)
+        series_dir = self._series_dir(market, symbol, interval)
+
+        with self._lock:
+            series_dir.mkdir(parents=True, exist_ok=True)
+
+            for partition, new_bars in df.groupby(self._partition_keys(df.index, interval)):
+                path = series_dir / f"{partition}.parquet"
+                if path.exists():
+                    try:
+                        existing = pd.read_parquet(path)
+                        new_bars = pd.concat([existing, new_bars])
+                    except Exception as e:
+                        logger.warning(f"Rewriting unreadable bar partition {path}: {e}")
+                new_bars = new_bars[~new_bars.index.duplicated(keep="last")].sort_index()
+
+                tmp_path = series_dir / f".{partition}.parquet.tmp"
+                new_bars.to_parquet(tmp_path)
+                os.replace(tmp_path, path)
+
+            meta = self.get_metadata(market, symbol, interval) or {}
+            last_ts = df.index.max()
+            if meta.get("last_timestamp"):
+                last_ts = max(last_ts, self._localize(pd.Timestamp(meta["last_timestamp"]), market))
+            meta["last_timestamp"] = last_ts.isoformat()
+
+            if full_history:
+                meta["full_history"] = True
+            if coverage_start is not None:
+                new_start = self._localize(pd.Timestamp(coverage_start), market)
+                if meta.get("coverage_start"):
+                    new_start = min(new_start, self._localize(pd.Timestamp(meta["coverage_start"]), market))
+                meta["coverage_start"] = new_start.isoformat()
+
+            meta["updated_at"] = time.time()
+            self._write_metadata(market, symbol, interval, meta)
+
+    def clear(self, market: Optional[str] = None, symbol: Optional[str] = None):
+        """Remove stored bars for a symbol, a market, or everything."""
+        with self._lock:
+            if market and symbol:
+                target = self._symbol_dir(market, symbol)
+            elif market:
+                target = self.root / market.upper()
+            else:
+                target = self.root
+            if target.exists():
+                shutil.rmtree(target)
+
+
+# Global instance
+_bar_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> Optional[BarStore]:
+    """
+    Get the shared bar store instance.
+
+    Returns:
+        BarStore, or None when the store is disabled or pyarrow is missing
+    """
+    global _bar_store
+    if _bar_store is None:
+        if not PYARROW_AVAILABLE:
+            return None
+        from config.settings import settings
+        if not settings.bar_store_enabled:
+            return None
+        _bar_store = BarStore(settings.bar_store_path, settings.bar_store_refresh_seconds)
+    return _bar_store
@@ -0,0 +1,254 @@
+"""
+Persisted 1-minute base bars with on-demand multi-resolution aggregation.
+
+yfinance only serves the last few weeks of 1-minute history, so every download
+is appended to the local bar store and the series accumulates over time. The
+recent part of each symbol's base series is kept in memory as a
+``ResampledSeries``; 5/15/30/60-minute (and daily and coarser) bars are built
+from it and updated incrementally when new minutes are downloaded.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.data_fetcher.bar_store import BarStore, DateLike, get_bar_store
+from src.data_fetcher.resampler import OHLCV_AGGREGATION, ResampledSeries, resample_ohlcv
+from src.data_fetcher.symbol_master import SymbolMaster, get_symbol_master, split_symbol
+from src.data_fetcher.trading_calendar import get_trading_calendar
+from src.data_fetcher.transport import Transport, get_transport
+
+logger = logging.getLogger(__name__)
+
+BASE_INTERVAL = "1m"
+
+
+class IntradayBars:
+    """
+    1-minute base series per symbol for one market, persisted and resampled.
+    """
+
+    # yfinance limits a single 1-minute request to about a week
+    MAX_REQUEST_DAYS = 7
+
+    def __init__(
+        self,
+        market: str,
+        bar_store: Optional[BarStore] = None,
+        symbol_master: Optional[SymbolMaster] = None,
+        refresh_seconds: int = 60,
+        memory_days: int = 30,
+        max_series: int = 256,
+        transport: Optional[Transport] = None
+    ):
+        """
+        Args:
+            market: Market code ('US' or 'TW')
+            bar_store: Store the base bars are persisted to (None keeps them in memory only)
+            symbol_master: Listing lookup used to pick the exact Taiwan exchange suffix
+            refresh_seconds: How long a series is served without checking upstream
+            memory_days: Days of base bars kept in memory per symbol
+            max_series: Symbols kept in memory (least recently used are dropped)
+            transport: Live, recording or replaying gateway for the yfinance calls
+        """
+        self.market = market.upper()
+        self.bar_store = bar_store
+        self.symbol_master = symbol_master or get_symbol_master()
+        self.calendar = get_trading_calendar(self.market)
+        self.refresh_seconds = refresh_seconds
+        self.memory_days = memory_days
+        self.max_series = max_series
+        self.transport = transport or get_transport()
+
+        self._series: "OrderedDict[str, ResampledSeries]" = OrderedDict()
+        self._updated_at: Dict[str, float] = {}
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"downloads": 0, "bars_downloaded": 0, "loads": 0, "evictions": 0}
+
+    def _resolve(self, symbol: str) -> Tuple[str, str]:
+        """(storage key, yfinance ticker) for a symbol."""
+        if self.market != "TW":
+            key = symbol.upper().strip()
+            return key, key
+        code, suffix_exchange = split_symbol(symbol)
+        instrument = self.symbol_master.get(f"{code}.TW")
+        if instrument is not None and instrument.market == "TW":
+            return code, instrument.symbol
+        return code, f"{code}.TWO" if suffix_exchange == "TPEx" else f"{code}.TW"
+
+    # ------------------------------------------------------------------
+    # Upstream
+    # ------------------------------------------------------------------
+
+    def _download(self, ticker: str, since: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """Download 1-minute bars from ``since`` (or the last week) via yfinance."""
+        try:
+            import yfinance as yf
+
+            if since is None or since < pd.Timestamp.now(tz=since.tz) - timedelta(days=self.MAX_REQUEST_DAYS):
+                call = {"ticker": ticker, "method": "history", "period": f"{self.MAX_REQUEST_DAYS}d", "interval": BASE_INTERVAL}
+                fetch = lambda: yf.Ticker(ticker).history(period=call["period"], interval=BASE_INTERVAL)
+            else:
+                call = {"ticker": ticker, "method": "history", "start": since.date(), "interval": BASE_INTERVAL}
+                fetch = lambda: yf.Ticker(ticker).history(start=call["start"], interval=BASE_INTERVAL)
+            data = self.transport.frame("yfinance", call, fetch)
+        except Exception as e:
+            logger.error(f"Error fetching intraday data for {ticker}: {str(e)}")
+            return pd.DataFrame()
+
+        if data is None or data.empty:
+            return pd.DataFrame()
+        data.columns = [col.lower().replace(' ', '_') for col in data.columns]
+        return data[[column for column in OHLCV_AGGREGATION if column in data.columns]]
+
+    def _needs_refresh(self, key: str) -> bool:
+        """Stale once ``refresh_seconds`` have passed and the market traded, or the last bar settled, since."""
+        updated_at = self._updated_at.get(key)
+        if updated_at is None and self.bar_store is not None:
+            stored = self.bar_store.updated_at(self.market, key, BASE_INTERVAL)
+            updated_at = stored.timestamp() if stored else None
+        if updated_at is None:
+            return True
+        if time.time() - updated_at < self.refresh_seconds:
+            return False
+        return not self.calendar.is_settled(
+            datetime.fromtimestamp(updated_at).astimezone(), datetime.now().astimezone()
+        )
+
+    # ------------------------------------------------------------------
+    # Series
+    # ------------------------------------------------------------------
+
+    def _memory_start(self) -> pd.Timestamp:
+        return pd.Timestamp.now(tz=self.calendar.timezone).normalize() - timedelta(days=self.memory_days)
+
+    def _load(self, key: str) -> ResampledSeries:
+        base = pd.DataFrame()
+        if self.bar_store is not None:
+            try:
+                base = self.bar_store.read(self.market, key, BASE_INTERVAL, start=self._memory_start())
+                self.stats["loads"] += 1
+            except Exception as e:
+                logger.warning(f"Bar store unavailable for {self.market}:{key} intraday bars: {str(e)}")
+        return ResampledSeries(base, self.market)
+
+    def _series_for(self, key: str) -> ResampledSeries:
+        with self._lock:
+            series = self._series.get(key)
+            if series is not None:
+                self._series.move_to_end(key)
+                return series
+
+        series = self._load(key)
+        with self._lock:
+            series = self._series.setdefault(key, series)
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                evicted, _ = self._series.popitem(last=False)
+                self._updated_at.pop(evicted, None)
+                self.stats["evictions"] += 1
+        return series
+
+    def refresh(self, symbol: str, force: bool = False) -> int:
+        """
+        Download new 1-minute bars for a symbol if its series is stale.
+
+        Returns:
+            Number of bars downloaded
+        """
+        key, ticker = self._resolve(symbol)
+        with self._lock:
+            symbol_lock = self._symbol_locks.setdefault(key, threading.Lock())
+
+        with symbol_lock:
+            series = self._series_for(key)
+            if not force and not self._needs_refresh(key):
+                return 0
+
+            since = series.last_timestamp
+            if since is None and self.bar_store is not None:
+                since = self.bar_store.last_timestamp(self.market, key, BASE_INTERVAL)
+            tail = self._download(ticker, since)
+            self.stats["downloads"] += 1
+
+            if not tail.empty:
+                if self.bar_store is not None:
+                    try:
+                        self.bar_store.write(self.market, key, tail, BASE_INTERVAL)
+                    except Exception as e:
+                        logger.warning(f"Failed to store intraday bars for {self.market}:{key}: {str(e)}")
+                series.append(tail)
+                series.trim(self._memory_start())
+                self.stats["bars_downloaded"] += len(tail)
+            elif self.bar_store is not None:
+                self.bar_store.touch(self.market, key, BASE_INTERVAL)
+
+            self._updated_at[key] = time.time()
+            return len(tail)
+
+    def get_bars(
+        self,
+        symbol: str,
+        resolution: str = "1",
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None
+    ) -> pd.DataFrame:
+        """
+        Bars at any supported resolution built from the 1-minute base series.
+
+        Args:
+            symbol: Symbol ('AAPL', '2330', '6415.TWO')
+            resolution: TradingView resolution ('1', '5', '15', '30', '60', '1D', '1W', '1M')
+            start: Inclusive start (naive values are exchange time)
+            end: Inclusive end
+
+        Returns:
+            OHLCV DataFrame indexed by bar start, empty if no data is available
+        """
+        self.refresh(symbol)
+        key, _ = self._resolve(symbol)
+        series = self._series_for(key)
+
+        # Older than the in-memory window: aggregate straight from the store
+        if start is not None and self.bar_store is not None:
+            start_ts = pd.Timestamp(start)
+            if start_ts.tzinfo is None:
+                start_ts = start_ts.tz_localize(self.calendar.timezone)
+            if start_ts < self._memory_start():
+                stored = self.bar_store.read(self.market, key, BASE_INTERVAL, start=start, end=end)
+                return resample_ohlcv(stored, resolution, self.market)
+
+        return series.get(resolution, start, end)
+
+    def get_stats(self) -> Dict:
+        """Download counters and in-memory series count."""
+        with self._lock:
+            return {**self.stats, "series": len(self._series)}
+
+
+# Global instances
+_intraday_bars: Dict[str, IntradayBars] = {}
+_intraday_bars_lock = threading.Lock()
+
+
+def get_intraday_bars(market: str) -> IntradayBars:
+    """
+    Get the shared intraday series manager for a market.
+
+    Args:
+        market: 'US' or 'TW'
+
+    Returns:
+        IntradayBars backed by the shared bar store (if enabled)
+    """
+    market = market.upper()
+    with _intraday_bars_lock:
+        if market not in _intraday_bars:
+            _intraday_bars[market] = IntradayBars(market, bar_store=get_bar_store())
+        return _intraday_bars[market]
@@ -0,0 +1,164 @@
+"""
+Shared real-time quote polling with fan-out to subscribers.
+
+Every websocket client used to poll upstream for its own symbol. The hub keeps
+one subscriber set per symbol and a single polling task that requests each
+distinct symbol once per interval, in batches, then pushes the quote to every
+subscriber's queue. Upstream traffic therefore scales with the number of
+distinct symbols rather than the number of connections.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Fetches quotes for a batch of symbols; symbols without a quote are omitted
+BatchQuoteFetcher = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class QuoteHub:
+    """
+    Per-symbol quote fan-out backed by one batched poller.
+    """
+
+    def __init__(
+        self,
+        fetch_quotes: BatchQuoteFetcher,
+        interval: float = 5.0,
+        batch_size: int = 50,
+        queue_size: int = 1
+    ):
+        """
+        Args:
+            fetch_quotes: Coroutine function returning {symbol: quote} for a list of symbols
+            interval: Seconds between polls of the same symbol
+            batch_size: Maximum symbols per upstream quote request
+            queue_size: Quotes buffered per subscriber; slow subscribers skip to the latest
+        """
+        self.fetch_quotes = fetch_quotes
+        self.interval = interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._latest: Dict[str, Any] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.stats = {"polls": 0, "symbols_requested": 0, "deliveries": 0, "dropped": 0}
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def subscribe(self, symbol: str) -> asyncio.Queue:
+        """
+        Subscribe to quotes for a symbol.
+
+        Returns:
+            Queue receiving each new quote; the last known quote is delivered immediately
+        """
+        symbol = symbol.upper()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(symbol, set()).add(queue)
+
+        if symbol in self._latest:
+            self._offer(queue, self._latest[symbol])
+        self._ensure_poller()
+        return queue
+
+    def unsubscribe(self, symbol: str, queue: asyncio.Queue):
+        """Remove a subscriber; symbols without subscribers stop being polled."""
+        symbol = symbol.upper()
+        queues = self._subscribers.get(symbol)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[symbol]
+            self._latest.pop(symbol, None)
+
+    def symbols(self) -> List[str]:
+        """Symbols that currently have at least one subscriber."""
+        return list(self._subscribers)
+
+    def subscriber_count(self, symbol: Optional[str] = None) -> int:
+        """Number of subscribers for one symbol, or across all symbols."""
+        if symbol is not None:
+            return len(self._subscribers.get(symbol.upper(), ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    # ------------------------------------------------------------------
+    # Polling and fan-out
+    # ------------------------------------------------------------------
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    async def _poll_loop(self):
+        while self._subscribers:
+            started = time.monotonic()
+            await self.poll_once()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def poll_once(self):
+        """Request every subscribed symbol once and publish the results."""
+        symbols = self.symbols()
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        if not batches:
+            return
+
+        self.stats["polls"] += 1
+        self.stats["symbols_requested"] += len(symbols)
+        results = await asyncio.gather(*(self.fetch_quotes(batch) for batch in batches), return_exceptions=True)
+
+        for batch, quotes in zip(batches, results):
+            if isinstance(quotes, Exception):
+                logger.warning(f"Quote poll failed for {len(batch)} symbols: {str(quotes)}")
+                continue
+            for symbol, quote in (quotes or {}).items():
+                if quote is not None:
+                    self.publish(symbol, quote)
+
+    def publish(self, symbol: str, quote: Any):
+        """Push a quote to every subscriber of the symbol."""
+        symbol = symbol.upper()
+        queues = self._subscribers.get(symbol)
+        if not queues:
+            return
+        self._latest[symbol] = quote
+        for queue in list(queues):
+            self._offer(queue, quote)
+
+    def _offer(self, queue: asyncio.Queue, quote: Any):
+        if queue.full():
+            # Drop the stale quote instead of letting a slow client back up the hub
+            try:
+                queue.get_nowait()
+                self.stats["dropped"] += 1
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(quote)
+        self.stats["deliveries"] += 1
+
+    async def close(self):
+        """Stop polling and drop all subscriptions."""
+        self._subscribers.clear()
+        self._latest.clear()
+        if self._poller is not None and not self._poller.done():
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+        self._poller = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Poll and delivery counters plus current subscription counts."""
+        return {
+            **self.stats,
+            "symbols": len(self._subscribers),
+            "subscribers": self.subscriber_count(),
+        }
@@ -0,0 +1,240 @@
+"""
+Token-bucket rate limiting for upstream market data APIs.
+
+Callers await a token instead of sleeping for a fixed interval, so bursts up to
+the bucket capacity go out immediately and sustained traffic is paced at the
+configured rate.
+
+``AsyncTokenBucket`` is local to one event loop. ``SharedTokenBucket`` keeps
+its state in a ``TokenBucketStore`` so that several workers can share one quota:
+in memory within a process, or in Redis across processes.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logging.warning("redis not available. Shared rate limits will be kept per process.")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTokenBucket:
+    """
+    Asyncio token bucket.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio.Lock is bound to the loop it is first used on
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available without waiting."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until ``tokens`` are available and take them."""
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity")
+
+        async with self._get_lock():
+            self._refill()
+            shortfall = tokens - self._tokens
+            if shortfall > 0:
+                await asyncio.sleep(shortfall / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class TokenBucketStore:
+    """
+    Backend holding token bucket state.
+
+    ``reserve`` takes tokens even when the bucket is empty, letting the balance
+    go negative, and returns how long the caller must wait for its reservation
+    to be covered. A single atomic call per request therefore suffices, and
+    waiting callers are served in arrival order.
+    """
+
+    # Whether reserve() does network I/O and should run off the event loop
+    remote = False
+
+    def reserve(self, key: str, tokens: float, rate: float, capacity: float) -> float:
+        """
+        Reserve tokens from a bucket.
+
+        Returns:
+            Seconds to wait before the reserved tokens may be used (0 if available now)
+        """
+        raise NotImplementedError
+
+
+class InMemoryTokenBucketStore(TokenBucketStore):
+    """
+    Token buckets shared by all threads and event loops of one process.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, tokens: float, rate: float, capacity: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            balance, updated_at = self._buckets.get(key, (capacity, now))
+            balance = min(capacity, balance + (now - updated_at) * rate) - tokens
+            self._buckets[key] = (balance, now)
+        return max(0.0, -balance / rate)
+
+
+class RedisTokenBucketStore(TokenBucketStore):
+    """
+    Token buckets shared across processes through Redis.
+    """
+
+    remote = True
+
+    # Refill and reserve atomically, using the Redis server clock
+    _RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local balance = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+balance = math.min(capacity, balance + math.max(0, now - updated_at) * rate) - requested
+redis.call('HSET', KEYS[1], 'tokens', tostring(balance), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - balance) / rate) + 60)
+if balance >= 0 then
+    return '0'
+end
+return tostring(-balance / rate)
+"""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        """
+        Args:
+            client: redis.Redis client
+            prefix: Key prefix for bucket hashes
+        """
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self._RESERVE_SCRIPT)
+
+    def reserve(self, key: str, tokens: float, rate: float, capacity: float) -> float:
+        wait = self._script(keys=[self.prefix + key], args=[rate, capacity, tokens])
+        if isinstance(wait, bytes):
+            wait = wait.decode()
+        return max(0.0, float(wait))
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in a ``TokenBucketStore``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: Optional[float] = None,
+        store: Optional[TokenBucketStore] = None
+    ):
+        """
+        Args:
+            name: Bucket name; buckets with the same name and store share tokens
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+            store: State backend (defaults to the process-wide store)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self.store = store or get_token_bucket_store()
+
+    def _reserve(self, tokens: float) -> float:
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity")
+        return self.store.reserve(self.name, tokens, self.rate, self.capacity)
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait asynchronously until ``tokens`` are available and take them."""
+        if self.store.remote:
+            wait = await asyncio.get_running_loop().run_in_executor(None, self._reserve, tokens)
+        else:
+            wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limit {self.name}: waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, tokens: float = 1.0):
+        """Synchronous variant of ``acquire`` for callers outside an event loop."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limit {self.name}: waiting {wait:.2f}s")
+            time.sleep(wait)
+
+
+# Global instance
+_token_bucket_store: Optional[TokenBucketStore] = None
+
+
+def get_token_bucket_store() -> TokenBucketStore:
+    """
+    Get the shared token bucket store.
+
+    Uses Redis when ``RATE_LIMIT_STORE=redis`` and the server is reachable,
+    otherwise an in-process store.
+    """
+    global _token_bucket_store
+    if _token_bucket_store is None:
+        from config.settings import settings
+        if settings.rate_limit_store == "redis" and REDIS_AVAILABLE:
+            try:
+                client = redis.Redis.from_url(settings.redis_url)
+                client.ping()
+                _token_bucket_store = RedisTokenBucketStore(client)
+            except Exception as e:
+                logger.warning(f"Redis rate limit store unavailable, using in-process store: {str(e)}")
+        if _token_bucket_store is None:
+            _token_bucket_store = InMemoryTokenBucketStore()
+    return _token_bucket_store
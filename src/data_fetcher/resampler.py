@@ -0,0 +1,240 @@
+"""
+OHLCV resampling from a base bar series.
+
+Charts ask for bars by TradingView resolution ('1', '5', '15', '60', '1D', '1W',
+'1M'). Only the finest series is downloaded and stored; coarser bars are built
+from it on demand:
+
+    open = first open, high = max high, low = min low,
+    close = last close, volume = sum of volume
+
+Minute bins are anchored at the session open (09:30 New York, 09:00 Taipei), so
+an hourly bar covers 09:30-10:29 rather than the clock hour. Weekly bars start on
+Monday and monthly bars on the first calendar day.
+
+``ResampledSeries`` caches every aggregated resolution of one symbol and, when
+new base bars arrive, recomputes only the bins from the last cached bar onwards.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.data_fetcher.bar_store import MARKET_TIMEZONES, DateLike
+from src.data_fetcher.trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+# Canonical TradingView resolution -> pandas resample rule
+RESOLUTION_RULES = {
+    "1": "1min",
+    "5": "5min",
+    "15": "15min",
+    "30": "30min",
+    "60": "60min",
+    "1D": "1D",
+    "1W": "W-MON",
+    "1M": "MS",
+}
+
+SUPPORTED_RESOLUTIONS = list(RESOLUTION_RULES)
+
+_RESOLUTION_ALIASES = {
+    "1H": "60", "60M": "60", "D": "1D", "W": "1W", "M": "1M",
+    "1MIN": "1", "5MIN": "5", "15MIN": "15", "30MIN": "30",
+}
+
+OHLCV_AGGREGATION = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+
+def normalize_resolution(resolution: str) -> str:
+    """
+    Map a resolution string to its canonical form.
+
+    Raises:
+        ValueError: If the resolution is not supported
+    """
+    value = str(resolution).strip().upper()
+    value = _RESOLUTION_ALIASES.get(value, value)
+    if value not in RESOLUTION_RULES:
+        raise ValueError(f"Unsupported resolution: {resolution}")
+    return value
+
+
+def is_intraday_resolution(resolution: str) -> bool:
+    """Whether a resolution is finer than one day."""
+    return normalize_resolution(resolution).isdigit()
+
+
+def _bin_offset(resolution: str, market: str) -> timedelta:
+    """Offset from midnight that aligns minute bins with the session open."""
+    minutes = int(resolution)
+    if minutes <= 1:
+        return timedelta(0)
+    open_time = get_trading_calendar(market).open_time
+    return timedelta(minutes=(open_time.hour * 60 + open_time.minute) % minutes)
+
+
+def resample_ohlcv(data: pd.DataFrame, resolution: str, market: str = "US") -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars into a coarser resolution.
+
+    Args:
+        data: Bars indexed by timestamp with open/high/low/close/volume columns
+        resolution: Target TradingView resolution
+        market: Market code ('US' or 'TW'), used for timezone and session alignment
+
+    Returns:
+        Aggregated bars labelled by bin start; bins without trades are dropped
+    """
+    resolution = normalize_resolution(resolution)
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    df = data
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TIMEZONES.get(market.upper(), "UTC"))
+        df = df.set_axis(index)
+
+    aggregation = {column: how for column, how in OHLCV_AGGREGATION.items() if column in df.columns}
+    rule = RESOLUTION_RULES[resolution]
+    if resolution.isdigit():
+        resampler = df.resample(rule, origin="start_day", offset=_bin_offset(resolution, market))
+    elif resolution == "1W":
+        resampler = df.resample(rule, label="left", closed="left")
+    else:
+        resampler = df.resample(rule)
+
+    bars = resampler.agg(aggregation)
+    return bars.dropna(subset=[column for column in ("open", "close") if column in bars.columns])
+
+
+class ResampledSeries:
+    """
+    Base bars of one symbol plus cached aggregations per resolution.
+    """
+
+    def __init__(self, base: pd.DataFrame, market: str = "US", base_resolution: str = "1"):
+        """
+        Args:
+            base: Base bars indexed by timestamp
+            market: Market code ('US' or 'TW')
+            base_resolution: Resolution of the base bars
+        """
+        self.market = market
+        self.base_resolution = normalize_resolution(base_resolution)
+        self.base = self._clean(base)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.RLock()
+
+    def _clean(self, data: Optional[pd.DataFrame]) -> pd.DataFrame:
+        tz = MARKET_TIMEZONES.get(self.market.upper(), "UTC")
+        if data is None or data.empty:
+            return pd.DataFrame(columns=list(OHLCV_AGGREGATION), index=pd.DatetimeIndex([], tz=tz), dtype=float)
+        columns = [column for column in OHLCV_AGGREGATION if column in data.columns]
+        df = data[columns]
+        index = pd.DatetimeIndex(data.index)
+        index = index.tz_localize(tz) if index.tz is None else index.tz_convert(tz)
+        df = df.set_axis(index)
+        return df[~df.index.duplicated(keep="last")].sort_index()
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """Timestamp of the newest base bar."""
+        return self.base.index[-1] if len(self.base) else None
+
+    def append(self, bars: pd.DataFrame) -> int:
+        """
+        Merge new base bars and update the cached resolutions incrementally.
+
+        The new bars replace the base from their first timestamp on, so a
+        re-downloaded tail (including the still-forming minute) overwrites the
+        old one. Only bins from the last cached bin at or before the first new
+        bar are recomputed; bars older than the whole base reset the caches.
+
+        Returns:
+            Number of base bars received
+        """
+        new = self._clean(bars)
+        if new.empty:
+            return 0
+
+        with self._lock:
+            first_new = new.index[0]
+            if len(self.base) and first_new < self.base.index[0]:
+                self.base = self._clean(pd.concat([self.base, new]))
+                self._frames.clear()
+                return len(new)
+
+            kept = self.base[self.base.index < first_new]
+            self.base = pd.concat([kept, new]) if len(kept) else new
+            self.base = self.base[~self.base.index.duplicated(keep="last")].sort_index()
+
+            for resolution, frame in list(self._frames.items()):
+                if frame.empty:
+                    del self._frames[resolution]
+                    continue
+                # Re-aggregate from the bin that contains the first new bar
+                position = frame.index.searchsorted(first_new, side="right") - 1
+                if position < 0:
+                    del self._frames[resolution]
+                    continue
+                bin_start = frame.index[position]
+                tail = resample_ohlcv(self.base[self.base.index >= bin_start], resolution, self.market)
+                self._frames[resolution] = pd.concat([frame.iloc[:position], tail])
+            return len(new)
+
+    def trim(self, start: pd.Timestamp):
+        """Drop base bars before ``start``; bins already aggregated are kept."""
+        with self._lock:
+            if len(self.base) and self.base.index[0] < start:
+                self.base = self.base[self.base.index >= start]
+
+    def get(
+        self,
+        resolution: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None
+    ) -> pd.DataFrame:
+        """
+        Bars at a resolution, optionally limited to [start, end] (bin start times).
+
+        Naive bounds are interpreted in exchange time.
+        """
+        resolution = normalize_resolution(resolution)
+        with self._lock:
+            if resolution == self.base_resolution:
+                frame = self.base
+            else:
+                frame = self._frames.get(resolution)
+                if frame is None:
+                    frame = resample_ohlcv(self.base, resolution, self.market)
+                    self._frames[resolution] = frame
+
+        if frame.empty:
+            return frame
+        tz = frame.index.tz
+        if start is not None:
+            start_ts = pd.Timestamp(start)
+            start_ts = start_ts.tz_localize(tz) if start_ts.tzinfo is None else start_ts.tz_convert(tz)
+            frame = frame[frame.index >= start_ts]
+        if end is not None:
+            end_ts = pd.Timestamp(end)
+            end_ts = end_ts.tz_localize(tz) if end_ts.tzinfo is None else end_ts.tz_convert(tz)
+            frame = frame[frame.index <= end_ts]
+        return frame
+
+    def cached_resolutions(self) -> List[str]:
+        """Resolutions with a cached aggregation."""
+        with self._lock:
+            return list(self._frames)
@@ -0,0 +1,236 @@
+"""
+Learned routing across upstream data sources with per-provider circuit breakers.
+
+A fetch can usually be served by several routes: a provider plus a variant
+(e.g. yfinance with '5483.TWO', or the TPEx daily snapshot). Trying them in a
+fixed order means every request for an OTC symbol pays for the routes that
+never work for it. The router remembers, per symbol, which route last returned
+data and which returned nothing, and orders candidates accordingly:
+
+    1. the route that last succeeded for the symbol
+    2. routes never tried for the symbol (in the caller's order)
+    3. routes that recently came back empty for the symbol
+    4. routes that recently returned only part of the requested range (e.g. the
+       daily snapshots, which cover the last month), so a full-history provider
+       that missed once is retried before them
+
+Independently, each provider keeps a latency/error-rate moving average and a
+circuit breaker: after ``failure_threshold`` consecutive errors (exceptions or
+timeouts, not empty results) its routes are skipped for ``reset_timeout``
+seconds, after which a single trial request is let through.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (provider, variant), e.g. ("yfinance", "5483.TWO") or ("snapshot", "TPEx")
+Route = Tuple[str, Optional[str]]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class ProviderHealth:
+    """Moving-average health and circuit state of one provider."""
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    opened_at: Optional[float] = None
+    trial_in_flight: bool = False
+
+
+class SourceRouter:
+    """
+    Per-symbol route memory plus per-provider circuit breakers.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        miss_ttl: float = 24 * 3600,
+        smoothing: float = 0.2,
+        max_symbols: int = 4096
+    ):
+        """
+        Args:
+            failure_threshold: Consecutive provider errors that open its circuit
+            reset_timeout: Seconds an open circuit waits before a trial request
+            miss_ttl: Seconds an empty result keeps a route at the back for a symbol
+            smoothing: Weight of the newest sample in the latency/error-rate averages
+            max_symbols: Symbols whose routes are remembered (least recently used are dropped)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.miss_ttl = miss_ttl
+        self.smoothing = smoothing
+        self.max_symbols = max_symbols
+
+        self._providers: Dict[str, ProviderHealth] = {}
+        self._good: "OrderedDict[Hashable, Route]" = OrderedDict()
+        self._misses: "OrderedDict[Hashable, Dict[Route, float]]" = OrderedDict()
+        self._partials: "OrderedDict[Hashable, Dict[Route, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Circuit breakers
+    # ------------------------------------------------------------------
+
+    def _health(self, provider: str) -> ProviderHealth:
+        health = self._providers.get(provider)
+        if health is None:
+            health = self._providers[provider] = ProviderHealth()
+        return health
+
+    def _state(self, health: ProviderHealth, now: float) -> str:
+        if health.opened_at is None:
+            return CLOSED
+        if now - health.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def circuit_state(self, provider: str) -> str:
+        """'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._state(self._health(provider), time.monotonic())
+
+    def allow(self, provider: str) -> bool:
+        """
+        Whether a request to the provider may be made now.
+
+        A half-open circuit admits one trial request at a time.
+        """
+        with self._lock:
+            health = self._health(provider)
+            state = self._state(health, time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not health.trial_in_flight:
+                health.trial_in_flight = True
+                return True
+            return False
+
+    def _record_call(self, provider: str, latency: float, failed: bool):
+        health = self._health(provider)
+        alpha = self.smoothing
+        health.calls += 1
+        health.latency = latency if health.latency is None else (1 - alpha) * health.latency + alpha * latency
+        health.error_rate = (1 - alpha) * health.error_rate + alpha * (1.0 if failed else 0.0)
+        health.trial_in_flight = False
+        if failed:
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.opened_at is not None or health.consecutive_failures >= self.failure_threshold:
+                if health.opened_at is None:
+                    logger.warning(f"Opening circuit for data provider {provider} "
+                                   f"after {health.consecutive_failures} consecutive errors")
+                health.opened_at = time.monotonic()
+        else:
+            health.consecutive_failures = 0
+            health.opened_at = None
+
+    # ------------------------------------------------------------------
+    # Route memory
+    # ------------------------------------------------------------------
+
+    def order(self, key: Hashable, routes: List[Route]) -> List[Route]:
+        """
+        Candidate routes for a symbol, best first, without open-circuit providers.
+
+        Args:
+            key: Symbol identity, e.g. the bare code '5483'
+            routes: Candidate routes in default preference order
+        """
+        now = time.monotonic()
+        with self._lock:
+            good = self._good.get(key)
+            misses = self._misses.get(key, {})
+            partials = self._partials.get(key, {})
+            ranked = []
+            for position, route in enumerate(routes):
+                if self._state(self._health(route[0]), now) == OPEN:
+                    continue
+                if route == good:
+                    rank = 0
+                elif now - partials.get(route, float("-inf")) < self.miss_ttl:
+                    rank = 3
+                elif now - misses.get(route, float("-inf")) < self.miss_ttl:
+                    rank = 2
+                else:
+                    rank = 1
+                ranked.append((rank, position, route))
+        return [route for _, _, route in sorted(ranked)]
+
+    def record_success(self, key: Hashable, route: Route, latency: float):
+        """The route returned data covering the requested range for the symbol."""
+        with self._lock:
+            self._record_call(route[0], latency, failed=False)
+            self._good[key] = route
+            self._good.move_to_end(key)
+            for memory in (self._misses, self._partials):
+                if memory.get(key):
+                    memory[key].pop(route, None)
+            self._trim()
+
+    def record_miss(self, key: Hashable, route: Route, latency: float):
+        """The provider answered but had no data for the symbol on this route."""
+        self._record_outcome(self._misses, key, route, latency)
+
+    def record_partial(self, key: Hashable, route: Route, latency: float):
+        """The route returned data, but only part of the requested range."""
+        self._record_outcome(self._partials, key, route, latency)
+
+    def _record_outcome(self, memory: "OrderedDict", key: Hashable, route: Route, latency: float):
+        with self._lock:
+            self._record_call(route[0], latency, failed=False)
+            if self._good.get(key) == route:
+                del self._good[key]
+            memory.setdefault(key, {})[route] = time.monotonic()
+            memory.move_to_end(key)
+            self._trim()
+
+    def record_failure(self, key: Hashable, route: Route, latency: float, error: Optional[BaseException] = None):
+        """The provider errored or timed out; counts towards opening its circuit."""
+        with self._lock:
+            self._record_call(route[0], latency, failed=True)
+        if error is not None:
+            logger.debug(f"Route {route} failed for {key}: {error}")
+
+    def _trim(self):
+        while len(self._good) > self.max_symbols:
+            self._good.popitem(last=False)
+        while len(self._misses) > self.max_symbols:
+            self._misses.popitem(last=False)
+        while len(self._partials) > self.max_symbols:
+            self._partials.popitem(last=False)
+
+    def known_route(self, key: Hashable) -> Optional[Route]:
+        """The route that last returned data for a symbol."""
+        with self._lock:
+            return self._good.get(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-provider health and circuit state, plus remembered symbol counts."""
+        now = time.monotonic()
+        with self._lock:
+            providers = {
+                name: {
+                    "state": self._state(health, now),
+                    "calls": health.calls,
+                    "failures": health.failures,
+                    "error_rate": round(health.error_rate, 3),
+                    "latency_ms": round(health.latency * 1000, 1) if health.latency is not None else None,
+                }
+                for name, health in self._providers.items()
+            }
+            return {"providers": providers, "symbols": len(self._good)}
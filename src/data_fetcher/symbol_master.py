@@ -0,0 +1,501 @@
+"""
+Full-universe symbol master with prefix and n-gram search.
+
+The instrument list is built from the exchanges' own listing files:
+
+    TWSE   openapi.twse.com.tw   STOCK_DAY_ALL (+ t187ap03_L for English names)
+    TPEx   www.tpex.org.tw       tpex_mainboard_daily_close_quotes (+ mopsfe_t187ap03_O)
+    US     www.nasdaqtrader.com  nasdaqlisted.txt / otherlisted.txt
+
+and persisted as one JSON file next to the bar store, so searches and
+code-to-exchange lookups never touch the network. ``refresh_if_stale`` downloads
+the listings again at most once per ``max_age``. Until a listing has been loaded
+the master is empty and callers fall back to their own symbol tables.
+
+Searches are answered from two in-memory indexes:
+
+* a prefix index: sorted key arrays (a flattened trie) for codes, full names and
+  name words, scanned with ``bisect`` in O(log n + limit);
+* an n-gram index: posting lists of 2- and 3-grams for substring matches such
+  as "積電" or "micro".
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+
+from src.data_fetcher.transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+TWSE_LISTING_URL = "https://openapi.twse.com.tw/v1/exchangeReport/STOCK_DAY_ALL"
+TWSE_COMPANY_URL = "https://openapi.twse.com.tw/v1/opendata/t187ap03_L"
+TPEX_LISTING_URL = "https://www.tpex.org.tw/openapi/v1/tpex_mainboard_daily_close_quotes"
+TPEX_COMPANY_URL = "https://www.tpex.org.tw/openapi/v1/mopsfe_t187ap03_O"
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+
+TW_EXCHANGES = ("TWSE", "TPEx")
+TW_SUFFIXES = {"TWSE": ".TW", "TPEx": ".TWO"}
+
+# Field names used by the TWSE / TPEx open data APIs
+_CODE_FIELDS = ("Code", "SecuritiesCompanyCode", "公司代號")
+_NAME_FIELDS = ("Name", "CompanyName", "公司簡稱")
+_ENGLISH_FIELDS = ("英文簡稱", "EnglishAbbreviation", "CompanyEnglishAbbreviation")
+
+# otherlisted.txt exchange codes
+_US_EXCHANGES = {"A": "AMEX", "N": "NYSE", "P": "NYSEARCA", "Z": "BATS", "V": "IEX"}
+
+_COLUMNS = ["code", "name", "exchange", "market", "type", "english_name"]
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """One listed security."""
+    code: str
+    name: str
+    exchange: str
+    market: str
+    type: str = "stock"
+    english_name: str = ""
+
+    @property
+    def symbol(self) -> str:
+        """Symbol as used by the fetchers ('2330.TW', '6415.TWO', 'AAPL')."""
+        return self.code + TW_SUFFIXES.get(self.exchange, "")
+
+
+def split_symbol(symbol: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a symbol into its code and the exchange implied by its suffix.
+
+    Examples:
+        '6415.TWO' -> ('6415', 'TPEx'), 'TWSE:2330' -> ('2330', None), 'aapl' -> ('AAPL', None)
+    """
+    symbol = symbol.upper().strip()
+    if ':' in symbol:
+        symbol = symbol.split(':', 1)[1]
+    for exchange, suffix in (("TPEx", ".TWO"), ("TWSE", ".TW")):
+        if symbol.endswith(suffix):
+            return symbol[:-len(suffix)], exchange
+    return symbol, None
+
+
+def _fold(text: str) -> str:
+    """Case- and width-insensitive search key (full-width digits/letters fold to ASCII)."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _field(row: Dict, names: Tuple[str, ...]) -> str:
+    for name in names:
+        value = row.get(name)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+# ----------------------------------------------------------------------
+# Listing parsers
+# ----------------------------------------------------------------------
+
+def parse_tw_listing(exchange: str, rows: List[Dict], companies: Iterable[Dict] = ()) -> List[Instrument]:
+    """
+    Build instruments from a TWSE / TPEx open data listing.
+
+    Args:
+        exchange: "TWSE" or "TPEx"
+        rows: Daily quote rows covering every listed security (code and Chinese name)
+        companies: Company profile rows, used for English short names
+
+    Returns:
+        Instruments in listing order; codes starting with "00" are ETFs
+    """
+    english = {}
+    for row in companies:
+        code, name = _field(row, _CODE_FIELDS), _field(row, _ENGLISH_FIELDS)
+        if code and name:
+            english[code] = name
+
+    instruments = {}
+    for row in rows:
+        code, name = _field(row, _CODE_FIELDS).upper(), _field(row, _NAME_FIELDS)
+        if code and name and code not in instruments:
+            kind = "etf" if code.startswith("00") else "stock"
+            instruments[code] = Instrument(code, name, exchange, "TW", kind, english.get(code, ""))
+    return list(instruments.values())
+
+
+def parse_us_listing(text: str) -> List[Instrument]:
+    """
+    Build instruments from NASDAQ Trader's ``nasdaqlisted.txt`` or ``otherlisted.txt``.
+
+    Test issues and preferred/when-issued lines (codes containing '$') are skipped;
+    class shares use the yfinance form ('BRK.B' -> 'BRK-B').
+    """
+    instruments = []
+    for row in csv.DictReader(io.StringIO(text), delimiter="|"):
+        code = (row.get("Symbol") or row.get("ACT Symbol") or "").strip()
+        if not code or code.startswith("File Creation Time") or "$" in code:
+            continue
+        if row.get("Test Issue") == "Y":
+            continue
+
+        if "Market Category" in row:
+            exchange = "NASDAQ"
+        else:
+            exchange = _US_EXCHANGES.get((row.get("Exchange") or "").strip())
+            if exchange is None:
+                continue
+
+        name = (row.get("Security Name") or "").split(" - ")[0].strip()
+        kind = "etf" if row.get("ETF") == "Y" else "stock"
+        instruments.append(Instrument(code.replace(".", "-"), name or code, exchange, "US", kind))
+    return instruments
+
+
+def download_listings(timeout: float = 30) -> Dict[str, List[Instrument]]:
+    """
+    Download every listing source.
+
+    Returns:
+        {"TWSE" | "TPEx" | "US": instruments}; sources that failed are omitted
+    """
+    def get(url: str) -> requests.Response:
+        response = get_transport().get("listings", url, timeout=timeout)
+        response.raise_for_status()
+        return response
+
+    def get_optional_json(url: str) -> List[Dict]:
+        try:
+            return get(url).json()
+        except Exception as e:
+            logger.debug(f"Optional listing {url} failed: {str(e)}")
+            return []
+
+    listings = {}
+    for exchange, listing_url, company_url in (
+        ("TWSE", TWSE_LISTING_URL, TWSE_COMPANY_URL),
+        ("TPEx", TPEX_LISTING_URL, TPEX_COMPANY_URL),
+    ):
+        try:
+            instruments = parse_tw_listing(exchange, get(listing_url).json(), get_optional_json(company_url))
+        except Exception as e:
+            logger.warning(f"{exchange} listing download failed: {str(e)}")
+            continue
+        if instruments:
+            listings[exchange] = instruments
+
+    try:
+        instruments = []
+        for url in (NASDAQ_LISTED_URL, OTHER_LISTED_URL):
+            instruments.extend(parse_us_listing(get(url).text))
+        if instruments:
+            listings["US"] = instruments
+    except Exception as e:
+        logger.warning(f"US listing download failed: {str(e)}")
+
+    return listings
+
+
+# ----------------------------------------------------------------------
+# Search index
+# ----------------------------------------------------------------------
+
+class SymbolIndex:
+    """
+    Immutable search index over a list of instruments.
+    """
+
+    NGRAM_SIZES = (2, 3)
+
+    def __init__(self, instruments: Iterable[Instrument]):
+        # Ids follow result rank (shorter codes first), so posting lists are already ranked
+        self.instruments: List[Instrument] = sorted(instruments, key=lambda i: (len(i.code), i.code))
+        self._by_code: Dict[Tuple[str, str], int] = {}
+        self._texts: List[Tuple[str, ...]] = []
+        self._ngrams: Dict[str, List[int]] = {}
+
+        # Prefix tiers, searched in order: codes, full names, later name words
+        tiers: Tuple[list, list, list] = ([], [], [])
+        for i, instrument in enumerate(self.instruments):
+            self._by_code.setdefault((instrument.market, instrument.code.upper()), i)
+
+            code = _fold(instrument.code)
+            names = {_fold(name) for name in (instrument.name, instrument.english_name) if name}
+            words = {word for name in names for word in name.split()[1:]} - names
+            tiers[0].append((code, i))
+            tiers[1].extend((name, i) for name in names)
+            tiers[2].extend((word, i) for word in words)
+
+            texts = (code, *names)
+            self._texts.append(texts)
+            grams = {text[j:j + n] for text in texts for n in self.NGRAM_SIZES for j in range(len(text) - n + 1)}
+            for gram in grams:
+                self._ngrams.setdefault(gram, []).append(i)
+
+        self._prefix: List[Tuple[List[str], List[int]]] = []
+        for entries in tiers:
+            entries.sort()
+            self._prefix.append(([key for key, _ in entries], [i for _, i in entries]))
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        """Exact lookup by code or symbol ('2330', '6415.TWO', 'AAPL')."""
+        code, suffix_exchange = split_symbol(symbol)
+        if suffix_exchange or code[:1].isdigit():
+            markets = ("TW", "US")
+        else:
+            markets = ("US", "TW")
+        for market in markets:
+            i = self._by_code.get((market, code))
+            if i is not None:
+                return self.instruments[i]
+        return None
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        market: Optional[str] = None,
+        exchange: Optional[str] = None
+    ) -> List[Instrument]:
+        """
+        Find instruments by code, Chinese or English name.
+
+        Results are ranked exact code, code prefix, name prefix, name-word prefix,
+        then substring matches.
+
+        Args:
+            query: Code, symbol or (partial) name
+            limit: Maximum number of results
+            market: Only return "TW" or "US" instruments
+            exchange: Only return instruments of this exchange (e.g. "TPEx")
+        """
+        code, _ = split_symbol(query)
+        key = _fold(code)
+        if not key or limit <= 0:
+            return []
+
+        instruments = self.instruments
+
+        def accepted(i: int) -> bool:
+            instrument = instruments[i]
+            return ((market is None or instrument.market == market)
+                    and (not exchange or instrument.exchange == exchange))
+
+        found: Dict[int, None] = {}
+        for keys, ids in self._prefix:
+            for j in range(bisect_left(keys, key), len(keys)):
+                if not keys[j].startswith(key):
+                    break
+                i = ids[j]
+                if i not in found and accepted(i):
+                    found[i] = None
+                    if len(found) >= limit:
+                        return [instruments[i] for i in found]
+
+        for i in self._substring_matches(key):
+            if i not in found and accepted(i):
+                found[i] = None
+                if len(found) >= limit:
+                    break
+        return [instruments[i] for i in found]
+
+    def _substring_matches(self, key: str) -> Iterator[int]:
+        """Ids whose code or names contain ``key``, in rank order."""
+        n = min(len(key), max(self.NGRAM_SIZES))
+        if n < min(self.NGRAM_SIZES):
+            return
+
+        # Walk the rarest n-gram's posting list and verify candidates lazily
+        posting = min((self._ngrams.get(key[j:j + n], ()) for j in range(len(key) - n + 1)), key=len)
+        for i in posting:
+            if n == len(key) or any(key in text for text in self._texts[i]):
+                yield i
+
+
+# ----------------------------------------------------------------------
+# Symbol master
+# ----------------------------------------------------------------------
+
+class SymbolMaster:
+    """
+    Listing-backed instrument master persisted as a local JSON file.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_age: float = 24 * 3600,
+        instruments: Iterable[Instrument] = ()
+    ):
+        """
+        Args:
+            path: JSON file holding the last downloaded listings (None keeps it in memory)
+            max_age: Seconds before ``refresh_if_stale`` downloads the listings again
+            instruments: Initial instruments (mainly for tests)
+        """
+        self.path = Path(path) if path else None
+        self.max_age = max_age
+        self.updated_at: Optional[datetime] = None
+        self._index = SymbolIndex(instruments)
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def is_loaded(self) -> bool:
+        """Whether any listing has been loaded."""
+        return len(self._index) > 0
+
+    def set_instruments(self, instruments: Iterable[Instrument], updated_at: Optional[datetime] = None):
+        """Replace the instrument list; the index is rebuilt and swapped in atomically."""
+        self._index = SymbolIndex(instruments)
+        self.updated_at = updated_at or datetime.now()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        """Exact lookup by code or symbol ('2330', '6415.TWO', 'AAPL')."""
+        return self._index.get(symbol)
+
+    def exchange_of(self, symbol: str) -> Optional[str]:
+        """Listing exchange of a code ("TWSE", "TPEx", "NASDAQ", ...), or None if unknown."""
+        instrument = self._index.get(symbol)
+        return instrument.exchange if instrument else None
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        market: Optional[str] = None,
+        exchange: Optional[str] = None
+    ) -> List[Instrument]:
+        """Search by code, Chinese or English name; see ``SymbolIndex.search``."""
+        return self._index.search(query, limit, market=market, exchange=exchange)
+
+    # ------------------------------------------------------------------
+    # Persistence and refresh
+    # ------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """
+        Load the persisted listings.
+
+        Returns:
+            True if the file existed and was read
+        """
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            instruments = [Instrument(*row) for row in payload["rows"]]
+            updated_at = datetime.fromisoformat(payload["updated_at"])
+        except Exception as e:
+            logger.warning(f"Failed to read symbol master {self.path}: {str(e)}")
+            return False
+
+        self.set_instruments(instruments, updated_at)
+        logger.info(f"Loaded {len(instruments)} instruments from {self.path}")
+        return True
+
+    def save(self):
+        """Persist the current listings (no-op without a path)."""
+        if self.path is None:
+            return
+        payload = {
+            "updated_at": (self.updated_at or datetime.now()).isoformat(),
+            "columns": _COLUMNS,
+            "rows": [[getattr(instrument, column) for column in _COLUMNS] for instrument in self._index.instruments],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self) -> bool:
+        """Whether the listings are missing or older than ``max_age``."""
+        if self.updated_at is None:
+            return True
+        return (datetime.now() - self.updated_at).total_seconds() > self.max_age
+
+    def refresh(self) -> bool:
+        """
+        Download the listings, rebuild the index and persist it.
+
+        Sources that fail keep their previously loaded instruments.
+
+        Returns:
+            True if at least one source was downloaded
+        """
+        with self._refresh_lock:
+            listings = download_listings()
+            if not listings:
+                return False
+
+            for instrument in self._index.instruments:
+                group = instrument.exchange if instrument.market == "TW" else instrument.market
+                if group not in listings:
+                    listings.setdefault(f"previous:{group}", []).append(instrument)
+
+            self.set_instruments([instrument for group in listings.values() for instrument in group])
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"Failed to persist symbol master: {str(e)}")
+            logger.info(f"Symbol master refreshed: {len(self)} instruments")
+            return True
+
+    def refresh_if_stale(self) -> bool:
+        """Refresh when the listings are missing or older than ``max_age``."""
+        if not self.is_stale():
+            return False
+        return self.refresh()
+
+    def get_stats(self) -> Dict[str, object]:
+        """Instrument counts per exchange and listing age."""
+        counts: Dict[str, int] = {}
+        for instrument in self._index.instruments:
+            counts[instrument.exchange] = counts.get(instrument.exchange, 0) + 1
+        return {
+            "instruments": len(self),
+            "exchanges": counts,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+# Global instance
+_symbol_master: Optional[SymbolMaster] = None
+
+
+def get_symbol_master() -> SymbolMaster:
+    """
+    Get the shared symbol master, loaded from the local listing file.
+
+    The listings are not downloaded here; call ``refresh_if_stale`` (the API
+    server does so in the background at startup).
+    """
+    global _symbol_master
+    if _symbol_master is None:
+        from config.settings import settings
+        path = os.path.join(settings.bar_store_path, "_symbols", "symbols.json") if settings.bar_store_enabled else None
+        _symbol_master = SymbolMaster(path, max_age=settings.symbol_master_refresh_hours * 3600)
+        _symbol_master.load()
+    return _symbol_master
@@ -0,0 +1,446 @@
+"""
+Vectorized synthetic market data for load and scale tests.
+
+Generates correlated OHLCV panels for any number of symbols over daily or
+minute sessions of the US or Taiwan trading calendar. Log returns follow a
+one-factor geometric Brownian motion (every symbol loads on a common market
+shock with pairwise correlation ``correlation``) whose volatility switches
+between a calm and a turbulent regime with Markov-style spells; volume scales
+with each bar's absolute return and the regime. Everything is drawn in whole
+arrays, so thousands of symbols over years of bars take seconds.
+
+Daily paths start at the trading calendar's first session and are drawn in
+fixed blocks of sessions, each seeded by its position from that epoch; a
+request generates the blocks it overlaps and slices out its range, so
+overlapping requests agree bar for bar. Minute bars bridge each session's
+daily return, seeded by the session, so they end on the daily close.
+
+Output is seeded and deterministic, and comes in the shapes the rest of the
+system consumes: wide per-field panels, per-symbol frames, a
+``fetch_historical_data`` stand-in for the fetchers, and bar-store writes.
+"""
+
+import bisect
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher.bar_store import BarStore, DateLike, MARKET_TIMEZONES, period_to_start
+from src.data_fetcher.trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+FIELDS = ("open", "high", "low", "close", "volume")
+BLOCK_SESSIONS = 256
+REGIME_BATCH = 64
+
+
+def session_index(market: str, start: DateLike, end: DateLike, interval: str = "1d") -> pd.DatetimeIndex:
+    """
+    Bar timestamps of every session between ``start`` and ``end``.
+
+    Args:
+        market: Market code ('US' or 'TW')
+        start: First day (inclusive)
+        end: Last day (inclusive)
+        interval: '1d' or a minute interval such as '1m', '5m', '60m'
+
+    Returns:
+        Exchange-timezone DatetimeIndex; daily bars sit at midnight, minute
+        bars at their open time (early closes honoured)
+    """
+    calendar = get_trading_calendar(market)
+    sessions = calendar.sessions_in_range(pd.Timestamp(start).date(), pd.Timestamp(end).date())
+    if interval == "1d":
+        return pd.DatetimeIndex(pd.to_datetime(sessions)).tz_localize(calendar.timezone).rename("date")
+    if not interval.endswith("m") or not interval[:-1].isdigit():
+        raise ValueError(f"Unsupported synthetic interval: {interval}")
+    if not sessions:
+        return pd.DatetimeIndex([], tz=calendar.timezone, name="date")
+
+    step = np.timedelta64(int(interval[:-1]), "m")
+    opens = pd.DatetimeIndex([calendar.session_open(day) for day in sessions]).tz_convert("UTC").tz_localize(None)
+    closes = pd.DatetimeIndex([calendar.session_close(day) for day in sessions]).tz_convert("UTC").tz_localize(None)
+    bars_per_session = int(np.ceil((closes - opens).max() / step))
+
+    # One row per session, one column per bar slot; slots past an early close are dropped
+    grid = opens.values[:, None] + np.arange(bars_per_session) * step
+    grid = grid[grid < closes.values[:, None]]
+    return pd.DatetimeIndex(grid).tz_localize("UTC").tz_convert(calendar.timezone).rename("date")
+
+
+def regime_path(n: int, rng: np.random.Generator, calm_spell: float, turbulent_spell: float) -> np.ndarray:
+    """
+    Alternating calm (0) / turbulent (1) states with geometric spell lengths.
+
+    Args:
+        n: Number of bars
+        rng: Random generator
+        calm_spell: Mean calm spell length in bars
+        turbulent_spell: Mean turbulent spell length in bars
+
+    Returns:
+        int8 array of length ``n``; spells are drawn in fixed batches, so the
+        first bars don't depend on ``n`` for the same generator state
+    """
+    if n <= 0:
+        return np.zeros(0, dtype=np.int8)
+    first = int(rng.random() < turbulent_spell / (calm_spell + turbulent_spell))
+    durations = np.empty(0, dtype=np.int64)
+    while durations.sum() < n:
+        drawn = np.empty(2 * REGIME_BATCH, dtype=np.int64)
+        drawn[0::2] = rng.geometric(1 / max(calm_spell, 1), REGIME_BATCH)
+        drawn[1::2] = rng.geometric(1 / max(turbulent_spell, 1), REGIME_BATCH)
+        durations = np.concatenate([durations, drawn])
+    states = np.repeat(np.tile(np.array([first, 1 - first], dtype=np.int8), len(durations) // 2), durations)
+    return states[:n]
+
+
+def ohlcv_from_returns(
+    log_returns: np.ndarray,
+    start_prices: np.ndarray,
+    step_volatility: np.ndarray,
+    base_volume: np.ndarray,
+    rng: np.random.Generator,
+    volume_sensitivity: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """
+    Build OHLCV arrays from a (bars x symbols) matrix of close-to-close log returns.
+
+    Opens gap away from the previous close by a fraction of the bar's
+    volatility, highs/lows extend beyond the open/close body by a half-normal
+    excursion, and volume is lognormal around ``base_volume`` scaled up by
+    the absolute return in units of bar volatility.
+
+    Args:
+        log_returns: Close-to-close log returns, shape (n, k)
+        start_prices: Close before the first bar, shape (k,)
+        step_volatility: Per-bar return volatility, broadcastable to (n, k)
+        base_volume: Typical volume per bar, broadcastable to (n, k)
+        rng: Random generator
+        volume_sensitivity: Extra volume per unit of |return| / volatility
+
+    Returns:
+        {"open", "high", "low", "close", "volume"} arrays of shape (n, k)
+    """
+    n, k = log_returns.shape
+    log_close = np.log(start_prices) + np.cumsum(log_returns, axis=0)
+    log_prev = np.vstack([np.log(start_prices)[None, :], log_close[:-1]])
+    step_volatility = np.broadcast_to(step_volatility, (n, k))
+
+    log_open = log_prev + 0.25 * step_volatility * rng.standard_normal((n, k))
+    body_high = np.maximum(log_open, log_close)
+    body_low = np.minimum(log_open, log_close)
+    high = np.exp(body_high + 0.5 * step_volatility * np.abs(rng.standard_normal((n, k))))
+    low = np.exp(body_low - 0.5 * step_volatility * np.abs(rng.standard_normal((n, k))))
+
+    surprise = np.abs(log_returns) / np.maximum(step_volatility, 1e-12)
+    volume = base_volume * rng.lognormal(-0.045, 0.3, (n, k)) * (1 + volume_sensitivity * surprise)
+
+    return {
+        "open": np.exp(log_open),
+        "high": high,
+        "low": low,
+        "close": np.exp(log_close),
+        "volume": np.maximum(volume, 1).round().astype(np.int64),
+    }
+
+
+def random_walk_ohlcv(
+    index: pd.DatetimeIndex,
+    start_price: float = 50.0,
+    drift: float = 0.0,
+    volatility: float = 0.02,
+    base_volume: float = 50_000,
+    seed: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Single-symbol OHLCV random walk over ``index``.
+
+    Args:
+        index: Bar timestamps
+        start_price: Price before the first bar
+        drift: Mean simple return per bar
+        volatility: Return standard deviation per bar
+        base_volume: Typical volume per bar
+        seed: Random seed (None for fresh entropy)
+
+    Returns:
+        DataFrame with open/high/low/close/volume columns
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = (np.log1p(drift) - 0.5 * volatility ** 2 + volatility * rng.standard_normal((len(index), 1)))
+    arrays = ohlcv_from_returns(
+        log_returns, np.array([start_price]), np.array([volatility]), np.array([base_volume]), rng
+    )
+    return pd.DataFrame({field: values[:, 0] for field, values in arrays.items()}, index=index)
+
+
+class SyntheticMarket:
+    """
+    Seeded universe of correlated synthetic symbols on a real trading calendar.
+
+    Every range is a slice of one path per seed that starts at the calendar's
+    first session, so a symbol's bars for a day don't depend on the range
+    requested around it.
+    """
+
+    def __init__(
+        self,
+        symbols: Union[int, Sequence[str]] = 100,
+        market: str = "US",
+        seed: int = 0,
+        annual_drift: float = 0.07,
+        annual_volatility: float = 0.25,
+        correlation: float = 0.3,
+        price_range: Tuple[float, float] = (10.0, 500.0),
+        base_volume: float = 1_000_000,
+        turbulence: float = 2.5,
+        calm_spell_days: float = 120,
+        turbulent_spell_days: float = 20,
+        max_cached_panels: int = 4
+    ):
+        """
+        Args:
+            symbols: Symbol names, or a count of generated names (SYN0000, SYN0001, ...)
+            market: Calendar and timezone to generate on ('US' or 'TW')
+            seed: Seed for symbol parameters and paths
+            annual_drift: Mean annual drift across symbols
+            annual_volatility: Median annual volatility across symbols
+            correlation: Pairwise correlation of returns through the market factor
+            price_range: Range of starting prices (log-uniform)
+            base_volume: Median daily volume across symbols
+            turbulence: Volatility multiplier of the turbulent regime
+            calm_spell_days: Mean length of calm spells in trading days
+            turbulent_spell_days: Mean length of turbulent spells in trading days
+            max_cached_panels: Generated ranges kept for ``fetch_historical_data``
+        """
+        if isinstance(symbols, int):
+            symbols = [f"SYN{i:04d}" for i in range(symbols)]
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.market = market.upper()
+        self.seed = seed
+        self.correlation = float(np.clip(correlation, 0.0, 1.0))
+        self.turbulence = turbulence
+        self.calm_spell_days = calm_spell_days
+        self.turbulent_spell_days = turbulent_spell_days
+        self.max_cached_panels = max_cached_panels
+        self.calendar = get_trading_calendar(self.market)
+        self._panels: "OrderedDict[Tuple, Dict[str, pd.DataFrame]]" = OrderedDict()
+
+        # Per-symbol parameters are fixed by the seed, independent of the range generated
+        k = len(self.symbols)
+        params = np.random.default_rng([seed, 0])
+        self.volatility = annual_volatility * params.lognormal(0.0, 0.35, k)
+        self.drift = annual_drift + 0.05 * params.standard_normal(k)
+        low, high = price_range
+        self.start_prices = np.exp(params.uniform(np.log(low), np.log(high), k))
+        self.base_volume = base_volume * params.lognormal(0.0, 1.0, k)
+
+        # Log close before each generated block, filled in as blocks are walked
+        self._levels: Dict[int, np.ndarray] = {0: np.log(self.start_prices)}
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    def panel(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        interval: str = "1d",
+        period: str = "1y"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Generate wide per-field panels.
+
+        Args:
+            start: First day (defaults to ``end`` minus ``period``)
+            end: Last day (defaults to today)
+            interval: '1d' or a minute interval such as '1m'
+            period: yfinance-style period used when ``start`` is None
+
+        Returns:
+            {"open" | "high" | "low" | "close" | "volume": DataFrame (bars x symbols)}
+        """
+        end = end or datetime.now()
+        start = start or period_to_start(period, pd.Timestamp(end).to_pydatetime())
+        index = session_index(self.market, start, end, interval)
+        if len(index) == 0:
+            return {field: pd.DataFrame(index=index, columns=self.symbols, dtype=float) for field in FIELDS}
+
+        # Sessions [first, stop) counted from the calendar's first session
+        days = index.normalize()
+        first = bisect.bisect_left(self.calendar.sessions, days[0].date())
+        stop = bisect.bisect_right(self.calendar.sessions, days[-1].date())
+        blocks = range(first // BLOCK_SESSIONS, (stop - 1) // BLOCK_SESSIONS + 1)
+        regime = self._regime(blocks[-1] * BLOCK_SESSIONS + BLOCK_SESSIONS)
+        bars = np.diff(np.append(np.flatnonzero(np.append(True, days[1:] != days[:-1])), len(days)))
+
+        parts = []
+        for block in blocks:
+            offset = block * BLOCK_SESSIONS
+            lo, hi = max(first - offset, 0), min(stop - offset, BLOCK_SESSIONS)
+            level = self._block_level(block)
+            log_returns, step_volatility, scale, rng = self._daily_block(block, regime)
+            if interval == "1d":
+                arrays = ohlcv_from_returns(
+                    log_returns, np.exp(level), step_volatility, self.base_volume[None, :] * np.sqrt(scale), rng
+                )
+                parts.append({field: values[lo:hi] for field, values in arrays.items()})
+                continue
+
+            log_close = level + np.cumsum(log_returns, axis=0)
+            log_prev = np.vstack([level[None, :], log_close[:-1]])
+            for row in range(lo, hi):
+                session = offset + row
+                parts.append(self._session_bars(
+                    session, int(interval[:-1]), int(bars[session - first]), log_prev[row],
+                    log_returns[row], step_volatility[row], scale[row]
+                ))
+
+        arrays = {field: np.concatenate([part[field] for part in parts]) for field in FIELDS}
+        return {field: pd.DataFrame(values, index=index, columns=self.symbols) for field, values in arrays.items()}
+
+    def _regime(self, sessions: int) -> np.ndarray:
+        """Daily calm/turbulent states of the first ``sessions`` sessions."""
+        rng = np.random.default_rng([self.seed, 2])
+        return regime_path(sessions, rng, self.calm_spell_days, self.turbulent_spell_days)
+
+    def _daily_block(self, block: int, regime: np.ndarray):
+        """Close-to-close log returns of one block of sessions, plus the block's generator."""
+        rng = np.random.default_rng([self.seed, 1, block])
+        states = regime[block * BLOCK_SESSIONS:(block + 1) * BLOCK_SESSIONS]
+        scale = np.where(states == 1, self.turbulence, 1.0)[:, None]
+        dt = 1.0 / TRADING_DAYS_PER_YEAR
+        step_volatility = self.volatility[None, :] * np.sqrt(dt) * scale
+
+        shock = self._shocks(BLOCK_SESSIONS, rng)
+        log_returns = (self.drift - 0.5 * self.volatility ** 2)[None, :] * dt + step_volatility * shock
+        return log_returns, step_volatility, scale, rng
+
+    def _shocks(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Standard normal shocks of shape (n, symbols); one-factor model, corr(i, j) = correlation."""
+        market_shock = rng.standard_normal((n, 1))
+        own_shock = rng.standard_normal((n, len(self.symbols)))
+        return np.sqrt(self.correlation) * market_shock + np.sqrt(1 - self.correlation) * own_shock
+
+    def _block_level(self, block: int) -> np.ndarray:
+        """Log close before the first session of ``block``."""
+        known = max(b for b in self._levels if b <= block)
+        level = self._levels[known]
+        if known < block:
+            regime = self._regime(block * BLOCK_SESSIONS)
+            for b in range(known, block):
+                level = level + self._daily_block(b, regime)[0].sum(axis=0)
+                self._levels[b + 1] = level
+        return level
+
+    def _session_bars(
+        self,
+        session: int,
+        minutes: int,
+        bars: int,
+        log_prev: np.ndarray,
+        log_return: np.ndarray,
+        step_volatility: np.ndarray,
+        scale: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Minute bars of one session, bridging its daily close-to-close return."""
+        rng = np.random.default_rng([self.seed, 3, minutes, session])
+        bar_volatility = step_volatility / np.sqrt(bars)
+        shock = self._shocks(bars, rng)
+        log_returns = bar_volatility * (shock - shock.mean(axis=0)) + log_return / bars
+
+        # Turbulent sessions trade more on top of the per-bar surprise
+        base_volume = self.base_volume * np.sqrt(scale) / bars
+        return ohlcv_from_returns(log_returns, np.exp(log_prev), bar_volatility, base_volume, rng)
+
+    def frames(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        interval: str = "1d",
+        period: str = "1y"
+    ) -> Dict[str, pd.DataFrame]:
+        """Per-symbol OHLCV frames (the fetchers' format, with a ``symbol`` column)."""
+        panel = self.panel(start, end, interval, period)
+        frames = {}
+        for symbol in self.symbols:
+            df = pd.DataFrame({field: panel[field][symbol] for field in FIELDS})
+            df["symbol"] = symbol
+            frames[symbol] = df
+        return frames
+
+    # ------------------------------------------------------------------
+    # Consumers
+    # ------------------------------------------------------------------
+
+    def fetch_historical_data(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Drop-in for the fetchers' ``fetch_historical_data`` (US and Taiwan signatures).
+
+        Generated ranges are cached, so repeated fetches for symbols of one
+        universe share a single generation.
+
+        Returns:
+            OHLCV DataFrame, empty for symbols outside the universe
+        """
+        symbol = symbol.upper()
+        if symbol not in self.symbols:
+            return pd.DataFrame()
+        end = pd.Timestamp(end_date or datetime.now()).normalize()
+        start = pd.Timestamp(start_date or period_to_start(period, end.to_pydatetime())).normalize()
+
+        key = (start, end, interval)
+        frames = self._panels.get(key)
+        if frames is None:
+            frames = self.frames(start, end, interval)
+            self._panels[key] = frames
+            while len(self._panels) > self.max_cached_panels:
+                self._panels.popitem(last=False)
+        else:
+            self._panels.move_to_end(key)
+        return frames[symbol].copy()
+
+    def write_to_store(
+        self,
+        store: BarStore,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        interval: str = "1d",
+        period: str = "1y"
+    ) -> int:
+        """
+        Write every symbol's bars to a bar store as complete histories.
+
+        Returns:
+            Number of bars written
+        """
+        written = 0
+        for symbol, df in self.frames(start, end, interval, period).items():
+            store.write(self.market, symbol, df, interval, full_history=True)
+            written += len(df)
+        logger.info(f"Wrote {written} synthetic {interval} bars for {len(self.symbols)} symbols")
+        return written
+
+    def get_stats(self) -> Dict[str, object]:
+        """Universe size, market and cached ranges."""
+        return {
+            "symbols": len(self.symbols),
+            "market": self.market,
+            "timezone": MARKET_TIMEZONES.get(self.market, "UTC"),
+            "cached_panels": len(self._panels),
+        }
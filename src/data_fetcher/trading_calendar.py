@@ -0,0 +1,390 @@
+"""
+Exchange trading calendars for TWSE/TPEx and NYSE/NASDAQ.
+
+Sessions are precomputed once per exchange for a range of years, so session
+lookups, next open/close and "was the market open" checks are dictionary
+lookups instead of ad-hoc weekday/time arithmetic.
+
+US holidays follow the NYSE rules. Taiwan holidays depend on the lunar calendar
+and on annual announcements by the TWSE, so they are kept as a table that must
+be extended each year; years outside the table fall back to weekdays minus the
+fixed-date national holidays.
+"""
+
+import bisect
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+import pytz
+
+DateLike = Union[date, datetime]
+
+CALENDAR_FIRST_YEAR = 2015
+CALENDAR_YEARS_AHEAD = 2
+
+# Time after the close before a session's daily bar is final upstream
+# (Yahoo's Taiwan data runs about 20 minutes behind)
+SETTLEMENT_DELAY = timedelta(minutes=30)
+
+# TWSE/TPEx market closures on weekdays (national holidays, Lunar New Year
+# settlement-only days and typhoon closures), per TWSE announcements.
+TW_HOLIDAYS: Dict[int, List[str]] = {
+    2023: [
+        "2023-01-02", "2023-01-18", "2023-01-19", "2023-01-20", "2023-01-23",
+        "2023-01-24", "2023-01-25", "2023-01-26", "2023-01-27", "2023-02-27",
+        "2023-02-28", "2023-04-03", "2023-04-04", "2023-04-05", "2023-05-01",
+        "2023-06-22", "2023-06-23", "2023-09-29", "2023-10-09", "2023-10-10",
+    ],
+    2024: [
+        "2024-01-01", "2024-02-06", "2024-02-07", "2024-02-08", "2024-02-09",
+        "2024-02-12", "2024-02-13", "2024-02-14", "2024-02-28", "2024-04-04",
+        "2024-04-05", "2024-05-01", "2024-06-10", "2024-07-24", "2024-07-25",
+        "2024-09-17", "2024-10-02", "2024-10-03", "2024-10-10", "2024-10-31",
+    ],
+    2025: [
+        "2025-01-01", "2025-01-23", "2025-01-24", "2025-01-27", "2025-01-28",
+        "2025-01-29", "2025-01-30", "2025-01-31", "2025-02-28", "2025-04-03",
+        "2025-04-04", "2025-05-01", "2025-05-30", "2025-09-29", "2025-10-06",
+        "2025-10-10", "2025-10-24", "2025-12-25",
+    ],
+    2026: [
+        "2026-01-01", "2026-02-12", "2026-02-13", "2026-02-16", "2026-02-17",
+        "2026-02-18", "2026-02-19", "2026-02-20", "2026-02-27", "2026-04-03",
+        "2026-04-06", "2026-05-01", "2026-06-19", "2026-09-25", "2026-09-28",
+        "2026-10-09", "2026-10-26", "2026-12-25",
+    ],
+}
+
+# Fixed-date national holidays used for years without an announced table
+TW_FIXED_HOLIDAYS = [(1, 1), (2, 28), (4, 4), (5, 1), (10, 10)]
+
+# Unscheduled NYSE closures
+US_SPECIAL_CLOSURES = ["2018-12-05", "2025-01-09"]
+
+
+def _to_date(value: DateLike) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def us_holidays(year: int) -> Tuple[Dict[date, str], Dict[date, time]]:
+    """
+    NYSE holidays and early closes for a year.
+
+    Returns:
+        Tuple of ({date: holiday name}, {date: early close time})
+    """
+    holidays = {}
+
+    new_year = date(year, 1, 1)
+    if new_year.weekday() == 6:
+        holidays[new_year + timedelta(days=1)] = "New Year's Day"
+    elif new_year.weekday() < 5:
+        holidays[new_year] = "New Year's Day"
+    # A Saturday New Year's Day is not observed on the preceding Friday
+
+    holidays[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[_easter(year) - timedelta(days=2)] = "Good Friday"
+    holidays[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+    holidays[_observed(date(year, 7, 4))] = "Independence Day"
+    holidays[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    holidays[thanksgiving] = "Thanksgiving Day"
+    holidays[_observed(date(year, 12, 25))] = "Christmas Day"
+
+    for special in US_SPECIAL_CLOSURES:
+        special_day = date.fromisoformat(special)
+        if special_day.year == year:
+            holidays[special_day] = "Special closure"
+
+    early_closes = {}
+    for day in (date(year, 7, 3), thanksgiving + timedelta(days=1), date(year, 12, 24)):
+        if day.weekday() < 5 and day not in holidays:
+            early_closes[day] = time(13, 0)
+
+    return holidays, early_closes
+
+
+def tw_holidays(year: int) -> Dict[date, str]:
+    """TWSE/TPEx market holidays for a year."""
+    if year in TW_HOLIDAYS:
+        return {date.fromisoformat(day): "Market holiday" for day in TW_HOLIDAYS[year]}
+    return {date(year, month, day): "National holiday" for month, day in TW_FIXED_HOLIDAYS}
+
+
+class TradingCalendar:
+    """
+    Precomputed trading calendar for one exchange.
+    """
+
+    def __init__(
+        self,
+        exchange: str,
+        timezone: str,
+        open_time: time,
+        close_time: time,
+        holidays: Dict[date, str],
+        early_closes: Optional[Dict[date, time]] = None,
+        first_year: int = CALENDAR_FIRST_YEAR,
+        last_year: Optional[int] = None
+    ):
+        """
+        Args:
+            exchange: Exchange code
+            timezone: Exchange timezone name
+            open_time: Regular session open (local time)
+            close_time: Regular session close (local time)
+            holidays: Full-day closures
+            early_closes: Half-day sessions with their close time
+            first_year: First year to precompute
+            last_year: Last year to precompute (defaults to a couple of years ahead)
+        """
+        self.exchange = exchange
+        self.timezone = timezone
+        self.tz = pytz.timezone(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = dict(holidays)
+        self.early_closes = dict(early_closes or {})
+
+        self.first_day = date(first_year, 1, 1)
+        self.last_day = date(last_year or date.today().year + CALENDAR_YEARS_AHEAD, 12, 31)
+
+        # Sorted sessions plus a per-calendar-day index of the next session,
+        # which makes next/previous session lookups O(1)
+        self.sessions: List[date] = []
+        self._next_session_index: Dict[date, int] = {}
+        pending_days = []
+        day = self.first_day
+        while day <= self.last_day:
+            pending_days.append(day)
+            if day.weekday() < 5 and day not in self.holidays:
+                for pending in pending_days:
+                    self._next_session_index[pending] = len(self.sessions)
+                pending_days = []
+                self.sessions.append(day)
+            day += timedelta(days=1)
+        self._session_set = frozenset(self.sessions)
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def now(self) -> datetime:
+        """Current time in the exchange timezone."""
+        return datetime.now(self.tz)
+
+    def _local(self, ts: Optional[datetime]) -> datetime:
+        if ts is None:
+            return self.now()
+        if ts.tzinfo is None:
+            return self.tz.localize(ts)
+        return ts.astimezone(self.tz)
+
+    def is_session(self, day: DateLike) -> bool:
+        """Whether the exchange trades on this date."""
+        day = _to_date(day)
+        if self.first_day <= day <= self.last_day:
+            return day in self._session_set
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_holiday(self, day: DateLike) -> bool:
+        """Whether this date is a weekday market holiday."""
+        return _to_date(day) in self.holidays
+
+    def holiday_name(self, day: DateLike) -> Optional[str]:
+        return self.holidays.get(_to_date(day))
+
+    def is_early_close(self, day: DateLike) -> bool:
+        return _to_date(day) in self.early_closes
+
+    def session_open(self, day: DateLike) -> datetime:
+        """Opening time of a session (exchange timezone)."""
+        return self.tz.localize(datetime.combine(_to_date(day), self.open_time))
+
+    def session_close(self, day: DateLike) -> datetime:
+        """Closing time of a session, honouring early closes (exchange timezone)."""
+        day = _to_date(day)
+        return self.tz.localize(datetime.combine(day, self.early_closes.get(day, self.close_time)))
+
+    def next_session(self, day: DateLike, inclusive: bool = True) -> Optional[date]:
+        """First session on or after ``day`` (strictly after if not inclusive)."""
+        day = _to_date(day)
+        if not inclusive:
+            day += timedelta(days=1)
+        index = self._next_session_index.get(day)
+        if index is None:
+            if day < self.first_day:
+                return self.sessions[0] if self.sessions else None
+            return None
+        return self.sessions[index]
+
+    def previous_session(self, day: DateLike, inclusive: bool = True) -> Optional[date]:
+        """Last session on or before ``day`` (strictly before if not inclusive)."""
+        day = _to_date(day)
+        if inclusive and self.is_session(day):
+            return day
+        index = self._next_session_index.get(day)
+        if index is None:
+            if day > self.last_day and self.sessions:
+                return self.sessions[-1]
+            return None
+        return self.sessions[index - 1] if index > 0 else None
+
+    def sessions_in_range(self, start: DateLike, end: DateLike) -> List[date]:
+        """All sessions between ``start`` and ``end`` (inclusive)."""
+        start, end = _to_date(start), _to_date(end)
+        if start > end:
+            return []
+        lo = bisect.bisect_left(self.sessions, start)
+        hi = bisect.bisect_right(self.sessions, end)
+        return self.sessions[lo:hi]
+
+    # ------------------------------------------------------------------
+    # Intraday state
+    # ------------------------------------------------------------------
+
+    def is_open(self, ts: Optional[datetime] = None) -> bool:
+        """Whether the regular session is open at ``ts`` (default: now)."""
+        local = self._local(ts)
+        day = local.date()
+        if not self.is_session(day):
+            return False
+        return self.session_open(day) <= local <= self.session_close(day)
+
+    def next_open(self, ts: Optional[datetime] = None) -> Optional[datetime]:
+        """Next session open strictly after ``ts``."""
+        local = self._local(ts)
+        day = self.next_session(local.date())
+        if day is not None and self.session_open(day) <= local:
+            day = self.next_session(day, inclusive=False)
+        return self.session_open(day) if day else None
+
+    def next_close(self, ts: Optional[datetime] = None) -> Optional[datetime]:
+        """Next session close at or after ``ts``."""
+        local = self._local(ts)
+        day = self.next_session(local.date())
+        if day is not None and self.session_close(day) < local:
+            day = self.next_session(day, inclusive=False)
+        return self.session_close(day) if day else None
+
+    def was_open_between(self, start: datetime, end: datetime) -> bool:
+        """
+        Whether any part of a regular session falls between two instants.
+
+        Used by caches to decide if new bars can exist since the last refresh.
+        """
+        start_local, end_local = self._local(start), self._local(end)
+        for day in self.sessions_in_range(start_local.date(), end_local.date()):
+            if self.session_open(day) < end_local and self.session_close(day) > start_local:
+                return True
+        return False
+
+    def is_settled(
+        self,
+        updated_at: datetime,
+        ts: Optional[datetime] = None,
+        settlement: timedelta = SETTLEMENT_DELAY
+    ) -> bool:
+        """
+        Whether data fetched at ``updated_at`` still holds final bars at ``ts`` (default: now).
+
+        Not settled if a session traded since the fetch, or if the fetch came
+        before the latest closed session's close plus ``settlement``: a fetch
+        taken mid-session or just after the close holds a partial last bar.
+        """
+        fetched, local = self._local(updated_at), self._local(ts)
+        if self.was_open_between(fetched, local):
+            return False
+        day = self.previous_session(local.date())
+        if day is not None and self.session_close(day) > local:
+            day = self.previous_session(day, inclusive=False)
+        return day is None or fetched >= self.session_close(day) + settlement
+
+
+def _build_calendar(market: str) -> TradingCalendar:
+    last_year = date.today().year + CALENDAR_YEARS_AHEAD
+    years = range(CALENDAR_FIRST_YEAR, last_year + 1)
+
+    if market == "US":
+        holidays, early_closes = {}, {}
+        for year in years:
+            year_holidays, year_early = us_holidays(year)
+            holidays.update(year_holidays)
+            early_closes.update(year_early)
+        return TradingCalendar(
+            "NYSE", "America/New_York", time(9, 30), time(16, 0),
+            holidays, early_closes, last_year=last_year
+        )
+
+    holidays = {}
+    for year in years:
+        holidays.update(tw_holidays(year))
+    return TradingCalendar(
+        "TWSE", "Asia/Taipei", time(9, 0), time(13, 30),
+        holidays, last_year=last_year
+    )
+
+
+_EXCHANGE_MARKETS = {
+    "US": "US", "NYSE": "US", "NASDAQ": "US", "AMEX": "US",
+    "TW": "TW", "TWSE": "TW", "TPEX": "TW", "TAIWAN": "TW",
+}
+
+
+@lru_cache(maxsize=None)
+def _calendar_for_market(market: str) -> TradingCalendar:
+    return _build_calendar(market)
+
+
+def get_trading_calendar(exchange: str) -> TradingCalendar:
+    """
+    Get the shared calendar for an exchange or market.
+
+    Args:
+        exchange: 'US', 'NYSE', 'NASDAQ', 'TW', 'TWSE' or 'TPEx'
+
+    Returns:
+        TradingCalendar (TWSE and TPEx share sessions, as do NYSE and NASDAQ)
+    """
+    market = _EXCHANGE_MARKETS.get(exchange.upper())
+    if market is None:
+        raise ValueError(f"Unknown exchange: {exchange}")
+    return _calendar_for_market(market)
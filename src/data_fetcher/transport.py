@@ -0,0 +1,383 @@
+"""
+Pluggable record/replay transport for upstream data and AI calls.
+
+Every upstream request made by the data fetchers (yfinance, TWSE, TPEx, the
+MIS quote API, Alpha Vantage) and the OpenAI clients goes through a
+``Transport``, which runs in one of three modes:
+
+    live    call upstream (default)
+    record  call upstream and write each response to the cassette directory
+    replay  serve responses from the cassette directory, never touching the
+            network, optionally after an injected delay
+
+Replay makes the full fetch -> indicators -> patterns -> AI path runnable
+offline and deterministically, so it can be benchmarked and load-tested.
+
+Requests are recorded at the lowest level the library exposes: ``requests``
+and ``aiohttp`` responses as status plus body, OpenAI through an ``httpx``
+transport, and yfinance (which manages its own HTTP session) as the returned
+DataFrame, stored as Parquet. Recordings are keyed by a hash of the request
+description; API keys and authorization headers are never part of the key or
+the recording.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import pandas as pd
+import requests
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (LIVE, RECORD, REPLAY)
+
+# Query parameters that carry credentials and are left out of keys and recordings
+SECRET_PARAMS = {"apikey", "api_key", "access_token", "token"}
+
+
+class CassetteMissError(LookupError):
+    """Replay mode has no recording for a request."""
+
+
+def request_key(method: str, url: str, params: Optional[Mapping[str, Any]] = None, body: bytes = b"") -> str:
+    """Stable hash of a request, ignoring credential parameters."""
+    description = {
+        "method": method.upper(),
+        "url": url,
+        "params": sorted((str(k), str(v)) for k, v in (params or {}).items() if str(k).lower() not in SECRET_PARAMS),
+    }
+    if body:
+        description["body"] = hashlib.sha256(body).hexdigest()
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def call_key(description: Mapping[str, Any]) -> str:
+    """Stable hash of a library call description such as {"ticker": "AAPL", "period": "1mo"}."""
+    return hashlib.sha1(json.dumps(description, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _encode_body(content: bytes) -> Dict[str, str]:
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(body: Mapping[str, str]) -> bytes:
+    if "base64" in body:
+        return base64.b64decode(body["base64"])
+    return body.get("text", "").encode("utf-8")
+
+
+class RecordedResponse:
+    """The parts of ``requests.Response`` the fetchers use, served from a recording."""
+
+    def __init__(self, status_code: int, content: bytes, headers: Optional[Dict[str, str]] = None, url: str = ""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = url
+        self.encoding = "utf-8"
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self, **kwargs) -> Any:
+        return json.loads(self.content, **kwargs)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error (replayed) for url: {self.url}", response=self)
+
+
+class Transport:
+    """
+    Live, recording or replaying gateway for upstream calls.
+    """
+
+    def __init__(
+        self,
+        mode: str = LIVE,
+        cassette_dir: str = "data/cassettes",
+        latency: float = 0.0,
+        service_latency: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            mode: 'live', 'record' or 'replay'
+            cassette_dir: Directory recordings are written to and replayed from
+            latency: Seconds each replayed response is delayed by
+            service_latency: Per-service overrides of ``latency`` (e.g. {"openai": 2.0})
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown transport mode: {mode} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.root = Path(cassette_dir)
+        self.latency = latency
+        self.service_latency = dict(service_latency or {})
+        self._lock = threading.Lock()
+        self.stats = {"live": 0, "recorded": 0, "replayed": 0, "misses": 0}
+
+    # ------------------------------------------------------------------
+    # Cassette storage
+    # ------------------------------------------------------------------
+
+    def _path(self, service: str, key: str, suffix: str = ".json") -> Path:
+        return self.root / service / f"{key}{suffix}"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _delay(self, service: str) -> float:
+        return self.service_latency.get(service, self.latency)
+
+    def _load(self, service: str, key: str) -> Dict[str, Any]:
+        path = self._path(service, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            self._count("misses")
+            raise CassetteMissError(f"No {service} recording {key} in {self.root}")
+        self._count("replayed")
+        return record
+
+    def _save(self, service: str, key: str, record: Dict[str, Any]):
+        path = self._path(service, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        self._count("recorded")
+
+    # ------------------------------------------------------------------
+    # requests / aiohttp
+    # ------------------------------------------------------------------
+
+    def get(self, service: str, url: str, params: Optional[Mapping[str, Any]] = None, **kwargs):
+        """
+        ``requests.get`` through the transport.
+
+        Args:
+            service: Cassette namespace, e.g. "twse" or "alpha_vantage"
+            url: Request URL
+            params: Query parameters
+            **kwargs: Passed to ``requests.get`` (timeout, headers, ...)
+
+        Returns:
+            ``requests.Response`` (live/record) or ``RecordedResponse`` (replay)
+
+        Raises:
+            CassetteMissError: In replay mode, if the request was never recorded
+        """
+        key = request_key("GET", url, params)
+        if self.mode == REPLAY:
+            record = self._load(service, key)
+            time.sleep(self._delay(service))
+            return RecordedResponse(record["status"], _decode_body(record["body"]), record.get("headers"), url)
+
+        self._count("live")
+        response = requests.get(url, params=params, **kwargs)
+        if self.mode == RECORD:
+            self._save(service, key, {
+                "request": {"method": "GET", "url": url, "params": _public_params(params)},
+                "status": response.status_code,
+                "headers": {"content-type": response.headers.get("content-type", "")},
+                "body": _encode_body(response.content),
+            })
+        return response
+
+    async def aget_json(
+        self,
+        service: str,
+        session,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        **kwargs
+    ) -> Tuple[int, Any]:
+        """
+        ``session.get(...)`` plus ``response.json()`` through the transport.
+
+        Args:
+            service: Cassette namespace
+            session: aiohttp.ClientSession (unused in replay mode)
+            url: Request URL
+            params: Query parameters
+            **kwargs: Passed to ``session.get`` (timeout, ...)
+
+        Returns:
+            (HTTP status, decoded JSON body or None when the status is not 200)
+        """
+        key = request_key("GET", url, params)
+        if self.mode == REPLAY:
+            record = self._load(service, key)
+            await asyncio.sleep(self._delay(service))
+            body = _decode_body(record["body"])
+            return record["status"], json.loads(body) if record["status"] == 200 and body else None
+
+        self._count("live")
+        async with session.get(url, params=params, **kwargs) as response:
+            status = response.status
+            content = await response.read() if status == 200 else b""
+        if self.mode == RECORD:
+            self._save(service, key, {
+                "request": {"method": "GET", "url": url, "params": _public_params(params)},
+                "status": status,
+                "body": _encode_body(content),
+            })
+        return status, json.loads(content) if content else None
+
+    # ------------------------------------------------------------------
+    # Library calls (yfinance)
+    # ------------------------------------------------------------------
+
+    def frame(self, service: str, description: Mapping[str, Any], fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Run a DataFrame-returning library call through the transport.
+
+        Args:
+            service: Cassette namespace, e.g. "yfinance"
+            description: Call arguments identifying the result (ticker, period, interval, ...)
+            fetch: Zero-argument function making the live call
+
+        Returns:
+            The live or replayed DataFrame (index, time zone and dtypes preserved)
+        """
+        key = call_key(description)
+        if self.mode == REPLAY:
+            self._load(service, key)
+            time.sleep(self._delay(service))
+            return pd.read_parquet(self._path(service, key, ".parquet"))
+
+        self._count("live")
+        data = fetch()
+        if self.mode == RECORD and data is not None:
+            path = self._path(service, key, ".parquet")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data.to_parquet(path)
+            self._save(service, key, {"call": dict(description), "rows": len(data)})
+        return data
+
+    def value(self, service: str, description: Mapping[str, Any], fetch: Callable[[], Any]) -> Any:
+        """Run a library call returning JSON-like data (e.g. ``Ticker.info``) through the transport."""
+        key = call_key(description)
+        if self.mode == REPLAY:
+            record = self._load(service, key)
+            time.sleep(self._delay(service))
+            return record["value"]
+
+        self._count("live")
+        value = fetch()
+        if self.mode == RECORD:
+            self._save(service, key, {"call": dict(description), "value": value})
+        return value
+
+    # ------------------------------------------------------------------
+    # httpx (OpenAI)
+    # ------------------------------------------------------------------
+
+    def httpx_client(self, service: str = "openai") -> Optional["httpx.Client"]:
+        """
+        ``httpx.Client`` to pass as ``OpenAI(http_client=...)``.
+
+        Returns:
+            None in live mode (the SDK's default client is used)
+        """
+        if self.mode == LIVE:
+            return None
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("httpx is required to record or replay OpenAI calls")
+        return httpx.Client(transport=RecordReplayHTTPXTransport(self, service))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Mode plus live/recorded/replayed/miss counters."""
+        return {"mode": self.mode, "cassette_dir": str(self.root), **self.stats}
+
+
+def _public_params(params: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    return {k: v for k, v in (params or {}).items() if str(k).lower() not in SECRET_PARAMS}
+
+
+if HTTPX_AVAILABLE:
+    class RecordReplayHTTPXTransport(httpx.BaseTransport):
+        """httpx transport recording to / replaying from a ``Transport``'s cassettes."""
+
+        # Describe the wire encoding of the live body, not the decoded body we return
+        _DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+        def __init__(self, transport: Transport, service: str, live: Optional["httpx.BaseTransport"] = None):
+            self.transport = transport
+            self.service = service
+            self.live = live or httpx.HTTPTransport()
+
+        def handle_request(self, request: "httpx.Request") -> "httpx.Response":
+            body = request.read()
+            url = str(request.url.copy_with(query=None))
+            key = request_key(request.method, url, dict(request.url.params), body)
+            owner = self.transport
+
+            if owner.mode == REPLAY:
+                record = owner._load(self.service, key)
+                time.sleep(owner._delay(self.service))
+                return httpx.Response(record["status"], headers=record.get("headers"),
+                                      content=_decode_body(record["body"]), request=request)
+
+            owner._count("live")
+            response = self.live.handle_request(request)
+            try:
+                content = response.read()
+            finally:
+                response.close()
+            headers = {k: v for k, v in response.headers.items() if k.lower() not in self._DROP_HEADERS}
+            if owner.mode == RECORD:
+                owner._save(self.service, key, {
+                    "request": {"method": request.method, "url": url},
+                    "status": response.status_code,
+                    "headers": {"content-type": response.headers.get("content-type", "")},
+                    "body": _encode_body(content),
+                })
+            return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+        def close(self):
+            self.live.close()
+
+
+# Global instance
+_transport: Optional[Transport] = None
+
+
+def get_transport() -> Transport:
+    """Get the shared transport configured from settings (HTTP_TRANSPORT_MODE etc.)."""
+    global _transport
+    if _transport is None:
+        from config.settings import settings
+        _transport = Transport(
+            settings.http_transport_mode,
+            settings.http_cassette_dir,
+            settings.http_replay_latency_ms / 1000
+        )
+    return _transport
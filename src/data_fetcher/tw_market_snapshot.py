@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+台股全市場每日行情快照快取
+TWSE MI_INDEX 與 TPEx stk_quote 每個交易日只下載一次，解析為以股票代號為索引的
+欄式表格，供所有台股代號共用。
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from src.cache.single_flight import SingleFlight
+from src.data_fetcher.bar_store import PYARROW_AVAILABLE
+from src.data_fetcher.rate_limiter import AsyncTokenBucket
+from src.data_fetcher.trading_calendar import get_trading_calendar
+from src.data_fetcher.transport import Transport, get_transport
+
+logger = logging.getLogger(__name__)
+
+TWSE_MI_INDEX_URL = "https://www.twse.com.tw/exchangeReport/MI_INDEX"
+TPEX_STK_QUOTE_URL = "https://www.tpex.org.tw/web/stock/afterTrading/DAILY_CLOSE_quotes/stk_quote.php"
+
+SNAPSHOT_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# 同步下載以 (交易所, 日期) 分段上鎖的鎖數量
+DOWNLOAD_LOCK_STRIPES = 64
+
+# 各交易所回應中 (代號, 開, 高, 低, 收, 量) 的欄位位置
+_ROW_LAYOUT = {
+    "TWSE": {"code": 0, "open": 5, "high": 6, "low": 7, "close": 8, "volume": 2},
+    "TPEx": {"code": 0, "open": 4, "high": 5, "low": 6, "close": 2, "volume": 7},
+}
+
+DateLike = Union[datetime, date]
+
+
+class SnapshotUnavailable(RuntimeError):
+    """全市場快照下載失敗 (與「當日無資料」區分)"""
+
+
+def _to_date(value: DateLike) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _request_params(exchange: str, day: date) -> Tuple[str, Dict[str, str]]:
+    """回傳指定交易所與日期的 (url, params)"""
+    if exchange == "TWSE":
+        return TWSE_MI_INDEX_URL, {
+            'response': 'json',
+            'date': day.strftime('%Y%m%d'),
+            'type': 'ALLBUT0999'
+        }
+    return TPEX_STK_QUOTE_URL, {
+        'l': 'zh-tw',
+        'd': f"{day.year - 1911}/{day.month:02d}/{day.day:02d}",  # 民國日期格式
+        'se': 'EW',
+        's': '0,asc,0'
+    }
+
+
+def _empty_snapshot() -> pd.DataFrame:
+    return pd.DataFrame(columns=SNAPSHOT_COLUMNS, index=pd.Index([], name="code"))
+
+
+def parse_snapshot(exchange: str, payload: Dict) -> pd.DataFrame:
+    """
+    將交易所全市場回應解析為欄式表格。
+
+    Args:
+        exchange: "TWSE" 或 "TPEx"
+        payload: API JSON 回應
+
+    Returns:
+        以股票代號為索引、含 open/high/low/close/volume 欄位的 DataFrame
+    """
+    rows = payload.get('data' if exchange == "TWSE" else 'aaData') or []
+    layout = _ROW_LAYOUT[exchange]
+    min_len = max(layout.values()) + 1
+    rows = [row for row in rows if len(row) >= min_len]
+    if not rows:
+        return _empty_snapshot()
+
+    raw = pd.DataFrame(rows)
+    table = pd.DataFrame(index=pd.Index(raw[layout["code"]].astype(str).str.strip(), name="code"))
+    for column in SNAPSHOT_COLUMNS:
+        values = raw[layout[column]].astype(str).str.replace(',', '', regex=False).str.strip()
+        table[column] = pd.to_numeric(values, errors='coerce').to_numpy()
+
+    table["volume"] = table["volume"].fillna(0).astype("int64")
+    return table[~table.index.duplicated(keep="first")]
+
+
+class TWMarketSnapshotCache:
+    """台股全市場每日行情快照快取"""
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = None,
+        max_snapshots: int = 600,
+        transport: Optional[Transport] = None
+    ):
+        """
+        Args:
+            root: 已收盤日期快照的 Parquet 儲存目錄 (None 則只保留在記憶體)
+            max_snapshots: 記憶體中保留的快照數量上限 (LRU)
+            transport: 上游請求的傳輸層 (可錄製/重播)
+        """
+        self.root = Path(root) if root and PYARROW_AVAILABLE else None
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[Tuple[str, date], pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.calendar = get_trading_calendar("TW")
+        self.transport = transport or get_transport()
+        self.stats = {"hits": 0, "misses": 0, "requests": 0}
+        # 同一 (交易所, 日期) 同時只下載一次：執行緒以分段鎖排隊，協程共用同一個下載
+        self._download_locks = [threading.Lock() for _ in range(DOWNLOAD_LOCK_STRIPES)]
+        self._flights = SingleFlight()
+
+    # ------------------------------------------------------------------
+    # 記憶體與磁碟快取
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, exchange: str, day: date) -> Optional[Path]:
+        if self.root is None:
+            return None
+        return self.root / exchange / f"{day.strftime('%Y%m%d')}.parquet"
+
+    def _lookup(self, exchange: str, day: date, count_miss: bool = True) -> Optional[pd.DataFrame]:
+        # 週末與休市日不會有行情，不需詢問上游
+        if not self.calendar.is_session(day):
+            return _empty_snapshot()
+
+        key = (exchange, day)
+        with self._lock:
+            if key in self._snapshots:
+                self._snapshots.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._snapshots[key]
+
+        path = self._disk_path(exchange, day)
+        if path is not None and path.exists():
+            try:
+                table = pd.read_parquet(path)
+                self._remember(exchange, day, table, persist=False)
+                with self._lock:
+                    self.stats["hits"] += 1
+                return table
+            except Exception as e:
+                logger.warning(f"讀取行情快照失敗 {path}: {str(e)}")
+
+        if count_miss:
+            with self._lock:
+                self.stats["misses"] += 1
+        return None
+
+    def _remember(self, exchange: str, day: date, table: pd.DataFrame, persist: bool = True):
+        # 當日資料可能尚未公布，空結果只快取已過去的日期
+        if table.empty and day >= date.today():
+            return
+
+        with self._lock:
+            self._snapshots[(exchange, day)] = table
+            self._snapshots.move_to_end((exchange, day))
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+
+        path = self._disk_path(exchange, day)
+        if persist and path is not None and day < date.today():
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(".tmp")
+                table.to_parquet(tmp_path)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"儲存行情快照失敗 {path}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # 同步 / 非同步下載
+    # ------------------------------------------------------------------
+
+    def get_snapshot(self, exchange: str, day: DateLike) -> Optional[pd.DataFrame]:
+        """
+        取得指定日期的全市場快照 (同步)。
+
+        Returns:
+            快照表格；下載失敗時回傳 None
+        """
+        day = _to_date(day)
+        cached = self._lookup(exchange, day)
+        if cached is not None:
+            return cached
+
+        with self._download_locks[hash((exchange, day)) % DOWNLOAD_LOCK_STRIPES]:
+            # 等待期間其他執行緒可能已下載完成
+            cached = self._lookup(exchange, day, count_miss=False)
+            if cached is not None:
+                return cached
+
+            url, params = _request_params(exchange, day)
+            try:
+                with self._lock:
+                    self.stats["requests"] += 1
+                response = self.transport.get(exchange.lower(), url, params=params, timeout=10)
+                if response.status_code != 200:
+                    return None
+                table = parse_snapshot(exchange, response.json())
+            except Exception as e:
+                logger.debug(f"{exchange} 全市場行情下載失敗 {day}: {str(e)}")
+                return None
+
+            self._remember(exchange, day, table)
+            return table
+
+    async def aget_snapshot(
+        self,
+        exchange: str,
+        day: DateLike,
+        session,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+        raise_on_error: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        取得指定日期的全市場快照 (非同步，使用 aiohttp session)。
+
+        Args:
+            exchange: "TWSE" 或 "TPEx"
+            day: 交易日期
+            session: aiohttp.ClientSession
+            rate_limiter: 實際發出請求前需取得的令牌桶 (命中快取時不消耗)
+            raise_on_error: 下載失敗時拋出 SnapshotUnavailable 而非回傳 None
+
+        Returns:
+            快照表格；下載失敗時回傳 None
+
+        Raises:
+            SnapshotUnavailable: raise_on_error 為 True 且下載失敗
+        """
+        day = _to_date(day)
+        cached = self._lookup(exchange, day)
+        if cached is not None:
+            return cached
+
+        # 同時請求同一日期的協程共用一次下載 (及一個令牌)
+        try:
+            return await self._flights.do(
+                (exchange, day), lambda: self._adownload(exchange, day, session, rate_limiter)
+            )
+        except SnapshotUnavailable:
+            if raise_on_error:
+                raise
+            return None
+
+    async def _adownload(
+        self,
+        exchange: str,
+        day: date,
+        session,
+        rate_limiter: Optional[AsyncTokenBucket]
+    ) -> pd.DataFrame:
+        """下載並快取一日快照；失敗時拋出 SnapshotUnavailable"""
+        # 其他執行緒的下載可能剛完成
+        cached = self._lookup(exchange, day, count_miss=False)
+        if cached is not None:
+            return cached
+
+        url, params = _request_params(exchange, day)
+        try:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            with self._lock:
+                self.stats["requests"] += 1
+            status, payload = await self.transport.aget_json(
+                exchange.lower(), session, url, params=params, timeout=10
+            )
+            if status != 200:
+                raise SnapshotUnavailable(f"HTTP {status}")
+            table = parse_snapshot(exchange, payload)
+        except Exception as e:
+            logger.debug(f"{exchange} 全市場行情下載失敗 {day}: {str(e)}")
+            raise SnapshotUnavailable(f"{exchange} 全市場行情下載失敗 {day}: {str(e)}") from e
+
+        self._remember(exchange, day, table)
+        return table
+
+    @staticmethod
+    def extract_bar(table: Optional[pd.DataFrame], code: str) -> Optional[Dict[str, float]]:
+        """從快照中取出單一股票的 OHLCV，無成交或不存在時回傳 None"""
+        if table is None or table.empty or code not in table.index:
+            return None
+        row = table.loc[code]
+        if pd.isna(row["close"]) or row["close"] <= 0:
+            return None
+        return {
+            'open': float(row["open"]) if not pd.isna(row["open"]) else float(row["close"]),
+            'high': float(row["high"]) if not pd.isna(row["high"]) else float(row["close"]),
+            'low': float(row["low"]) if not pd.isna(row["low"]) else float(row["close"]),
+            'close': float(row["close"]),
+            'volume': int(row["volume"]),
+        }
+
+    def get_bar(self, exchange: str, code: str, day: DateLike) -> Optional[Dict[str, float]]:
+        """取得單一股票某日的 OHLCV (同步)"""
+        return self.extract_bar(self.get_snapshot(exchange, day), code)
+
+    async def aget_bar(
+        self,
+        exchange: str,
+        code: str,
+        day: DateLike,
+        session,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+        raise_on_error: bool = False
+    ) -> Optional[Dict[str, float]]:
+        """取得單一股票某日的 OHLCV (非同步)；raise_on_error 見 aget_snapshot"""
+        return self.extract_bar(
+            await self.aget_snapshot(exchange, day, session, rate_limiter, raise_on_error=raise_on_error), code
+        )
+
+    def clear(self):
+        """清除記憶體中的快照"""
+        with self._lock:
+            self._snapshots.clear()
+
+
+# 全局實例
+_snapshot_cache: Optional[TWMarketSnapshotCache] = None
+
+
+def get_market_snapshot_cache() -> TWMarketSnapshotCache:
+    """獲取共用的台股全市場快照快取"""
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        from config.settings import settings
+        root = os.path.join(settings.bar_store_path, "_snapshots") if settings.bar_store_enabled else None
+        _snapshot_cache = TWMarketSnapshotCache(root)
+    return _snapshot_cache
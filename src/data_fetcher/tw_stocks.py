@@ -1,12 +1,19 @@
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import asyncio
 import aiohttp
-import requests
 from dataclasses import dataclass
 import logging
+import time
+
+from src.data_fetcher.bar_store import BarStore
+from src.data_fetcher.tw_market_snapshot import TWMarketSnapshotCache, get_market_snapshot_cache
+from src.data_fetcher.trading_calendar import get_trading_calendar
+from src.data_fetcher.symbol_master import SymbolMaster, get_symbol_master, split_symbol
+from src.data_fetcher.source_router import Route, SourceRouter
+from src.data_fetcher.synthetic_market import random_walk_ohlcv
+from src.data_fetcher.transport import Transport, get_transport
 
 try:
     import twstock
@@ -17,6 +24,21 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Bars starting this close to the requested start count as covering the range
+# (the range may begin on a weekend or holiday run)
+COVERAGE_TOLERANCE = timedelta(days=7)
+
+
+def _first_bar(data: pd.DataFrame) -> datetime:
+    """Timestamp of the first bar as a naive datetime."""
+    first_bar = data.index.min()
+    return first_bar.tz_localize(None) if first_bar.tzinfo is not None else first_bar
+
+
+def _covers_start(data: pd.DataFrame, start_date: Optional[datetime]) -> bool:
+    """Whether non-empty history reaches back to the requested start."""
+    return start_date is None or _first_bar(data) <= start_date + COVERAGE_TOLERANCE
+
 @dataclass
 class TWStockData:
     symbol: str
@@ -29,9 +51,35 @@ class TWStockData:
     name: str = ""
 
 class TWStockDataFetcher:
-    def __init__(self):
+    # TWSE MIS real-time quote API (accepts many '|'-separated channels per call)
+    MIS_URL = "https://mis.twse.com.tw/stock/api/getStockInfo.jsp"
+    MIS_BATCH_SIZE = 50
+    
+    def __init__(
+        self,
+        bar_store: Optional[BarStore] = None,
+        snapshot_cache: Optional[TWMarketSnapshotCache] = None,
+        symbol_master: Optional[SymbolMaster] = None,
+        source_router: Optional[SourceRouter] = None,
+        transport: Optional[Transport] = None
+    ):
         self.base_url = "https://www.twse.com.tw/exchangeReport"
         self.otc_url = "https://www.tpex.org.tw/web/stock"
+        self.bar_store = bar_store
+        # Whole-market daily files are shared by every Taiwan symbol
+        self.snapshots = snapshot_cache or get_market_snapshot_cache()
+        self.calendar = get_trading_calendar("TW")
+        # Listing-backed code -> exchange lookup (avoids trying TWSE then TPEx)
+        self.symbol_master = symbol_master or get_symbol_master()
+        # Remembers which provider/suffix works per code and trips failing providers
+        self.source_router = source_router or SourceRouter()
+        # Live, recording or replaying gateway for upstream requests
+        self.transport = transport or get_transport()
+    
+    def _listed_exchange(self, code: str) -> Optional[str]:
+        """Exchange ("TWSE" / "TPEx") a Taiwan code is listed on, or None if unknown."""
+        exchange = self.symbol_master.exchange_of(f"{code}.TW")
+        return exchange if exchange in ("TWSE", "TPEx") else None
         
     def fetch_historical_data(
         self, 
@@ -42,6 +90,9 @@ class TWStockDataFetcher:
         """
         Fetch historical Taiwan stock data.
         
+        When a bar store is configured, stored bars are served first and only the
+        missing tail since the last stored bar is downloaded.
+        
         Args:
             symbol: Taiwan stock symbol (e.g., '2330')
             start_date: Start date for data
@@ -50,55 +101,17 @@ class TWStockDataFetcher:
         Returns:
             DataFrame with OHLCV data
         """
-        # First try yfinance as it's more reliable
-        yf_data = self._fetch_via_yfinance(symbol, start_date, end_date)
-        if not yf_data.empty:
-            return yf_data
-        
-        # Try API backup method
-        api_data = self._fetch_via_api(symbol, start_date, end_date)
-        if not api_data.empty:
-            return api_data
-        
-        # Fallback to twstock if available
-        if TWSTOCK_AVAILABLE:
+        if self.bar_store is not None:
             try:
-                # Remove .TW suffix if present
-                clean_symbol = symbol.replace('.TW', '')
-                
-                # Use twstock library
-                stock = twstock.Stock(clean_symbol)
-                
-                if end_date is None:
-                    end_date = datetime.now()
-                if start_date is None:
-                    start_date = end_date - timedelta(days=365)
-                
-                # Fetch data
-                data = stock.fetch_from(start_date.year, start_date.month)
-                
-                if data:
-                    # Convert to DataFrame
-                    df = pd.DataFrame([{
-                        'date': d.date,
-                        'open': d.open,
-                        'high': d.high,
-                        'low': d.low,
-                        'close': d.close,
-                        'volume': d.capacity,
-                        'symbol': symbol
-                    } for d in data])
-                    
-                    # Filter by date range
-                    df['date'] = pd.to_datetime(df['date'])
-                    df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-                    
-                    # Set date as index for consistency with backtesting expectations
-                    df = df.sort_values('date').set_index('date')
-                    return df
-                
+                data = self._fetch_with_store(symbol, start_date, end_date)
             except Exception as e:
-                logger.debug(f"twstock fetch failed for {symbol}: {str(e)}")
+                logger.warning(f"Bar store unavailable for {symbol}, fetching directly: {str(e)}")
+                data = self._fetch_from_sources(symbol, start_date, end_date)
+        else:
+            data = self._fetch_from_sources(symbol, start_date, end_date)
+        
+        if not data.empty:
+            return data
         
         # Final fallback: generate minimal mock data for analysis if symbol appears valid
         clean_symbol = symbol.replace('.TW', '')
@@ -109,6 +122,186 @@ class TWStockDataFetcher:
         logger.error(f"No data available for Taiwan stock {symbol}")
         return pd.DataFrame()
     
+    def _fetch_with_store(
+        self,
+        symbol: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> pd.DataFrame:
+        """Serve history from the local bar store, downloading only the missing tail."""
+        store = self.bar_store
+        code = symbol.replace('.TWO', '').replace('.TW', '')
+        
+        if end_date is None:
+            end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=90)
+        
+        if store.covers("TW", code, "1d", start_date):
+            last_ts = store.last_timestamp("TW", code, "1d")
+            if end_date.date() > last_ts.date() and self._store_needs_refresh(code):
+                tail_start = datetime.combine(last_ts.date(), datetime.min.time())
+                tail = self._fetch_from_sources(symbol, tail_start, end_date)
+                if tail.empty:
+                    store.touch("TW", code, "1d")
+                else:
+                    store.write("TW", code, tail, "1d")
+            
+            data = store.read("TW", code, "1d", start=start_date, end=end_date)
+            if not data.empty:
+                data['symbol'] = symbol
+                return data
+        
+        data = self._fetch_from_sources(symbol, start_date, end_date)
+        if not data.empty:
+            # Backup APIs only return recent days; record what was actually downloaded
+            coverage_start = start_date if _covers_start(data, start_date) else _first_bar(data)
+            store.write("TW", code, data, "1d", coverage_start=coverage_start)
+        return data
+    
+    def _store_needs_refresh(self, code: str) -> bool:
+        """Stored bars are stale if the market traded, or the last bar settled, since the last refresh."""
+        if self.bar_store.is_fresh("TW", code, "1d"):
+            return False
+        updated_at = self.bar_store.updated_at("TW", code, "1d")
+        if updated_at is None:
+            return True
+        return not self.calendar.is_settled(updated_at.astimezone(), datetime.now().astimezone())
+    
+    def _source_routes(self, symbol: str) -> List[Route]:
+        """Candidate (provider, variant) routes for a Taiwan symbol in default order."""
+        code, suffix_exchange = split_symbol(symbol)
+        exchange = self._listed_exchange(code)
+        
+        if exchange is not None:
+            # Listed code: query the exact exchange only
+            exchanges = [exchange]
+            suffixes = [".TW" if exchange == "TWSE" else ".TWO"]
+        elif suffix_exchange == "TPEx" or (code.isdigit() and len(code) == 4 and code[0] in "3456789"):
+            # Unknown code that may be an OTC listing: the router learns which variant works
+            exchanges = ["TPEx", "TWSE"]
+            suffixes = [".TWO", ".TW", ".TPE"] if suffix_exchange == "TPEx" else [".TW", ".TWO", ".TPE"]
+        else:
+            exchanges = ["TWSE"]
+            suffixes = [".TW"]
+        
+        routes: List[Route] = [("yfinance", f"{code}{suffix}") for suffix in suffixes]
+        routes += [("snapshot", name) for name in exchanges]
+        if TWSTOCK_AVAILABLE:
+            routes.append(("twstock", code))
+        return routes
+    
+    def _fetch_from_sources(
+        self,
+        symbol: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Fetch history from the upstream sources.
+        
+        The route (provider and suffix/exchange) that last returned data for the
+        symbol is tried first; providers with an open circuit are skipped. A
+        route returning only recent bars (the snapshots cover about a month) is
+        kept as a fallback while the remaining routes are tried, and is not
+        learned as the symbol's route.
+        """
+        code = split_symbol(symbol)[0]
+        router = self.source_router
+        partial = pd.DataFrame()
+        
+        for route in router.order(code, self._source_routes(symbol)):
+            provider, variant = route
+            if not router.allow(provider):
+                continue
+            
+            started = time.monotonic()
+            try:
+                data = self._fetch_route(provider, variant, symbol, start_date, end_date)
+            except Exception as e:
+                router.record_failure(code, route, time.monotonic() - started, e)
+                continue
+            
+            if data is None or data.empty:
+                router.record_miss(code, route, time.monotonic() - started)
+                continue
+            
+            if not _covers_start(data, start_date):
+                router.record_partial(code, route, time.monotonic() - started)
+                if len(data) > len(partial):
+                    partial = data
+                continue
+            
+            router.record_success(code, route, time.monotonic() - started)
+            logger.info(f"Fetched {len(data)} data points for {symbol} via {provider} ({variant})")
+            return data
+        
+        if not partial.empty:
+            logger.info(f"Only {len(partial)} recent data points available for {symbol}")
+        return partial
+    
+    def _fetch_route(
+        self,
+        provider: str,
+        variant: Optional[str],
+        symbol: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> pd.DataFrame:
+        """Fetch history over one route; raises on provider errors, returns empty when there is no data."""
+        if provider == "yfinance":
+            return self._fetch_via_yfinance(variant, symbol, start_date, end_date)
+        if provider == "snapshot":
+            return self._fetch_via_snapshots(variant, symbol, start_date, end_date)
+        if provider == "twstock":
+            return self._fetch_via_twstock(symbol, start_date, end_date)
+        raise ValueError(f"Unknown data provider: {provider}")
+    
+    def _fetch_via_twstock(
+        self,
+        symbol: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """Fetch Taiwan stock data via the twstock package."""
+        clean_symbol = split_symbol(symbol)[0]
+        
+        if end_date is None:
+            end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=365)
+        
+        # twstock makes its own HTTP requests, so the call is recorded and
+        # replayed as plain rows through the transport
+        def fetch_rows() -> List[Dict]:
+            return [{
+                'date': d.date.isoformat(),
+                'open': d.open,
+                'high': d.high,
+                'low': d.low,
+                'close': d.close,
+                'volume': d.capacity
+            } for d in twstock.Stock(clean_symbol).fetch_from(start_date.year, start_date.month)]
+        
+        data = self.transport.value(
+            "twstock",
+            {"code": clean_symbol, "method": "fetch_from", "year": start_date.year, "month": start_date.month},
+            fetch_rows
+        )
+        if not data:
+            return pd.DataFrame()
+        
+        # Convert to DataFrame
+        df = pd.DataFrame(data)
+        df['symbol'] = symbol
+        
+        # Filter by date range
+        df['date'] = pd.to_datetime(df['date'])
+        df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+        
+        # Set date as index for consistency with backtesting expectations
+        return df.sort_values('date').set_index('date')
+    
     def _generate_minimal_mock_data(self, symbol: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> pd.DataFrame:
         """Generate minimal mock data when no real data is available."""
         try:
@@ -124,35 +317,9 @@ class TWStockDataFetcher:
             if len(dates) == 0:
                 return pd.DataFrame()
             
-            # Generate realistic price movement starting from a base price
-            base_price = 50.0  # Default base price
-            prices = [base_price]
-            
-            for i in range(1, len(dates)):
-                # Random walk with slight upward bias
-                change = np.random.normal(0.01, 0.02)  # 1% mean, 2% std
-                new_price = max(prices[-1] * (1 + change), 1.0)  # Minimum price of 1.0
-                prices.append(new_price)
-            
-            mock_data = []
-            for i, date in enumerate(dates):
-                price = prices[i]
-                daily_range = price * 0.03  # 3% daily range
-                high = price + np.random.uniform(0, daily_range)
-                low = price - np.random.uniform(0, daily_range)
-                open_price = low + np.random.uniform(0, high - low)
-                volume = int(np.random.uniform(10000, 100000))
-                
-                mock_data.append({
-                    'open': round(open_price, 2),
-                    'high': round(high, 2), 
-                    'low': round(low, 2),
-                    'close': round(price, 2),
-                    'volume': volume,
-                    'symbol': symbol
-                })
-            
-            df = pd.DataFrame(mock_data, index=dates)
+            # Random walk with slight upward bias (1% mean, 2% std per day) from a default base price
+            df = random_walk_ohlcv(dates, start_price=50.0, drift=0.01, volatility=0.02).round(2)
+            df['symbol'] = symbol
             logger.info(f"Generated {len(df)} mock data points for {symbol}")
             return df
             
@@ -188,6 +355,7 @@ class TWStockDataFetcher:
     
     def _fetch_via_yfinance(
         self, 
+        yf_symbol: str,
         symbol: str, 
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
@@ -196,198 +364,101 @@ class TWStockDataFetcher:
         Fetch Taiwan stock data via yfinance.
         
         Args:
-            symbol: Taiwan stock symbol
+            yf_symbol: Yahoo ticker variant ('2330.TW', '5483.TWO', ...)
+            symbol: Symbol to tag the rows with
             start_date: Start date
             end_date: End date
             
         Returns:
-            DataFrame with stock data
+            DataFrame with stock data, empty if Yahoo has no data for the variant
         """
-        try:
-            import yfinance as yf
-            
-            # Ensure symbol has .TW suffix for yfinance
-            if not symbol.endswith('.TW'):
-                yf_symbol = f"{symbol}.TW"
-            else:
-                yf_symbol = symbol
-            
-            # Set default dates if not provided
-            if end_date is None:
-                end_date = datetime.now()
-            if start_date is None:
-                start_date = end_date - timedelta(days=90)
-            
-            # Try different variations for OTC stocks
-            variations = [yf_symbol]
-            clean_symbol = symbol.replace('.TW', '')
-            
-            # For OTC stocks (3000+), try TWO suffix as well
-            if clean_symbol.isdigit() and len(clean_symbol) == 4 and clean_symbol.startswith(('3', '4', '5', '6', '7', '8', '9')):
-                variations.extend([f"{clean_symbol}.TWO", f"{clean_symbol}.TPE"])
-            
-            for variant in variations:
-                try:
-                    logger.debug(f"Trying yfinance variant: {variant}")
-                    ticker = yf.Ticker(variant)
-                    data = ticker.history(start=start_date, end=end_date)
-                    
-                    if not data.empty:
-                        # Clean and format data - keep datetime index for backtesting
-                        data.columns = [col.lower().replace(' ', '_') for col in data.columns]
-                        
-                        # Ensure index is datetime and properly named
-                        if not isinstance(data.index, pd.DatetimeIndex):
-                            data.index = pd.to_datetime(data.index)
-                        
-                        # Add symbol column (use original symbol)
-                        data['symbol'] = symbol
-                        
-                        logger.info(f"Successfully fetched {len(data)} data points for {symbol} via yfinance variant {variant}")
-                        return data
-                    
-                except Exception as e:
-                    logger.debug(f"yfinance variant {variant} failed: {str(e)}")
-                    continue
-            
-            logger.warning(f"No data found for Taiwan stock {symbol} via yfinance (tried all variants)")
-            return pd.DataFrame()
-            
-        except Exception as e:
-            logger.debug(f"yfinance fetch failed for {symbol}: {str(e)}")
+        import yfinance as yf
+        
+        # Set default dates if not provided
+        if end_date is None:
+            end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=90)
+        
+        # Ranges are derived from datetime.now(), so recordings are keyed by
+        # calendar date for a replay to find them
+        data = self.transport.frame(
+            "yfinance",
+            {
+                "ticker": yf_symbol, "method": "history",
+                "start": start_date.date().isoformat(), "end": end_date.date().isoformat()
+            },
+            lambda: yf.Ticker(yf_symbol).history(start=start_date, end=end_date)
+        )
+        if data.empty:
+            logger.debug(f"No data for Taiwan stock {symbol} via yfinance variant {yf_symbol}")
             return pd.DataFrame()
+        
+        # Clean and format data - keep datetime index for backtesting
+        data.columns = [col.lower().replace(' ', '_') for col in data.columns]
+        
+        # Ensure index is datetime and properly named
+        if not isinstance(data.index, pd.DatetimeIndex):
+            data.index = pd.to_datetime(data.index)
+        
+        # Add symbol column (use original symbol)
+        data['symbol'] = symbol
+        return data
     
-    def _fetch_via_api(
+    def _fetch_via_snapshots(
         self, 
+        exchange: str,
         symbol: str, 
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> pd.DataFrame:
         """
-        Fetch Taiwan stock data via TWSE/OTC API (backup method).
+        Fetch recent Taiwan stock data from the TWSE/TPEx daily market snapshots (backup method).
         
         Args:
+            exchange: "TWSE" or "TPEx"
             symbol: Taiwan stock symbol
             start_date: Start date
             end_date: End date
             
         Returns:
-            DataFrame with stock data
-        """
-        try:
-            if end_date is None:
-                end_date = datetime.now()
-            if start_date is None:
-                start_date = end_date - timedelta(days=90)  # Reduce range for faster API calls
-            
-            # Clean symbol
-            clean_symbol = symbol.replace('.TW', '')
-            
-            # Determine if it's an OTC stock (typically starts with 3-9)
-            is_otc_stock = (clean_symbol.isdigit() and len(clean_symbol) == 4 and 
-                          clean_symbol.startswith(('3', '4', '5', '6', '7', '8', '9')))
+            DataFrame with stock data, empty if the code is not in the snapshots
             
-            all_data = []
-            
-            # Try to get recent data (last 30 days) for better success rate
-            recent_start = max(start_date, end_date - timedelta(days=30))
-            current_date = recent_start
-            
-            while current_date <= end_date and len(all_data) < 30:  # Limit to reduce API calls
-                date_str = current_date.strftime('%Y%m%d')
-                data_found = False
-                
-                if is_otc_stock:
-                    # Try OTC market API first for OTC stocks
-                    data_found = self._fetch_otc_data_for_date(clean_symbol, current_date, date_str, all_data, symbol)
-                
-                if not data_found:
-                    # Try TWSE (main market) API
-                    data_found = self._fetch_twse_data_for_date(clean_symbol, current_date, date_str, all_data, symbol)
-                
-                current_date += timedelta(days=1)
-            
-            if all_data:
-                df = pd.DataFrame(all_data)
-                df = df.sort_values('date').set_index('date')
-                logger.info(f"Successfully fetched {len(df)} data points for {symbol} via API")
-                return df
-            else:
-                logger.warning(f"No data found for Taiwan stock {symbol} via API")
-                return pd.DataFrame()
-                
-        except Exception as e:
-            logger.error(f"Error in API fetch for {symbol}: {str(e)}")
+        Raises:
+            RuntimeError: If every snapshot download in the range failed
+        """
+        if end_date is None:
+            end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=90)  # Reduce range for faster API calls
+        
+        clean_symbol = split_symbol(symbol)[0]
+        all_data = []
+        downloaded = failed = 0
+        
+        # Try to get recent data (last 30 days) for better success rate
+        current_date = max(start_date, end_date - timedelta(days=30))
+        
+        while current_date <= end_date and len(all_data) < 30:  # Limit to reduce API calls
+            # Skip weekends and exchange holidays without an upstream request
+            if self.calendar.is_session(current_date):
+                table = self.snapshots.get_snapshot(exchange, current_date)
+                if table is None:
+                    failed += 1
+                else:
+                    downloaded += 1
+                    bar = self.snapshots.extract_bar(table, clean_symbol)
+                    if bar is not None:
+                        all_data.append({'date': current_date, **bar, 'symbol': symbol})
+            current_date += timedelta(days=1)
+        
+        if failed and not downloaded:
+            raise RuntimeError(f"{exchange} snapshots unavailable ({failed} failed downloads)")
+        if not all_data:
             return pd.DataFrame()
-    
-    def _fetch_twse_data_for_date(self, clean_symbol: str, current_date: datetime, 
-                                  date_str: str, all_data: list, symbol: str) -> bool:
-        """Fetch data from TWSE API for a specific date."""
-        try:
-            url = f"{self.base_url}/MI_INDEX"
-            params = {
-                'response': 'json',
-                'date': date_str,
-                'type': 'ALLBUT0999'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'data' in data:
-                    for row in data['data']:
-                        if len(row) >= 9 and row[0] == clean_symbol:
-                            all_data.append({
-                                'date': current_date,
-                                'open': self._parse_price(row[5]),
-                                'high': self._parse_price(row[6]),
-                                'low': self._parse_price(row[7]),
-                                'close': self._parse_price(row[8]),
-                                'volume': self._parse_volume(row[2]),
-                                'symbol': symbol
-                            })
-                            return True
-            return False
-        except Exception as e:
-            logger.debug(f"TWSE API error for {symbol} on {date_str}: {str(e)}")
-            return False
-    
-    def _fetch_otc_data_for_date(self, clean_symbol: str, current_date: datetime, 
-                                 date_str: str, all_data: list, symbol: str) -> bool:
-        """Fetch data from OTC API for a specific date."""
-        try:
-            # OTC API endpoint
-            url = f"{self.otc_url}/afterTrading/DAILY_CLOSE_quotes/stk_quote.php"
-            params = {
-                'l': 'zh-tw',
-                'd': f"{current_date.year-1911}/{current_date.month:02d}/{current_date.day:02d}",  # ROC date format
-                'se': 'EW',  # OTC market code
-                's': '0,asc,0'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'aaData' in data:
-                    for row in data['aaData']:
-                        if len(row) >= 8 and row[0] == clean_symbol:
-                            # OTC data format is different
-                            all_data.append({
-                                'date': current_date,
-                                'open': self._parse_price(row[4]),
-                                'high': self._parse_price(row[5]),
-                                'low': self._parse_price(row[6]),
-                                'close': self._parse_price(row[2]),
-                                'volume': self._parse_volume(row[7].replace(',', '')),
-                                'symbol': symbol
-                            })
-                            return True
-            return False
-        except Exception as e:
-            logger.debug(f"OTC API error for {symbol} on {date_str}: {str(e)}")
-            return False
+        
+        df = pd.DataFrame(all_data)
+        return df.sort_values('date').set_index('date')
     
     def _parse_price(self, price_str: str) -> float:
         """Parse price string from TWSE API."""
@@ -425,9 +496,10 @@ class TWStockDataFetcher:
         try:
             clean_symbol = symbol.replace('.TW', '')
             
-            # Get real-time data using twstock
-            stock = twstock.Stock(clean_symbol)
-            price = twstock.realtime.get(clean_symbol)
+            # Get real-time data using twstock, through the transport like other upstream calls
+            price = self.transport.value(
+                "twstock", {"code": clean_symbol, "method": "realtime"}, lambda: twstock.realtime.get(clean_symbol)
+            )
             
             if price and 'success' in price and price['success']:
                 return {
@@ -446,44 +518,86 @@ class TWStockDataFetcher:
     
     def _get_realtime_via_api(self, symbol: str) -> Optional[Dict]:
         """Get real-time data via API (backup method)."""
-        try:
-            clean_symbol = symbol.replace('.TW', '')
+        return self.get_quotes([symbol]).get(symbol)
+    
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Get real-time quotes for many Taiwan stocks from the TWSE MIS API.
+        
+        Up to ``MIS_BATCH_SIZE`` symbols are requested per call. Codes found in
+        the symbol master are queried on their exchange's channel only; unknown
+        codes without a .TWO suffix are queried on both the listed and OTC channels.
+        
+        Args:
+            symbols: Taiwan stock symbols ('2330', '2330.TW', '6415.TWO')
             
-            # Use TWSE real-time API
-            url = "https://mis.twse.com.tw/stock/api/getStockInfo.jsp"
+        Returns:
+            Dictionary mapping each requested symbol to its quote dict
+        """
+        # Each code is queried once, and its quote is returned under every
+        # form it was requested in ('2330' and '2330.TW' both get a key)
+        by_code = {}
+        for symbol in dict.fromkeys(symbols):
+            code = symbol.upper().replace('.TWO', '').replace('.TW', '')
+            exchange = self._listed_exchange(code)
+            if exchange is not None:
+                channels = ['tse'] if exchange == "TWSE" else ['otc']
+            else:
+                channels = ['otc'] if symbol.upper().endswith('.TWO') else ['tse', 'otc']
+            requested, known_channels = by_code.setdefault(code, ([], []))
+            requested.append(symbol)
+            known_channels.extend(channel for channel in channels if channel not in known_channels)
+        
+        entries = [(code, channel) for code, (_, channels) in by_code.items() for channel in channels]
+        quotes = {}
+        for i in range(0, len(entries), self.MIS_BATCH_SIZE):
+            batch = entries[i:i + self.MIS_BATCH_SIZE]
             params = {
-                'ex_ch': f'tse_{clean_symbol}.tw',
+                'ex_ch': '|'.join(f"{channel}_{code}.tw" for code, channel in batch),
                 'json': '1',
                 'delay': '0'
             }
+            try:
+                response = self.transport.get("twse_mis", self.MIS_URL, params=params, timeout=5)
+                if response.status_code != 200:
+                    continue
+                rows = response.json().get('msgArray') or []
+            except Exception as e:
+                logger.error(f"Error in real-time API fetch for {len(batch)} symbols: {str(e)}")
+                continue
             
-            response = requests.get(url, params=params, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'msgArray' in data and len(data['msgArray']) > 0:
-                    stock_data = data['msgArray'][0]
-                    
-                    current_price = float(stock_data.get('z', 0))
-                    yesterday_close = float(stock_data.get('y', 0))
-                    
-                    if current_price > 0 and yesterday_close > 0:
-                        change = current_price - yesterday_close
-                        change_percent = (change / yesterday_close) * 100
-                        
-                        return {
-                            'symbol': symbol,
-                            'price': current_price,
-                            'change': change,
-                            'change_percent': change_percent,
-                            'volume': int(stock_data.get('v', 0)),
-                            'timestamp': datetime.now()
-                        }
-            
-        except Exception as e:
-            logger.error(f"Error in real-time API fetch for {symbol}: {str(e)}")
+            for row in rows:
+                code = str(row.get('c', '')).strip()
+                if code not in by_code:
+                    continue
+                for symbol in by_code[code][0]:
+                    quote = self._parse_mis_quote(symbol, row)
+                    if quote is not None:
+                        quotes[symbol] = quote
         
-        return None
+        return quotes
+    
+    def _parse_mis_quote(self, symbol: str, row: Dict) -> Optional[Dict]:
+        """Build a quote dict from one MIS ``msgArray`` row."""
+        yesterday_close = self._parse_price(row.get('y', ''))
+        # 'z' is '-' between trades; fall back to the best bid, then the open
+        current_price = self._parse_price(row.get('z', ''))
+        if current_price <= 0:
+            best_bid = str(row.get('b', '')).split('_')[0]
+            current_price = self._parse_price(best_bid) or self._parse_price(row.get('o', ''))
+        
+        if current_price <= 0 or yesterday_close <= 0:
+            return None
+        
+        change = current_price - yesterday_close
+        return {
+            'symbol': symbol,
+            'price': current_price,
+            'change': change,
+            'change_percent': (change / yesterday_close) * 100,
+            'volume': self._parse_volume(row.get('v', '0')),
+            'timestamp': datetime.now()
+        }
     
     def get_company_info(self, symbol: str) -> Optional[Dict]:
         """
@@ -566,22 +680,7 @@ class TWStockDataFetcher:
             True if market is open, False otherwise
         """
         try:
-            import pytz
-            
-            # Taiwan timezone
-            tw_tz = pytz.timezone('Asia/Taipei')
-            now_tw = datetime.now(tw_tz)
-            
-            # Check if it's a weekday
-            if now_tw.weekday() >= 5:  # Saturday = 5, Sunday = 6
-                return False
-            
-            # Taiwan stock market hours: 9:00 AM - 1:30 PM Taiwan time
-            market_open = now_tw.replace(hour=9, minute=0, second=0, microsecond=0)
-            market_close = now_tw.replace(hour=13, minute=30, second=0, microsecond=0)
-            
-            return market_open <= now_tw <= market_close
-            
+            return self.calendar.is_open()
         except Exception as e:
             logger.error(f"Error checking Taiwan market status: {str(e)}")
             return False
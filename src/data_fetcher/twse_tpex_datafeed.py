@@ -9,12 +9,19 @@ import numpy as np
 import requests
 import asyncio
 import aiohttp
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
 import logging
 from dataclasses import dataclass
 import json
-import time
+
+from src.cache.bar_range_cache import BarRangeCache
+from src.data_fetcher.intraday_bars import get_intraday_bars
+from src.data_fetcher.rate_limiter import AsyncTokenBucket
+from src.data_fetcher.resampler import SUPPORTED_RESOLUTIONS, is_intraday_resolution, normalize_resolution, resample_ohlcv
+from src.data_fetcher.tw_market_snapshot import get_market_snapshot_cache
+from src.data_fetcher.trading_calendar import get_trading_calendar
+from src.data_fetcher.symbol_master import get_symbol_master, split_symbol
 
 logger = logging.getLogger(__name__)
 
@@ -39,17 +46,22 @@ class TWSymbolInfo:
     session: str = "0900-1330"
     minmov: int = 1
     pricescale: int = 100
-    has_intraday: bool = False
+    has_intraday: bool = True
     supported_resolutions: List[str] = None
 
     def __post_init__(self):
         if self.supported_resolutions is None:
-            self.supported_resolutions = ["1D"]
+            self.supported_resolutions = list(SUPPORTED_RESOLUTIONS)
 
 class TWStockDatafeed:
     """TWSE/TPEx 開放資料 Datafeed"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: float = 5.0,
+        cache_max_bytes: int = 64 * 1024 * 1024
+    ):
         self.base_urls = {
             "TWSE": "https://www.twse.com.tw/exchangeReport/",
             "TPEx": "https://www.tpex.org.tw/web/stock/"
@@ -73,44 +85,55 @@ class TWStockDatafeed:
             "6415": {"name": "矽力-KY", "exchange": "TPEx"},
         }
         
-        # 快取機制
-        self.cache = {}
-        self.cache_ttl = 300  # 5分鐘快取
-    
-    def _get_cache_key(self, symbol: str, start_date: str, end_date: str) -> str:
-        """生成快取鍵"""
-        return f"tw_bars_{symbol}_{start_date}_{end_date}"
-    
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """檢查快取是否有效"""
-        if cache_key not in self.cache:
-            return False
+        # 全市場代號表 (TWSE/TPEx 上市櫃清單，精確判斷交易所)
+        self.symbol_master = get_symbol_master()
         
-        cached_time = self.cache[cache_key].get('timestamp', 0)
-        return (time.time() - cached_time) < self.cache_ttl
+        # 全市場每日快照 (所有台股代號共用)
+        self.snapshots = get_market_snapshot_cache()
+        self.calendar = get_trading_calendar("TW")
+        
+        # 併發抓取：限制同時請求數，並以令牌桶控制上游請求速率
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = AsyncTokenBucket(requests_per_second, capacity=max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        
+        # 快取機制：每檔股票保存已抓取的連續區段，平移/縮放只抓取缺少的日期
+        self.cache_ttl = 300  # 最新一天的K線5分鐘後重新抓取
+        self.bar_cache = BarRangeCache(max_bytes=cache_max_bytes, ttl=self.cache_ttl)
     
     def normalize_taiwan_symbol(self, symbol: str) -> tuple:
         """標準化台股符號並返回 (code, exchange)"""
-        if symbol.endswith('.TW'):
-            code = symbol[:-3]
-            return code, "TWSE"
-        elif symbol.endswith('.TWO'):
-            code = symbol[:-4]  
-            return code, "TPEx"
-        else:
+        code, suffix_exchange = split_symbol(symbol)
+        
+        # 代號表有收錄時以上市櫃清單為準
+        instrument = self.symbol_master.get(f"{code}.TW")
+        if instrument is not None and instrument.market == "TW":
+            return code, instrument.exchange
+        
+        if suffix_exchange:
+            return code, suffix_exchange
+        elif code in self.taiwan_stocks:
             # 純代號，查找對照表
-            if symbol in self.taiwan_stocks:
-                return symbol, self.taiwan_stocks[symbol]["exchange"]
-            else:
-                # 預設為上市
-                return symbol, "TWSE"
+            return code, self.taiwan_stocks[code]["exchange"]
+        else:
+            # 預設為上市
+            return code, "TWSE"
     
     async def get_symbol_info(self, symbol: str) -> Optional[TWSymbolInfo]:
         """獲取台股符號資訊"""
         try:
             code, exchange = self.normalize_taiwan_symbol(symbol)
+            instrument = self.symbol_master.get(f"{code}.TW")
             
-            if code in self.taiwan_stocks:
+            if instrument is not None and instrument.market == "TW":
+                return TWSymbolInfo(
+                    symbol=instrument.symbol,
+                    name=instrument.name,
+                    exchange=exchange,
+                    type=instrument.type
+                )
+            elif code in self.taiwan_stocks:
                 stock_info = self.taiwan_stocks[code]
                 return TWSymbolInfo(
                     symbol=f"{code}.{'TW' if exchange == 'TWSE' else 'TWO'}",
@@ -135,154 +158,158 @@ class TWStockDatafeed:
         to_timestamp: int,
         resolution: str = "1D"
     ) -> List[TWBar]:
-        """獲取台股K線數據"""
+        """
+        獲取台股K線數據
+
+        分K由 1 分K 基礎序列聚合，週K/月K由日K聚合
+        """
         try:
             code, exchange = self.normalize_taiwan_symbol(symbol)
+            resolution = normalize_resolution(resolution)
             
-            start_date = datetime.fromtimestamp(from_timestamp).strftime('%Y%m%d')
-            end_date = datetime.fromtimestamp(to_timestamp).strftime('%Y%m%d')
-            
-            # 檢查快取
-            cache_key = self._get_cache_key(symbol, start_date, end_date)
-            if self._is_cache_valid(cache_key):
-                logger.info(f"使用快取數據: {symbol}")
-                return self.cache[cache_key]['data']
+            if is_intraday_resolution(resolution):
+                suffix = "TWO" if exchange == "TPEx" else "TW"
+                frame = await asyncio.to_thread(
+                    get_intraday_bars("TW").get_bars, f"{code}.{suffix}", resolution,
+                    pd.Timestamp(from_timestamp, unit="s", tz="UTC"), pd.Timestamp(to_timestamp, unit="s", tz="UTC")
+                )
+                return self._frame_to_bars(frame)
+            if resolution != "1D":
+                daily = await self.get_bars(symbol, from_timestamp, to_timestamp, "1D")
+                return self._frame_to_bars(resample_ohlcv(self._bars_to_frame(daily), resolution, "TW"))
             
-            logger.info(f"從開放資料API獲取: {symbol} ({exchange})")
+            # 日K以整天為單位快取：起點取當日 00:00，終點取當日 23:59:59
+            start = datetime.combine(datetime.fromtimestamp(from_timestamp).date(), datetime.min.time())
+            end = datetime.combine(datetime.fromtimestamp(to_timestamp).date(), datetime.max.time())
+            start_ts, end_ts = int(start.timestamp()), int(end.timestamp())
             
-            if exchange == "TWSE":
-                bars = await self._fetch_twse_data(code, from_timestamp, to_timestamp)
-            else:
-                bars = await self._fetch_tpex_data(code, from_timestamp, to_timestamp)
+            async def fetch_range(gap_start: int, gap_end: int) -> List[TWBar]:
+                logger.info(f"從開放資料API獲取: {symbol} ({exchange}) "
+                            f"{datetime.fromtimestamp(gap_start):%Y%m%d}-{datetime.fromtimestamp(gap_end):%Y%m%d}")
+                return await self._fetch_snapshot_bars(exchange, code, gap_start, gap_end, raise_on_error=True)
             
-            # 儲存到快取
-            self.cache[cache_key] = {
-                'data': bars,
-                'timestamp': time.time()
-            }
-            
-            return bars
+            try:
+                return await self.bar_cache.get_or_fetch((exchange, code, resolution), start_ts, end_ts, fetch_range)
+            except Exception as e:
+                # 部分日期抓取失敗時不寫入快取，改回傳可取得的K線
+                logger.warning(f"K線區段抓取不完整 {symbol}: {str(e)}")
+                return await self._fetch_snapshot_bars(exchange, code, start_ts, end_ts)
             
         except Exception as e:
             logger.error(f"獲取K線數據失敗 {symbol}: {str(e)}")
             return []
     
+    @staticmethod
+    def _bars_to_frame(bars: List[TWBar]) -> pd.DataFrame:
+        """K線列表轉為以時間為索引的 DataFrame"""
+        if not bars:
+            return pd.DataFrame()
+        frame = pd.DataFrame([bar.__dict__ for bar in bars])
+        frame.index = pd.to_datetime(frame.pop("time"), unit="s", utc=True).dt.tz_convert("Asia/Taipei")
+        return frame
+
+    @staticmethod
+    def _frame_to_bars(frame: pd.DataFrame) -> List[TWBar]:
+        """DataFrame 轉為K線列表"""
+        if frame is None or frame.empty:
+            return []
+        return [
+            TWBar(
+                time=int(timestamp.timestamp()),
+                open=float(row.open),
+                high=float(row.high),
+                low=float(row.low),
+                close=float(row.close),
+                volume=int(row.volume)
+            )
+            for timestamp, row in zip(frame.index, frame.itertuples(index=False))
+        ]
+
     async def _fetch_twse_data(self, code: str, from_ts: int, to_ts: int) -> List[TWBar]:
-        """從 TWSE 開放資料API獲取數據"""
-        bars = []
+        """從 TWSE 全市場每日快照獲取數據"""
+        return await self._fetch_snapshot_bars("TWSE", code, from_ts, to_ts)
+    
+    async def _fetch_tpex_data(self, code: str, from_ts: int, to_ts: int) -> List[TWBar]:
+        """從 TPEx 全市場每日快照獲取數據"""
+        return await self._fetch_snapshot_bars("TPEx", code, from_ts, to_ts)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """取得長期共用的 keep-alive 連線 session (每個事件迴圈一個)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """關閉共用的連線 session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+    
+    async def _fetch_snapshot_bars(
+        self,
+        exchange: str,
+        code: str,
+        from_ts: int,
+        to_ts: int,
+        raise_on_error: bool = False
+    ) -> List[TWBar]:
+        """
+        併發從共用的全市場快照取出單一股票的K線，依時間排序回傳
         
-        try:
-            current_date = datetime.fromtimestamp(from_ts)
-            end_date = datetime.fromtimestamp(to_ts)
-            
-            async with aiohttp.ClientSession() as session:
-                while current_date <= end_date:
-                    date_str = current_date.strftime('%Y%m%d')
-                    
-                    # TWSE 每日交易資料API
-                    url = f"{self.base_urls['TWSE']}MI_INDEX"
-                    params = {
-                        'response': 'json',
-                        'date': date_str,
-                        'type': 'ALLBUT0999'
-                    }
-                    
-                    try:
-                        async with session.get(url, params=params, timeout=10) as response:
-                            if response.status == 200:
-                                data = await response.json()
-                                
-                                # 解析TWSE API回應
-                                if 'data' in data and data['data']:
-                                    for row in data['data']:
-                                        if len(row) >= 9 and row[0] == code:
-                                            try:
-                                                bar = TWBar(
-                                                    time=int(current_date.timestamp()),
-                                                    open=self._parse_price(row[5]),
-                                                    high=self._parse_price(row[6]),
-                                                    low=self._parse_price(row[7]),
-                                                    close=self._parse_price(row[8]),
-                                                    volume=self._parse_volume(row[2])
-                                                )
-                                                bars.append(bar)
-                                                logger.debug(f"TWSE數據: {code} {date_str} 收盤={bar.close}")
-                                                break
-                                            except Exception as e:
-                                                logger.warning(f"解析TWSE數據失敗 {code} {date_str}: {str(e)}")
-                    
-                    except asyncio.TimeoutError:
-                        logger.warning(f"TWSE API 逾時: {date_str}")
-                    except Exception as e:
-                        logger.warning(f"TWSE API 錯誤 {date_str}: {str(e)}")
-                    
-                    current_date += timedelta(days=1)
-                    
-                    # 避免請求過快
-                    await asyncio.sleep(0.1)
+        K線時間為交易日 00:00 (本地時間)。raise_on_error 為 True 時，任一日期
+        抓取失敗即拋出例外 (避免不完整的結果被寫入快取)。
+        """
+        start_date = datetime.fromtimestamp(from_ts)
+        end_date = datetime.fromtimestamp(to_ts)
         
-        except Exception as e:
-            logger.error(f"TWSE數據獲取失敗: {str(e)}")
+        # 只抓取交易日，週末與休市日不發出請求
+        dates = [
+            datetime.combine(session, datetime.min.time())
+            for session in self.calendar.sessions_in_range(start_date, end_date)
+        ]
         
-        return bars
-    
-    async def _fetch_tpex_data(self, code: str, from_ts: int, to_ts: int) -> List[TWBar]:
-        """從 TPEx 開放資料API獲取數據"""
-        bars = []
+        if not dates:
+            return []
         
-        try:
-            current_date = datetime.fromtimestamp(from_ts)
-            end_date = datetime.fromtimestamp(to_ts)
-            
-            async with aiohttp.ClientSession() as session:
-                while current_date <= end_date:
-                    date_str = current_date.strftime('%Y/%m/%d')
-                    
-                    # TPEx 每日交易資料API
-                    url = f"{self.base_urls['TPEx']}aftertrading/daily_trading_info/st43_result.php"
-                    params = {
-                        'l': 'zh-tw',
-                        'd': date_str,
-                        'stkno': code
-                    }
-                    
-                    try:
-                        async with session.get(url, params=params, timeout=10) as response:
-                            if response.status == 200:
-                                data = await response.json()
-                                
-                                # 解析TPEx API回應
-                                if 'aaData' in data and data['aaData']:
-                                    for row in data['aaData']:
-                                        if len(row) >= 6 and row[0] == code:
-                                            try:
-                                                bar = TWBar(
-                                                    time=int(current_date.timestamp()),
-                                                    open=self._parse_price(row[4]),
-                                                    high=self._parse_price(row[5]),
-                                                    low=self._parse_price(row[6]),
-                                                    close=self._parse_price(row[2]),
-                                                    volume=self._parse_volume(row[8])
-                                                )
-                                                bars.append(bar)
-                                                logger.debug(f"TPEx數據: {code} {date_str} 收盤={bar.close}")
-                                                break
-                                            except Exception as e:
-                                                logger.warning(f"解析TPEx數據失敗 {code} {date_str}: {str(e)}")
-                    
-                    except asyncio.TimeoutError:
-                        logger.warning(f"TPEx API 逾時: {date_str}")
-                    except Exception as e:
-                        logger.warning(f"TPEx API 錯誤 {date_str}: {str(e)}")
-                    
-                    current_date += timedelta(days=1)
-                    
-                    # 避免請求過快
-                    await asyncio.sleep(0.1)
+        session = await self._get_session()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
         
-        except Exception as e:
-            logger.error(f"TPEx數據獲取失敗: {str(e)}")
+        async def fetch_day(day: datetime):
+            async with semaphore:
+                return await self.snapshots.aget_bar(
+                    exchange, code, day, session, rate_limiter=self.rate_limiter,
+                    raise_on_error=raise_on_error
+                )
+        
+        # gather 保留輸入順序，結果即為時間順序
+        results = await asyncio.gather(*(fetch_day(day) for day in dates), return_exceptions=True)
         
+        bars = []
+        for day, bar in zip(dates, results):
+            if isinstance(bar, Exception):
+                if raise_on_error:
+                    raise bar
+                logger.warning(f"{exchange} API 錯誤 {day:%Y%m%d}: {str(bar)}")
+                continue
+            if bar is None:
+                continue
+            bars.append(TWBar(
+                time=int(day.timestamp()),
+                open=bar['open'],
+                high=bar['high'],
+                low=bar['low'],
+                close=bar['close'],
+                volume=bar['volume']
+            ))
+        
+        logger.debug(f"{exchange}數據: {code} 共 {len(bars)} 根K線 ({len(dates)} 天)")
         return bars
     
     def _parse_price(self, price_str: Union[str, float]) -> float:
@@ -319,6 +346,19 @@ class TWStockDatafeed:
     
     async def search_symbols(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """搜尋台股符號"""
+        if self.symbol_master.is_loaded():
+            return [
+                {
+                    "symbol": instrument.symbol,
+                    "full_name": f"{instrument.exchange}:{instrument.code}",
+                    "description": instrument.name,
+                    "exchange": instrument.exchange,
+                    "type": instrument.type
+                }
+                for instrument in self.symbol_master.search(query, limit, market="TW")
+            ]
+        
+        # 代號表尚未載入時搜尋內建對照表
         results = []
         query_upper = query.upper()
         
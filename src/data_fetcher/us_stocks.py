@@ -8,9 +8,30 @@ import aiohttp
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import time
+
+from src.data_fetcher.bar_store import BarStore, STORE_INTERVALS, period_to_start
+from src.data_fetcher.intraday_bars import IntradayBars
+from src.data_fetcher.trading_calendar import get_trading_calendar
+from src.data_fetcher.transport import Transport, get_transport
 
 logger = logging.getLogger(__name__)
 
+# yf.download collects per-ticker results in yfinance module state that every
+# call resets, so two downloads running at once in this process can drop or
+# swap each other's tickers; the lock has to be process-wide for that reason.
+# It is held only around the live call (see _yf_download) and history is
+# downloaded in BULK_BATCH_SIZE batches, so a quote poll waits for at most one
+# batch of history rather than a whole bulk fetch.
+_YF_DOWNLOAD_LOCK = threading.Lock()
+
+
+def _yf_download(tickers: List[str], **kwargs) -> pd.DataFrame:
+    """yf.download under the process-wide download lock."""
+    with _YF_DOWNLOAD_LOCK:
+        return yf.download(tickers, **kwargs)
+
 @dataclass
 class StockData:
     symbol: str
@@ -32,9 +53,27 @@ class RealTimeQuote:
     timestamp: datetime
 
 class USStockDataFetcher:
-    def __init__(self, max_workers: int = 5):
+    # Tickers requested per yfinance download call in bulk mode
+    BULK_BATCH_SIZE = 50
+    # Company metadata changes rarely; keep it much longer than quotes
+    COMPANY_INFO_TTL = 24 * 3600
+    
+    def __init__(
+        self,
+        max_workers: int = 5,
+        bar_store: Optional[BarStore] = None,
+        intraday_bars: Optional[IntradayBars] = None,
+        transport: Optional[Transport] = None
+    ):
         self.max_workers = max_workers
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.bar_store = bar_store
+        self.calendar = get_trading_calendar("US")
+        # Live, recording or replaying gateway for yfinance calls
+        self.transport = transport or get_transport()
+        # 1-minute base series, persisted alongside the daily bars
+        self.intraday = intraday_bars or IntradayBars("US", bar_store=bar_store, transport=self.transport)
+        self._company_info_cache: Dict[str, Tuple[float, Dict]] = {}
         
     def fetch_historical_data(
         self, 
@@ -45,6 +84,9 @@ class USStockDataFetcher:
         """
         Fetch historical stock data using yfinance.
         
+        When a bar store is configured, stored bars are served first and only the
+        missing tail since the last stored bar is downloaded.
+        
         Args:
             symbol: Stock symbol (e.g., 'AAPL')
             period: Data period ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max')
@@ -53,62 +95,176 @@ class USStockDataFetcher:
         Returns:
             DataFrame with OHLCV data
         """
+        if self.bar_store is not None and interval in STORE_INTERVALS:
+            try:
+                return self._fetch_with_store(symbol, period, interval)
+            except Exception as e:
+                logger.warning(f"Bar store unavailable for {symbol}, fetching directly: {str(e)}")
+        
+        return self._download_history(symbol, interval=interval, period=period)
+    
+    def _download_history(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """Download and clean OHLCV history from yfinance."""
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period, interval=interval)
+            if start is not None:
+                call = {"ticker": symbol, "method": "history", "start": start, "interval": interval}
+                fetch = lambda: yf.Ticker(symbol).history(start=start, interval=interval)
+            else:
+                call = {"ticker": symbol, "method": "history", "period": period, "interval": interval}
+                fetch = lambda: yf.Ticker(symbol).history(period=period, interval=interval)
+            data = self.transport.frame("yfinance", call, fetch)
             
             if data.empty:
                 logger.warning(f"No data found for symbol {symbol}")
                 return pd.DataFrame()
             
-            # Clean and format data - keep datetime index for backtesting
-            if 'Date' not in data.columns:
-                # Index is already datetime, just clean column names
-                data.columns = [col.lower().replace(' ', '_') for col in data.columns]
-            else:
-                # Reset index was called, need to set it back
-                data.reset_index(inplace=True)
-                data.columns = [col.lower().replace(' ', '_') for col in data.columns]
-                if 'date' in data.columns:
-                    data.set_index('date', inplace=True)
-            
-            # Ensure index is datetime
-            if not isinstance(data.index, pd.DatetimeIndex):
-                data.index = pd.to_datetime(data.index)
-            
-            # Add symbol column
-            data['symbol'] = symbol
-            
-            return data
+            return self._format_history(data, symbol)
             
         except Exception as e:
             logger.error(f"Error fetching data for {symbol}: {str(e)}")
             return pd.DataFrame()
     
+    @staticmethod
+    def _format_history(data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """Normalise yfinance column names and index, and tag rows with the symbol."""
+        # Clean and format data - keep datetime index for backtesting
+        if 'Date' not in data.columns:
+            # Index is already datetime, just clean column names
+            data.columns = [col.lower().replace(' ', '_') for col in data.columns]
+        else:
+            # Reset index was called, need to set it back
+            data.reset_index(inplace=True)
+            data.columns = [col.lower().replace(' ', '_') for col in data.columns]
+            if 'date' in data.columns:
+                data.set_index('date', inplace=True)
+        
+        # Ensure index is datetime
+        if not isinstance(data.index, pd.DatetimeIndex):
+            data.index = pd.to_datetime(data.index)
+        
+        # Add symbol column
+        data['symbol'] = symbol
+        
+        return data
+    
+    def _fetch_with_store(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Serve history from the local bar store, downloading only the missing tail."""
+        store = self.bar_store
+        start = period_to_start(period)
+        
+        if store.covers("US", symbol, interval, start):
+            if self._store_needs_refresh(symbol, interval):
+                # Re-download from the last finished bar so adjustments can be detected
+                last_ts = store.last_timestamp("US", symbol, interval)
+                recent = store.read("US", symbol, interval, start=last_ts - timedelta(days=10))
+                anchor = recent.iloc[-2:-1] if len(recent) >= 2 else recent.iloc[-1:]
+                tail = self._download_history(symbol, interval=interval, start=anchor.index[0].date())
+                
+                if tail.empty:
+                    store.touch("US", symbol, interval)
+                elif self._history_was_adjusted(anchor, tail):
+                    # A split or dividend re-based the adjusted history; start over
+                    logger.info(f"Adjusted history changed for {symbol}, refreshing bar store")
+                    store.clear("US", symbol)
+                    return self._download_and_store(symbol, period, interval, start)
+                else:
+                    store.write("US", symbol, tail, interval)
+            
+            data = store.read("US", symbol, interval, start=start)
+            if not data.empty:
+                data['symbol'] = symbol
+                return data
+        
+        return self._download_and_store(symbol, period, interval, start)
+    
+    def _store_needs_refresh(self, symbol: str, interval: str) -> bool:
+        """Stored bars are stale if the market traded, or the last bar settled, since the last refresh."""
+        if self.bar_store.is_fresh("US", symbol, interval):
+            return False
+        updated_at = self.bar_store.updated_at("US", symbol, interval)
+        if updated_at is None:
+            return True
+        return not self.calendar.is_settled(updated_at.astimezone(), datetime.now().astimezone())
+    
+    def _download_and_store(
+        self,
+        symbol: str,
+        period: str,
+        interval: str,
+        start: Optional[datetime]
+    ) -> pd.DataFrame:
+        """Download a full period and persist it to the bar store."""
+        data = self._download_history(symbol, interval=interval, period=period)
+        self._store_period(symbol, data, interval, start)
+        return data
+    
+    def _store_period(self, symbol: str, data: pd.DataFrame, interval: str, start: Optional[datetime]):
+        """Persist a freshly downloaded period to the bar store."""
+        if not data.empty:
+            self.bar_store.write(
+                "US", symbol, data, interval,
+                coverage_start=start, full_history=start is None
+            )
+    
+    @staticmethod
+    def _history_was_adjusted(anchor: pd.DataFrame, tail: pd.DataFrame) -> bool:
+        """Check whether a re-downloaded, already finished bar differs from the stored one."""
+        if 'stock_splits' in tail.columns and (tail['stock_splits'].fillna(0) != 0).any():
+            return True
+        if anchor.empty or 'close' not in anchor.columns:
+            return False
+        
+        overlap = tail[tail.index.normalize() == anchor.index[0].normalize()]
+        if overlap.empty:
+            return False
+        
+        stored_close = float(anchor['close'].iloc[0])
+        new_close = float(overlap['close'].iloc[0])
+        return stored_close > 0 and abs(new_close - stored_close) / stored_close > 0.005
+    
     def fetch_multiple_symbols(
         self, 
         symbols: List[str], 
         period: str = "1y",
-        interval: str = "1d"
+        interval: str = "1d",
+        bulk: bool = True
     ) -> Dict[str, pd.DataFrame]:
         """
-        Fetch historical data for multiple symbols concurrently.
+        Fetch historical data for multiple symbols.
+        
+        In bulk mode, symbols that are not already in the bar store are requested
+        in batches of ``BULK_BATCH_SIZE`` tickers per yfinance download call.
+        Symbols missing from a batch response are retried one by one.
         
         Args:
             symbols: List of stock symbols
             period: Data period
             interval: Data interval
+            bulk: Use batched multi-ticker downloads (False fetches each symbol separately)
             
         Returns:
             Dictionary mapping symbol to DataFrame
         """
+        symbols = list(dict.fromkeys(symbols))
         results = {}
+        remaining = symbols
+        
+        if bulk and len(symbols) > 1:
+            results, remaining = self._fetch_bulk(symbols, period, interval)
+            if remaining:
+                logger.info(f"Bulk download missed {len(remaining)} symbols, fetching individually")
         
-        # Use ThreadPoolExecutor for concurrent API calls
+        # Use ThreadPoolExecutor for concurrent per-symbol API calls
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             future_to_symbol = {
                 executor.submit(self.fetch_historical_data, symbol, period, interval): symbol 
-                for symbol in symbols
+                for symbol in remaining
             }
             
             for future in future_to_symbol:
@@ -122,7 +278,108 @@ class USStockDataFetcher:
                 except Exception as e:
                     logger.error(f"Error processing {symbol}: {str(e)}")
         
-        return results
+        # Keep the caller's symbol order
+        return {symbol: results[symbol] for symbol in symbols if symbol in results}
+    
+    def _fetch_bulk(
+        self,
+        symbols: List[str],
+        period: str,
+        interval: str
+    ) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
+        """
+        Download symbols in multi-ticker batches.
+        
+        Symbols the bar store can already answer are left for the per-symbol path,
+        which serves them from disk (or downloads only their tail).
+        
+        Returns:
+            Tuple of (symbol -> DataFrame, symbols still to fetch individually)
+        """
+        use_store = self.bar_store is not None and interval in STORE_INTERVALS
+        start = period_to_start(period)
+        
+        to_download = []
+        remaining = []
+        for symbol in symbols:
+            try:
+                if use_store and self.bar_store.covers("US", symbol, interval, start):
+                    remaining.append(symbol)
+                    continue
+            except Exception as e:
+                logger.warning(f"Bar store unavailable for {symbol}: {str(e)}")
+            to_download.append(symbol)
+        
+        results = {}
+        for i in range(0, len(to_download), self.BULK_BATCH_SIZE):
+            batch = to_download[i:i + self.BULK_BATCH_SIZE]
+            frames = self._download_batch(batch, period, interval)
+            
+            for symbol in batch:
+                data = frames.get(symbol)
+                if data is None or data.empty:
+                    remaining.append(symbol)
+                    continue
+                if use_store:
+                    try:
+                        self._store_period(symbol, data, interval, start)
+                    except Exception as e:
+                        logger.warning(f"Failed to store bars for {symbol}: {str(e)}")
+                results[symbol] = data
+        
+        return results, remaining
+    
+    def _download_batch(self, symbols: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        """Download one batch of tickers in a single yfinance request."""
+        try:
+            # Live calls are serialised by _yf_download; each still fetches its
+            # tickers in parallel, and replayed cassettes skip the lock entirely
+            data = self.transport.frame(
+                "yfinance",
+                {"tickers": list(symbols), "method": "download", "period": period, "interval": interval},
+                lambda: _yf_download(
+                    symbols,
+                    period=period,
+                    interval=interval,
+                    group_by='ticker',
+                    auto_adjust=True,
+                    actions=True,
+                    ignore_tz=False,
+                    threads=min(len(symbols), self.max_workers),
+                    progress=False
+                )
+            )
+        except Exception as e:
+            logger.error(f"Bulk download failed for {len(symbols)} symbols: {str(e)}")
+            return {}
+        
+        if data is None or data.empty:
+            return {}
+        return self._split_bulk_frame(data, symbols)
+    
+    @classmethod
+    def _split_bulk_frame(cls, data: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Split a wide (ticker, field) download into per-symbol OHLCV frames.
+        
+        Each symbol's block is selected from the column MultiIndex rather than
+        re-downloaded; rows where the ticker did not trade are dropped.
+        """
+        if not isinstance(data.columns, pd.MultiIndex):
+            # Single-ticker responses may come back with flat columns
+            return {symbols[0]: cls._format_history(data, symbols[0])} if len(symbols) == 1 else {}
+        
+        tickers = set(data.columns.get_level_values(0))
+        frames = {}
+        for symbol in symbols:
+            if symbol not in tickers:
+                continue
+            frame = data[symbol]
+            frame = frame[frame['Close'].notna()] if 'Close' in frame.columns else frame.dropna(how='all')
+            if frame.empty:
+                continue
+            frames[symbol] = cls._format_history(frame, symbol)
+        return frames
     
     def get_stock_data(self, symbol: str, period: str = "3mo") -> pd.DataFrame:
         """
@@ -147,49 +404,80 @@ class USStockDataFetcher:
         Returns:
             RealTimeQuote object or None if error
         """
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            if not info:
-                return None
-            
-            price = info.get('currentPrice') or info.get('regularMarketPrice', 0)
-            change = info.get('regularMarketChange', 0)
-            change_percent = info.get('regularMarketChangePercent', 0)
-            volume = info.get('regularMarketVolume', 0)
-            
-            return RealTimeQuote(
-                symbol=symbol,
-                price=price,
-                change=change,
-                change_percent=change_percent * 100,  # Convert to percentage
-                volume=volume,
-                timestamp=datetime.now()
-            )
+        return self.get_quotes([symbol]).get(symbol)
+    
+    def get_quotes(self, symbols: List[str]) -> Dict[str, RealTimeQuote]:
+        """
+        Get real-time quotes for many symbols.
+        
+        Quotes are derived from the last two daily bars of a multi-ticker chart
+        download (the current session's bar is live during trading hours), which
+        is far lighter than scraping ``Ticker.info`` for each symbol.
+        
+        Args:
+            symbols: Stock symbols
             
-        except Exception as e:
-            logger.error(f"Error fetching real-time quote for {symbol}: {str(e)}")
+        Returns:
+            Dictionary mapping symbol to RealTimeQuote, omitting symbols without data
+        """
+        symbols = list(dict.fromkeys(symbols))
+        quotes = {}
+        for i in range(0, len(symbols), self.BULK_BATCH_SIZE):
+            batch = symbols[i:i + self.BULK_BATCH_SIZE]
+            frames = self._download_batch(batch, period="5d", interval="1d")
+            for symbol, bars in frames.items():
+                quote = self._quote_from_bars(symbol, bars)
+                if quote is not None:
+                    quotes[symbol] = quote
+        return quotes
+    
+    @staticmethod
+    def _quote_from_bars(symbol: str, bars: pd.DataFrame) -> Optional[RealTimeQuote]:
+        """Build a quote from the latest daily bar and the previous close."""
+        closes = bars['close'].dropna()
+        if closes.empty:
             return None
+        
+        price = float(closes.iloc[-1])
+        previous_close = float(closes.iloc[-2]) if len(closes) >= 2 else float(bars['open'].iloc[-1])
+        change = price - previous_close
+        volume = bars['volume'].iloc[-1] if 'volume' in bars.columns else 0
+        
+        return RealTimeQuote(
+            symbol=symbol,
+            price=price,
+            change=change,
+            change_percent=(change / previous_close * 100) if previous_close else 0.0,
+            volume=int(volume) if pd.notna(volume) else 0,
+            timestamp=datetime.now()
+        )
     
     def get_company_info(self, symbol: str) -> Optional[Dict]:
         """
         Get company information for a symbol.
         
+        Company metadata is cached for ``COMPANY_INFO_TTL`` seconds, separately
+        from quotes, because ``Ticker.info`` is slow and heavily rate-limited.
+        
         Args:
             symbol: Stock symbol
             
         Returns:
             Dictionary with company info or None
         """
+        cached = self._company_info_cache.get(symbol)
+        if cached is not None and time.time() - cached[0] < self.COMPANY_INFO_TTL:
+            return cached[1]
+        
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = self.transport.value(
+                "yfinance", {"ticker": symbol, "method": "info"}, lambda: yf.Ticker(symbol).info
+            )
             
             if not info:
                 return None
             
-            return {
+            company_info = {
                 'symbol': symbol,
                 'company_name': info.get('longName', ''),
                 'sector': info.get('sector', ''),
@@ -202,6 +490,8 @@ class USStockDataFetcher:
                 'fifty_two_week_low': info.get('fiftyTwoWeekLow', 0),
                 'description': info.get('longBusinessSummary', ''),
             }
+            self._company_info_cache[symbol] = (time.time(), company_info)
+            return company_info
             
         except Exception as e:
             logger.error(f"Error fetching company info for {symbol}: {str(e)}")
@@ -235,32 +525,35 @@ class USStockDataFetcher:
         
         return df
     
-    def get_intraday_data(self, symbol: str, days: int = 1) -> pd.DataFrame:
+    def get_intraday_data(self, symbol: str, days: int = 1, resolution: str = "1") -> pd.DataFrame:
         """
-        Get intraday data (1-minute intervals) for recent days.
+        Get intraday data for recent trading days.
+        
+        1-minute bars are persisted as the base series, so history accumulates
+        beyond yfinance's short intraday window; coarser resolutions are
+        aggregated from it.
         
         Args:
             symbol: Stock symbol
-            days: Number of days to fetch (max 7 for yfinance)
+            days: Number of trading days to return
+            resolution: Bar resolution ('1', '5', '15', '30', '60')
             
         Returns:
-            DataFrame with 1-minute interval data
+            DataFrame with intraday bars
         """
         try:
-            # yfinance limits intraday data to last 7 days
-            days = min(days, 7)
-            period = f"{days}d"
+            start = self.calendar.previous_session(self.calendar.now().date())
+            for _ in range(max(days, 1) - 1):
+                start = self.calendar.previous_session(start, inclusive=False)
             
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period, interval="1m")
+            data = self.intraday.get_bars(symbol, resolution, start=start)
             
             if data.empty:
                 logger.warning(f"No intraday data found for symbol {symbol}")
                 return pd.DataFrame()
             
             # Clean and format data
-            data.reset_index(inplace=True)
-            data.columns = [col.lower().replace(' ', '_') for col in data.columns]
+            data = data.rename_axis('datetime').reset_index()
             data['symbol'] = symbol
             
             return data
@@ -277,21 +570,7 @@ class USStockDataFetcher:
             True if market is open, False otherwise
         """
         try:
-            # Get current time in ET (market timezone)
-            import pytz
-            et_tz = pytz.timezone('US/Eastern')
-            now_et = datetime.now(et_tz)
-            
-            # Check if it's a weekday
-            if now_et.weekday() >= 5:  # Saturday = 5, Sunday = 6
-                return False
-            
-            # Check if it's within market hours (9:30 AM - 4:00 PM ET)
-            market_open = now_et.replace(hour=9, minute=30, second=0, microsecond=0)
-            market_close = now_et.replace(hour=16, minute=0, second=0, microsecond=0)
-            
-            return market_open <= now_et <= market_close
-            
+            return self.calendar.is_open()
         except Exception as e:
             logger.error(f"Error checking market status: {str(e)}")
             return False
@@ -0,0 +1,179 @@
+"""
+Scheduled warm-up of hot symbols ahead of and during each market's session.
+
+Without it every symbol is fetched and analysed on its first request, which
+makes the open the slowest time of day. The scheduler wakes every
+``interval`` seconds and, for each market that is open or opens within
+``lead`` seconds, re-runs a warm-up coroutine (bars, indicators, patterns,
+signals) for that market's configured symbols plus the symbols users asked for
+recently, in batches, so requests for hot symbols hit warm caches.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from src.data_fetcher.async_market_data import is_taiwan_symbol
+from src.data_fetcher.trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+# Warms every cache derived from one symbol
+SymbolWarmer = Callable[[str], Awaitable[Any]]
+
+MARKETS = ("US", "TW")
+
+
+def market_of(symbol: str) -> str:
+    """'TW' for .TW / .TWO symbols, otherwise 'US'."""
+    return "TW" if is_taiwan_symbol(symbol) else "US"
+
+
+class WarmupScheduler:
+    """
+    Periodic, session-aware warm-up of configured and recently requested symbols.
+    """
+
+    def __init__(
+        self,
+        warm: SymbolWarmer,
+        symbols: Iterable[str],
+        interval: float = 15 * 60,
+        batch_size: int = 10,
+        lead: float = 30 * 60,
+        max_recent: int = 50,
+        recent_ttl: float = 24 * 3600
+    ):
+        """
+        Args:
+            warm: Coroutine function refreshing all cached data for one symbol
+            symbols: Symbols always kept warm (e.g. US_SYMBOLS + TW_SYMBOLS)
+            interval: Seconds between warm-up rounds
+            batch_size: Symbols warmed concurrently
+            lead: Seconds before the session open at which warming starts
+            max_recent: Recently requested symbols kept warm in addition
+            recent_ttl: Seconds a requested symbol stays in the recent set
+        """
+        self.warm = warm
+        self.symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.lead = lead
+        self.max_recent = max_recent
+        self.recent_ttl = recent_ttl
+
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self.stats = {"rounds": 0, "symbols_warmed": 0, "errors": 0, "last_round": None}
+
+    # ------------------------------------------------------------------
+    # Symbol sets
+    # ------------------------------------------------------------------
+
+    def record(self, symbol: str):
+        """Note a user request so the symbol is kept warm for ``recent_ttl``."""
+        symbol = symbol.upper()
+        self._recent[symbol] = time.time()
+        self._recent.move_to_end(symbol)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    def recent_symbols(self) -> List[str]:
+        """Recently requested symbols, most recent last."""
+        cutoff = time.time() - self.recent_ttl
+        for symbol in [symbol for symbol, seen in self._recent.items() if seen < cutoff]:
+            del self._recent[symbol]
+        return list(self._recent)
+
+    def hot_symbols(self, market: Optional[str] = None) -> List[str]:
+        """Configured plus recently requested symbols, optionally for one market."""
+        symbols = list(dict.fromkeys(self.symbols + self.recent_symbols()))
+        if market is None:
+            return symbols
+        return [symbol for symbol in symbols if market_of(symbol) == market]
+
+    def active_markets(self, now: Optional[datetime] = None) -> List[str]:
+        """Markets in session or opening within ``lead`` seconds."""
+        now = now or datetime.now().astimezone()
+        active = []
+        for market in MARKETS:
+            calendar = get_trading_calendar(market)
+            if calendar.is_open(now) or calendar.is_open(now + timedelta(seconds=self.lead)):
+                active.append(market)
+        return active
+
+    # ------------------------------------------------------------------
+    # Rounds
+    # ------------------------------------------------------------------
+
+    async def run_once(self, markets: Optional[Iterable[str]] = None) -> int:
+        """
+        Warm the hot symbols of the given (default: active) markets once.
+
+        Returns:
+            Number of symbols warmed successfully
+        """
+        markets = self.active_markets() if markets is None else list(markets)
+        symbols = [symbol for market in markets for symbol in self.hot_symbols(market)]
+        warmed = 0
+
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i:i + self.batch_size]
+            results = await asyncio.gather(*(self.warm(symbol) for symbol in batch), return_exceptions=True)
+            for symbol, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    self.stats["errors"] += 1
+                    logger.warning(f"Warm-up failed for {symbol}: {result}")
+                else:
+                    warmed += 1
+
+        self.stats["rounds"] += 1
+        self.stats["symbols_warmed"] += warmed
+        self.stats["last_round"] = datetime.now().isoformat()
+        if symbols:
+            logger.info(f"Warmed {warmed}/{len(symbols)} symbols for {', '.join(markets)}")
+        return warmed
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Warm-up round failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the background loop (idempotent); call from a running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background loop, cancelling a round in progress."""
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Round counters plus the current hot-symbol counts."""
+        return {
+            **self.stats,
+            "running": self._task is not None and not self._task.done(),
+            "configured_symbols": len(self.symbols),
+            "recent_symbols": len(self.recent_symbols()),
+        }
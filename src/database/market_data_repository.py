@@ -0,0 +1,380 @@
+"""
+Bulk ingestion and range reads for the stock_prices / technical_indicators tables
+"""
+
+import csv
+import io
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Table, and_, select, text
+from sqlalchemy.engine import Engine
+
+from src.data_fetcher.bar_store import MARKET_TIMEZONES
+from .models import Base, StockPrice, TechnicalIndicator
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume", "adj_close"]
+INTEGER_COLUMNS = {"volume"}
+INDICATOR_COLUMNS = [
+    column.name for column in TechnicalIndicator.__table__.columns
+    if column.name not in ("id", "symbol", "timestamp")
+]
+
+# Unique (symbol, timestamp) indexes the upserts conflict on; created for tables
+# that predate them (create_all does not alter existing tables)
+UPSERT_INDEXES = {
+    "stock_prices": "uq_stock_prices_symbol_timestamp",
+    "technical_indicators": "uq_technical_indicators_symbol_timestamp",
+}
+
+DateLike = Union[datetime, pd.Timestamp, str]
+
+
+class MarketDataRepository:
+    """Bulk upserts and column-oriented range reads for bars and indicators"""
+
+    # Above this many rows, PostgreSQL (psycopg2) loads go through COPY into a temp table
+    COPY_THRESHOLD = 5000
+
+    def __init__(self, engine: Engine, chunk_size: int = 5000):
+        """
+        Args:
+            engine: SQLAlchemy engine (SQLite locally, PostgreSQL/Timescale in production)
+            chunk_size: Rows per executemany batch
+        """
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.dialect = engine.dialect.name
+
+    def ensure_schema(self):
+        """Create the tables and the unique (symbol, timestamp) indexes the upserts rely on"""
+        tables = [StockPrice.__table__, TechnicalIndicator.__table__]
+        Base.metadata.create_all(bind=self.engine, tables=tables)
+        with self.engine.begin() as conn:
+            for table_name, index_name in UPSERT_INDEXES.items():
+                conn.execute(text(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table_name} (symbol, timestamp)"
+                ))
+            if self.dialect == "postgresql":
+                # Older tables declared volume NOT NULL; bars without a volume are stored as NULL
+                conn.execute(text("ALTER TABLE stock_prices ALTER COLUMN volume DROP NOT NULL"))
+
+    # ------------------------------------------------------------------
+    # Conversion helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _utc_naive(index: pd.Index, market: str) -> pd.DatetimeIndex:
+        """Timestamps are stored as naive UTC; naive input is taken as exchange time"""
+        index = pd.DatetimeIndex(pd.to_datetime(index))
+        if index.tz is None:
+            index = index.tz_localize(MARKET_TIMEZONES.get(market.upper(), "UTC"))
+        return index.tz_convert("UTC").tz_localize(None)
+
+    @staticmethod
+    def _records(symbol: str, timestamps: pd.DatetimeIndex, columns: Dict[str, np.ndarray], extra: Optional[Dict] = None) -> List[Dict]:
+        """Build executemany parameter rows column-wise; NaN becomes NULL, INTEGER_COLUMNS are written as ints"""
+        names = list(columns)
+        values = []
+        for name in names:
+            array = columns[name]
+            if array.dtype.kind == "f":
+                missing = np.isnan(array)
+                if name in INTEGER_COLUMNS:
+                    array = np.where(missing, 0, array).astype(np.int64)
+                array = array.astype(object)
+                array[missing] = None
+            else:
+                array = array.astype(object)
+            values.append(array)
+        base = {"symbol": symbol, **(extra or {})}
+        stamps = timestamps.to_pydatetime()
+        return [
+            {**base, "timestamp": stamp, **dict(zip(names, row))}
+            for stamp, row in zip(stamps, zip(*values))
+        ]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _upsert(self, table: Table, rows: List[Dict], update_columns: Sequence[str]) -> int:
+        if not rows:
+            return 0
+
+        if self.dialect == "postgresql" and len(rows) > self.COPY_THRESHOLD and self._has_copy():
+            return self._copy_upsert(table, rows, update_columns)
+
+        if self.dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif self.dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return self._replace_rows(table, rows)
+
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol", "timestamp"],
+            set_={column: stmt.excluded[column] for column in update_columns}
+        )
+        with self.engine.begin() as conn:
+            for i in range(0, len(rows), self.chunk_size):
+                conn.execute(stmt, rows[i:i + self.chunk_size])
+        return len(rows)
+
+    def _has_copy(self) -> bool:
+        return self.engine.dialect.driver == "psycopg2"
+
+    def _copy_upsert(self, table: Table, rows: List[Dict], update_columns: Sequence[str]) -> int:
+        """COPY rows into a temp table, then upsert them in one INSERT ... SELECT"""
+        columns = ["symbol", "timestamp", *update_columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if row.get(column) is None else row[column] for column in columns])
+        buffer.seek(0)
+
+        column_list = ", ".join(columns)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in update_columns)
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute(
+                f"CREATE TEMP TABLE _ingest (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.copy_expert(f"COPY _ingest ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM _ingest "
+                f"ON CONFLICT (symbol, timestamp) DO UPDATE SET {updates}"
+            )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return len(rows)
+
+    def _replace_rows(self, table: Table, rows: List[Dict]) -> int:
+        """Portable fallback: delete the keys being written, then bulk insert"""
+        with self.engine.begin() as conn:
+            by_symbol: Dict[str, List[datetime]] = {}
+            for row in rows:
+                by_symbol.setdefault(row["symbol"], []).append(row["timestamp"])
+            for symbol, stamps in by_symbol.items():
+                conn.execute(table.delete().where(and_(table.c.symbol == symbol, table.c.timestamp.in_(stamps))))
+            for i in range(0, len(rows), self.chunk_size):
+                conn.execute(table.insert(), rows[i:i + self.chunk_size])
+        return len(rows)
+
+    def upsert_bars(self, symbol: str, data: pd.DataFrame, market: str = "US") -> int:
+        """
+        Insert or update OHLCV bars for one symbol
+
+        Args:
+            symbol: Symbol to store under
+            data: Fetcher-format DataFrame indexed by timestamp (open/high/low/close/volume[/adj_close])
+            market: Market code; also the timezone naive timestamps are interpreted in
+
+        Returns:
+            Number of rows written
+        """
+        if data is None or data.empty:
+            return 0
+        columns = {}
+        for column in PRICE_COLUMNS:
+            if column in data.columns:
+                columns[column] = data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        if "close" not in columns:
+            raise ValueError(f"Bars for {symbol} have no close column")
+        rows = self._records(symbol, self._utc_naive(data.index, market), columns, {"market": market.upper()})
+        return self._upsert(StockPrice.__table__, rows, [*columns, "market"])
+
+    def upsert_bars_many(self, frames: Dict[str, pd.DataFrame], market: str = "US") -> int:
+        """Upsert bars for many symbols ({symbol: DataFrame})"""
+        return sum(self.upsert_bars(symbol, data, market) for symbol, data in frames.items())
+
+    def upsert_indicators(self, symbol: str, data: pd.DataFrame, market: str = "US") -> int:
+        """
+        Insert or update computed indicators for one symbol
+
+        Columns of ``data`` that match technical_indicators columns (rsi, macd,
+        sma_20, ...) are written; others are ignored.
+
+        Returns:
+            Number of rows written
+        """
+        if data is None or data.empty:
+            return 0
+        columns = {
+            column: data[column].to_numpy(dtype=np.float64)
+            for column in INDICATOR_COLUMNS if column in data.columns
+        }
+        if not columns:
+            return 0
+        rows = self._records(symbol, self._utc_naive(data.index, market), columns)
+        return self._upsert(TechnicalIndicator.__table__, rows, list(columns))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _bounds(column, start: Optional[DateLike], end: Optional[DateLike], market: str) -> list:
+        conditions = []
+        for bound, op in ((start, "ge"), (end, "le")):
+            if bound is None:
+                continue
+            ts = pd.Timestamp(bound)
+            if ts.tzinfo is None:
+                ts = ts.tz_localize(MARKET_TIMEZONES.get(market.upper(), "UTC"))
+            value = ts.tz_convert("UTC").tz_localize(None).to_pydatetime()
+            conditions.append(column >= value if op == "ge" else column <= value)
+        return conditions
+
+    def _read_columns(
+        self,
+        table: Table,
+        symbols: Sequence[str],
+        columns: Sequence[str],
+        start: Optional[DateLike],
+        end: Optional[DateLike],
+        market: str
+    ) -> Dict[str, np.ndarray]:
+        """Range query on the (symbol, timestamp) index, returned as NumPy columns"""
+        symbol_filter = table.c.symbol == symbols[0] if len(symbols) == 1 else table.c.symbol.in_(list(symbols))
+        stmt = (
+            select(table.c.symbol, table.c.timestamp, *[table.c[column] for column in columns])
+            .where(symbol_filter, *self._bounds(table.c.timestamp, start, end, market))
+            .order_by(table.c.symbol, table.c.timestamp)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(stmt).fetchall()
+
+        names = ["symbol", "timestamp", *columns]
+        if not rows:
+            arrays = {name: np.array([], dtype=np.float64) for name in columns}
+            arrays["symbol"] = np.array([], dtype=object)
+            arrays["timestamp"] = np.array([], dtype="datetime64[us]")
+            return arrays
+
+        transposed = list(zip(*rows))
+        arrays = {"symbol": np.array(transposed[0], dtype=object)}
+        arrays["timestamp"] = pd.to_datetime(pd.Series(transposed[1])).to_numpy()
+        for name, values in zip(names[2:], transposed[2:]):
+            arrays[name] = np.array(values, dtype=np.float64)  # NULL -> nan
+        return arrays
+
+    def _frame(self, arrays: Dict[str, np.ndarray], columns: Sequence[str], market: str) -> pd.DataFrame:
+        index = pd.DatetimeIndex(arrays["timestamp"]).tz_localize("UTC").tz_convert(
+            MARKET_TIMEZONES.get(market.upper(), "UTC")
+        ).rename("date")
+        return pd.DataFrame({column: arrays[column] for column in columns}, index=index)
+
+    def read_bar_arrays(
+        self,
+        symbol: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        market: str = "US",
+        columns: Sequence[str] = ("open", "high", "low", "close", "volume")
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read bars for one symbol as NumPy columns
+
+        Returns:
+            {"timestamp": datetime64 (UTC), "open": float64, ...}
+        """
+        arrays = self._read_columns(StockPrice.__table__, [symbol], list(columns), start, end, market)
+        arrays.pop("symbol")
+        return arrays
+
+    def read_bars(
+        self,
+        symbol: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        market: str = "US"
+    ) -> pd.DataFrame:
+        """
+        Read bars for one symbol in the fetchers' format
+
+        Returns:
+            OHLCV DataFrame indexed by exchange-time timestamps, empty if none stored
+        """
+        columns = ["open", "high", "low", "close", "volume"]
+        arrays = self._read_columns(StockPrice.__table__, [symbol], columns, start, end, market)
+        df = self._frame(arrays, columns, market)
+        if not df.empty:
+            # Bars stored without a volume read back as <NA> instead of a garbage integer
+            volume = df["volume"]
+            df["volume"] = volume.astype("Int64") if volume.isna().any() else volume.astype(np.int64)
+            df["symbol"] = symbol
+        return df
+
+    def read_panel(
+        self,
+        symbols: Iterable[str],
+        field: str = "close",
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        market: str = "US"
+    ) -> pd.DataFrame:
+        """
+        Read one field for many symbols in a single query
+
+        Returns:
+            Wide DataFrame (timestamps x symbols); missing bars are NaN
+        """
+        symbols = list(dict.fromkeys(symbols))
+        arrays = self._read_columns(StockPrice.__table__, symbols, [field], start, end, market)
+        long = pd.DataFrame({"symbol": arrays["symbol"], field: arrays[field]},
+                            index=pd.DatetimeIndex(arrays["timestamp"]))
+        wide = long.pivot(columns="symbol", values=field).reindex(columns=symbols)
+        wide.index = wide.index.tz_localize("UTC").tz_convert(MARKET_TIMEZONES.get(market.upper(), "UTC")).rename("date")
+        wide.columns.name = None
+        return wide
+
+    def read_indicators(
+        self,
+        symbol: str,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        columns: Optional[Sequence[str]] = None,
+        market: str = "US"
+    ) -> pd.DataFrame:
+        """Read stored indicators for one symbol (all indicator columns by default)"""
+        columns = list(columns or INDICATOR_COLUMNS)
+        arrays = self._read_columns(TechnicalIndicator.__table__, [symbol], columns, start, end, market)
+        return self._frame(arrays, columns, market)
+
+    def latest_timestamp(self, symbol: str, market: str = "US") -> Optional[pd.Timestamp]:
+        """Timestamp of the newest stored bar for a symbol (exchange time)"""
+        table = StockPrice.__table__
+        stmt = select(table.c.timestamp).where(table.c.symbol == symbol).order_by(table.c.timestamp.desc()).limit(1)
+        with self.engine.connect() as conn:
+            value = conn.execute(stmt).scalar()
+        if value is None:
+            return None
+        return pd.Timestamp(value).tz_localize("UTC").tz_convert(MARKET_TIMEZONES.get(market.upper(), "UTC"))
+
+
+# Global repository instance
+_market_data_repository: Optional[MarketDataRepository] = None
+
+
+def get_market_data_repository() -> Optional[MarketDataRepository]:
+    """Get the shared repository, or None when no database is configured"""
+    global _market_data_repository
+    if _market_data_repository is None:
+        from .connection import db_manager
+        if db_manager is None or db_manager.engine is None:
+            return None
+        _market_data_repository = MarketDataRepository(db_manager.engine)
+        _market_data_repository.ensure_schema()
+    return _market_data_repository
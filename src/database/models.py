@@ -22,13 +22,13 @@ class StockPrice(Base):
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
     close = Column(Float, nullable=False)
-    volume = Column(Integer, nullable=False)
+    volume = Column(Integer)  # NULL when the source reported no volume
     adj_close = Column(Float)
     market = Column(String(10), default='US')  # US, TW, etc.
     
-    # Create composite index for efficient queries
+    # Create composite index for efficient queries (unique: one bar per symbol and timestamp, the upsert key)
     __table_args__ = (
-        Index('ix_stock_prices_symbol_timestamp', 'symbol', 'timestamp'),
+        Index('uq_stock_prices_symbol_timestamp', 'symbol', 'timestamp', unique=True),
         Index('ix_stock_prices_timestamp_symbol', 'timestamp', 'symbol'),
     )
     
@@ -67,7 +67,7 @@ class TechnicalIndicator(Base):
     volume_ratio = Column(Float)
     
     __table_args__ = (
-        Index('ix_technical_indicators_symbol_timestamp', 'symbol', 'timestamp'),
+        Index('uq_technical_indicators_symbol_timestamp', 'symbol', 'timestamp', unique=True),
     )
 
 class TechnicalPattern(Base):
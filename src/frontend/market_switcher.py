@@ -7,10 +7,11 @@ Market Switcher - 美股/台股市場切換機制
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, time
 from dataclasses import dataclass
-import pytz
 import logging
 from enum import Enum
 
+from src.data_fetcher.trading_calendar import get_trading_calendar
+
 logger = logging.getLogger(__name__)
 
 class MarketType(str, Enum):
@@ -58,6 +59,12 @@ class MarketSwitcher:
     def __init__(self):
         self.current_market = MarketType.AUTO
         
+        # 交易所行事曆 (交易日、假日、提前收盤)
+        self.calendars = {
+            MarketType.US: get_trading_calendar("US"),
+            MarketType.TAIWAN: get_trading_calendar("TW"),
+        }
+        
         # 市場基本資訊
         self.markets = {
             MarketType.US: MarketInfo(
@@ -113,33 +120,35 @@ class MarketSwitcher:
     
     def _update_market_status(self):
         """更新市場狀態"""
-        # 更新美股狀態
-        us_status = self._get_us_market_status()
-        self.markets[MarketType.US].status = us_status
-        
-        # 更新台股狀態
-        tw_status = self._get_taiwan_market_status()
-        self.markets[MarketType.TAIWAN].status = tw_status
+        for market_type in (MarketType.US, MarketType.TAIWAN):
+            calendar = self.calendars[market_type]
+            market = self.markets[market_type]
+            market.status = (self._get_us_market_status() if market_type == MarketType.US
+                             else self._get_taiwan_market_status())
+            market.next_open = calendar.next_open()
+            market.next_close = calendar.next_close()
     
     def _get_us_market_status(self) -> MarketStatus:
         """獲取美股市場狀態"""
         try:
-            eastern = pytz.timezone('America/New_York')
-            now = datetime.now(eastern)
+            calendar = self.calendars[MarketType.US]
+            now = calendar.now()
             current_time = now.time()
             
-            # 檢查是否為工作日
-            if now.weekday() >= 5:  # 週末
+            # 週末與交易所假日
+            if calendar.is_holiday(now):
+                return MarketStatus.HOLIDAY
+            if not calendar.is_session(now):
                 return MarketStatus.CLOSED
             
-            # 常規交易時間 9:30-16:00
-            if time(9, 30) <= current_time <= time(16, 0):
+            # 常規交易時間 9:30-16:00 (提前收盤日為 13:00)
+            if calendar.is_open(now):
                 return MarketStatus.OPEN
             # 盤前交易 4:00-9:30
             elif time(4, 0) <= current_time < time(9, 30):
                 return MarketStatus.PRE_MARKET
-            # 盤後交易 16:00-20:00
-            elif time(16, 0) < current_time <= time(20, 0):
+            # 盤後交易 收盤-20:00
+            elif calendar.session_close(now) < now and current_time <= time(20, 0):
                 return MarketStatus.AFTER_HOURS
             else:
                 return MarketStatus.CLOSED
@@ -151,16 +160,15 @@ class MarketSwitcher:
     def _get_taiwan_market_status(self) -> MarketStatus:
         """獲取台股市場狀態"""
         try:
-            taipei = pytz.timezone('Asia/Taipei')
-            now = datetime.now(taipei)
-            current_time = now.time()
+            calendar = self.calendars[MarketType.TAIWAN]
+            now = calendar.now()
             
-            # 檢查是否為工作日
-            if now.weekday() >= 5:  # 週末
-                return MarketStatus.CLOSED
+            # 週末與交易所假日
+            if calendar.is_holiday(now):
+                return MarketStatus.HOLIDAY
             
             # 常規交易時間 9:00-13:30
-            if time(9, 0) <= current_time <= time(13, 30):
+            if calendar.is_open(now):
                 return MarketStatus.OPEN
             else:
                 return MarketStatus.CLOSED
@@ -216,27 +224,14 @@ class MarketSwitcher:
     
     def _get_next_open_market(self) -> MarketType:
         """獲取下一個開市的市場"""
-        utc_now = datetime.now(pytz.UTC)
+        us_open = self.calendars[MarketType.US].next_open()
+        tw_open = self.calendars[MarketType.TAIWAN].next_open()
         
-        # 計算到各市場開市的時間
-        eastern = pytz.timezone('America/New_York')
-        taipei = pytz.timezone('Asia/Taipei')
-        
-        # 美股開市時間 (9:30 AM ET)
-        us_open = utc_now.astimezone(eastern).replace(hour=9, minute=30, second=0, microsecond=0)
-        if us_open <= utc_now.astimezone(eastern):
-            us_open += pytz.timedelta(days=1)
-        
-        # 台股開市時間 (9:00 AM CST)
-        tw_open = utc_now.astimezone(taipei).replace(hour=9, minute=0, second=0, microsecond=0)
-        if tw_open <= utc_now.astimezone(taipei):
-            tw_open += pytz.timedelta(days=1)
-        
-        # 轉換為UTC進行比較
-        us_open_utc = us_open.astimezone(pytz.UTC)
-        tw_open_utc = tw_open.astimezone(pytz.UTC)
-        
-        return MarketType.US if us_open_utc < tw_open_utc else MarketType.TAIWAN
+        if us_open is None:
+            return MarketType.TAIWAN
+        if tw_open is None:
+            return MarketType.US
+        return MarketType.US if us_open < tw_open else MarketType.TAIWAN
     
     def _get_market_config(self, market_type: MarketType) -> Dict[str, Any]:
         """獲取市場配置"""
@@ -254,7 +249,9 @@ class MarketSwitcher:
             "pre_market": market_info.pre_market_hours,
             "after_hours": market_info.after_hours,
             "status": market_info.status.value,
-            "is_open": market_info.status == MarketStatus.OPEN
+            "is_open": market_info.status == MarketStatus.OPEN,
+            "next_open": market_info.next_open.isoformat() if market_info.next_open else None,
+            "next_close": market_info.next_close.isoformat() if market_info.next_close else None
         }
     
     def _get_default_symbols(self, market_type: MarketType) -> List[Dict[str, Any]]:
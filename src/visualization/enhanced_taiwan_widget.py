@@ -10,6 +10,8 @@ import json
 import logging
 from datetime import datetime, timedelta
 
+from src.data_fetcher.symbol_master import get_symbol_master, split_symbol
+
 logger = logging.getLogger(__name__)
 
 class EnhancedTaiwanWidget:
@@ -72,17 +74,14 @@ class EnhancedTaiwanWidget:
         Returns:
             (code, exchange, full_symbol) 例如: ("2330", "TWSE", "2330.TW")
         """
-        symbol = symbol.upper().strip()
-        
         # 移除各種可能的後綴
-        if symbol.endswith('.TW'):
-            code = symbol[:-3]
-            exchange = "TWSE"
-        elif symbol.endswith('.TWO'):
-            code = symbol[:-4]
-            exchange = "TPEx"
-        else:
-            code = symbol
+        code, exchange = split_symbol(symbol)
+        
+        # 全市場代號表有收錄時以上市櫃清單為準
+        listed_exchange = get_symbol_master().exchange_of(f"{code}.TW")
+        if listed_exchange in ("TWSE", "TPEx"):
+            exchange = listed_exchange
+        elif exchange is None:
             # 根據股票清單判斷交易所
             if code in self.taiwan_stocks:
                 exchange = self.taiwan_stocks[code]["exchange"]
@@ -139,10 +138,11 @@ class EnhancedTaiwanWidget:
             })
             return stock_info
         else:
-            # 未知股票的預設資訊
+            # 未收錄於對照表的股票：名稱取自全市場代號表
+            instrument = get_symbol_master().get(full_symbol)
             return {
                 "code": code,
-                "name": f"台股 {code}",
+                "name": instrument.name if instrument else f"台股 {code}",
                 "industry": "未分類",
                 "exchange": exchange,
                 "market_cap": "unknown",
@@ -17,6 +17,10 @@ import pandas as pd
 # Import your existing data fetchers
 from ..data_fetcher.us_stocks import USStockDataFetcher
 from ..data_fetcher.tw_stocks import TWStockDataFetcher
+from ..data_fetcher.bar_store import get_bar_store, start_to_period
+from ..data_fetcher.intraday_bars import get_intraday_bars
+from ..data_fetcher.resampler import SUPPORTED_RESOLUTIONS, is_intraday_resolution, normalize_resolution, resample_ohlcv
+from ..data_fetcher.symbol_master import get_symbol_master
 
 logger = logging.getLogger(__name__)
 
@@ -59,8 +63,11 @@ class TradingViewDatafeed:
     """
     
     def __init__(self):
-        self.us_fetcher = USStockDataFetcher()
-        self.tw_fetcher = TWStockDataFetcher()
+        self.us_fetcher = USStockDataFetcher(bar_store=get_bar_store())
+        self.tw_fetcher = TWStockDataFetcher(bar_store=get_bar_store())
+        
+        # 全市場代號表 (TWSE/TPEx/美股上市清單)
+        self.symbol_master = get_symbol_master()
         
         # 符號對照表
         self.symbol_mapping = {
@@ -119,7 +126,7 @@ class TradingViewDatafeed:
                 {"name": "ETF", "value": "etf"},
                 {"name": "指數", "value": "index"}
             ],
-            "supported_resolutions": ["1", "5", "15", "30", "60", "1D", "1W", "1M"],
+            "supported_resolutions": list(SUPPORTED_RESOLUTIONS),
             "supports_resolution": True
         }
     
@@ -131,6 +138,12 @@ class TradingViewDatafeed:
         """標準化符號格式"""
         symbol = symbol.upper().strip()
         
+        # 台股代碼依上市櫃清單加上 .TW / .TWO
+        if symbol[:1].isdigit() and not self.is_taiwan_symbol(symbol):
+            instrument = self.symbol_master.get(symbol)
+            if instrument is not None and instrument.market == "TW":
+                return instrument.symbol
+        
         # 台股數字代碼自動加上 .TW
         if symbol.isdigit() and len(symbol) == 4:
             return f"{symbol}.TW"
@@ -142,6 +155,20 @@ class TradingViewDatafeed:
         符號搜尋功能
         對應 TradingView 的 searchSymbols
         """
+        if self.symbol_master.is_loaded():
+            return [
+                {
+                    "symbol": instrument.symbol,
+                    "full_name": f"{instrument.exchange}:{instrument.symbol}",
+                    "description": instrument.name,
+                    "exchange": instrument.exchange,
+                    "ticker": instrument.symbol,
+                    "type": instrument.type
+                }
+                for instrument in self.symbol_master.search(query, limit, exchange=exchange or None)
+            ]
+        
+        # 代號表尚未載入時搜尋內建對照表
         query = query.upper().strip()
         results = []
         
@@ -176,10 +203,12 @@ class TradingViewDatafeed:
         """
         symbol = self.normalize_symbol(symbol)
         
-        if symbol not in self.symbol_mapping:
-            raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
-        
-        info = self.symbol_mapping[symbol]
+        info = self.symbol_mapping.get(symbol)
+        if info is None:
+            instrument = self.symbol_master.get(symbol)
+            if instrument is None:
+                raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+            info = {"name": instrument.name, "exchange": instrument.exchange, "type": instrument.type}
         
         # 根據市場設定時區和交易時段
         if self.is_taiwan_symbol(symbol):
@@ -199,9 +228,9 @@ class TradingViewDatafeed:
             ticker=symbol,
             minmov=1,
             pricescale=100,
-            has_intraday=False,  # 目前只支援日K
+            has_intraday=True,  # 分K由 1 分K 基礎序列聚合
             has_weekly_and_monthly=True,
-            supported_resolutions=["1D", "1W", "1M"],
+            supported_resolutions=list(SUPPORTED_RESOLUTIONS),
             volume_precision=0,
             data_status="delayed_streaming"  # 延遲數據
         )
@@ -217,19 +246,35 @@ class TradingViewDatafeed:
         """
         獲取 K線數據
         對應 TradingView 的 getBars
+
+        分K（1/5/15/30/60）由已保存的 1 分K 基礎序列聚合；
+        日K 直接取日線，週K/月K 由日線聚合
         """
         try:
             symbol = self.normalize_symbol(symbol)
+            resolution = normalize_resolution(resolution)
             
             # 轉換時間戳
             start_date = datetime.fromtimestamp(from_timestamp)
             end_date = datetime.fromtimestamp(to_timestamp)
+            market = "TW" if self.is_taiwan_symbol(symbol) else "US"
             
-            # 根據符號類型選擇數據源
-            if self.is_taiwan_symbol(symbol):
-                df = self.tw_fetcher.fetch_historical_data(symbol, start_date, end_date)
+            if is_intraday_resolution(resolution):
+                df = await asyncio.to_thread(
+                    get_intraday_bars(market).get_bars,
+                    symbol, resolution, pd.Timestamp(from_timestamp, unit="s", tz="UTC"),
+                    pd.Timestamp(to_timestamp, unit="s", tz="UTC")
+                )
             else:
-                df = self.us_fetcher.fetch_historical_data(symbol, start_date, end_date)
+                # 根據符號類型選擇數據源
+                if market == "TW":
+                    df = await asyncio.to_thread(self.tw_fetcher.fetch_historical_data, symbol, start_date, end_date)
+                else:
+                    df = await asyncio.to_thread(
+                        self.us_fetcher.fetch_historical_data, symbol, start_to_period(start_date), "1d"
+                    )
+                if not df.empty and resolution != "1D":
+                    df = resample_ohlcv(df, resolution, market)
             
             if df.empty:
                 return {
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+共用測試夾具
+提供以合成隨機漫步產生日K數據的工廠
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.synthetic_market import random_walk_ohlcv
+
+
+@pytest.fixture
+def make_bars():
+    """回傳自 2023-01-02 起逐營業日的 OHLCV 工廠：make_bars(periods, seed, start_price=100.0)"""
+    def build(periods: int, seed: int, start_price: float = 100.0) -> pd.DataFrame:
+        index = pd.date_range("2023-01-02", periods=periods, freq="B")
+        return random_walk_ohlcv(index, start_price=start_price, seed=seed)
+    return build
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Alpha Vantage 請求額度與回應快取測試
+測試共用令牌桶、非同步等待與依函數參數的 TTL 快取
+"""
+
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import patch, MagicMock
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.ttl_cache import TTLCache
+from src.data_fetcher.rate_limiter import InMemoryTokenBucketStore, SharedTokenBucket
+from src.data import stock_functions
+from src.data.stock_functions import StockDataFetcher
+
+QUOTE_PAYLOAD = {"Global Quote": {"01. symbol": "AAPL", "05. price": "190.5", "06. volume": "1000"}}
+
+
+def mock_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+class TestSharedTokenBucket:
+    """共用令牌桶測試"""
+
+    def test_buckets_share_store(self):
+        """測試同名令牌桶共用同一份額度"""
+        store = InMemoryTokenBucketStore()
+        worker_a = SharedTokenBucket("alpha_vantage", rate=1.0, capacity=2, store=store)
+        worker_b = SharedTokenBucket("alpha_vantage", rate=1.0, capacity=2, store=store)
+
+        assert store.reserve("alpha_vantage", 1, 1.0, 2) == 0
+        assert store.reserve("alpha_vantage", 1, 1.0, 2) == 0
+        # 額度用盡後，另一個 worker 需等待約一秒
+        wait = worker_b.store.reserve(worker_b.name, 1, worker_b.rate, worker_b.capacity)
+        assert 0.9 < wait <= 1.0
+        assert worker_a.store is worker_b.store
+        print("✅ 共用額度測試通過")
+
+    def test_async_acquire_does_not_block_loop(self):
+        """測試等待額度時事件迴圈仍可執行其他工作"""
+        bucket = SharedTokenBucket("test", rate=20.0, capacity=1, store=InMemoryTokenBucketStore())
+
+        async def run():
+            ticks = 0
+
+            async def heartbeat():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            beat = asyncio.create_task(heartbeat())
+            start = time.perf_counter()
+            await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+            elapsed = time.perf_counter() - start
+            beat.cancel()
+            return ticks, elapsed
+
+        ticks, elapsed = asyncio.run(run())
+        assert elapsed >= 0.14  # 第一個立即取得，其餘三個各等 0.05 秒
+        assert ticks >= 10
+        print("✅ 非同步等待測試通過")
+
+
+class TestResponseCache:
+    """Alpha Vantage 回應快取測試"""
+
+    def make_fetcher(self, transport=None):
+        bucket = SharedTokenBucket("av-test", rate=100.0, capacity=5, store=InMemoryTokenBucketStore())
+        return StockDataFetcher(api_key="test", rate_limiter=bucket, cache=TTLCache(), transport=transport)
+
+    def test_repeated_quote_served_locally(self):
+        """測試同一代號的重複報價請求由快取回應"""
+        transport = MagicMock()
+        transport.get.return_value = mock_response(QUOTE_PAYLOAD)
+        fetcher = self.make_fetcher(transport)
+
+        with patch.object(stock_functions, "_stock_data_fetcher", fetcher):
+            first = stock_functions.get_stock_quote("AAPL")
+            second = asyncio.run(stock_functions.aget_stock_quote("AAPL"))
+            stock_functions.get_stock_quote("MSFT")
+
+        assert transport.get.call_count == 2  # AAPL 一次、MSFT 一次
+        assert first == second and first["price"] == 190.5
+        assert "apikey" not in dict(fetcher._cache_key({"function": "GLOBAL_QUOTE", "apikey": "x"}))
+        print("✅ 回應快取測試通過")
+
+    def test_errors_are_not_cached(self):
+        """測試 API 限制錯誤不會被快取"""
+        transport = MagicMock()
+        transport.get.side_effect = [mock_response({"Note": "limit"}), mock_response(QUOTE_PAYLOAD)]
+        fetcher = self.make_fetcher(transport)
+
+        with patch.object(stock_functions, "_stock_data_fetcher", fetcher):
+            failed = stock_functions.get_stock_quote("AAPL")
+            recovered = stock_functions.get_stock_quote("AAPL")
+
+        assert "error" in failed
+        assert recovered["price"] == 190.5
+        assert transport.get.call_count == 2
+        print("✅ 錯誤不快取測試通過")
+
+    def test_information_responses_are_not_cached(self):
+        """測試節流或需付費方案的 Information 回應視為錯誤且不快取"""
+        transport = MagicMock()
+        transport.get.side_effect = [
+            mock_response({"Information": "Thank you for using Alpha Vantage! Please consider spreading out your free API requests more sparingly."}),
+            mock_response({"Information": "This is a premium endpoint."}),
+            mock_response(QUOTE_PAYLOAD),
+        ]
+        fetcher = self.make_fetcher(transport)
+
+        with patch.object(stock_functions, "_stock_data_fetcher", fetcher):
+            throttled = stock_functions.get_stock_quote("AAPL")
+            premium = asyncio.run(stock_functions.aget_stock_quote("AAPL"))
+            recovered = stock_functions.get_stock_quote("AAPL")
+
+        assert "error" in throttled and "error" in premium
+        assert recovered["price"] == 190.5
+        assert transport.get.call_count == 3
+        print("✅ Information 回應不快取測試通過")
+
+    def test_ttl_expiry(self):
+        """測試快取到期後失效"""
+        cache = TTLCache(default_ttl=0.01)
+        cache.set("k", 1)
+        assert cache.get("k") == 1
+        time.sleep(0.02)
+        assert cache.get("k") is None
+        print("✅ TTL 到期測試通過")
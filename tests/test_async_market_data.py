@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+非同步行情存取層與請求合併測試
+測試阻塞抓取不會卡住事件迴圈、依市場分派，以及相同請求只執行一次
+"""
+
+import sys
+import os
+import time
+import asyncio
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.single_flight import SingleFlight
+from src.data_fetcher.async_market_data import AsyncMarketData, is_taiwan_symbol
+from src.database.market_data_repository import MarketDataRepository
+
+
+class SlowFetcher:
+    """模擬阻塞的同步抓取器"""
+
+    def __init__(self, market: str, delay: float = 0.2):
+        self.market = market
+        self.delay = delay
+        self.calls = []
+
+    def fetch_historical_data(self, symbol, **kwargs):
+        time.sleep(self.delay)
+        self.calls.append((symbol, kwargs))
+        return pd.DataFrame({"close": [1.0]})
+
+    def get_quotes(self, symbols):
+        time.sleep(self.delay)
+        self.calls.append(("quotes", list(symbols)))
+        return {symbol: {"symbol": symbol, "market": self.market} for symbol in symbols}
+
+
+class TestAsyncMarketData:
+    """非同步行情存取層測試"""
+
+    def test_dispatch_by_market(self):
+        """測試依代號後綴分派至對應抓取器"""
+        us, tw = SlowFetcher("US", 0), SlowFetcher("TW", 0)
+        market_data = AsyncMarketData(us, tw, max_workers=2)
+
+        async def run():
+            await market_data.get_bars("AAPL", period="6mo")
+            await market_data.get_bars("6415.TWO", period="1mo")
+            return await market_data.get_quote("2330.TW")
+
+        quote = asyncio.run(run())
+        market_data.shutdown()
+
+        assert us.calls == [("AAPL", {"period": "6mo", "interval": "1d"})]
+        assert tw.calls[0][0] == "6415.TWO"
+        assert tw.calls[0][1]["start_date"] is not None
+        assert quote["market"] == "TW"
+        assert is_taiwan_symbol("2330.tw") and not is_taiwan_symbol("TSLA")
+        print("✅ 市場分派測試通過")
+
+    def test_event_loop_not_blocked(self):
+        """測試慢速抓取期間事件迴圈仍能回應"""
+        market_data = AsyncMarketData(SlowFetcher("US"), SlowFetcher("TW"), max_workers=4)
+
+        async def run():
+            ticks = 0
+
+            async def heartbeat():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            beat = asyncio.create_task(heartbeat())
+            start = time.perf_counter()
+            await asyncio.gather(*(market_data.get_bars(s) for s in ["AAPL", "MSFT", "NVDA", "AMZN"]))
+            elapsed = time.perf_counter() - start
+            beat.cancel()
+            return ticks, elapsed
+
+        ticks, elapsed = asyncio.run(run())
+        market_data.shutdown()
+
+        assert ticks >= 5
+        assert elapsed < 0.6  # 四個 0.2 秒的請求並行執行
+        print("✅ 非阻塞測試通過")
+
+
+class TestDatabaseBars:
+    """資料庫 K線寫入與回讀測試"""
+
+    def test_write_through_and_fallback(self, tmp_path):
+        """測試日K寫入資料庫，上游無資料時改由資料庫回讀，分鐘K不經過資料庫"""
+        index = pd.date_range(pd.Timestamp.now().normalize() - pd.Timedelta(days=10), periods=5,
+                              freq="B", tz="America/New_York", name="date")
+        close = 100 + np.arange(5, dtype=float)
+        bars = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                             "volume": np.full(5, 1000), "symbol": "AAPL"}, index=index)
+        responses = [bars, pd.DataFrame(), pd.DataFrame()]
+
+        class ScriptedFetcher(SlowFetcher):
+            def fetch_historical_data(self, symbol, **kwargs):
+                self.calls.append((symbol, kwargs))
+                return responses.pop(0)
+
+        repository = MarketDataRepository(create_engine(f"sqlite:///{tmp_path / 'market.db'}"))
+        repository.ensure_schema()
+        us = ScriptedFetcher("US", 0)
+        market_data = AsyncMarketData(us, SlowFetcher("TW", 0), repository=repository)
+
+        async def run():
+            fetched = await market_data.get_bars("AAPL", period="1mo")
+            fallback = await market_data.get_bars("AAPL", period="1mo")
+            minutes = await market_data.get_bars("AAPL", period="1d", interval="5m")
+            return fetched, fallback, minutes
+
+        fetched, fallback, minutes = asyncio.run(run())
+        market_data.shutdown()
+
+        assert len(us.calls) == 3
+        assert fetched["close"].tolist() == close.tolist()
+        assert fallback["close"].tolist() == close.tolist()
+        assert fallback.index.equals(index)
+        assert minutes.empty
+        print("✅ 資料庫寫入與回讀測試通過")
+
+
+class TestSingleFlight:
+    """請求合併測試"""
+
+    def test_concurrent_calls_share_one_fetch(self):
+        """測試同時的相同請求只執行一次"""
+        us = SlowFetcher("US", 0.1)
+        market_data = AsyncMarketData(us, SlowFetcher("TW", 0), max_workers=4)
+
+        async def run():
+            return await asyncio.gather(
+                *(market_data.get_bars("AAPL", period="3mo") for _ in range(5)),
+                market_data.get_bars("AAPL", period="1y"),
+            )
+
+        results = asyncio.run(run())
+        market_data.shutdown()
+
+        assert len(us.calls) == 2  # 3mo 一次、1y 一次
+        assert market_data.flights.stats["shared"] == 4
+        assert market_data.flights.in_flight() == 0
+        # 每個呼叫者拿到各自的物件，新增欄位互不影響
+        results[0]["rsi"] = 50.0
+        assert "rsi" not in results[1].columns
+        print("✅ 請求合併測試通過")
+
+    def test_error_is_shared_and_forgotten(self):
+        """測試錯誤會傳給所有等待者，且之後重新執行"""
+        flights = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        async def run():
+            outcomes = await asyncio.gather(*(flights.do("k", failing) for _ in range(3)), return_exceptions=True)
+            again = await asyncio.gather(flights.do("k", failing), return_exceptions=True)
+            return outcomes, again
+
+        outcomes, again = asyncio.run(run())
+        assert all(isinstance(o, ValueError) for o in outcomes)
+        assert isinstance(again[0], ValueError)
+        assert len(attempts) == 2
+        print("✅ 錯誤共享測試通過")
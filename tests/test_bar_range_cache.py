@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+K線區段快取測試
+測試子區間切片、只抓取缺口、相鄰區段合併、最新K線過期與位元組上限淘汰
+"""
+
+import sys
+import os
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.bar_range_cache import BarRangeCache
+from src.data_fetcher.tw_market_snapshot import TWMarketSnapshotCache
+from src.data_fetcher.twse_tpex_datafeed import TWStockDatafeed
+
+DAY = 86400
+
+
+class DailyBars:
+    """每天一根K線的假資料來源，記錄每次抓取的區間"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, start, end):
+        self.calls.append((start, end))
+        first = -(-start // DAY) * DAY
+        return [SimpleNamespace(time=t, close=t / DAY) for t in range(first, end + 1, DAY)]
+
+
+class TestBarRangeCache:
+    """區段快取測試"""
+
+    def test_sub_range_and_pan(self):
+        """測試子區間不再抓取，平移一天只抓取新的一天"""
+        cache = BarRangeCache()
+        source = DailyBars()
+
+        async def run():
+            full = await cache.get_or_fetch("2330", 0, 30 * DAY, source)
+            inner = await cache.get_or_fetch("2330", 5 * DAY, 10 * DAY, source)
+            panned = await cache.get_or_fetch("2330", DAY, 31 * DAY, source)
+            return full, inner, panned
+
+        full, inner, panned = asyncio.run(run())
+
+        assert len(full) == 31
+        assert [bar.time for bar in inner] == [d * DAY for d in range(5, 11)]
+        assert source.calls == [(0, 30 * DAY), (30 * DAY + 1, 31 * DAY)]
+        assert [bar.time for bar in panned] == [d * DAY for d in range(1, 32)]
+        assert cache.get_stats()["segments"] == 1
+        print("✅ 子區間與平移測試通過")
+
+    def test_gap_between_segments_is_merged(self):
+        """測試只抓取兩個區段之間的缺口並合併為單一區段"""
+        cache = BarRangeCache()
+        source = DailyBars()
+
+        async def run():
+            await cache.get_or_fetch("2330", 0, 9 * DAY, source)
+            await cache.get_or_fetch("2330", 20 * DAY, 29 * DAY, source)
+            return await cache.get_or_fetch("2330", 0, 29 * DAY, source)
+
+        bars = asyncio.run(run())
+
+        assert source.calls[-1] == (9 * DAY + 1, 20 * DAY - 1)
+        assert [bar.time for bar in bars] == [d * DAY for d in range(30)]
+        assert cache.get_stats()["segments"] == 1
+        assert cache.stats["partial_hits"] == 1
+        print("✅ 缺口合併測試通過")
+
+    def test_live_edge_expires(self):
+        """測試超過 TTL 後只重新抓取最新一天"""
+        cache = BarRangeCache(ttl=300, live_window=DAY)
+        now = time.time()
+        fetched_at = now - 600
+        cache.put("2330", 0, int(now), [SimpleNamespace(time=0)], fetched_at=fetched_at)
+
+        assert cache.gaps("2330", 0, int(now), now=fetched_at + 1) == []
+        assert cache.gaps("2330", 0, int(now), now=now) == [(int(fetched_at - DAY) + 1, int(now))]
+        print("✅ 最新K線過期測試通過")
+
+    def test_lru_byte_budget(self):
+        """測試超過位元組上限時淘汰最久未使用的股票"""
+        bars = [SimpleNamespace(time=d * DAY, close=1.0) for d in range(100)]
+        cache = BarRangeCache(max_bytes=1)  # 只能保留最近寫入的一檔
+        cache.put("A", 0, 99 * DAY, bars)
+        cache.put("B", 0, 99 * DAY, bars)
+
+        assert cache.get("A", 0, 99 * DAY) == []
+        assert len(cache.get("B", 0, 99 * DAY)) == 100
+        assert cache.stats["evictions"] == 1
+        assert 0 < cache.get_stats()["bytes"]
+        print("✅ 位元組上限淘汰測試通過")
+
+
+class CountingSnapshots(TWMarketSnapshotCache):
+    """記錄每日快照查詢次數的快照快取"""
+
+    def __init__(self):
+        super().__init__()
+        self.days = []
+
+    async def aget_bar(self, exchange, code, day, session, rate_limiter=None, raise_on_error=False):
+        self.days.append(day.date())
+        return {"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1}
+
+
+class TestDatafeedCache:
+    """Datafeed 區段快取整合測試"""
+
+    def test_scrolling_fetches_only_new_days(self):
+        """測試圖表往前捲動一週只抓取新增的交易日"""
+        datafeed = TWStockDatafeed()
+        datafeed.snapshots = CountingSnapshots()
+        end = datetime(2024, 5, 31, 13, 30)
+        start = end - timedelta(days=30)
+
+        async def run():
+            try:
+                first = await datafeed.get_bars("2330.TW", int(start.timestamp()), int(end.timestamp()))
+                days_after_first = len(datafeed.snapshots.days)
+                older = start - timedelta(days=7)
+                second = await datafeed.get_bars("2330.TW", int(older.timestamp()), int(end.timestamp()))
+                return first, second, days_after_first
+            finally:
+                await datafeed.close()
+
+        first, second, days_after_first = asyncio.run(run())
+        new_days = datafeed.snapshots.days[days_after_first:]
+
+        assert len(first) == days_after_first
+        assert new_days and max(new_days) < datetime(2024, 5, 1).date()
+        assert len(second) == len(first) + len(new_days)
+        print("✅ Datafeed 捲動測試通過")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+本地K線儲存測試
+測試 Parquet 分區儲存、增量追加與抓取器整合
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.bar_store import BarStore, period_to_start, PYARROW_AVAILABLE
+from src.data_fetcher.us_stocks import USStockDataFetcher
+
+pytestmark = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+
+def make_bars(start: str, periods: int, tz: str = "America/New_York") -> pd.DataFrame:
+    """建立測試用的日K數據"""
+    index = pd.date_range(start, periods=periods, freq="B", tz=tz, name="date")
+    close = 100 + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        "open": close - 0.5,
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": np.full(periods, 1000),
+    }, index=index)
+
+
+class TestBarStore:
+    """K線儲存基本功能測試"""
+
+    def test_write_and_read_across_years(self, tmp_path):
+        """測試跨年度分區寫入與讀取"""
+        store = BarStore(tmp_path)
+        bars = make_bars("2023-12-20", 20)
+        store.write("US", "AAPL", bars, coverage_start=bars.index[0])
+
+        assert (tmp_path / "US" / "AAPL" / "1d" / "2023.parquet").exists()
+        assert (tmp_path / "US" / "AAPL" / "1d" / "2024.parquet").exists()
+
+        result = store.read("US", "AAPL")
+        assert len(result) == 20
+        assert result["close"].tolist() == bars["close"].tolist()
+
+        subset = store.read("US", "AAPL", start=datetime(2024, 1, 1))
+        assert subset.index.min().year == 2024
+        print("✅ 跨年度分區測試通過")
+
+    def test_upsert_keeps_latest_bar(self, tmp_path):
+        """測試重複K線以最新數據覆蓋"""
+        store = BarStore(tmp_path)
+        bars = make_bars("2024-03-01", 5)
+        store.write("US", "MSFT", bars)
+
+        update = bars.iloc[-1:].copy()
+        update["close"] = 999.0
+        store.write("US", "MSFT", pd.concat([update, make_bars("2024-03-08", 2).iloc[1:]]))
+
+        result = store.read("US", "MSFT")
+        assert len(result) == 6
+        assert result.loc[bars.index[-1], "close"] == 999.0
+        assert store.last_timestamp("US", "MSFT") == result.index.max()
+        print("✅ 增量覆蓋測試通過")
+
+    def test_coverage(self, tmp_path):
+        """測試下載範圍判斷"""
+        store = BarStore(tmp_path)
+        assert not store.covers("TW", "2330", "1d", datetime(2024, 1, 1))
+
+        store.write("TW", "2330", make_bars("2024-01-02", 10, tz="Asia/Taipei"),
+                    coverage_start=datetime(2024, 1, 1))
+        assert store.covers("TW", "2330", "1d", datetime(2024, 1, 5))
+        assert not store.covers("TW", "2330", "1d", datetime(2023, 6, 1))
+        assert not store.covers("TW", "2330", "1d", None)
+        print("✅ 覆蓋範圍測試通過")
+
+    def test_naive_index_is_localized(self, tmp_path):
+        """測試無時區K線以交易所時區儲存"""
+        store = BarStore(tmp_path)
+        bars = make_bars("2024-05-02", 3, tz=None)
+        store.write("TW", "5483", bars)
+
+        result = store.read("TW", "5483")
+        assert str(result.index.tz) == "Asia/Taipei"
+        print("✅ 時區標準化測試通過")
+
+    def test_clear_index_symbol(self, tmp_path):
+        """測試清除含特殊字元的指數代碼"""
+        store = BarStore(tmp_path)
+        store.write("US", "^GSPC", make_bars("2024-05-01", 3))
+        store.write("US", "AAPL", make_bars("2024-05-01", 3))
+        assert len(store.read("US", "^GSPC")) == 3
+
+        store.clear("US", "^GSPC")
+        assert store.read("US", "^GSPC").empty
+        assert store.last_timestamp("US", "^GSPC") is None
+        assert len(store.read("US", "AAPL")) == 3
+        print("✅ 指數代碼清除測試通過")
+
+    def test_period_to_start(self):
+        """測試期間字串轉換"""
+        now = datetime(2024, 6, 15, 10, 30)
+        assert period_to_start("max", now) is None
+        assert period_to_start("ytd", now) == datetime(2024, 1, 1)
+        assert period_to_start("1mo", now) == datetime(2024, 5, 16)
+        print("✅ 期間轉換測試通過")
+
+
+class TestFetcherWithStore:
+    """抓取器與K線儲存整合測試"""
+
+    def test_second_fetch_is_served_locally(self, tmp_path):
+        """測試第二次請求直接由本地儲存回應"""
+        store = BarStore(tmp_path, refresh_seconds=300)
+        fetcher = USStockDataFetcher(bar_store=store)
+        bars = make_bars((datetime.now() - timedelta(days=20)).strftime("%Y-%m-%d"), 10)
+        bars["symbol"] = "AAPL"
+
+        with patch.object(fetcher, "_download_history", return_value=bars) as mock_download:
+            first = fetcher.fetch_historical_data("AAPL", period="1mo")
+            second = fetcher.fetch_historical_data("AAPL", period="1mo")
+
+        assert mock_download.call_count == 1
+        assert len(first) == len(second) == 10
+        assert (second["symbol"] == "AAPL").all()
+        print("✅ 本地儲存命中測試通過")
+
+    def test_stale_store_downloads_only_tail(self, tmp_path):
+        """測試過期時只下載最後一段K線"""
+        store = BarStore(tmp_path, refresh_seconds=0)
+        fetcher = USStockDataFetcher(bar_store=store)
+        bars = make_bars((datetime.now() - timedelta(days=20)).strftime("%Y-%m-%d"), 10)
+        store.write("US", "AAPL", bars, coverage_start=datetime.now() - timedelta(days=40))
+        # 上次更新於一週前，期間必定有交易日
+        meta = store.get_metadata("US", "AAPL")
+        meta["updated_at"] -= 7 * 24 * 3600
+        store._write_metadata("US", "AAPL", "1d", meta)
+
+        tail = pd.concat([bars.iloc[-2:], make_bars(bars.index[-1].strftime("%Y-%m-%d"), 3).iloc[1:]])
+        with patch.object(fetcher, "_download_history", return_value=tail) as mock_download:
+            result = fetcher.fetch_historical_data("AAPL", period="1mo")
+
+        assert mock_download.call_args.kwargs["start"] == bars.index[-2].date()
+        assert len(result) == 12
+        print("✅ 增量下載測試通過")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+批次報價測試
+測試 TWSE MIS 批次報價解析、美股日K報價與欄式輸出
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.tw_stocks import TWStockDataFetcher
+from src.data_fetcher.symbol_master import Instrument, SymbolMaster
+from src.data_fetcher.us_stocks import USStockDataFetcher
+from src.data_fetcher.async_market_data import AsyncMarketData, quotes_to_columns
+
+
+class TestTaiwanBatchQuotes:
+    """台股批次報價測試"""
+
+    def test_mis_batch_request(self):
+        """測試多檔台股以單一 MIS 請求取得報價，已知代號只查詢所屬交易所"""
+        master = SymbolMaster(instruments=[
+            Instrument("2330", "台積電", "TWSE", "TW"),
+            Instrument("6415", "矽力*-KY", "TPEx", "TW"),
+        ])
+        transport = MagicMock()
+        fetcher = TWStockDataFetcher(symbol_master=master, transport=transport)
+        payload = {"msgArray": [
+            {"c": "2330", "ex": "tse", "z": "600.00", "y": "590.00", "v": "12,345"},
+            {"c": "6415", "ex": "otc", "z": "-", "b": "410.00_409.50_", "y": "400.00", "v": "321"},
+        ]}
+        response = MagicMock(status_code=200)
+        response.json.return_value = payload
+        transport.get.return_value = response
+
+        quotes = fetcher.get_quotes(["2330.TW", "6415", "9999"])
+
+        assert transport.get.call_count == 1
+        channels = transport.get.call_args.kwargs["params"]["ex_ch"].split("|")
+        assert channels == ["tse_2330.tw", "otc_6415.tw", "tse_9999.tw", "otc_9999.tw"]
+        assert quotes["2330.TW"]["price"] == 600.0
+        assert quotes["2330.TW"]["volume"] == 12345
+        assert quotes["6415"]["price"] == 410.0  # 無最新成交時使用最佳買價
+        assert round(quotes["6415"]["change_percent"], 2) == 2.5
+        assert "9999" not in quotes
+        print("✅ MIS 批次報價測試通過")
+
+    def test_every_symbol_form_gets_a_quote(self):
+        """測試同一代號以不同寫法請求時，只查詢一次且每種寫法都有報價"""
+        master = SymbolMaster(instruments=[Instrument("2330", "台積電", "TWSE", "TW")])
+        transport = MagicMock()
+        fetcher = TWStockDataFetcher(symbol_master=master, transport=transport)
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"msgArray": [
+            {"c": "2330", "ex": "tse", "z": "600.00", "y": "590.00", "v": "12,345"},
+        ]}
+        transport.get.return_value = response
+
+        quotes = fetcher.get_quotes(["2330", "2330.TW"])
+
+        assert transport.get.call_args.kwargs["params"]["ex_ch"] == "tse_2330.tw"
+        assert set(quotes) == {"2330", "2330.TW"}
+        assert quotes["2330"]["symbol"] == "2330"
+        assert quotes["2330.TW"]["symbol"] == "2330.TW"
+        assert quotes["2330"]["price"] == quotes["2330.TW"]["price"] == 600.0
+        print("✅ 多種代號寫法報價測試通過")
+
+
+class TestUSBatchQuotes:
+    """美股批次報價測試"""
+
+    def test_quote_from_daily_bars(self):
+        """測試由最近兩根日K計算報價"""
+        index = pd.date_range("2024-05-01", periods=3, freq="B", tz="America/New_York")
+        bars = pd.DataFrame({
+            "open": [99.0, 100.0, 101.0],
+            "close": [100.0, 102.0, 99.96],
+            "volume": [10, 20, 30],
+        }, index=index)
+
+        quote = USStockDataFetcher._quote_from_bars("AAPL", bars)
+
+        assert quote.price == 99.96
+        assert round(quote.change, 2) == -2.04
+        assert round(quote.change_percent, 2) == -2.0
+        assert quote.volume == 30
+        print("✅ 日K報價測試通過")
+
+    def test_company_info_is_cached(self):
+        """測試公司資料使用長效快取"""
+        fetcher = USStockDataFetcher()
+        ticker = MagicMock()
+        ticker.info = {"longName": "Apple Inc.", "sector": "Technology"}
+
+        with patch("src.data_fetcher.us_stocks.yf.Ticker", return_value=ticker) as mock_ticker:
+            first = fetcher.get_company_info("AAPL")
+            second = fetcher.get_company_info("AAPL")
+
+        assert mock_ticker.call_count == 1
+        assert first == second and first["company_name"] == "Apple Inc."
+        print("✅ 公司資料快取測試通過")
+
+
+class TestQuotePayload:
+    """報價輸出與快取測試"""
+
+    def test_columnar_payload_and_ttl(self):
+        """測試欄式輸出，以及短期內重複請求不再詢問上游"""
+        us, tw = MagicMock(), MagicMock()
+        us.get_quotes.return_value = {
+            "AAPL": {"symbol": "AAPL", "price": 190.0, "change": 1.0, "change_percent": 0.5,
+                     "volume": 100, "timestamp": datetime(2024, 5, 1, 10, 0)},
+        }
+        tw.get_quotes.return_value = {}
+        market_data = AsyncMarketData(us, tw, quote_ttl=60)
+
+        async def run():
+            first = await market_data.get_quotes(["AAPL", "2330.TW"])
+            second = await market_data.get_quotes(["AAPL"])
+            return first, second
+
+        first, second = asyncio.run(run())
+        market_data.shutdown()
+
+        assert us.get_quotes.call_count == 1
+        assert tw.get_quotes.call_args.args[0] == ["2330.TW"]
+        assert second == {"AAPL": first["AAPL"]}
+
+        payload = quotes_to_columns(["AAPL", "2330.TW"], first)
+        assert payload["symbols"] == ["AAPL"]
+        assert payload["price"] == [190.0]
+        assert payload["timestamp"] == ["2024-05-01T10:00:00"]
+        assert payload["missing"] == ["2330.TW"]
+        print("✅ 欄式報價測試通過")
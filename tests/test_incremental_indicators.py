@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+增量技術指標引擎測試
+測試逐根更新結果與批次計算一致、快照還原與未收盤 K棒預覽
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.incremental_indicators import IncrementalIndicators
+from src.analysis.technical_indicators import IndicatorAnalyzer
+
+
+def assert_frames_close(actual: pd.DataFrame, expected: pd.DataFrame):
+    for column in IncrementalIndicators.COLUMNS:
+        np.testing.assert_allclose(
+            actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+            rtol=1e-7, atol=1e-7, equal_nan=True, err_msg=column
+        )
+
+
+class TestIncrementalIndicators:
+    """增量指標引擎測試"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_batch_calculation(self, seed, make_bars):
+        """測試逐根更新的每個欄位與 calculate_all_indicators 一致 (含長平盤與缺值)"""
+        bars = make_bars(300, seed)
+        bars.iloc[40:45, bars.columns.get_loc("close")] = bars["close"].iloc[39]  # 短平盤
+        # 停牌：60 根 K 棒價格不變、無成交量，長於所有指標視窗
+        for column in ("open", "high", "low", "close"):
+            bars.iloc[100:160, bars.columns.get_loc(column)] = bars["close"].iloc[99]
+        bars.iloc[100:160, bars.columns.get_loc("volume")] = 0
+        bars.iloc[200, bars.columns.get_loc("close")] = np.nan
+        bars.iloc[230, bars.columns.get_loc("volume")] = np.nan
+
+        expected = IndicatorAnalyzer().calculate_all_indicators(bars)
+        actual = IncrementalIndicators().update_frame(bars)
+        assert_frames_close(actual, expected)
+        flat = slice(140, 160)
+        assert actual["rsi"].iloc[flat].isna().all() and actual["bb_position"].iloc[flat].isna().all()
+        print("✅ 增量與批次計算一致性測試通過")
+
+    def test_snapshot_restore_and_preview(self, make_bars):
+        """測試快照可 JSON 序列化、還原後續算結果一致，且預覽不改變狀態"""
+        import json
+
+        bars = make_bars(200, 5)
+        expected = IncrementalIndicators().update_frame(bars)
+
+        engine = IncrementalIndicators.from_history(bars.iloc[:120])
+        restored = IncrementalIndicators.restore(json.loads(json.dumps(engine.snapshot())))
+
+        next_bar = bars.iloc[120]
+        preview = restored.preview(next_bar)
+        assert restored.bars == 120
+        assert preview["sma_20"] == restored.preview(next_bar)["sma_20"]
+
+        tail = restored.update_frame(bars.iloc[120:])
+        assert_frames_close(tail, expected.iloc[120:])
+        np.testing.assert_allclose(preview["rsi"], expected["rsi"].iloc[120])
+        print("✅ 快照還原與預覽測試通過")
+
+    def test_wilder_rsi(self, make_bars):
+        """測試 Wilder 平滑 RSI 與遞迴定義一致"""
+        close = make_bars(60, 2)["close"]
+        engine = IncrementalIndicators(wilder_rsi=True)
+        values = [engine.update({"high": c, "low": c, "close": c, "volume": 1.0})["rsi"] for c in close]
+
+        delta = close.diff().to_numpy()[1:]
+        gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+        avg_gain, avg_loss = gain[:14].mean(), loss[:14].mean()
+        for g, l in zip(gain[14:], loss[14:]):
+            avg_gain = (avg_gain * 13 + g) / 14
+            avg_loss = (avg_loss * 13 + l) / 14
+        assert np.isnan(values[13]) and not np.isnan(values[14])
+        np.testing.assert_allclose(values[-1], 100 - 100 / (1 + avg_gain / avg_loss))
+        print("✅ Wilder RSI 測試通過")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+技術指標表快取測試
+測試相同 K棒命中、新增/修正 K棒時由尾端狀態延伸，且結果與重新計算一致
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.technical_indicators import IndicatorAnalyzer
+from src.cache.indicator_frame_cache import IndicatorFrameCache, bar_interval, common_prefix_length
+
+
+def assert_same(actual: pd.DataFrame, expected: pd.DataFrame):
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.index.equals(expected.index)
+    np.testing.assert_allclose(actual.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                               rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+class TestIndicatorFrameCache:
+    """指標表快取測試"""
+
+    def test_hit_and_extension_match_recompute(self, make_bars):
+        """測試重複請求命中快取，新 K棒延伸後與完整重算一致"""
+        bars = make_bars(260, 17, start_price=60.0)
+        analyzer = IndicatorAnalyzer()
+        cache = IndicatorFrameCache(analyzer)
+
+        first = cache.get_frame("aapl", bars.iloc[:250])
+        first["scratch"] = 1.0  # 呼叫端加欄位不影響快取
+        again = cache.get_frame("AAPL", bars.iloc[:250])
+        assert "scratch" not in again.columns
+        assert cache.get_stats()["hits"] == 1
+
+        extended = cache.get_frame("AAPL", bars)
+        assert_same(extended, analyzer.calculate_all_indicators(bars))
+
+        revised = bars.copy()
+        revised.iloc[-1, revised.columns.get_loc("close")] *= 1.03  # 盤中最新 K棒更新
+        assert_same(cache.get_frame("AAPL", revised), analyzer.calculate_all_indicators(revised))
+
+        stats = cache.get_stats()
+        assert stats["extensions"] == 2 and stats["misses"] == 1
+        assert stats["extended_bars"] == 11
+        print("✅ 命中與延伸一致性測試通過")
+
+    def test_bar_by_bar_extension_through_flat_span(self, make_bars):
+        """測試逐根延伸經過停牌平盤與缺值時，每次結果都與完整重算一致"""
+        bars = make_bars(300, 17, start_price=60.0)
+        for column in ("open", "high", "low", "close"):
+            bars.iloc[200:260, bars.columns.get_loc(column)] = bars["close"].iloc[199]
+        bars.iloc[200:260, bars.columns.get_loc("volume")] = 0
+        bars.iloc[270, bars.columns.get_loc("close")] = np.nan
+        analyzer = IndicatorAnalyzer()
+        cache = IndicatorFrameCache(analyzer)
+
+        cache.get_frame("2330", bars.iloc[:230])
+        for end in range(231, len(bars) + 1):
+            assert_same(cache.get_frame("2330", bars.iloc[:end]), analyzer.calculate_all_indicators(bars.iloc[:end]))
+        assert cache.get_stats()["extensions"] == 70
+        print("✅ 平盤區段逐根延伸一致性測試通過")
+
+    def test_subsets_and_fallbacks(self, make_bars):
+        """測試指標子集可延伸，起點改變或非串流指標則重新計算"""
+        bars = make_bars(260, 17, start_price=60.0)
+        analyzer = IndicatorAnalyzer()
+        cache = IndicatorFrameCache(analyzer, max_entries=2)
+
+        cache.get_frame("2330", bars.iloc[:200], names=["rsi", "macd"])
+        subset = cache.get_frame("2330", bars, names=["macd", "rsi"])
+        assert list(subset.columns) == ["macd", "rsi"]
+        assert_same(subset, analyzer.calculate_indicators(bars, ["macd", "rsi"]))
+        assert cache.get_stats()["extensions"] == 1
+
+        changed = bars.copy()
+        changed.iloc[0, changed.columns.get_loc("close")] += 1
+        cache.get_frame("2330", changed, names=["rsi", "macd"])             # 首根 K棒改變
+        cache.get_frame("2330", bars.iloc[:200], names=["sma_100"])
+        cache.get_frame("2330", bars, names=["sma_100"])                    # 不支援串流延伸
+        stats = cache.get_stats()
+        assert stats["extensions"] == 1 and stats["misses"] == 4
+        assert stats["size"] == 2 and stats["evictions"] == 0
+
+        cache.get_frame("2317", bars, names=["rsi"])
+        assert cache.get_stats()["evictions"] == 1
+        cache.invalidate("2330")
+        assert len(cache) == 1
+        print("✅ 子集與重算條件測試通過")
+
+    def test_periods_keep_separate_entries(self, make_bars):
+        """測試同一股票 1mo/3mo/6mo 不同起點的指標表各自快取，不互相覆蓋"""
+        bars = make_bars(262, 17, start_price=60.0)
+        analyzer = IndicatorAnalyzer()
+        cache = IndicatorFrameCache(analyzer)
+        periods = [bars.iloc[-24:-2], bars.iloc[-68:-2], bars.iloc[-134:-2]]
+
+        for data in periods + periods:
+            frame = cache.get_frame("2330", data)
+            assert_same(frame, analyzer.calculate_all_indicators(data))
+
+        stats = cache.get_stats()
+        assert stats["misses"] == 3 and stats["hits"] == 3 and stats["size"] == 3
+
+        # 同起點的新 K棒仍由既有項目延伸
+        grown = bars.iloc[-134:]
+        assert_same(cache.get_frame("2330", grown), analyzer.calculate_all_indicators(grown))
+        assert cache.get_stats()["extensions"] == 1
+        print("✅ 不同期間分開快取測試通過")
+
+    def test_helpers(self, make_bars):
+        """測試 K棒間隔推斷與共同前綴長度"""
+        bars = make_bars(30, 17, start_price=60.0)
+        assert bar_interval(bars.index) == "1 days 00:00:00"
+        changed = bars.copy()
+        changed.iloc[20, changed.columns.get_loc("volume")] += 1
+        assert common_prefix_length(bars, changed) == 20
+        assert common_prefix_length(bars.iloc[:10], bars) == 10
+        print("✅ 輔助函式測試通過")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+技術指標相依規劃器測試
+測試只計算請求的指標、共用中間結果只算一次，且數值與 TechnicalIndicators 原始公式一致
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.indicator_planner import INDICATOR_REGISTRY, IndicatorPlanner, IndicatorSpec
+from src.analysis.technical_indicators import IndicatorAnalyzer, TechnicalIndicators
+
+
+def baseline_indicators(bars: pd.DataFrame) -> pd.DataFrame:
+    """原始 calculate_all_indicators 以 TechnicalIndicators pandas 公式逐欄計算的結果"""
+    ti = TechnicalIndicators
+    df = bars.copy()
+    close, high, low = df["close"], df["high"], df["low"]
+    df["sma_20"], df["sma_50"] = ti.sma(close, 20), ti.sma(close, 50)
+    df["ema_12"], df["ema_26"] = ti.ema(close, 12), ti.ema(close, 26)
+    df["rsi"] = ti.rsi(close)
+    df["macd"], df["macd_signal"], df["macd_histogram"] = ti.macd(close)
+    upper, middle, lower = ti.bollinger_bands(close)
+    df["bb_upper"], df["bb_middle"], df["bb_lower"] = upper, middle, lower
+    df["bb_width"] = (upper - lower) / middle
+    df["bb_position"] = (close - lower) / (upper - lower)
+    df["stoch_k"], df["stoch_d"] = ti.stochastic_oscillator(high, low, close)
+    df["williams_r"] = ti.williams_r(high, low, close)
+    df["atr"], df["adx"] = ti.atr(high, low, close), ti.adx(high, low, close)
+    df["volume_sma"] = ti.volume_sma(df["volume"])
+    df["obv"] = ti.on_balance_volume(close, df["volume"])
+    df["pvt"] = ti.price_volume_trend(close, df["volume"])
+    df["price_change"] = close.pct_change()
+    df["volume_ratio"] = df["volume"] / df["volume_sma"]
+    return df
+
+
+class TestIndicatorPlanner:
+    """指標規劃器測試"""
+
+    def test_plan_contains_only_needed_nodes(self):
+        """測試儀表板訊號所需指標不會帶入布林通道、ATR 等無關節點"""
+        plan = IndicatorPlanner().plan(["rsi", "macd", "sma_20"])
+        assert set(plan) == {"rsi", "ema_12", "ema_26", "macd", "sma_20"}
+        assert plan.index("ema_12") < plan.index("macd")
+
+        full = IndicatorPlanner().plan(["bb_middle", "bb_width", "adx", "atr"])
+        assert full.count("sma_20") == 1 and full.count("atr") == 1
+        with pytest.raises(ValueError):
+            IndicatorPlanner().plan(["not_an_indicator"])
+        print("✅ 相依規劃測試通過")
+
+    def test_shared_nodes_computed_once(self, make_bars):
+        """測試每個節點在一次計算中只執行一次"""
+        calls = {}
+
+        def counted(spec):
+            def compute(*args):
+                calls[spec.name] = calls.get(spec.name, 0) + 1
+                return spec.compute(*args)
+            return IndicatorSpec(spec.name, spec.inputs, compute)
+
+        planner = IndicatorPlanner({name: counted(spec) for name, spec in INDICATOR_REGISTRY.items()})
+        frame = planner.compute(make_bars(200, 21, start_price=80.0),
+                                ["stoch_k", "williams_r", "adx", "atr", "bb_upper", "bb_lower"])
+        assert list(frame.columns) == ["stoch_k", "williams_r", "adx", "atr", "bb_upper", "bb_lower"]
+        assert set(calls.values()) == {1}
+        assert calls["highest_14"] == 1 and calls["true_range"] == 1 and calls["bb_std"] == 1
+        print("✅ 共用中間結果測試通過")
+
+    def test_matches_technical_indicator_formulas(self, make_bars):
+        """測試規劃器輸出與 TechnicalIndicators 原始 pandas 公式一致"""
+        bars = make_bars(200, 21, start_price=80.0)
+        ti = TechnicalIndicators
+        macd, signal, histogram = ti.macd(bars["close"])
+        upper, middle, lower = ti.bollinger_bands(bars["close"])
+        stoch_k, stoch_d = ti.stochastic_oscillator(bars["high"], bars["low"], bars["close"])
+        expected = {
+            "sma_20": ti.sma(bars["close"], 20), "ema_26": ti.ema(bars["close"], 26),
+            "sma_100": ti.sma(bars["close"], 100),
+            "rsi": ti.rsi(bars["close"]), "macd": macd, "macd_signal": signal, "macd_histogram": histogram,
+            "bb_upper": upper, "bb_middle": middle, "bb_lower": lower,
+            "stoch_k": stoch_k, "stoch_d": stoch_d,
+            "williams_r": ti.williams_r(bars["high"], bars["low"], bars["close"]),
+            "atr": ti.atr(bars["high"], bars["low"], bars["close"]),
+            "adx": ti.adx(bars["high"], bars["low"], bars["close"]),
+            "obv": ti.on_balance_volume(bars["close"], bars["volume"]),
+            "pvt": ti.price_volume_trend(bars["close"], bars["volume"]),
+        }
+        actual = IndicatorPlanner().compute(bars, list(expected))
+        for name, series in expected.items():
+            np.testing.assert_allclose(actual[name].to_numpy(), series.to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+        print("✅ 數值一致性測試通過")
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_baseline_with_gaps_and_flat_span(self, seed, make_bars):
+        """測試缺值與長時間平盤 (停牌) 時，calculate_all_indicators 與原始 pandas 流程一致"""
+        bars = make_bars(300, seed)
+        flat_price = bars["close"].iloc[99]
+        for column in ("open", "high", "low", "close"):
+            bars.iloc[100:160, bars.columns.get_loc(column)] = flat_price
+        bars.iloc[100:160, bars.columns.get_loc("volume")] = 0
+        bars.iloc[200, bars.columns.get_loc("close")] = np.nan
+        bars.iloc[230, bars.columns.get_loc("volume")] = np.nan
+
+        expected = baseline_indicators(bars)
+        # 平盤視窗的布林帶寬為 0：pandas 的標準差有時留下捨入殘差，這裡一律為 0/0 = NaN
+        flat = (expected["bb_upper"] - expected["bb_lower"]) < 1e-6 * expected["bb_middle"]
+        assert flat.sum() > 30
+        expected.loc[flat, "bb_position"] = np.nan
+
+        actual = IndicatorAnalyzer().calculate_all_indicators(bars)
+        for column in expected.columns:
+            np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-5, equal_nan=True, err_msg=column)
+        assert not np.isinf(actual["bb_position"]).any()
+        print("✅ 缺值與平盤區段一致性測試通過")
+
+    def test_analyzer_uses_subset(self, make_bars):
+        """測試 analyze 與 calculate_indicators 只回傳請求欄位"""
+        bars = make_bars(200, 21, start_price=80.0)
+        analyzer = IndicatorAnalyzer()
+        subset = analyzer.calculate_indicators(bars, ["rsi", "sma_20"])
+        assert list(subset.columns) == ["rsi", "sma_20"]
+
+        summary = analyzer.analyze(bars)
+        full = analyzer.calculate_all_indicators(bars)
+        assert summary["rsi"] == pytest.approx(full["rsi"].iloc[-1])
+        assert summary["bb_lower"] == pytest.approx(full["bb_lower"].iloc[-1])
+        assert list(full.columns[:5]) == ["open", "high", "low", "close", "volume"]
+        print("✅ 分析器子集計算測試通過")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+最新值技術指標測試
+測試只以所需回看區間計算最後一根 K 棒的指標值，結果與完整計算的最後一列一致
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis import technical_indicators
+from src.analysis.latest_indicators import (
+    LATEST_INDICATORS, ema_series, ema_warmup, latest_indicator_values
+)
+from src.analysis.technical_indicators import IndicatorAnalyzer
+
+
+def assert_matches_full(data: pd.DataFrame):
+    expected = IndicatorAnalyzer().calculate_all_indicators(data).iloc[-1]
+    values = latest_indicator_values(data, LATEST_INDICATORS)
+    for name in LATEST_INDICATORS:
+        assert np.isclose(values[name], expected[name], rtol=1e-9, atol=1e-9, equal_nan=True), name
+
+
+class TestLatestIndicators:
+    """最新值指標測試"""
+
+    def test_matches_full_calculation(self, make_bars):
+        """測試一年日線的最新值與完整計算最後一列一致"""
+        assert_matches_full(make_bars(252, 25, start_price=80.0))
+        print("✅ 最新值一致性測試通過")
+
+    @pytest.mark.parametrize("periods", [1, 2, 10, 14, 15, 16, 20, 30, 50])
+    def test_short_history(self, periods, make_bars):
+        """測試歷史不足回看區間時與完整計算同樣回傳 NaN 或部分結果"""
+        assert_matches_full(make_bars(periods, periods, start_price=80.0))
+        print(f"✅ {periods} 根 K 棒最新值測試通過")
+
+    def test_long_history_uses_warmup_tail(self, make_bars):
+        """測試長歷史只以 EMA 暖機區間計算，誤差在容忍範圍內"""
+        assert ema_warmup(26) + ema_warmup(9) < 1500
+        assert_matches_full(make_bars(1500, 25, start_price=80.0))
+
+        values = np.linspace(10.0, 20.0, 50)
+        assert np.allclose(ema_series(values, 12), pd.Series(values).ewm(span=12, adjust=False).mean())
+        print("✅ 長歷史暖機區間測試通過")
+
+    def test_missing_values(self, make_bars):
+        """測試缺值：RSI 等視窗指標與完整計算一致，EMA 暖機區間內缺值則拒絕"""
+        data = make_bars(252, 25, start_price=80.0)
+        data.iloc[-3, data.columns.get_loc("high")] = np.nan
+        names = [name for name in LATEST_INDICATORS if not name.startswith(("ema", "macd"))]
+        expected = IndicatorAnalyzer().calculate_all_indicators(data).iloc[-1]
+        values = latest_indicator_values(data, names)
+        for name in names:
+            assert np.isclose(values[name], expected[name], equal_nan=True), name
+
+        data.iloc[-3, data.columns.get_loc("close")] = np.nan
+        with pytest.raises(ValueError):
+            latest_indicator_values(data, ["macd"])
+        with pytest.raises(ValueError):
+            latest_indicator_values(data, ["not_an_indicator"])
+        print("✅ 缺值處理測試通過")
+
+    def test_analyze_latest_only(self, make_bars):
+        """測試 analyze 最新值模式與完整計算模式摘要一致，缺值時自動回退"""
+        analyzer = IndicatorAnalyzer()
+        data = make_bars(252, 25, start_price=80.0)
+        fast = analyzer.analyze(data)
+        full = analyzer.analyze(data, latest_only=False)
+        assert fast.keys() == full.keys()
+        for key in fast:
+            assert np.isclose(fast[key], full[key], rtol=1e-9), key
+
+        data.iloc[-3, data.columns.get_loc("close")] = np.nan
+        fallback = analyzer.analyze(data)
+        assert np.isclose(fallback["macd"], analyzer.analyze(data, latest_only=False)["macd"], equal_nan=True)
+        assert analyzer.analyze(data.iloc[:0]) == {}
+        print("✅ analyze 最新值模式測試通過")
+
+    @pytest.mark.skipif(technical_indicators.TALIB_AVAILABLE, reason="TA-Lib 版本走完整計算")
+    def test_latest_only_skips_full_calculation(self, monkeypatch, make_bars):
+        """測試最新值模式不會建立完整指標欄位"""
+        analyzer = IndicatorAnalyzer()
+        monkeypatch.setattr(analyzer, "calculate_indicators", lambda *args, **kwargs: pytest.fail("full path used"))
+        assert "rsi" in analyzer.analyze(make_bars(252, 25, start_price=80.0))
+        print("✅ 最新值模式未走完整計算測試通過")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+行情資料庫存取層測試
+測試 K線與技術指標的批次 upsert、區間讀取與多股票面板讀取 (SQLite)
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.market_data_repository import MarketDataRepository
+
+
+def make_bars(start: str, periods: int, base: float = 100.0) -> pd.DataFrame:
+    index = pd.date_range(start, periods=periods, freq="B", tz="America/New_York")
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        "open": close - 0.5,
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": np.arange(periods, dtype=np.int64) * 100 + 1000,
+        "symbol": "AAPL",
+    }, index=index)
+
+
+def make_repository(tmp_path) -> MarketDataRepository:
+    repository = MarketDataRepository(create_engine(f"sqlite:///{tmp_path / 'market.db'}"), chunk_size=7)
+    repository.ensure_schema()
+    return repository
+
+
+class TestMarketDataRepository:
+    """資料庫存取層測試"""
+
+    def test_upsert_and_range_read(self, tmp_path):
+        """測試重複寫入時更新既有 K線，並依區間讀回相同欄位與時區"""
+        repository = make_repository(tmp_path)
+        bars = make_bars("2024-05-01", 20)
+        assert repository.upsert_bars("AAPL", bars) == 20
+
+        revised = make_bars("2024-05-22", 10, base=500.0)  # 與前一批重疊 5 根
+        repository.upsert_bars("AAPL", revised)
+
+        stored = repository.read_bars("AAPL")
+        assert len(stored) == 25
+        assert str(stored.index.tz) == "America/New_York"
+        assert stored.loc["2024-05-22", "close"] == 500.0
+        assert stored["volume"].dtype == np.int64
+
+        window = repository.read_bars("AAPL", start="2024-05-06", end="2024-05-10")
+        assert list(window.index.day) == [6, 7, 8, 9, 10]
+        pd.testing.assert_frame_equal(
+            window[["open", "high", "low", "close", "volume"]],
+            bars.loc["2024-05-06":"2024-05-10", ["open", "high", "low", "close", "volume"]],
+            check_freq=False, check_names=False
+        )
+
+        arrays = repository.read_bar_arrays("AAPL", columns=("close",))
+        assert arrays["close"].dtype == np.float64 and len(arrays["close"]) == 25
+        assert repository.latest_timestamp("AAPL") == stored.index[-1]
+        print("✅ K線 upsert 與區間讀取測試通過")
+
+    def test_missing_volume_stays_missing(self, tmp_path):
+        """測試缺少成交量的 K線存為 NULL，讀回為 <NA> 而非錯誤整數"""
+        repository = make_repository(tmp_path)
+        bars = make_bars("2024-05-01", 3)
+        bars["volume"] = [1000.0, np.nan, 3000.0]
+        repository.upsert_bars("AAPL", bars)
+
+        with repository.engine.connect() as conn:
+            raw = conn.exec_driver_sql("SELECT volume FROM stock_prices ORDER BY timestamp").fetchall()
+        assert [row[0] for row in raw] == [1000, None, 3000]
+
+        stored = repository.read_bars("AAPL")
+        assert str(stored["volume"].dtype) == "Int64"
+        assert stored["volume"].isna().tolist() == [False, True, False]
+        assert stored["volume"].iloc[2] == 3000
+        print("✅ 缺少成交量測試通過")
+
+    def test_indicators_and_panel(self, tmp_path):
+        """測試技術指標 NaN 存為 NULL，且多股票面板以單一查詢讀回"""
+        repository = make_repository(tmp_path)
+        bars = make_bars("2024-05-01", 5)
+        indicators = pd.DataFrame({
+            "rsi": [np.nan, np.nan, 55.0, 60.0, 65.0],
+            "sma_20": [100.0, 100.5, 101.0, 101.5, 102.0],
+            "not_a_column": 1.0,
+        }, index=bars.index)
+        assert repository.upsert_indicators("AAPL", indicators) == 5
+
+        stored = repository.read_indicators("AAPL", columns=["rsi", "sma_20"])
+        assert stored["rsi"].isna().sum() == 2
+        assert stored["sma_20"].iloc[-1] == 102.0
+
+        repository.upsert_bars_many({"AAPL": bars, "MSFT": make_bars("2024-05-02", 3, base=400.0)})
+        panel = repository.read_panel(["MSFT", "AAPL"])
+        assert list(panel.columns) == ["MSFT", "AAPL"]
+        assert panel.shape == (5, 2)
+        assert panel["MSFT"].isna().sum() == 2
+        print("✅ 技術指標與面板讀取測試通過")
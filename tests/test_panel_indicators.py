@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+面板技術指標測試
+測試多股票向量化計算與逐檔批次計算一致 (含上市/下市造成的不等長歷史) 及 Arrow 輸出
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.panel_indicators import PanelIndicators
+from src.analysis.technical_indicators import IndicatorAnalyzer
+from src.data_fetcher.synthetic_market import SyntheticMarket
+
+
+def make_ragged_panel():
+    fields = SyntheticMarket(["AAA", "BBB", "CCC", "DDD"], seed=9).panel("2023-01-01", "2023-12-31")
+    for frame in fields.values():
+        frame.iloc[:80, frame.columns.get_loc("BBB")] = np.nan   # 較晚上市
+        frame.iloc[200:, frame.columns.get_loc("CCC")] = np.nan  # 提前下市
+    return fields
+
+
+class TestPanelIndicators:
+    """面板指標測試"""
+
+    def test_matches_per_symbol_calculation(self):
+        """測試每檔股票的面板結果等於以其自身 K棒執行 calculate_all_indicators"""
+        fields = make_ragged_panel()
+        panel = PanelIndicators().calculate_panel(fields)
+        assert set(panel) == set(PanelIndicators.COLUMNS)
+
+        analyzer = IndicatorAnalyzer()
+        for symbol in fields["close"].columns:
+            bars = pd.DataFrame({name: frame[symbol] for name, frame in fields.items()}).dropna()
+            expected = analyzer.calculate_all_indicators(bars)
+            for column in PanelIndicators.COLUMNS:
+                actual = panel[column][symbol]
+                np.testing.assert_allclose(
+                    actual.loc[bars.index].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                    rtol=1e-7, atol=1e-6, equal_nan=True, err_msg=f"{symbol} {column}"
+                )
+                assert actual.drop(bars.index).isna().all()
+        print("✅ 面板與逐檔計算一致性測試通過")
+
+    def test_arrays_latest_and_arrow(self):
+        """測試原始陣列輸入、最新一筆篩選表與長格式 Arrow 表"""
+        fields = make_ragged_panel()
+        arrays = {name: frame.to_numpy() for name, frame in fields.items()}
+        panel = PanelIndicators().calculate_panel(arrays, symbols=list(fields["close"].columns))
+        assert panel["rsi"].shape == fields["close"].shape
+
+        latest = PanelIndicators.latest(panel)
+        assert list(latest.index) == ["AAA", "BBB", "CCC", "DDD"]
+        assert np.isnan(latest.loc["CCC", "rsi"]) and not np.isnan(latest.loc["AAA", "rsi"])
+
+        table = PanelIndicators.to_arrow(PanelIndicators().calculate_panel(fields))
+        assert table.column_names[:2] == ["timestamp", "symbol"]
+        assert table.num_rows == int(fields["close"].notna().to_numpy().sum())
+        print("✅ 陣列輸入、最新值與 Arrow 輸出測試通過")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+報價中心測試
+測試多個訂閱者共用同一個上游輪詢，以及批次與慢速訂閱者處理
+"""
+
+import sys
+import os
+import asyncio
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.quote_hub import QuoteHub
+
+
+class FakeQuotes:
+    """記錄每次批次請求的報價來源"""
+
+    def __init__(self):
+        self.batches = []
+        self.price = 100.0
+
+    async def __call__(self, symbols):
+        self.batches.append(list(symbols))
+        self.price += 1
+        return {symbol: {"symbol": symbol, "price": self.price} for symbol in symbols if symbol != "BAD"}
+
+
+class TestQuoteHub:
+    """報價中心測試"""
+
+    def test_fan_out_scales_with_symbols(self):
+        """測試 200 個連線只產生與代號數相同的上游請求"""
+        source = FakeQuotes()
+        hub = QuoteHub(source, interval=60, batch_size=2)
+
+        async def run():
+            queues = [hub.subscribe("AAPL") for _ in range(200)]
+            queues += [hub.subscribe("msft"), hub.subscribe("BAD")]
+            await asyncio.sleep(0.01)  # 讓輪詢任務跑完第一輪
+            received = [queue.get_nowait() for queue in queues[:201]]
+            stats = hub.get_stats()
+            await hub.close()
+            return received, stats
+
+        received, stats = asyncio.run(run())
+
+        assert source.batches == [["AAPL", "MSFT"], ["BAD"]]
+        assert all(quote["symbol"] == "AAPL" for quote in received[:200])
+        assert received[200]["symbol"] == "MSFT"
+        assert stats["symbols"] == 3 and stats["subscribers"] == 202
+        print("✅ 報價分發測試通過")
+
+    def test_slow_subscriber_gets_latest(self):
+        """測試慢速訂閱者只會拿到最新報價"""
+        source = FakeQuotes()
+        hub = QuoteHub(source, interval=60)
+
+        async def run():
+            queue = hub.subscribe("AAPL")
+            await hub.poll_once()
+            await hub.poll_once()
+            latest = queue.get_nowait()
+            late_queue = hub.subscribe("AAPL")  # 新訂閱者立即收到最後報價
+            cached = late_queue.get_nowait()
+            await hub.close()
+            return latest, cached
+
+        latest, cached = asyncio.run(run())
+        assert latest["price"] == cached["price"]
+        assert hub.stats["dropped"] >= 1
+        print("✅ 慢速訂閱者測試通過")
+
+    def test_unsubscribe_stops_polling(self):
+        """測試取消訂閱後不再輪詢該代號"""
+        source = FakeQuotes()
+        hub = QuoteHub(source, interval=0.01)
+
+        async def run():
+            queue = hub.subscribe("AAPL")
+            await asyncio.sleep(0.03)
+            hub.unsubscribe("AAPL", queue)
+            polls = len(source.batches)
+            await asyncio.sleep(0.05)
+            return polls
+
+        polls = asyncio.run(run())
+        assert polls >= 1
+        assert len(source.batches) == polls
+        assert hub.symbols() == []
+        print("✅ 取消訂閱測試通過")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+多週期K線聚合測試
+測試由 1 分K 聚合各週期、增量更新、分K月分區保存與 TradingView 週期支援
+"""
+
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.bar_store import BarStore, start_to_period
+from src.data_fetcher.intraday_bars import IntradayBars
+from src.data_fetcher.resampler import ResampledSeries, normalize_resolution, resample_ohlcv
+from src.data_fetcher.symbol_master import SymbolMaster, parse_tw_listing
+from src.data_fetcher.twse_tpex_datafeed import TWStockDatafeed
+
+
+def minute_bars(start: str, minutes: int, tz: str = "America/New_York", seed: int = 0) -> pd.DataFrame:
+    """產生連續的 1 分K"""
+    index = pd.date_range(start, periods=minutes, freq="1min", tz=tz)
+    close = 100 + np.random.default_rng(seed).normal(0, 0.1, minutes).cumsum()
+    return pd.DataFrame({
+        "open": close - 0.05,
+        "high": close + 0.1,
+        "low": close - 0.1,
+        "close": close,
+        "volume": np.arange(1, minutes + 1, dtype=float),
+    }, index=index)
+
+
+class TestResample:
+    """聚合規則測試"""
+
+    def test_minute_bins_follow_session_open(self):
+        """測試美股小時K以 09:30 開盤對齊"""
+        base = minute_bars("2024-05-01 09:30", 390)
+        hourly = resample_ohlcv(base, "60", "US")
+
+        assert hourly.index[0] == pd.Timestamp("2024-05-01 09:30", tz="America/New_York")
+        assert len(hourly) == 7  # 6 根完整小時 + 15:30 起的半小時
+        first = base.iloc[:60]
+        assert hourly["open"].iloc[0] == first["open"].iloc[0]
+        assert hourly["high"].iloc[0] == first["high"].max()
+        assert hourly["low"].iloc[0] == first["low"].min()
+        assert hourly["close"].iloc[0] == first["close"].iloc[-1]
+        assert hourly["volume"].iloc[0] == first["volume"].sum()
+        print("✅ 分K對齊開盤測試通過")
+
+    def test_daily_weekly_monthly(self):
+        """測試日K聚合為週K（週一起始）與月K"""
+        index = pd.bdate_range("2024-04-24", "2024-05-10", tz="Asia/Taipei")
+        daily = pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0}, index=index)
+
+        weekly = resample_ohlcv(daily, "1W", "TW")
+        monthly = resample_ohlcv(daily, "M", "TW")
+
+        assert list(weekly.index.dayofweek) == [0, 0, 0]
+        assert weekly["volume"].tolist() == [30.0, 50.0, 50.0]
+        assert monthly.index[1] == pd.Timestamp("2024-05-01", tz="Asia/Taipei")
+        assert normalize_resolution("D") == "1D" and normalize_resolution("1h") == "60"
+        print("✅ 週K月K聚合測試通過")
+
+
+class TestResampledSeries:
+    """增量更新測試"""
+
+    def test_incremental_matches_full(self):
+        """測試新增基礎K線後各週期與全量重算一致"""
+        full = minute_bars("2024-05-01 09:30", 780)
+        series = ResampledSeries(full.iloc[:500], "US")
+        for resolution in ("5", "60", "1D"):
+            series.get(resolution)
+
+        # 重送最後一根（盤中未完成的 1 分K）並補上新資料
+        series.append(full.iloc[499:])
+
+        for resolution in ("5", "60", "1D"):
+            expected = resample_ohlcv(full, resolution, "US")
+            pd.testing.assert_frame_equal(series.get(resolution), expected, check_freq=False)
+        assert series.last_timestamp == full.index[-1]
+        print("✅ 增量更新測試通過")
+
+    def test_range_filter(self):
+        """測試依時間區間取出K線"""
+        series = ResampledSeries(minute_bars("2024-05-01 09:30", 390), "US")
+        bars = series.get("15", start="2024-05-01 10:00", end="2024-05-01 11:00")
+
+        assert bars.index[0] == pd.Timestamp("2024-05-01 10:00", tz="America/New_York")
+        assert len(bars) == 5
+        print("✅ 區間篩選測試通過")
+
+
+class TestIntradayStorage:
+    """分K保存測試"""
+
+    def test_monthly_partitions(self, tmp_path):
+        """測試 1 分K依月份分區保存並可跨月讀取"""
+        store = BarStore(tmp_path)
+        bars = pd.concat([minute_bars("2024-04-30 09:30", 10), minute_bars("2024-05-01 09:30", 10)])
+        store.write("US", "AAPL", bars, "1m")
+
+        files = sorted(p.name for p in (tmp_path / "US" / "AAPL" / "1m").glob("*.parquet"))
+        assert files == ["2024-04.parquet", "2024-05.parquet"]
+        assert len(store.read("US", "AAPL", "1m", start="2024-05-01")) == 10
+        assert len(store.read("US", "AAPL", "1m")) == 20
+        print("✅ 分K月分區測試通過")
+
+    def test_downloads_are_persisted(self, tmp_path):
+        """測試下載的 1 分K寫入本地並作為各週期的基礎"""
+        store = BarStore(tmp_path)
+        now = pd.Timestamp.now(tz="America/New_York").floor("min")
+        download = minute_bars(now - pd.Timedelta(minutes=119), 120)
+        intraday = IntradayBars("US", bar_store=store, symbol_master=SymbolMaster(), refresh_seconds=3600)
+
+        with patch.object(intraday, "_download", return_value=download) as mock_download:
+            five_minute = intraday.get_bars("AAPL", "5")
+            intraday.get_bars("AAPL", "15")
+
+        assert mock_download.call_count == 1  # 第二次在刷新間隔內，不再下載
+        assert len(store.read("US", "AAPL", "1m")) == 120
+        assert five_minute["volume"].sum() == download["volume"].sum()
+
+        # 新實例從本地保存的基礎序列載入，不需重新下載
+        reloaded = IntradayBars("US", bar_store=store, symbol_master=SymbolMaster(), refresh_seconds=3600)
+        with patch.object(reloaded, "_download") as mock_download:
+            assert len(reloaded.get_bars("AAPL", "1")) == 120
+        mock_download.assert_not_called()
+        print("✅ 分K保存測試通過")
+
+    def test_tw_ticker_uses_listed_exchange(self):
+        """測試台股分K使用上市櫃別對應的 Yahoo 代號"""
+        master = SymbolMaster(instruments=parse_tw_listing("TPEx", [{"SecuritiesCompanyCode": "6415", "CompanyName": "矽力*-KY"}]))
+        intraday = IntradayBars("TW", symbol_master=master)
+
+        assert intraday._resolve("6415") == ("6415", "6415.TWO")
+        assert intraday._resolve("2330.TW") == ("2330", "2330.TW")
+        assert start_to_period("2000-01-01") == "max"
+        print("✅ 台股分K代號測試通過")
+
+
+class TestDatafeedResolutions:
+    """Datafeed 週期支援測試"""
+
+    def test_weekly_bars_from_daily(self):
+        """測試台股週K由日K聚合"""
+        datafeed = TWStockDatafeed()
+        days = pd.bdate_range("2024-05-06", "2024-05-17", tz="Asia/Taipei")
+        daily = pd.DataFrame({"open": 10.0, "high": 11.0, "low": 9.0, "close": 10.5, "volume": 100.0}, index=days)
+
+        async def fake_daily(symbol, from_ts, to_ts, resolution="1D"):
+            assert resolution == "1D"
+            return datafeed._frame_to_bars(daily)
+
+        with patch.object(datafeed, "get_bars", side_effect=fake_daily):
+            weekly = asyncio.run(TWStockDatafeed.get_bars(datafeed, "2330", 0, 2 ** 31, "1W"))
+
+        assert [bar.volume for bar in weekly] == [500, 500]
+        assert "60" in asyncio.run(datafeed.get_symbol_info("2330")).supported_resolutions
+        print("✅ 週K聚合測試通過")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+滾動視窗核心函式測試
+測試區塊掃描的滾動和/均值/標準差/極值、順序統計分位數與串流 Welford 狀態，皆與 pandas/NumPy 結果一致
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.rolling_kernels import (
+    OrderStatistics, RollingExtreme, RollingMoments,
+    rolling_max, rolling_mean, rolling_min, rolling_quantile, rolling_std, rolling_sum
+)
+
+
+def make_values(rows: int = 257, cols: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(4)
+    values = 100 + np.cumsum(rng.standard_normal((rows, cols)), axis=0)
+    values[:10, 1] = np.nan       # 較晚開始的欄位
+    values[rows // 2, 2] = np.nan  # 中間缺值
+    return values
+
+
+class TestArrayKernels:
+    """陣列核心函式測試"""
+
+    @pytest.mark.parametrize("window", [1, 2, 5, 14, 20, 64])
+    def test_matches_pandas_rolling(self, window):
+        """測試 1D/2D 滾動統計在各種視窗長度下與 pandas 一致 (含 NaN)"""
+        values = make_values()
+        rolling = pd.DataFrame(values).rolling(window)
+        checks = [
+            (rolling_sum(values, window), rolling.sum()),
+            (rolling_mean(values, window), rolling.mean()),
+            (rolling_max(values, window), rolling.max()),
+            (rolling_min(values, window), rolling.min()),
+        ]
+        if window > 1:
+            checks.append((rolling_std(values, window), rolling.std()))
+        for actual, expected in checks:
+            np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-8, equal_nan=True)
+
+        np.testing.assert_allclose(
+            rolling_mean(values[:, 0], window), pd.Series(values[:, 0]).rolling(window).mean().to_numpy(),
+            rtol=1e-9, equal_nan=True
+        )
+        print(f"✅ 視窗 {window} 滾動統計測試通過")
+
+    def test_rolling_quantile_and_short_input(self):
+        """測試滾動分位數與 pandas 線性插值一致，且資料不足時全為 NaN"""
+        values = make_values(80)
+        expected = pd.DataFrame(values).rolling(15).quantile(0.95).to_numpy()
+        np.testing.assert_allclose(rolling_quantile(values, 15, 0.95), expected, equal_nan=True)
+        assert np.isnan(rolling_max(values[:3], 5)).all()
+        print("✅ 滾動分位數測試通過")
+
+
+class TestStreamingKernels:
+    """串流核心測試"""
+
+    def test_order_statistics(self):
+        """測試加入/移除後的分位數與 np.percentile 一致"""
+        rng = np.random.default_rng(1)
+        data = rng.standard_normal(40)
+        stats = OrderStatistics(data)
+        for q in (0.0, 0.05, 0.5, 0.95, 1.0):
+            assert stats.quantile(q) == pytest.approx(np.percentile(data, q * 100))
+        for x in data[:15]:
+            stats.remove(x)
+        assert stats.quantile(0.95) == pytest.approx(np.percentile(data[15:], 95))
+        with pytest.raises(ValueError):
+            stats.remove(1e9)
+        print("✅ 順序統計測試通過")
+
+    def test_streaming_state_roundtrip(self):
+        """測試 Welford 與單調佇列極值逐筆更新結果一致，且狀態可保存還原"""
+        values = make_values(100)[:, 2]
+        moments, extreme = RollingMoments(20), RollingExtreme(14, maximum=False)
+        means, lows = [], []
+        for i, x in enumerate(values):
+            if i == 50:
+                restored = RollingMoments(20)
+                restored.load(moments.state())
+                moments = restored
+            moments.update(x)
+            means.append(moments.average)
+            lows.append(extreme.update(x))
+        np.testing.assert_allclose(means, rolling_mean(values, 20), rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(lows, rolling_min(values, 14), equal_nan=True)
+        print("✅ 串流狀態測試通過")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+資料來源路由測試
+測試依股票記憶可用路由、供應商熔斷與台股抓取優先使用已知可用的代號後綴
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.source_router import SourceRouter, CLOSED, OPEN, HALF_OPEN
+from src.data_fetcher.symbol_master import Instrument, SymbolMaster
+from src.data_fetcher.tw_stocks import TWStockDataFetcher
+
+ROUTES = [("yfinance", "5483.TW"), ("yfinance", "5483.TWO"), ("snapshot", "TPEx")]
+
+
+class TestSourceRouter:
+    """路由記憶與熔斷測試"""
+
+    def test_order_learns_from_results(self):
+        """測試成功路由排第一，無資料路由排最後"""
+        router = SourceRouter()
+        assert router.order("5483", ROUTES) == ROUTES
+
+        router.record_miss("5483", ("yfinance", "5483.TW"), 0.1)
+        router.record_success("5483", ("yfinance", "5483.TWO"), 0.1)
+
+        assert router.order("5483", ROUTES) == [
+            ("yfinance", "5483.TWO"), ("snapshot", "TPEx"), ("yfinance", "5483.TW")
+        ]
+        assert router.known_route("5483") == ("yfinance", "5483.TWO")
+        assert router.order("6415", ROUTES) == ROUTES  # 其他股票不受影響
+        print("✅ 路由排序測試通過")
+
+    def test_partial_routes_rank_after_misses(self):
+        """測試只回傳部分區間的路由不會被記為可用路由，且排在無資料路由之後"""
+        router = SourceRouter()
+        router.record_miss("5483", ("yfinance", "5483.TWO"), 0.1)
+        router.record_partial("5483", ("snapshot", "TPEx"), 0.1)
+
+        assert router.known_route("5483") is None
+        assert router.order("5483", ROUTES)[-2:] == [("yfinance", "5483.TWO"), ("snapshot", "TPEx")]
+        print("✅ 部分區間路由排序測試通過")
+
+    def test_circuit_opens_and_half_opens(self):
+        """測試連續錯誤開啟熔斷，逾時後只放行一次試探請求"""
+        router = SourceRouter(failure_threshold=3, reset_timeout=0.05)
+        for _ in range(3):
+            assert router.allow("yfinance")
+            router.record_failure("5483", ("yfinance", "5483.TW"), 0.1, RuntimeError("timeout"))
+
+        assert router.circuit_state("yfinance") == OPEN
+        assert not router.allow("yfinance")
+        assert router.order("5483", ROUTES) == [("snapshot", "TPEx")]
+
+        time.sleep(0.06)
+        assert router.circuit_state("yfinance") == HALF_OPEN
+        assert router.allow("yfinance")
+        assert not router.allow("yfinance")  # 試探進行中
+
+        router.record_success("5483", ("yfinance", "5483.TWO"), 0.1)
+        assert router.circuit_state("yfinance") == CLOSED
+        stats = router.get_stats()["providers"]["yfinance"]
+        assert stats["calls"] == 4 and stats["failures"] == 3
+        print("✅ 熔斷測試通過")
+
+
+class TestTWStockRouting:
+    """台股抓取路由測試"""
+
+    def test_unlisted_otc_code_remembers_variant(self):
+        """測試未列於清單的上櫃代號第二次抓取直接使用 .TWO"""
+        fetcher = TWStockDataFetcher(symbol_master=SymbolMaster(instruments=[]))
+        bars = pd.DataFrame({"close": [50.0]}, index=pd.date_range("2024-05-02", periods=1))
+        calls = []
+
+        def fake_yfinance(yf_symbol, symbol, start_date=None, end_date=None):
+            calls.append(yf_symbol)
+            return bars if yf_symbol == "5483.TWO" else pd.DataFrame()
+
+        def failing_snapshots(exchange, symbol, start_date=None, end_date=None):
+            raise AssertionError("snapshots should not be needed")
+
+        fetcher._fetch_via_yfinance = fake_yfinance
+        fetcher._fetch_via_snapshots = failing_snapshots
+
+        assert not fetcher._fetch_from_sources("5483").empty
+        assert calls == ["5483.TW", "5483.TWO"]
+
+        calls.clear()
+        assert not fetcher._fetch_from_sources("5483.TW").empty
+        assert calls == ["5483.TWO"]
+        print("✅ 台股路由記憶測試通過")
+
+    def test_truncated_snapshot_does_not_pin_listed_code(self):
+        """測試 yfinance 一次無資料時快照補位，但下次長區間請求仍先用 yfinance"""
+        master = SymbolMaster(instruments=[Instrument("2330", "台積電", "TWSE", "TW")])
+        fetcher = TWStockDataFetcher(symbol_master=master)
+        end = datetime(2024, 6, 28)
+        start = end - timedelta(days=180)
+        history = pd.DataFrame({"close": 1.0}, index=pd.bdate_range(start, end))
+        recent = history.iloc[-20:]
+        yfinance_calls = []
+
+        def flaky_yfinance(yf_symbol, symbol, start_date=None, end_date=None):
+            yfinance_calls.append(yf_symbol)
+            return pd.DataFrame() if len(yfinance_calls) == 1 else history
+
+        fetcher._fetch_via_yfinance = flaky_yfinance
+        fetcher._fetch_via_snapshots = lambda exchange, symbol, start_date=None, end_date=None: recent
+
+        assert len(fetcher._fetch_from_sources("2330.TW", start, end)) == 20
+        assert fetcher.source_router.known_route("2330") is None
+
+        assert len(fetcher._fetch_from_sources("2330.TW", start, end)) == len(history)
+        assert yfinance_calls == ["2330.TW", "2330.TW"]
+        assert fetcher.source_router.known_route("2330") == ("yfinance", "2330.TW")
+        print("✅ 快照部分資料不固定路由測試通過")
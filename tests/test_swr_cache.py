@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Stale-while-revalidate 快取測試
+測試過期資料於寬限時間內立即回傳、背景單一更新與 K線快取
+"""
+
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.swr_cache import SWRCache, FRESH, STALE, MISSING
+from src.data_fetcher.async_market_data import AsyncMarketData
+
+
+class TestSWRCache:
+    """快取策略測試"""
+
+    def test_stale_value_served_while_refreshing(self):
+        """測試過期項目立即回傳舊值，且只啟動一次背景更新"""
+        cache = SWRCache(ttl=0.2, grace=10)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        async def run():
+            assert await cache.get_or_compute("k", compute) == 1
+            await asyncio.sleep(0.21)
+            assert cache.peek("k") == (1, STALE)
+
+            start = time.perf_counter()
+            stale = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(0.1)  # 等待背景更新完成
+            return stale, elapsed
+
+        stale, elapsed = asyncio.run(run())
+        assert stale == [1] * 5
+        assert elapsed < 0.02  # 不等待重新計算
+        assert len(calls) == 2  # 首次計算 + 一次背景更新
+        assert cache.peek("k") == (2, FRESH)
+        assert cache.get_stats()["stale_hits"] == 5
+        print("✅ 過期即回傳測試通過")
+
+    def test_expired_past_grace_recomputes(self):
+        """測試超過寬限時間的項目需重新計算，失敗結果不快取"""
+        cache = SWRCache(ttl=0.01, grace=0.01, should_cache=lambda value: value != "error")
+
+        async def run():
+            await cache.get_or_compute("k", lambda: asyncio.sleep(0, result="old"))
+            await asyncio.sleep(0.03)
+            assert cache.peek("k") == (None, MISSING)
+            assert await cache.get_or_compute("k", lambda: asyncio.sleep(0, result="error")) == "error"
+            return cache.peek("k")
+
+        assert asyncio.run(run()) == (None, MISSING)
+        print("✅ 寬限過期測試通過")
+
+    def test_refresh_error_keeps_stale(self):
+        """測試背景更新失敗時保留舊值"""
+        cache = SWRCache(ttl=0.01, grace=10)
+
+        async def failing():
+            raise RuntimeError("upstream down")
+
+        async def run():
+            cache.set("k", "old")
+            await asyncio.sleep(0.02)
+            value = await cache.get_or_compute("k", failing)
+            await asyncio.sleep(0.01)
+            return value
+
+        assert asyncio.run(run()) == "old"
+        assert cache.peek("k") == ("old", STALE)
+        assert cache.get_stats()["refresh_errors"] == 1
+        print("✅ 更新失敗保留舊值測試通過")
+
+
+    def test_background_refresh_uses_refresh_callable(self):
+        """測試過期項目的背景更新改用 refresh，首次計算仍用 compute"""
+        cache = SWRCache(ttl=0.2, grace=10)
+        calls = []
+
+        async def compute():
+            calls.append("compute")
+            return "cached inputs"
+
+        async def refresh():
+            calls.append("refresh")
+            return "fresh inputs"
+
+        async def run():
+            first = await cache.get_or_compute("k", compute, refresh=refresh)
+            await asyncio.sleep(0.21)
+            stale = await cache.get_or_compute("k", compute, refresh=refresh)
+            await asyncio.sleep(0.01)
+            return first, stale
+
+        assert asyncio.run(run()) == ("cached inputs", "cached inputs")
+        assert calls == ["compute", "refresh"]
+        assert cache.peek("k") == ("fresh inputs", FRESH)
+        print("✅ 背景更新略過內層快取測試通過")
+
+
+class TestBarsCache:
+    """K線快取測試"""
+
+    def test_bars_served_from_cache(self):
+        """測試 K線由快取回應，空結果不快取"""
+        us_fetcher = MagicMock()
+        bars = pd.DataFrame({"close": [1.0, 2.0]}, index=pd.date_range("2024-05-01", periods=2))
+        us_fetcher.fetch_historical_data.side_effect = [bars, pd.DataFrame(), pd.DataFrame()]
+        cache = SWRCache(ttl=60, grace=60, should_cache=lambda data: not data.empty)
+        market_data = AsyncMarketData(us_fetcher, MagicMock(), max_workers=2, bars_cache=cache)
+
+        async def run():
+            first = await market_data.get_bars("AAPL", period="1mo")
+            first["extra"] = 1  # 呼叫端修改不影響快取
+            second = await market_data.get_bars("AAPL", period="1mo")
+            await market_data.get_bars("MSFT", period="1mo")
+            await market_data.get_bars("MSFT", period="1mo")
+            return second
+
+        second = asyncio.run(run())
+        market_data.shutdown()
+
+        assert "extra" not in second.columns
+        assert us_fetcher.fetch_historical_data.call_count == 3  # AAPL 一次、MSFT 兩次
+        print("✅ K線快取測試通過")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+全市場代號表測試
+測試上市櫃清單解析、前綴/n-gram 搜尋、交易所判斷與本地檔案保存
+"""
+
+import sys
+import os
+import time
+from unittest.mock import patch
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher import symbol_master as symbol_master_module
+from src.data_fetcher.symbol_master import (
+    Instrument, SymbolMaster, parse_tw_listing, parse_us_listing, split_symbol
+)
+
+NASDAQ_LISTED = """Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+AMD|Advanced Micro Devices, Inc. - Common Stock|Q|N|N|100|N|N
+QQQ|Invesco QQQ Trust, Series 1|G|N|N|100|Y|N
+ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N
+File Creation Time: 0501202400:00||||||||
+"""
+
+OTHER_LISTED = """ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol
+BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK.B
+SPY|SPDR S&P 500 ETF Trust|P|SPY|Y|100|N|SPY
+ABR$D|Arbor Realty Trust Preferred|N|ABRpD|N|100|N|ABR-D
+File Creation Time: 0501202400:00|||||||
+"""
+
+TWSE_ROWS = [
+    {"Code": "2330", "Name": "台積電"},
+    {"Code": "3481", "Name": "群創"},
+    {"Code": "00878", "Name": "國泰永續高股息"},
+]
+TWSE_COMPANIES = [{"公司代號": "2330", "英文簡稱": "TSMC"}]
+TPEX_ROWS = [
+    {"SecuritiesCompanyCode": "6415", "CompanyName": "矽力*-KY"},
+    {"SecuritiesCompanyCode": "5483", "CompanyName": "中美晶"},
+]
+
+
+def make_master(**kwargs) -> SymbolMaster:
+    instruments = (
+        parse_tw_listing("TWSE", TWSE_ROWS, TWSE_COMPANIES)
+        + parse_tw_listing("TPEx", TPEX_ROWS)
+        + parse_us_listing(NASDAQ_LISTED)
+        + parse_us_listing(OTHER_LISTED)
+    )
+    return SymbolMaster(instruments=instruments, **kwargs)
+
+
+class TestListingParsers:
+    """上市清單解析測試"""
+
+    def test_us_listing(self):
+        """測試 NASDAQ Trader 清單解析"""
+        nasdaq = {i.code: i for i in parse_us_listing(NASDAQ_LISTED)}
+        other = {i.code: i for i in parse_us_listing(OTHER_LISTED)}
+
+        assert set(nasdaq) == {"AAPL", "AMD", "QQQ"}  # 測試代號被排除
+        assert nasdaq["AAPL"].name == "Apple Inc." and nasdaq["AAPL"].exchange == "NASDAQ"
+        assert nasdaq["QQQ"].type == "etf"
+        assert set(other) == {"BRK-B", "SPY"}  # 特別股被排除，類股代號改為 yfinance 格式
+        assert other["BRK-B"].exchange == "NYSE" and other["SPY"].exchange == "NYSEARCA"
+        print("✅ 美股清單解析測試通過")
+
+    def test_tw_listing(self):
+        """測試 TWSE/TPEx 開放資料清單解析"""
+        twse = {i.code: i for i in parse_tw_listing("TWSE", TWSE_ROWS, TWSE_COMPANIES)}
+
+        assert twse["2330"].english_name == "TSMC"
+        assert twse["2330"].symbol == "2330.TW"
+        assert twse["00878"].type == "etf"
+        assert parse_tw_listing("TPEx", TPEX_ROWS)[0].symbol == "6415.TWO"
+        print("✅ 台股清單解析測試通過")
+
+
+class TestSymbolSearch:
+    """代號搜尋測試"""
+
+    def test_exact_exchange_resolution(self):
+        """測試代號對應交易所為精確結果"""
+        master = make_master()
+
+        assert master.exchange_of("6415") == "TPEx"
+        assert master.exchange_of("3481.TW") == "TWSE"
+        assert master.get("6415.TW").symbol == "6415.TWO"
+        assert master.exchange_of("brk-b") == "NYSE"
+        assert master.exchange_of("9999") is None
+        assert split_symbol("TWSE:2330") == ("2330", None)
+        print("✅ 交易所判斷測試通過")
+
+    def test_ranking_and_filters(self):
+        """測試代號、名稱前綴與子字串搜尋的排序及篩選"""
+        master = make_master()
+
+        assert [i.code for i in master.search("A")][:2] == ["AAPL", "AMD"]
+        assert master.search("2330.TW")[0].code == "2330"
+        assert master.search("台積")[0].code == "2330"
+        assert master.search("tsmc")[0].code == "2330"
+        assert master.search("micro")[0].code == "AMD"  # 名稱中的單字前綴
+        assert [i.code for i in master.search("永續")] == ["00878"]  # 名稱中段
+        assert [i.code for i in master.search("ky")] == ["6415"]
+        assert master.search("S&P 500")[0].code == "SPY"
+        assert all(i.exchange == "TPEx" for i in master.search("5", exchange="TPEx"))
+        assert all(i.market == "US" for i in master.search("a", market="US"))
+        assert master.search("") == []
+        print("✅ 搜尋排序與篩選測試通過")
+
+    def test_search_speed(self):
+        """測試一萬檔代號的搜尋耗時遠低於 1 毫秒"""
+        words = ["advanced", "micro", "global", "capital", "holdings", "energy", "systems", "group"]
+        instruments = [
+            Instrument(f"{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{i % 7}", f"{words[i % 8]} {words[i // 8 % 8]} Inc",
+                       "NASDAQ", "US")
+            for i in range(7000)
+        ] + [
+            Instrument(str(1000 + i), f"測試{i}光電", "TWSE", "TW") for i in range(3000)
+        ]
+        master = SymbolMaster(instruments=instruments)
+        queries = ["A", "AB3", "1234", "micro", "hold", "試12", "光電", "energy sys", "zzzz"]
+
+        start = time.perf_counter()
+        for _ in range(50):
+            for query in queries:
+                master.search(query, 10)
+        per_query = (time.perf_counter() - start) / (50 * len(queries))
+
+        assert len(master) == 10000
+        assert per_query < 0.001
+        print(f"✅ 搜尋效能測試通過 ({per_query * 1e6:.0f} µs/次)")
+
+
+class TestPersistence:
+    """本地保存與更新測試"""
+
+    def test_save_and_load(self, tmp_path):
+        """測試代號表保存後可由本地檔案載入"""
+        path = tmp_path / "symbols.json"
+        master = make_master(path=path)
+        master.save()
+
+        loaded = SymbolMaster(path)
+        assert loaded.load()
+        assert len(loaded) == len(master)
+        assert loaded.get("6415").exchange == "TPEx"
+        assert not loaded.is_stale()
+        print("✅ 本地保存測試通過")
+
+    def test_failed_source_keeps_previous(self, tmp_path):
+        """測試單一來源下載失敗時保留上次清單"""
+        master = make_master(path=tmp_path / "symbols.json")
+        fresh = {"US": parse_us_listing(NASDAQ_LISTED)}
+
+        with patch.object(symbol_master_module, "download_listings", return_value=fresh):
+            assert master.refresh()
+
+        assert master.exchange_of("6415") == "TPEx"  # TPEx 下載失敗，保留舊資料
+        assert master.get("SPY") is None  # 美股以新清單為準
+        assert (tmp_path / "symbols.json").exists()
+        print("✅ 部分更新測試通過")
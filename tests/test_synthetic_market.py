@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+合成市場資料測試
+測試相關性 OHLCV 面板的可重現性、K棒合理性、交易日曆時間軸與寫入 K線儲存
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.bar_store import BarStore
+from src.data_fetcher.synthetic_market import SyntheticMarket, session_index
+
+
+class TestSyntheticPanels:
+    """合成面板測試"""
+
+    def test_seeded_and_consistent(self):
+        """測試相同種子產生相同資料，且每根 K棒高低價包住開收盤"""
+        first = SyntheticMarket(50, seed=7).panel("2023-01-01", "2023-12-31")
+        second = SyntheticMarket(50, seed=7).panel("2023-01-01", "2023-12-31")
+        other = SyntheticMarket(50, seed=8).panel("2023-01-01", "2023-12-31")
+
+        assert first["close"].shape == (250, 50)
+        assert first["close"].equals(second["close"])
+        assert not first["close"].equals(other["close"])
+
+        body_high = np.maximum(first["open"].values, first["close"].values)
+        body_low = np.minimum(first["open"].values, first["close"].values)
+        assert (first["high"].values >= body_high).all()
+        assert (first["low"].values <= body_low).all()
+        assert (first["volume"].values > 0).all()
+        print("✅ 可重現性與 K棒合理性測試通過")
+
+    def test_overlapping_ranges_agree(self):
+        """測試重疊區間的同一交易日產生相同 K棒，分鐘 K棒收在日線收盤價"""
+        market = SyntheticMarket(10, seed=4)
+        early = market.panel("2023-01-01", "2024-06-30")
+        late = SyntheticMarket(10, seed=4).panel("2023-06-01", "2025-03-31")
+        for field in early:
+            assert early[field].loc["2023-06-01":].equals(late[field].loc[:"2024-06-30"]), field
+
+        daily = market.panel("2024-05-01", "2024-05-03")["close"]
+        minutes = market.panel("2024-05-01", "2024-05-03", "5m")["close"]
+        shifted = market.panel("2024-05-02", "2024-05-06", "5m")["close"]
+        np.testing.assert_allclose(minutes.groupby(minutes.index.normalize()).last().values, daily.values)
+        assert minutes.loc["2024-05-02":].equals(shifted.loc[:"2024-05-03"])
+        print("✅ 重疊區間一致性測試通過")
+
+    def test_returns_are_correlated(self):
+        """測試報酬率的平均兩兩相關係數接近設定值"""
+        market = SyntheticMarket(40, seed=1, correlation=0.5)
+        returns = np.log(market.panel("2020-01-01", "2023-12-31")["close"]).diff().dropna()
+        corr = np.corrcoef(returns.values.T)
+        mean_corr = corr[np.triu_indices_from(corr, 1)].mean()
+        assert 0.4 < mean_corr < 0.6
+        print("✅ 相關性測試通過")
+
+    def test_minute_sessions_follow_calendar(self):
+        """測試分鐘 K棒依交易日曆產生，含提前收盤與台股時段"""
+        us = session_index("US", "2024-11-27", "2024-11-29", "1m")
+        assert len(us) == 390 + 210  # 感恩節休市，11/29 提前於 13:00 收盤
+        assert us[0] == pd.Timestamp("2024-11-27 09:30", tz="America/New_York")
+        assert us[-1] == pd.Timestamp("2024-11-29 12:59", tz="America/New_York")
+
+        tw = SyntheticMarket(["2330"], market="TW").panel("2024-05-02", "2024-05-02", "5m")["close"]
+        assert len(tw) == 54
+        assert tw.index[0] == pd.Timestamp("2024-05-02 09:00", tz="Asia/Taipei")
+        print("✅ 分鐘時段測試通過")
+
+
+class TestSyntheticConsumers:
+    """合成資料供應測試"""
+
+    def test_fetcher_and_bar_store(self, tmp_path):
+        """測試以抓取器介面提供資料並寫入 K線儲存"""
+        market = SyntheticMarket(["AAPL", "MSFT"], seed=3)
+        data = market.fetch_historical_data("aapl", start_date=pd.Timestamp("2024-01-01"),
+                                            end_date=pd.Timestamp("2024-06-30"))
+        assert list(data.columns) == ["open", "high", "low", "close", "volume", "symbol"]
+        assert market.fetch_historical_data("TSLA").empty
+
+        store = BarStore(tmp_path)
+        written = market.write_to_store(store, "2024-01-01", "2024-06-30")
+        stored = store.read("US", "AAPL", "1d")
+        assert written == 2 * len(data)
+        np.testing.assert_allclose(stored["close"].values, data["close"].values)
+        print("✅ 抓取器介面與 K線儲存測試通過")
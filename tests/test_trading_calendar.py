@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+交易所行事曆測試
+測試交易日、假日、提前收盤與開收盤時間計算
+"""
+
+import sys
+import os
+from datetime import date, datetime, time
+
+import pytz
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.trading_calendar import get_trading_calendar, us_holidays, _easter
+
+EASTERN = pytz.timezone("America/New_York")
+TAIPEI = pytz.timezone("Asia/Taipei")
+
+
+class TestUSCalendar:
+    """美股行事曆測試"""
+
+    def test_nyse_holidays(self):
+        """測試 NYSE 假日規則"""
+        holidays, early_closes = us_holidays(2024)
+        assert date(2024, 1, 15) in holidays   # MLK Day
+        assert date(2024, 3, 29) in holidays   # Good Friday
+        assert date(2024, 6, 19) in holidays   # Juneteenth
+        assert date(2024, 11, 28) in holidays  # Thanksgiving
+        assert early_closes[date(2024, 11, 29)] == time(13, 0)
+        assert early_closes[date(2024, 12, 24)] == time(13, 0)
+
+        # 週六的國慶日於週五休市，不再提前收盤
+        holidays_2026, early_2026 = us_holidays(2026)
+        assert date(2026, 7, 3) in holidays_2026
+        assert date(2026, 7, 3) not in early_2026
+        assert _easter(2025) == date(2025, 4, 20)
+        print("✅ NYSE 假日規則測試通過")
+
+    def test_open_and_next_open(self):
+        """測試開盤狀態與下一次開盤"""
+        calendar = get_trading_calendar("NASDAQ")
+        assert calendar.is_open(EASTERN.localize(datetime(2024, 7, 3, 12, 0)))
+        assert not calendar.is_open(EASTERN.localize(datetime(2024, 7, 3, 14, 0)))  # 提前收盤
+        assert not calendar.is_open(EASTERN.localize(datetime(2024, 7, 4, 11, 0)))
+
+        friday_evening = EASTERN.localize(datetime(2024, 3, 28, 17, 0))
+        assert calendar.next_open(friday_evening) == EASTERN.localize(datetime(2024, 4, 1, 9, 30))
+        assert calendar.next_close(friday_evening) == EASTERN.localize(datetime(2024, 4, 1, 16, 0))
+        print("✅ 美股開收盤測試通過")
+
+
+class TestTaiwanCalendar:
+    """台股行事曆測試"""
+
+    def test_sessions_skip_holidays(self):
+        """測試台股交易日略過週末與農曆新年"""
+        calendar = get_trading_calendar("TPEx")
+        sessions = calendar.sessions_in_range(date(2024, 2, 1), date(2024, 2, 29))
+        assert date(2024, 2, 8) not in sessions
+        assert date(2024, 2, 28) not in sessions
+        assert date(2024, 2, 15) in sessions
+        assert len(sessions) == 13  # 2/6-2/7 僅交割不交易
+        assert calendar.next_session(date(2024, 2, 6)) == date(2024, 2, 15)
+        assert calendar.previous_session(date(2024, 2, 14)) == date(2024, 2, 5)
+        print("✅ 台股交易日測試通過")
+
+    def test_was_open_between(self):
+        """測試區間內是否曾經開盤"""
+        calendar = get_trading_calendar("TW")
+        saturday = TAIPEI.localize(datetime(2024, 5, 4, 10, 0))
+        sunday = TAIPEI.localize(datetime(2024, 5, 5, 20, 0))
+        monday = TAIPEI.localize(datetime(2024, 5, 6, 9, 30))
+        assert not calendar.was_open_between(saturday, sunday)
+        assert calendar.was_open_between(saturday, monday)
+        print("✅ 開盤區間測試通過")
+
+    def test_refresh_mid_session_is_stale_after_close(self):
+        """測試盤中更新的資料在收盤後仍視為過期，收盤結算後更新才算完整"""
+        calendar = get_trading_calendar("TW")
+        mid_session = TAIPEI.localize(datetime(2024, 5, 6, 11, 0))
+        just_after_close = TAIPEI.localize(datetime(2024, 5, 6, 13, 40))
+        settled = TAIPEI.localize(datetime(2024, 5, 6, 14, 5))
+        evening = TAIPEI.localize(datetime(2024, 5, 6, 20, 0))
+        next_morning = TAIPEI.localize(datetime(2024, 5, 7, 8, 30))
+
+        assert not calendar.was_open_between(just_after_close, evening)
+        assert not calendar.is_settled(mid_session, evening)
+        assert not calendar.is_settled(just_after_close, evening)
+        assert calendar.is_settled(settled, evening)
+        assert calendar.is_settled(settled, next_morning)
+        # 週末查詢時，以週五收盤為準
+        friday_close = TAIPEI.localize(datetime(2024, 5, 3, 14, 0))
+        assert calendar.is_settled(friday_close, TAIPEI.localize(datetime(2024, 5, 5, 12, 0)))
+        assert not calendar.is_settled(friday_close, TAIPEI.localize(datetime(2024, 5, 6, 9, 30)))
+        print("✅ 收盤結算測試通過")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+錄製/重播傳輸層測試
+測試錄製上游回應後離線重播、注入延遲、API key 不寫入錄製檔與 OpenAI httpx 傳輸
+"""
+
+import sys
+import os
+import json
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pandas as pd
+import pytest
+import requests
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.transport import (
+    Transport, RecordReplayHTTPXTransport, CassetteMissError, RECORD, REPLAY
+)
+from src.data_fetcher.tw_market_snapshot import TWMarketSnapshotCache
+from src.data_fetcher.tw_stocks import TWStockDataFetcher
+
+TPEX_PAYLOAD = {
+    "aaData": [
+        ["5483", "中美晶", "150.50", "+1.00", "149.00", "151.00", "148.50", "3,210,000"],
+    ]
+}
+
+
+def make_response(payload, status_code=200):
+    response = requests.models.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode("utf-8")
+    response.headers["content-type"] = "application/json"
+    return response
+
+
+class TestRequestsReplay:
+    """requests 錄製與重播測試"""
+
+    def test_record_then_replay_offline(self, tmp_path):
+        """測試錄製的回應可離線重播，且 API key 不影響比對也不寫入檔案"""
+        recorder = Transport(RECORD, tmp_path)
+        with patch("requests.get", return_value=make_response({"Global Quote": {"05. price": "190.5"}})):
+            live = recorder.get("alpha_vantage", "https://example.test/query",
+                                params={"function": "GLOBAL_QUOTE", "symbol": "AAPL", "apikey": "secret"})
+        assert live.json()["Global Quote"]["05. price"] == "190.5"
+
+        files = list((tmp_path / "alpha_vantage").glob("*.json"))
+        assert len(files) == 1
+        assert "secret" not in files[0].read_text(encoding="utf-8")
+
+        player = Transport(REPLAY, tmp_path, latency=0.05)
+        with patch("requests.get", side_effect=AssertionError("network used in replay")):
+            start = time.perf_counter()
+            replayed = player.get("alpha_vantage", "https://example.test/query",
+                                  params={"symbol": "AAPL", "function": "GLOBAL_QUOTE", "apikey": "other"})
+            elapsed = time.perf_counter() - start
+
+        assert replayed.status_code == 200
+        assert replayed.json() == live.json()
+        assert elapsed >= 0.05
+        assert player.get_stats()["replayed"] == 1
+        print("✅ requests 錄製重播測試通過")
+
+    def test_replay_miss_raises(self, tmp_path):
+        """測試重播模式遇到未錄製的請求時拋出錯誤"""
+        player = Transport(REPLAY, tmp_path)
+        with pytest.raises(CassetteMissError):
+            player.get("twse", "https://example.test/other")
+        assert player.get_stats()["misses"] == 1
+        print("✅ 未錄製請求測試通過")
+
+    def test_snapshot_cache_replays(self, tmp_path):
+        """測試全市場快照可由錄製檔重建"""
+        day = date(2024, 5, 2)
+        with patch("requests.get", return_value=make_response(TPEX_PAYLOAD)):
+            recorded = TWMarketSnapshotCache(transport=Transport(RECORD, tmp_path)).get_bar("TPEx", "5483", day)
+
+        replayed = TWMarketSnapshotCache(transport=Transport(REPLAY, tmp_path)).get_bar("TPEx", "5483", day)
+        assert replayed == recorded
+        assert replayed["close"] == 150.5
+        print("✅ 快照重播測試通過")
+
+
+class TestLibraryReplay:
+    """函式庫呼叫 (yfinance) 與 OpenAI 傳輸測試"""
+
+    def test_frame_roundtrip(self, tmp_path):
+        """測試 DataFrame 重播保留時區索引與欄位"""
+        index = pd.date_range("2024-05-01 09:30", periods=3, freq="1min", tz="America/New_York")
+        frame = pd.DataFrame({"Close": [1.0, 2.0, 3.0], "Volume": [10, 20, 30]}, index=index)
+        call = {"ticker": "AAPL", "method": "history", "period": "5d", "interval": "1m"}
+
+        Transport(RECORD, tmp_path).frame("yfinance", call, lambda: frame)
+        replayed = Transport(REPLAY, tmp_path).frame("yfinance", call, lambda: pytest.fail("live call in replay"))
+
+        pd.testing.assert_frame_equal(replayed, frame, check_freq=False)
+        print("✅ DataFrame 重播測試通過")
+
+    def test_openai_httpx_transport(self, tmp_path):
+        """測試 OpenAI 使用的 httpx 傳輸層可錄製並重播，授權標頭不寫入檔案"""
+        completion = {"choices": [{"message": {"role": "assistant", "content": "BUY"}}]}
+        live = httpx.MockTransport(lambda request: httpx.Response(200, json=completion))
+        body = {"model": "gpt-4o", "messages": [{"role": "user", "content": "AAPL?"}]}
+        headers = {"Authorization": "Bearer sk-secret"}
+
+        recorder = httpx.Client(transport=RecordReplayHTTPXTransport(Transport(RECORD, tmp_path), "openai", live=live))
+        assert recorder.post("https://api.openai.test/v1/chat/completions", json=body, headers=headers).json() == completion
+        assert "sk-secret" not in next((tmp_path / "openai").glob("*.json")).read_text(encoding="utf-8")
+
+        player = Transport(REPLAY, tmp_path).httpx_client("openai")
+        assert player.post("https://api.openai.test/v1/chat/completions", json=body).json() == completion
+        with pytest.raises(CassetteMissError):
+            player.post("https://api.openai.test/v1/chat/completions", json={**body, "model": "other"})
+        print("✅ OpenAI 傳輸層測試通過")
+
+
+class TestTaiwanFetcherReplay:
+    """台股抓取器錄製與重播測試"""
+
+    def test_yfinance_history_replays_on_the_same_day(self, tmp_path):
+        """測試以 datetime.now() 推算的區間錄製後，同一天稍後重播仍能命中"""
+        index = pd.date_range("2024-05-02", periods=3, freq="B", tz="Asia/Taipei")
+        history = pd.DataFrame({"Open": [1.0, 2.0, 3.0], "Close": [1.5, 2.5, 3.5], "Volume": [10, 20, 30]}, index=index)
+        ticker = MagicMock()
+        ticker.history.return_value = history
+
+        recorder = TWStockDataFetcher(snapshot_cache=TWMarketSnapshotCache(), transport=Transport(RECORD, tmp_path))
+        end = datetime.now()
+        with patch("yfinance.Ticker", return_value=ticker):
+            recorded = recorder._fetch_via_yfinance("2330.TW", "2330.TW", end - timedelta(days=30), end)
+
+        player = TWStockDataFetcher(snapshot_cache=TWMarketSnapshotCache(), transport=Transport(REPLAY, tmp_path))
+        later = end + timedelta(microseconds=1234)
+        with patch("yfinance.Ticker", side_effect=AssertionError("network used in replay")):
+            replayed = player._fetch_via_yfinance("2330.TW", "2330.TW", later - timedelta(days=30), later)
+
+        pd.testing.assert_frame_equal(replayed, recorded, check_freq=False)
+        assert replayed["close"].tolist() == [1.5, 2.5, 3.5]
+        print("✅ 台股 yfinance 重播測試通過")
+
+    def test_twstock_calls_replay(self, tmp_path):
+        """測試 twstock 歷史與即時報價經由傳輸層錄製，重播時不呼叫 twstock"""
+        bar = SimpleNamespace(date=datetime(2024, 5, 2), open=580.0, high=590.0, low=578.0, close=588.0,
+                              capacity=25000000)
+        live = MagicMock()
+        live.Stock.return_value.fetch_from.return_value = [bar]
+        live.realtime.get.return_value = {"success": True, "realtime": {
+            "latest_trade_price": "588.0", "change": "8.0", "change_percent": "1.38",
+            "accumulate_trade_volume": "25000"}}
+        offline = MagicMock()
+        offline.Stock.side_effect = AssertionError("network used in replay")
+        offline.realtime.get.side_effect = AssertionError("network used in replay")
+
+        def run(mode, module):
+            fetcher = TWStockDataFetcher(snapshot_cache=TWMarketSnapshotCache(), transport=Transport(mode, tmp_path))
+            with patch("src.data_fetcher.tw_stocks.twstock", module, create=True), \
+                    patch("src.data_fetcher.tw_stocks.TWSTOCK_AVAILABLE", True):
+                history = fetcher._fetch_via_twstock("2330.TW", datetime(2024, 5, 1), datetime(2024, 5, 31))
+                quote = fetcher.get_real_time_quote("2330.TW")
+            return history, quote
+
+        recorded_history, recorded_quote = run(RECORD, live)
+        replayed_history, replayed_quote = run(REPLAY, offline)
+
+        pd.testing.assert_frame_equal(replayed_history, recorded_history)
+        assert replayed_history["close"].tolist() == [588.0]
+        assert replayed_quote["price"] == recorded_quote["price"] == 588.0
+        print("✅ twstock 重播測試通過")
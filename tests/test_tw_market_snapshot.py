@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+台股全市場快照快取測試
+確認每個日期只下載一次並由所有代號共用
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.rate_limiter import AsyncTokenBucket
+from src.data_fetcher.tw_market_snapshot import TWMarketSnapshotCache, parse_snapshot
+from src.data_fetcher.tw_stocks import TWStockDataFetcher
+
+TWSE_PAYLOAD = {
+    "data": [
+        ["2330", "台積電", "25,000,000", "10,000", "1,000,000", "580.00", "590.00", "578.00", "588.00"],
+        ["2317", "鴻海", "30,000,000", "12,000", "900,000", "104.50", "106.00", "104.00", "105.50"],
+        ["9999", "無成交", "0", "0", "0", "--", "--", "--", "--"],
+    ]
+}
+
+TPEX_PAYLOAD = {
+    "aaData": [
+        ["5483", "中美晶", "150.50", "+1.00", "149.00", "151.00", "148.50", "3,210,000"],
+    ]
+}
+
+
+class SlowTransport:
+    """模擬耗時的全市場下載，記錄實際發出的請求數"""
+
+    def __init__(self, payload, delay=0.05):
+        self.payload = payload
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, service, url, params=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return mock_response(self.payload)
+
+    async def aget_json(self, service, session, url, params=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return 200, self.payload
+
+
+def mock_response(payload):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = payload
+    return response
+
+
+class TestSnapshotParsing:
+    """快照解析測試"""
+
+    def test_parse_twse(self):
+        """測試 TWSE MI_INDEX 解析"""
+        table = parse_snapshot("TWSE", TWSE_PAYLOAD)
+        assert list(table.index) == ["2330", "2317", "9999"]
+        assert table.loc["2330", "close"] == 588.0
+        assert table.loc["2317", "volume"] == 30000000
+        assert TWMarketSnapshotCache.extract_bar(table, "9999") is None
+        print("✅ TWSE 解析測試通過")
+
+    def test_parse_tpex(self):
+        """測試 TPEx stk_quote 解析"""
+        table = parse_snapshot("TPEx", TPEX_PAYLOAD)
+        bar = TWMarketSnapshotCache.extract_bar(table, "5483")
+        assert bar == {"open": 149.0, "high": 151.0, "low": 148.5, "close": 150.5, "volume": 3210000}
+        print("✅ TPEx 解析測試通過")
+
+
+class TestSnapshotSharing:
+    """快照共用測試"""
+
+    def test_one_download_per_date_for_many_symbols(self):
+        """測試多個代號共用同一日的全市場檔案"""
+        transport = MagicMock()
+        transport.get.return_value = mock_response(TWSE_PAYLOAD)
+        cache = TWMarketSnapshotCache(transport=transport)
+        fetcher = TWStockDataFetcher(snapshot_cache=cache)
+        day = datetime(2024, 5, 2)
+
+        tsmc = fetcher._fetch_via_snapshots("TWSE", "2330.TW", day, day)
+        foxconn = fetcher._fetch_via_snapshots("TWSE", "2317.TW", day, day)
+        missing = fetcher._fetch_via_snapshots("TWSE", "1234.TW", day, day)
+
+        assert transport.get.call_count == 1
+        assert tsmc["close"].tolist() == [588.0]
+        assert foxconn["close"].tolist() == [105.5]
+        assert foxconn["symbol"].tolist() == ["2317.TW"]
+        assert missing.empty
+        assert cache.stats["requests"] == 1
+        print("✅ 全市場快照共用測試通過")
+
+    def test_empty_past_snapshot_is_cached(self):
+        """測試空快照不會重複下載，休市日不發出請求"""
+        transport = MagicMock()
+        transport.get.return_value = mock_response({"stat": "很抱歉，沒有符合條件的資料!"})
+        cache = TWMarketSnapshotCache(transport=transport)
+        assert cache.get_bar("TWSE", "2330", date(2024, 5, 3)) is None
+        assert cache.get_bar("TWSE", "2330", date(2024, 5, 3)) is None
+        # 週末與國定假日直接略過，不發出請求
+        assert cache.get_bar("TWSE", "2330", date(2024, 5, 4)) is None
+        assert cache.get_bar("TWSE", "2330", date(2024, 5, 1)) is None
+
+        assert transport.get.call_count == 1
+        print("✅ 休市日快取測試通過")
+
+
+class TestConcurrentDownloads:
+    """同日並行下載合併測試"""
+
+    def test_threads_share_one_download(self):
+        """測試多個執行緒同時查詢同一日期只下載一次"""
+        transport = SlowTransport(TWSE_PAYLOAD)
+        cache = TWMarketSnapshotCache(transport=transport)
+        codes = ["2330", "2317"] * 4
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            bars = list(pool.map(lambda code: cache.get_bar("TWSE", code, date(2024, 5, 2)), codes))
+
+        assert transport.calls == 1
+        assert cache.stats["requests"] == 1
+        assert [bar["close"] for bar in bars[:2]] == [588.0, 105.5]
+        print("✅ 執行緒下載合併測試通過")
+
+    def test_coroutines_share_one_download_and_token(self):
+        """測試多個協程同時查詢同一日期只下載一次、只消耗一個令牌"""
+        transport = SlowTransport(TPEX_PAYLOAD)
+        cache = TWMarketSnapshotCache(transport=transport)
+        bucket = AsyncTokenBucket(rate=1000.0, capacity=10)
+        acquired = []
+        original_acquire = bucket.acquire
+
+        async def counting_acquire(*args, **kwargs):
+            acquired.append(1)
+            return await original_acquire(*args, **kwargs)
+
+        bucket.acquire = counting_acquire
+
+        async def run():
+            return await asyncio.gather(*(
+                cache.aget_bar("TPEx", "5483", date(2024, 5, 2), None, bucket) for _ in range(5)
+            ))
+
+        bars = asyncio.run(run())
+        assert transport.calls == 1
+        assert len(acquired) == 1
+        assert all(bar["close"] == 150.5 for bar in bars)
+        print("✅ 協程下載合併測試通過")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+台股 Datafeed 併發抓取測試
+確認日期區間以有限併發抓取並依時間順序回傳
+"""
+
+import sys
+import os
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.rate_limiter import AsyncTokenBucket
+from src.data_fetcher.trading_calendar import get_trading_calendar
+from src.data_fetcher.tw_market_snapshot import TWMarketSnapshotCache
+from src.data_fetcher.twse_tpex_datafeed import TWStockDatafeed
+
+
+class FakeSnapshots(TWMarketSnapshotCache):
+    """以延遲模擬上游回應的快照快取"""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def aget_bar(self, exchange, code, day, session, rate_limiter=None, raise_on_error=False):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # 越早的日期回應越慢，確認結果仍依時間排序
+        await asyncio.sleep(0.05 - day.day * 0.001)
+        self.in_flight -= 1
+        return {"open": day.day, "high": day.day, "low": day.day, "close": day.day, "volume": 1}
+
+
+class TestConcurrentFetch:
+    """併發抓取測試"""
+
+    def test_bars_are_time_ordered_and_bounded(self):
+        """測試併發上限與時間排序"""
+        datafeed = TWStockDatafeed(max_concurrency=4)
+        datafeed.snapshots = FakeSnapshots()
+        start = datetime(2024, 5, 1)
+        end = start + timedelta(days=20)
+
+        async def run():
+            try:
+                return await datafeed._fetch_twse_data("2330", int(start.timestamp()), int(end.timestamp()))
+            finally:
+                await datafeed.close()
+
+        started = time.monotonic()
+        bars = asyncio.run(run())
+        elapsed = time.monotonic() - started
+
+        times = [bar.time for bar in bars]
+        assert times == sorted(times)
+        assert len(bars) == 14  # 21 天扣除 6 個週末日與 5/1 勞動節
+        assert datafeed.snapshots.max_in_flight == 4
+        assert elapsed < 21 * 0.05
+        print("✅ 併發抓取排序測試通過")
+
+
+class FlakyTransport:
+    """指定日期前幾次下載失敗，之後恢復的假上游"""
+
+    def __init__(self, failing_date: str, failures: int):
+        self.failing_date = failing_date
+        self.failures = failures
+        self.requests = []
+
+    async def aget_json(self, service, session, url, params=None, **kwargs):
+        day = params["date"]
+        self.requests.append(day)
+        if day == self.failing_date and self.requests.count(day) <= self.failures:
+            raise ConnectionError("upstream reset")
+        close = f"{int(day[-2:]) + 500}.00"
+        return 200, {"data": [["2330", "台積電", "1,000", "1", "1", close, close, close, close]]}
+
+
+class TestFailedDaysNotCached:
+    """下載失敗的日期不寫入區段快取"""
+
+    def test_recovers_after_transient_failure(self):
+        """測試單日失敗後，下次請求會重抓該區段並補齊所有交易日"""
+        datafeed = TWStockDatafeed()
+        # 區段抓取與其後的逐日備援都失敗一次
+        transport = FlakyTransport("20240515", failures=2)
+        datafeed.snapshots = TWMarketSnapshotCache(transport=transport)
+        start, end = datetime(2024, 5, 1), datetime(2024, 5, 31)
+        sessions = len(get_trading_calendar("TW").sessions_in_range(start, end))
+
+        async def run():
+            try:
+                first = await datafeed.get_bars("2330", int(start.timestamp()), int(end.timestamp()))
+                second = await datafeed.get_bars("2330", int(start.timestamp()), int(end.timestamp()))
+                return first, second
+            finally:
+                await datafeed.close()
+
+        first, second = asyncio.run(run())
+        assert len(first) == sessions - 1
+        assert len(second) == sessions
+        assert 515.0 in [bar.close for bar in second]
+        assert transport.requests.count("20240515") == 3
+        print("✅ 單日失敗後重抓測試通過")
+
+
+class TestTokenBucket:
+    """令牌桶測試"""
+
+    def test_burst_then_paced(self):
+        """測試突發容量與持續速率"""
+        bucket = AsyncTokenBucket(rate=20, capacity=5)
+
+        async def run():
+            started = time.monotonic()
+            for _ in range(10):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(run())
+        # 前 5 個立即取得，其餘 5 個以每秒 20 個的速率取得
+        assert 0.2 <= elapsed < 0.5
+        print("✅ 令牌桶速率測試通過")
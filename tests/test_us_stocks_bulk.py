@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+美股批次下載測試
+測試多代號單次下載、拆分與個別補抓
+"""
+
+import sys
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.us_stocks import USStockDataFetcher
+
+
+def make_wide_frame(symbols, periods: int = 5) -> pd.DataFrame:
+    """建立 yf.download(group_by='ticker') 格式的寬表"""
+    index = pd.date_range("2024-05-01", periods=periods, freq="B", tz="America/New_York", name="Date")
+    blocks = {}
+    for offset, symbol in enumerate(symbols):
+        close = 100 + offset * 10 + np.arange(periods, dtype=float)
+        blocks[symbol] = pd.DataFrame({
+            "Open": close - 0.5,
+            "High": close + 1.0,
+            "Low": close - 1.0,
+            "Close": close,
+            "Volume": np.full(periods, 1000),
+            "Dividends": np.zeros(periods),
+            "Stock Splits": np.zeros(periods),
+        }, index=index)
+    return pd.concat(blocks, axis=1)
+
+
+class TestBulkDownload:
+    """批次下載測試"""
+
+    def test_split_wide_frame(self):
+        """測試寬表拆分為各代號的 OHLCV"""
+        wide = make_wide_frame(["AAPL", "MSFT"])
+        wide.loc[wide.index[0], ("MSFT", "Close")] = np.nan  # MSFT 第一天無成交
+
+        frames = USStockDataFetcher._split_bulk_frame(wide, ["AAPL", "MSFT", "TSLA"])
+
+        assert set(frames) == {"AAPL", "MSFT"}
+        assert len(frames["AAPL"]) == 5
+        assert len(frames["MSFT"]) == 4
+        assert list(frames["AAPL"].columns[:5]) == ["open", "high", "low", "close", "volume"]
+        assert (frames["MSFT"]["symbol"] == "MSFT").all()
+        assert frames["MSFT"]["close"].iloc[0] == 111.0
+        print("✅ 寬表拆分測試通過")
+
+    def test_bulk_falls_back_per_symbol(self):
+        """測試批次缺少的代號改為個別下載"""
+        fetcher = USStockDataFetcher()
+        wide = make_wide_frame(["AAPL", "MSFT"])
+        single = USStockDataFetcher._split_bulk_frame(make_wide_frame(["TSLA"]), ["TSLA"])["TSLA"]
+
+        with patch("src.data_fetcher.us_stocks.yf.download", return_value=wide) as mock_bulk, \
+                patch.object(fetcher, "_download_history", return_value=single) as mock_single:
+            results = fetcher.fetch_multiple_symbols(["TSLA", "AAPL", "MSFT"], period="1mo")
+
+        assert mock_bulk.call_count == 1
+        assert mock_bulk.call_args.args[0] == ["TSLA", "AAPL", "MSFT"]
+        assert mock_single.call_count == 1
+        assert mock_single.call_args.args[0] == "TSLA"
+        assert list(results) == ["TSLA", "AAPL", "MSFT"]
+        print("✅ 批次補抓測試通過")
+
+    def test_bulk_batches(self):
+        """測試依批次大小分段請求"""
+        fetcher = USStockDataFetcher()
+        fetcher.BULK_BATCH_SIZE = 2
+        symbols = ["AAPL", "MSFT", "NVDA", "AMZN", "META"]
+
+        def fake_download(batch, **kwargs):
+            return make_wide_frame(batch)
+
+        with patch("src.data_fetcher.us_stocks.yf.download", side_effect=fake_download) as mock_bulk:
+            results = fetcher.fetch_multiple_symbols(symbols, period="1mo")
+
+        assert mock_bulk.call_count == 3
+        assert list(results) == symbols
+        print("✅ 批次分段測試通過")
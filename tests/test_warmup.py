@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+熱門股票預熱排程測試
+測試依開盤時段選擇市場、分批預熱與近期查詢股票的追蹤
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime
+
+import pytz
+
+# 添加項目路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_fetcher.warmup import WarmupScheduler
+
+
+class TestWarmupScheduler:
+    """預熱排程測試"""
+
+    def test_active_markets_follow_sessions(self):
+        """測試開盤前 lead 時間內與盤中的市場才會預熱"""
+        scheduler = WarmupScheduler(lambda symbol: asyncio.sleep(0), [], lead=30 * 60)
+        taipei = pytz.timezone("Asia/Taipei")
+        new_york = pytz.timezone("America/New_York")
+
+        # 2024-05-02 (週四) 台北 08:45：台股開盤前 15 分鐘
+        assert scheduler.active_markets(taipei.localize(datetime(2024, 5, 2, 8, 45))) == ["TW"]
+        # 紐約 09:10：美股開盤前 20 分鐘
+        assert scheduler.active_markets(new_york.localize(datetime(2024, 5, 2, 9, 10))) == ["US"]
+        # 台北 07:00：兩個市場都不在預熱時段
+        assert scheduler.active_markets(taipei.localize(datetime(2024, 5, 2, 7, 0))) == []
+        # 週六不預熱
+        assert scheduler.active_markets(taipei.localize(datetime(2024, 5, 4, 9, 30))) == []
+        print("✅ 開盤時段判斷測試通過")
+
+    def test_batches_and_recent_symbols(self):
+        """測試設定股票與近期查詢股票分批預熱，錯誤不影響其他股票"""
+        in_flight = 0
+        peak = 0
+        warmed = []
+
+        async def warm(symbol):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if symbol == "BAD":
+                raise RuntimeError("no data")
+            warmed.append(symbol)
+
+        scheduler = WarmupScheduler(warm, ["AAPL", "MSFT", "NVDA", "2330.TW"], batch_size=2, max_recent=2)
+        for symbol in ("tsla", "bad", "amd"):
+            scheduler.record(symbol)
+
+        assert scheduler.hot_symbols("US") == ["AAPL", "MSFT", "NVDA", "BAD", "AMD"]  # TSLA 已被擠出
+        count = asyncio.run(scheduler.run_once(["US"]))
+
+        assert count == 4
+        assert peak == 2
+        assert "2330.TW" not in warmed
+        assert scheduler.get_stats()["errors"] == 1
+        print("✅ 分批預熱測試通過")
+
+    def test_start_and_stop(self):
+        """測試背景排程可啟動並於關閉時停止"""
+        rounds = []
+
+        async def run():
+            scheduler = WarmupScheduler(lambda symbol: asyncio.sleep(0), ["AAPL"], interval=0.01)
+            scheduler.active_markets = lambda now=None: ["US"]
+            scheduler.run_once = lambda markets=None: asyncio.sleep(0, result=rounds.append(1))
+            scheduler.start()
+            await asyncio.sleep(0.05)
+            running = scheduler.get_stats()["running"]
+            await scheduler.stop()
+            return running, scheduler.get_stats()["running"]
+
+        assert asyncio.run(run()) == (True, False)
+        assert len(rounds) >= 2
+        print("✅ 排程啟動與停止測試通過")